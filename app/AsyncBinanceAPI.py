@@ -0,0 +1,116 @@
+# -*- coding: UTF-8 -*-
+# Native asyncio client for the Binance REST API
+
+import asyncio
+
+import config
+from BinanceAPI import BinanceAPI
+from Latency import Latency, span
+from Signer import Signer
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+class AsyncBinanceAPI(BinanceAPI):
+    """
+    asyncio counterpart of BinanceAPI
+
+    Exposes the same methods (get_order_books, get_ticker, get_klines,
+    query_order, buy_limit, cancel, ...) as coroutines. All requests share
+    one aiohttp connector, so hundreds of calls can be in flight on a single
+    event loop without an OS thread each.
+
+    Usage:
+        async with AsyncBinanceAPI(config.api_key, config.api_secret) as client:
+            books = await asyncio.gather(*[client.get_order_books(s, 5) for s in symbols])
+
+    Entering the context starts the server clock on a worker thread; a
+    client used without it pays that first sync on the event loop at its
+    first signed request.
+    """
+
+    def __init__(self, key, secret, limit=None, limit_per_host=None, timeout=30):
+        """
+        Args:
+            key: API key
+            secret: API secret
+            limit: Maximum concurrent connections (default: config.async_pool_limit or 100)
+            limit_per_host: Maximum concurrent connections per host (default: config.pool_size or 10)
+            timeout: Total request timeout in seconds
+        """
+        if aiohttp is None:
+            raise ImportError('AsyncBinanceAPI requires aiohttp (pip install aiohttp)')
+
+        self.key = key
+        self.secret = secret
+        self.signer = Signer(secret)
+        self.pool = None
+        self.governor = BinanceAPI.shared_governor()
+        self.clock = BinanceAPI.shared_clock()
+
+        self.limit = limit or getattr(config, 'async_pool_limit', 100)
+        self.limit_per_host = limit_per_host or getattr(config, 'pool_size', 10)
+        self.timeout = timeout
+        self._session = None
+
+    @staticmethod
+    def available():
+        return aiohttp is not None
+
+    async def __aenter__(self):
+        if self.clock:
+            # The first sync is a burst of blocking /time requests
+            await asyncio.to_thread(self.clock.start)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=getattr(config, 'pool_idle_timeout', 60) or None)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def warm_up(self, connections=None):
+        if connections is None:
+            connections = getattr(config, 'pool_prewarm', 2)
+        urls = ["%s/ping" % self.BASE_URL, "%s/ping" % self.BASE_URL_V3] * connections
+        await asyncio.gather(*[self._request("GET", url) for url in urls], return_exceptions=True)
+
+    async def _request(self, method, url, headers=None, data=None):
+        if Latency.enabled:
+            with span(self._endpoint(method, url)):
+                return await self._send_async(method, url, headers, data)
+        return await self._send_async(method, url, headers, data)
+
+    async def _send_async(self, method, url, headers=None, data=None):
+        if data is not None:
+            headers = dict(headers or {})
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+
+        if self.governor is not None:
+            await self.governor.acquire_async(method, url)
+
+        async with self._get_session().request(method, url, headers=headers, data=data) as response:
+            if self.governor is not None:
+                await self.governor.update_async(response.status, response.headers)
+            result = await response.json(content_type=None)
+
+        if self.clock and isinstance(result, dict) and result.get("code") == -1021:
+            # Timestamp outside recvWindow: re-measure the clock offset
+            self.clock.resync()
+        return result
@@ -0,0 +1,367 @@
+# -*- coding: UTF-8 -*-
+# Event-driven backtester for BollingerStrategy
+# Replays local kline files candle by candle through the live strategy code
+
+import csv
+import glob
+import io
+import json
+import time
+import zipfile
+from array import array
+from typing import Dict, List, Optional
+
+from BollingerStrategy import BollingerStrategy
+
+FIELDS = ('time', 'open', 'high', 'low', 'close', 'volume')
+
+
+# --- data ---
+
+def load_klines(paths) -> Dict[str, array]:
+    """
+    Load klines from local files
+
+    Accepts Binance REST JSON (a list of kline rows) and the CSV files of
+    data.binance.vision, plain or zipped, with or without a header line.
+    Files are merged in time order and duplicate candles are dropped.
+
+    Args:
+        paths: A path, a glob pattern, or a list of either
+
+    Returns:
+        Dict of 'time', 'open', 'high', 'low', 'close', 'volume' array('d') columns
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+
+    files = []
+    for pattern in paths:
+        matches = sorted(glob.glob(pattern))
+        if not matches:
+            raise FileNotFoundError('No kline files match %s' % pattern)
+        files.extend(matches)
+
+    chunks = [list(_read_rows(path)) for path in files]
+    chunks = [chunk for chunk in chunks if chunk]
+    chunks.sort(key=lambda chunk: chunk[0][0])
+
+    columns = {field: array('d') for field in FIELDS}
+    appends = [columns[field].append for field in FIELDS]
+    last = None
+    for chunk in chunks:
+        for row in chunk:
+            if last is not None and row[0] <= last:
+                continue
+            last = row[0]
+            for append, value in zip(appends, row):
+                append(value)
+
+    return columns
+
+
+def _read_rows(path: str):
+    if path.endswith('.zip'):
+        with zipfile.ZipFile(path) as archive:
+            for name in archive.namelist():
+                with archive.open(name) as f:
+                    yield from (_normalize(row) for row in _parse_csv(io.TextIOWrapper(f, encoding='utf-8')))
+        return
+
+    with open(path, encoding='utf-8') as f:
+        if path.endswith('.json'):
+            rows = (row[:6] for row in json.load(f))
+        else:
+            rows = _parse_csv(f)
+        yield from (_normalize(row) for row in rows)
+
+
+def _parse_csv(f):
+    for row in csv.reader(f):
+        if not row or not row[0].strip().isdigit():
+            continue  # header or blank line
+        yield row[:6]
+
+
+def _normalize(row):
+    open_time = float(row[0])
+    if open_time > 1e14:
+        open_time /= 1000.0  # microsecond timestamps (newer spot dumps)
+    return (open_time, float(row[1]), float(row[2]), float(row[3]), float(row[4]), float(row[5]))
+
+
+# --- slippage models ---
+
+class FixedSlippage:
+    """Fills move against the order by a fixed number of basis points"""
+
+    def __init__(self, bps: float = 0.0):
+        self.rate = bps / 10000.0
+
+    def fill(self, side: str, price: float, candle) -> float:
+        return price * (1 + self.rate) if side == 'BUY' else price * (1 - self.rate)
+
+
+class RangeSlippage:
+    """Fills move against the order by a fraction of the candle's high-low range"""
+
+    def __init__(self, fraction: float = 0.1):
+        self.fraction = fraction
+
+    def fill(self, side: str, price: float, candle) -> float:
+        move = (candle[2] - candle[3]) * self.fraction
+        return price + move if side == 'BUY' else max(price - move, 0.0)
+
+
+# --- results ---
+
+class Trade:
+    """One round trip"""
+
+    __slots__ = ('entry_time', 'entry_price', 'quantity', 'stop_loss', 'take_profit', 'confidence',
+                 'exit_time', 'exit_price', 'reason', 'fees', 'pnl', 'cost')
+
+    CSV_FIELDS = ('entry_time', 'exit_time', 'entry_price', 'exit_price', 'quantity', 'stop_loss',
+                  'take_profit', 'confidence', 'reason', 'fees', 'pnl', 'pnl_pct')
+
+    def __init__(self, entry_time, entry_price, quantity, stop_loss, take_profit, confidence, fee):
+        self.entry_time = entry_time
+        self.entry_price = entry_price
+        self.quantity = quantity
+        self.stop_loss = stop_loss
+        self.take_profit = take_profit
+        self.confidence = confidence
+        self.cost = entry_price * quantity + fee
+        self.fees = fee
+        self.exit_time = None
+        self.exit_price = None
+        self.reason = None
+        self.pnl = 0.0
+
+    @property
+    def pnl_pct(self) -> float:
+        return self.pnl / self.cost * 100 if self.cost else 0.0
+
+    def row(self) -> List:
+        return [int(self.entry_time), int(self.exit_time), self.entry_price, self.exit_price, self.quantity,
+                self.stop_loss, self.take_profit, self.confidence, self.reason, self.fees, self.pnl, self.pnl_pct]
+
+
+class BacktestResult:
+    """Trades, equity curve (one mark per candle) and summary statistics"""
+
+    def __init__(self, start_balance: float, trades: List[Trade], equity: array, times: array,
+                 bars_in_position: int, elapsed: float):
+        self.start_balance = start_balance
+        self.trades = trades
+        self.equity = equity
+        self.times = times
+        self.bars_in_position = bars_in_position
+        self.elapsed = elapsed
+
+    def max_drawdown(self):
+        """(largest peak-to-trough equity drop, the same in % of the peak)"""
+        peak = self.start_balance
+        worst = worst_pct = 0.0
+        for value in self.equity:
+            if value > peak:
+                peak = value
+            elif peak - value > worst:
+                worst = peak - value
+                worst_pct = worst / peak * 100
+        return worst, worst_pct
+
+    def summary(self) -> Dict:
+        final = self.equity[-1] if self.equity else self.start_balance
+        wins = [trade.pnl for trade in self.trades if trade.pnl > 0]
+        losses = [trade.pnl for trade in self.trades if trade.pnl <= 0]
+        drawdown, drawdown_pct = self.max_drawdown()
+        candles = len(self.equity)
+
+        return {
+            'candles': candles,
+            'trades': len(self.trades),
+            'wins': len(wins),
+            'losses': len(losses),
+            'win_rate': len(wins) / len(self.trades) * 100 if self.trades else 0.0,
+            'start_balance': self.start_balance,
+            'final_balance': final,
+            'pnl': final - self.start_balance,
+            'return_pct': (final - self.start_balance) / self.start_balance * 100 if self.start_balance else 0.0,
+            'max_drawdown': drawdown,
+            'max_drawdown_pct': drawdown_pct,
+            'profit_factor': sum(wins) / -sum(losses) if sum(losses) < 0 else float('inf') if wins else 0.0,
+            'avg_trade': sum(trade.pnl for trade in self.trades) / len(self.trades) if self.trades else 0.0,
+            'fees': sum(trade.fees for trade in self.trades),
+            'exposure_pct': self.bars_in_position / candles * 100 if candles else 0.0,
+            'elapsed': self.elapsed,
+            'candles_per_sec': candles / self.elapsed if self.elapsed else 0.0
+        }
+
+    def write_trades(self, path: str):
+        """Trade log as CSV"""
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(Trade.CSV_FIELDS)
+            for trade in self.trades:
+                writer.writerow(trade.row())
+
+
+# --- engine ---
+
+class Backtester:
+    """
+    Replays historical candles through BollingerStrategy
+
+    Each closed candle is fed to the strategy's incremental IndicatorEngine
+    and evaluated at its close, so a candle costs the same whatever the
+    window length. Trading follows BollingerTradingBot:
+
+    - flat: buy at the close on should_buy() with confidence >= min_confidence,
+      sized like execute_buy() (quantity, amount, or calculate_position_size())
+    - long: stop-loss and take-profit levels of the entry are checked against
+      each candle's low and high (stop first when a candle touches both, at
+      the open when it gaps through), then should_sell() at the close
+
+    Fills pass through the slippage model and pay the BNB or TOKEN
+    commission on both sides. A position still open at the end is closed at
+    the last close.
+    """
+
+    # Same rates as BollingerTradingBot
+    TOKEN_COMMISSION = 0.001  # 0.1%
+    BNB_COMMISSION = 0.0005   # 0.05%
+
+    def __init__(self, config: Dict = None, balance: float = 1000.0, min_confidence: float = 50,
+                 risk_per_trade: float = 2.0, quantity: float = 0, amount: float = 0,
+                 commission: str = 'BNB', slippage=None):
+        """
+        Args:
+            config: BollingerStrategy configuration
+            balance: Starting balance in the quote asset
+            min_confidence: Minimum confidence to act on a signal
+            risk_per_trade: Balance percentage risked per trade (dynamic sizing)
+            quantity: Fixed quantity per trade (0 = not fixed)
+            amount: Fixed quote amount per trade (0 = not fixed)
+            commission: 'BNB' or 'TOKEN'
+            slippage: FixedSlippage / RangeSlippage (default: none)
+        """
+        self.config = config or {}
+        self.balance = balance
+        self.min_confidence = min_confidence
+        self.risk_per_trade = risk_per_trade
+        self.quantity = quantity
+        self.amount = amount
+        self.commission = self.BNB_COMMISSION if commission == 'BNB' else self.TOKEN_COMMISSION
+        self.slippage = slippage or FixedSlippage(0)
+
+    @classmethod
+    def from_args(cls, args, **kwargs) -> 'Backtester':
+        """Backtester for trader_bollinger.py options"""
+        return cls(BollingerStrategy.config_from_args(args), min_confidence=args.min_confidence,
+                   risk_per_trade=args.risk_per_trade, quantity=args.quantity, amount=args.amount,
+                   commission=args.commission, **kwargs)
+
+    def run(self, klines, strategy: BollingerStrategy = None) -> BacktestResult:
+        """
+        Replay klines
+
+        Args:
+            klines: Columns from load_klines(), or kline rows
+            strategy: Strategy to drive (default: a new one from config)
+
+        Returns:
+            BacktestResult
+        """
+        if isinstance(klines, dict):
+            candles = zip(*(klines[field] for field in FIELDS))
+        else:
+            candles = (tuple(float(value) for value in row[:6]) for row in klines)
+
+        strategy = strategy or BollingerStrategy(self.config)
+        update = strategy.engine.update
+        evaluate = strategy.evaluate
+        fill = self.slippage.fill
+        commission = self.commission
+
+        balance = self.balance
+        position = None
+        trades = []
+        equity = array('d')
+        times = array('d')
+        in_position = 0
+        candle = None
+
+        started = time.perf_counter()
+
+        for candle in candles:
+            open_time, open_price, high, low, close = candle[0], candle[1], candle[2], candle[3], candle[4]
+
+            # Protective exits inside the candle
+            if position is not None:
+                in_position += 1
+                if low <= position.stop_loss:
+                    balance = self._close(position, open_time, fill('SELL', min(open_price, position.stop_loss), candle),
+                                          'Stop Loss', balance)
+                    trades.append(position)
+                    position = None
+                elif high >= position.take_profit:
+                    balance = self._close(position, open_time, fill('SELL', max(open_price, position.take_profit), candle),
+                                          'Take Profit', balance)
+                    trades.append(position)
+                    position = None
+
+            update(candle)
+            analysis = evaluate(close)
+
+            if position is None:
+                if strategy.should_buy(analysis) and analysis['confidence'] >= self.min_confidence:
+                    position = self._open(strategy, analysis, candle, balance)
+                    if position is not None:
+                        balance -= position.cost
+
+            elif strategy.should_sell(analysis, position.entry_price) and analysis['confidence'] >= self.min_confidence:
+                balance = self._close(position, open_time, fill('SELL', close, candle), 'Signal', balance)
+                trades.append(position)
+                position = None
+
+            equity.append(balance + (position.quantity * close * (1 - commission) if position is not None else 0.0))
+            times.append(open_time)
+
+        if position is not None:
+            balance = self._close(position, candle[0], fill('SELL', candle[4], candle), 'End of data', balance)
+            trades.append(position)
+            equity[-1] = balance
+
+        return BacktestResult(self.balance, trades, equity, times, in_position, time.perf_counter() - started)
+
+    def _open(self, strategy: BollingerStrategy, analysis: Dict, candle, balance: float) -> Optional[Trade]:
+        price = self.slippage.fill('BUY', candle[4], candle)
+
+        if self.quantity > 0:
+            quantity = self.quantity
+        elif self.amount > 0:
+            quantity = self.amount / analysis['entry_price']
+        else:
+            quantity = strategy.calculate_position_size(
+                balance, analysis['entry_price'], self.risk_per_trade, analysis['stop_loss'])
+
+        # Never spend more than the balance, fee included
+        quantity = min(quantity, balance / (price * (1 + self.commission)))
+        if quantity <= 0:
+            return None
+
+        return Trade(candle[0], price, quantity, analysis['stop_loss'], analysis['take_profit'],
+                     analysis['confidence'], price * quantity * self.commission)
+
+    def _close(self, trade: Trade, exit_time: float, price: float, reason: str, balance: float) -> float:
+        proceeds = price * trade.quantity
+        fee = proceeds * self.commission
+
+        trade.exit_time = exit_time
+        trade.exit_price = price
+        trade.reason = reason
+        trade.fees += fee
+        trade.pnl = proceeds - fee - trade.cost
+
+        return balance + proceeds - fee
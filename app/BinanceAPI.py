@@ -1,9 +1,14 @@
+import json
 import time
-import hashlib
-import requests
-import hmac
 import config
 
+from ConnectionPool import ConnectionPool
+from HttpRecorder import RecordingPool, ReplayPool
+from Latency import Latency, span
+from RateGovernor import RateGovernor
+from ClockSync import ClockSync
+from Signer import Signer
+
 try:
     from urllib import urlencode
 # python3
@@ -16,13 +21,77 @@ class BinanceAPI:
     BASE_URL_V3 = "https://api.binance.com/api/v3"
     PUBLIC_URL = "https://www.binance.com/exchange/public/product"
 
-    def __init__(self, key, secret):
+    # Keep-alive connections shared by every client in the process
+    _shared_pool = None
+
+    # Request weight / order rate budget, shared with other processes through rate_state_file
+    _shared_governor = None
+
+    # Server clock offset used to timestamp signed requests
+    _shared_clock = None
+
+    def __init__(self, key, secret, pool=None, governor=None, clock=None):
         self.key = key
         self.secret = secret
+        self.signer = Signer(secret) if secret is not None else None
+        self.pool = pool or BinanceAPI.shared_pool()
+        self.governor = governor or BinanceAPI.shared_governor()
+        # clock=False signs with the local clock
+        self.clock = BinanceAPI.shared_clock() if clock is None else clock
+
+    @classmethod
+    def shared_pool(cls):
+        if cls._shared_pool is None:
+            replay_file = getattr(config, 'replay_file', None)
+            if replay_file:
+                # Offline: responses come from a recording
+                cls._shared_pool = ReplayPool(replay_file, speed=getattr(config, 'replay_speed', None))
+                return cls._shared_pool
+
+            cls._shared_pool = ConnectionPool(
+                pool_size=getattr(config, 'pool_size', 10),
+                host_pool_sizes=getattr(config, 'pool_host_sizes', None),
+                idle_timeout=getattr(config, 'pool_idle_timeout', 60))
+
+            record_file = getattr(config, 'record_file', None)
+            if record_file:
+                cls._shared_pool = RecordingPool(cls._shared_pool, record_file)
+        return cls._shared_pool
+
+    @classmethod
+    def shared_governor(cls):
+        if cls._shared_governor is None and getattr(config, 'rate_limit', True):
+            # In memory unless a state file shared with other processes is configured
+            path = getattr(config, 'rate_state_file', None)
+            cls._shared_governor = RateGovernor(
+                weight_limit=getattr(config, 'rate_weight_limit', 6000),
+                order_limit_10s=getattr(config, 'rate_order_limit_10s', 100),
+                order_limit_day=getattr(config, 'rate_order_limit_day', 200000),
+                reserve=getattr(config, 'rate_reserve', 0.1),
+                path=path or None)
+        return cls._shared_governor
+
+    @classmethod
+    def shared_clock(cls):
+        if cls._shared_clock is None and getattr(config, 'clock_sync', True):
+            timer = BinanceAPI(None, None, clock=False)
+            cls._shared_clock = ClockSync(
+                lambda: timer.get_server_time()['serverTime'],
+                interval=getattr(config, 'clock_sync_interval', 60))
+        return cls._shared_clock
+
+    def warm_up(self, connections=None):
+        '''
+        Open keep-alive connections to both API hosts before trading starts.
+        '''
+        if connections is None:
+            connections = getattr(config, 'pool_prewarm', 2)
+        if connections > 0:
+            self.pool.warm(["%s/ping" % self.BASE_URL, "%s/ping" % self.BASE_URL_V3], connections)
 
     def ping(self):
         path = "%s/ping" % self.BASE_URL_V3
-        return requests.get(path, timeout=30, verify=True).json()
+        return self._request("GET", path)
     
     def get_history(self, market, limit=50):
         path = "%s/historicalTrades" % self.BASE_URL
@@ -34,9 +103,15 @@ class BinanceAPI:
         params = {"symbol": market, "limit": limit}
         return self._get_no_sign(path, params)
         
-    def get_klines(self, market, interval, startTime, endTime):
+    def get_klines(self, market, interval, startTime=None, endTime=None, limit=None):
         path = "%s/klines" % self.BASE_URL_V3
-        params = {"symbol": market, "interval":interval, "startTime":startTime, "endTime":endTime}
+        params = {"symbol": market, "interval":interval}
+        if startTime is not None:
+            params["startTime"] = startTime
+        if endTime is not None:
+            params["endTime"] = endTime
+        if limit is not None:
+            params["limit"] = limit
         return self._get_no_sign(path, params)
         
     def get_ticker(self, market):
@@ -54,15 +129,20 @@ class BinanceAPI:
         return self._get(path, {})
 
     def get_products(self):
-        return requests.get(self.PUBLIC_URL, timeout=30, verify=True).json()
+        return self._request("GET", self.PUBLIC_URL)
    
     def get_server_time(self):
         path = "%s/time" % self.BASE_URL_V3
-        return requests.get(path, timeout=30, verify=True).json()
+        return self._request("GET", path)
     
-    def get_exchange_info(self):
+    def get_exchange_info(self, symbols=None):
+        if symbols:
+            # Only the listed symbols instead of the whole exchange
+            path = "%s/exchangeInfo" % self.BASE_URL_V3
+            params = {"symbols": json.dumps(list(symbols), separators=(",", ":"))}
+            return self._get_no_sign(path, params)
         path = "%s/exchangeInfo" % self.BASE_URL
-        return requests.get(path, timeout=30, verify=True).json()
+        return self._request("GET", path)
 
     def get_open_orders(self, market, limit = 100):
         path = "%s/openOrders" % self.BASE_URL_V3
@@ -104,38 +184,74 @@ class BinanceAPI:
         params = {"symbol": market, "orderId": order_id}
         return self._delete(path, params)
 
+    def create_listen_key(self):
+        path = "%s/userDataStream" % self.BASE_URL_V3
+        return self._api_key_request("POST", path)
+
+    def keepalive_listen_key(self, listen_key):
+        path = "%s/userDataStream" % self.BASE_URL_V3
+        return self._api_key_request("PUT", path, {"listenKey": listen_key})
+
+    def close_listen_key(self, listen_key):
+        path = "%s/userDataStream" % self.BASE_URL_V3
+        return self._api_key_request("DELETE", path, {"listenKey": listen_key})
+
+    @staticmethod
+    def _endpoint(method, url):
+        # Span name: method and path, without host and query ("api GET /api/v3/order")
+        return "api %s /%s" % (method, url.split("?", 1)[0].split("/", 3)[-1])
+
+    def _request(self, method, url, headers=None, data=None):
+        if Latency.enabled:
+            with span(self._endpoint(method, url)):
+                return self._send(method, url, headers, data)
+        return self._send(method, url, headers, data)
+
+    def _send(self, method, url, headers=None, data=None):
+        if self.governor is not None:
+            self.governor.acquire(method, url)
+
+        response = self.pool.request(method, url, headers=headers, data=data)
+
+        if self.governor is not None:
+            self.governor.update(response.status_code, response.headers)
+
+        result = response.json()
+        if self.clock and isinstance(result, dict) and result.get("code") == -1021:
+            # Timestamp outside recvWindow: re-measure the clock offset
+            self.clock.resync()
+        return result
+
+    def _api_key_request(self, method, path, params={}):
+        # USER_STREAM endpoints: API key header, no signature
+        url = "%s?%s" % (path, urlencode(params)) if params else path
+        header = {"X-MBX-APIKEY": self.key}
+        return self._request(method, url, headers=header)
+
     def _get_no_sign(self, path, params={}):
         query = urlencode(params)
         url = "%s?%s" % (path, query)
-        return requests.get(url, timeout=30, verify=True).json()
+        return self._request("GET", url)
     
-    def _sign(self, params={}):
-        data = params.copy()
+    def _timestamp(self):
+        return self.clock.now() if self.clock else int(1000 * time.time())
 
-        ts = int(1000 * time.time())
-        data.update({"timestamp": ts})
-        h = urlencode(data)
-        b = bytearray()
-        b.extend(self.secret.encode())
-        signature = hmac.new(b, msg=h.encode('utf-8'), digestmod=hashlib.sha256).hexdigest()
-        data.update({"signature": signature})
-        return data
+    def _sign(self, params={}):
+        '''
+        Signed query string: params, recvWindow, timestamp, signature.
+        '''
+        return self.signer.query(params, self._timestamp(), config.recv_window)
 
     def _get(self, path, params={}):
-        params.update({"recvWindow": config.recv_window})
-        query = urlencode(self._sign(params))
-        url = "%s?%s" % (path, query)
+        url = "%s?%s" % (path, self._sign(params))
         header = {"X-MBX-APIKEY": self.key}
-        return requests.get(url, headers=header, \
-            timeout=30, verify=True).json()
+        return self._request("GET", url, headers=header)
 
     def _post(self, path, params={}):
-        params.update({"recvWindow": config.recv_window})
-        query = urlencode(self._sign(params))
+        query = self.signer.body(params, self._timestamp(), config.recv_window)
         url = "%s" % (path)
         header = {"X-MBX-APIKEY": self.key}
-        return requests.post(url, headers=header, data=query, \
-            timeout=30, verify=True).json()
+        return self._request("POST", url, headers=header, data=query)
 
     def _order(self, market, quantity, side, rate=None):
         params = {}
@@ -154,12 +270,9 @@ class BinanceAPI:
         return params
            
     def _delete(self, path, params={}):
-        params.update({"recvWindow": config.recv_window})
-        query = urlencode(self._sign(params))
-        url = "%s?%s" % (path, query)
+        url = "%s?%s" % (path, self._sign(params))
         header = {"X-MBX-APIKEY": self.key}
-        return requests.delete(url, headers=header, \
-            timeout=30, verify=True).json()
+        return self._request("DELETE", url, headers=header)
 
     def _format(self, price):
         return "{:.8f}".format(price)
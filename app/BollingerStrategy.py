@@ -5,6 +5,8 @@
 import logging
 from typing import Dict, List, Tuple, Optional
 from Indicators import Indicators
+from Latency import timed, span
+from StreamingIndicators import IndicatorEngine, StreamingBollinger, StreamingRSI, StreamingATR, StreamingVolume, StreamingMACD
 
 
 class BollingerStrategy:
@@ -59,14 +61,45 @@ class BollingerStrategy:
         self.macd_signal = self.config.get('macd_signal', 9)
         self.use_macd = self.config.get('use_macd', True)  # Enable/disable MACD confirmation
 
+        # Incremental indicator state, kept in step with the kline window
+        self.engine = IndicatorEngine(self._indicators)
+
         self.logger = logging.getLogger('BollingerStrategy')
 
-    def analyze(self, klines: List[List], current_price: float, current_volume: float = 0) -> Dict:
+    @staticmethod
+    def config_from_args(args) -> Dict:
+        """Strategy configuration from trader_bollinger.py options"""
+        return {
+            'bb_period': args.bb_period,
+            'bb_std_dev': args.bb_stddev,
+            'rsi_period': args.rsi_period,
+            'rsi_oversold': args.rsi_oversold,
+            'rsi_overbought': args.rsi_overbought,
+            'volume_threshold': args.volume_threshold,
+            'stop_loss_atr': args.stop_loss_atr,
+            # 'middle', 'upper', or a percentage given as text on the command line
+            'take_profit': args.take_profit if args.take_profit in ('middle', 'upper') else float(args.take_profit),
+            'min_bb_width': args.min_bb_width,
+            'max_bb_width': args.max_bb_width
+        }
+
+    def _indicators(self) -> Dict:
+        """Fresh streaming indicators for the engine"""
+        return {
+            'bb': StreamingBollinger(self.bb_period, self.bb_std_dev),
+            'rsi': StreamingRSI(self.rsi_period),
+            'volume': StreamingVolume(self.volume_period),
+            'atr': StreamingATR(14),
+            'macd': StreamingMACD(self.macd_fast, self.macd_slow, self.macd_signal)
+        }
+
+    @timed('strategy.analyze')
+    def analyze(self, klines, current_price: float, current_volume: float = 0) -> Dict:
         """
         Analyze market conditions using Bollinger Bands + RSI + Volume + MACD strategy
 
         Args:
-            klines: List of kline data [timestamp, open, high, low, close, volume, ...]
+            klines: KlineBuffer or list of kline data [timestamp, open, high, low, close, volume, ...]
             current_price: Current market price
             current_volume: Current trading volume
 
@@ -80,16 +113,27 @@ class BollingerStrategy:
                 'reason': 'Insufficient data for analysis'
             }
 
-        # Extract price and volume data
-        closes = [float(k[4]) for k in klines]  # Close prices
-        highs = [float(k[2]) for k in klines]   # High prices
-        lows = [float(k[3]) for k in klines]    # Low prices
-        volumes = [float(k[5]) for k in klines] # Volumes
+        # Feed only the candles that changed since the last call
+        with span('strategy.sync'):
+            self.engine.sync(klines)
+
+        return self.evaluate(current_price)
+
+    def evaluate(self, current_price: float) -> Dict:
+        """
+        Analyze the indicator state as it stands, without syncing a kline window
+
+        For callers that feed self.engine candle by candle themselves (the
+        backtester), analyze() is sync + evaluate().
+
+        Args:
+            current_price: Current market price
 
+        Returns:
+            Dictionary containing analysis results and trading signals
+        """
         # Calculate indicators
-        upper_band, middle_band, lower_band = Indicators.bollinger_bands(
-            closes, self.bb_period, self.bb_std_dev
-        )
+        upper_band, middle_band, lower_band = self.engine['bb'].value()
 
         if upper_band is None:
             return {
@@ -98,15 +142,15 @@ class BollingerStrategy:
                 'reason': 'Unable to calculate Bollinger Bands'
             }
 
-        rsi = Indicators.rsi(closes, self.rsi_period)
+        rsi = self.engine['rsi'].value()
         bb_width = Indicators.bb_width(upper_band, lower_band, middle_band)
         bb_percent = Indicators.bb_percent(current_price, upper_band, lower_band)
-        volume_data = Indicators.volume_analysis(volumes, self.volume_period)
-        atr = Indicators.atr(highs, lows, closes, 14)
+        volume_data = self.engine['volume'].value()
+        atr = self.engine['atr'].value()
         
         # Calculate MACD indicators
-        macd_line, signal_line, histogram = Indicators.macd(closes, self.macd_fast, self.macd_slow, self.macd_signal)
-        macd_signal_cross = Indicators.macd_signal_cross(closes, self.macd_fast, self.macd_slow, self.macd_signal) if self.use_macd else 'none'
+        macd_line, signal_line, histogram = self.engine['macd'].value()
+        macd_signal_cross = self.engine['macd'].cross() if self.use_macd else 'none'
 
         # Build analysis result
         analysis = {
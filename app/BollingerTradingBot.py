@@ -12,6 +12,10 @@ from BinanceAPI import BinanceAPI
 from BollingerStrategy import BollingerStrategy
 from Orders import Orders
 from Database import Database
+from MarketData import MarketDataStream
+from KlineSync import KlineSync
+from Latency import timed
+from Metrics import Metrics
 
 
 class BollingerTradingBot:
@@ -29,37 +33,28 @@ class BollingerTradingBot:
     TOKEN_COMMISSION = 0.001  # 0.1%
     BNB_COMMISSION = 0.0005   # 0.05%
 
-    def __init__(self, args):
+    def __init__(self, args, client: BinanceAPI = None, kline_sync: KlineSync = None, stream: MarketDataStream = None):
         """
         Initialize the trading bot
 
         Args:
             args: Parsed command line arguments
+            client: Shared Binance API client (a new one if omitted)
+            kline_sync: Shared kline fetcher (a new one if omitted)
+            stream: Shared, already started market stream covering this symbol
         """
         self.args = args
         self.symbol = args.symbol
         self.logger = logging.getLogger(f'BollingerBot-{self.symbol}')
 
         # Initialize Binance API client
-        self.client = BinanceAPI(config.api_key, config.api_secret)
+        self.client = client or BinanceAPI(config.api_key, config.api_secret)
 
         # Set commission type
         self.commission = self.BNB_COMMISSION if args.commission == 'BNB' else self.TOKEN_COMMISSION
 
         # Initialize strategy
-        strategy_config = {
-            'bb_period': args.bb_period,
-            'bb_std_dev': args.bb_stddev,
-            'rsi_period': args.rsi_period,
-            'rsi_oversold': args.rsi_oversold,
-            'rsi_overbought': args.rsi_overbought,
-            'volume_threshold': args.volume_threshold,
-            'stop_loss_atr': args.stop_loss_atr,
-            'take_profit': args.take_profit,
-            'min_bb_width': args.min_bb_width,
-            'max_bb_width': args.max_bb_width
-        }
-        self.strategy = BollingerStrategy(strategy_config)
+        self.strategy = BollingerStrategy(BollingerStrategy.config_from_args(args))
 
         # Trading state
         self.position = None  # Current position {price, quantity, timestamp, order_id}
@@ -74,6 +69,48 @@ class BollingerTradingBot:
         self.min_qty = 0
         self.min_notional = 0
 
+        # Kline window, fetched incrementally and shared with the stream view when streaming
+        self.kline_sync = kline_sync or KlineSync(self.client)
+        self.klines = self.kline_sync.buffer(self.symbol, args.interval, args.kline_limit)
+
+        # WebSocket market data and user data (--stream)
+        self.stream = stream
+        self.user_stream = None
+        self.stream_max_age = getattr(config, 'stream_max_age', 5)
+
+        self.cycle = 0
+
+    def start_stream(self):
+        """Stream price and klines so each cycle reads them from memory"""
+        try:
+            self.stream = MarketDataStream([self.symbol], interval=self.args.interval,
+                                           depth=True, snapshot=Orders.get_depth_snapshot)
+            self.stream.start()
+        except ImportError as e:
+            self.logger.warning(f'Streaming disabled: {e}')
+            self.stream = None
+            return
+
+        Orders.use_market(self.stream.view)
+        self.use_stream()
+
+        # Balances and order fills pushed by the exchange
+        try:
+            self.user_stream = Orders.user_data_stream()
+            self.user_stream.start()
+            Orders.use_user_data(self.user_stream.view)
+        except Exception as e:
+            self.logger.warning(f'User data stream disabled: {e}')
+            self.user_stream = None
+
+    def use_stream(self):
+        """Seed the kline window once; the stream's kline updates keep it current"""
+        self._sync_klines()
+        self.stream.view.seed_klines(self.symbol, self.args.interval, self.klines)
+
+        if not self.stream.view.wait(self.symbol):
+            self.logger.warning(f'No streamed book for {self.symbol} yet, using REST until it arrives')
+
     def validate_symbol(self) -> bool:
         """
         Validate symbol and get trading rules
@@ -82,28 +119,17 @@ class BollingerTradingBot:
             True if symbol is valid
         """
         try:
-            symbol_info = Orders.get_info(self.symbol)
+            symbol_filters = Orders.get_filters(self.symbol)
 
-            if not symbol_info:
+            if not symbol_filters:
                 self.logger.error(f'Invalid symbol: {self.symbol}')
                 return False
 
-            # Extract filters
-            filters = {item['filterType']: item for item in symbol_info['filters']}
-
-            self.step_size = float(filters['LOT_SIZE']['stepSize'])
-            self.tick_size = float(filters['PRICE_FILTER']['tickSize'])
-            self.min_qty = float(filters['LOT_SIZE']['minQty'])
-            
-            # MIN_NOTIONAL filter may not exist for all symbols
-            # Also check newer NOTIONAL filter variant
-            if 'MIN_NOTIONAL' in filters:
-                self.min_notional = float(filters['MIN_NOTIONAL']['minNotional'])
-            elif 'NOTIONAL' in filters:
-                self.min_notional = float(filters['NOTIONAL']['minNotional'])
-            else:
-                # Fallback for symbols without MIN_NOTIONAL or NOTIONAL filter
-                self.min_notional = 0
+            # Pre-parsed filters (NOTIONAL or MIN_NOTIONAL, 0 if neither exists)
+            self.step_size = float(symbol_filters.step_size)
+            self.tick_size = float(symbol_filters.tick_size)
+            self.min_qty = float(symbol_filters.min_qty)
+            self.min_notional = float(symbol_filters.min_notional)
 
             self.logger.info(f'Symbol validated: {self.symbol}')
             self.logger.debug(f'Step size: {self.step_size}, Tick size: {self.tick_size}')
@@ -123,42 +149,35 @@ class BollingerTradingBot:
         """Format price according to tick size"""
         return float(self.tick_size * math.floor(price / self.tick_size))
 
-    def get_klines(self) -> list:
+    def get_klines(self):
         """
-        Fetch historical kline data
+        Get the kline window, kept current by the stream when available
 
         Returns:
-            List of klines
+            KlineBuffer with the window, or an empty list if nothing could be fetched
         """
-        try:
-            # Calculate time range
-            interval_seconds = self._interval_to_seconds(self.args.interval)
-            end_time = int(time.time() * 1000)
-            start_time = end_time - (interval_seconds * 1000 * self.args.kline_limit)
+        if self.stream is not None and self.klines:
+            return self.klines
 
-            klines = self.client.get_klines(
-                self.symbol,
-                self.args.interval,
-                start_time,
-                end_time
-            )
+        if not self._sync_klines():
+            return []
+
+        return self.klines
 
-            return klines
+    def _sync_klines(self) -> bool:
+        """
+        Fetch the candles missing from the kline window
 
+        Returns:
+            True if the window is current and holds data
+        """
+        try:
+            self.kline_sync.sync(self.symbol, self.args.interval)
         except Exception as e:
             self.logger.error(f'Error fetching klines: {e}')
-            return []
+            return False
 
-    def _interval_to_seconds(self, interval: str) -> int:
-        """Convert interval string to seconds"""
-        multipliers = {
-            'm': 60,
-            'h': 3600,
-            'd': 86400
-        }
-        unit = interval[-1]
-        value = int(interval[:-1])
-        return value * multipliers.get(unit, 60)
+        return len(self.klines) > 0
 
     def analyze_market(self) -> Optional[Dict]:
         """
@@ -171,10 +190,16 @@ class BollingerTradingBot:
             self.logger.debug(f'Starting market analysis...')
             
             # Get current price and volume
-            self.logger.debug(f'Fetching ticker for {self.symbol}...')
-            ticker = self.client.get_ticker(self.symbol)
-            current_price = float(ticker['lastPrice'])
-            current_volume = float(ticker['volume'])
+            current_price = None
+            if self.stream is not None:
+                current_price = self.stream.view.last_price(self.symbol, self.stream_max_age)
+                current_volume = self.stream.view.volume(self.symbol) or 0.0
+
+            if current_price is None:
+                self.logger.debug(f'Fetching ticker for {self.symbol}...')
+                ticker = self.client.get_ticker(self.symbol)
+                current_price = float(ticker['lastPrice'])
+                current_volume = float(ticker['volume'])
             self.logger.debug(f'Ticker received: price={current_price}, volume={current_volume}')
 
             # Get historical data
@@ -186,9 +211,10 @@ class BollingerTradingBot:
                 self.logger.warning('No kline data available')
                 return None
 
-            # Run strategy analysis
+            # Run strategy analysis (the stream thread appends under the same lock)
             self.logger.debug(f'Running strategy analysis...')
-            analysis = self.strategy.analyze(klines, current_price, current_volume)
+            with self.klines.lock:
+                analysis = self.strategy.analyze(klines, current_price, current_volume)
             self.logger.debug(f'Analysis complete')
 
             return analysis
@@ -265,6 +291,8 @@ class BollingerTradingBot:
                     self.args.risk_per_trade
                 ])
 
+                Metrics.set('position', quantity, symbol=self.symbol)
+
                 self.logger.info(f'✅ Buy order placed: ID {order_id}')
                 self.logger.info(f'   Quantity: {quantity}, Price: {buy_price}')
                 self.logger.info(f'   Stop Loss: {analysis["stop_loss"]:.8f}')
@@ -324,6 +352,11 @@ class BollingerTradingBot:
                 else:
                     self.losing_trades += 1
 
+                Metrics.inc('trades_total', symbol=self.symbol, result='win' if profit > 0 else 'loss')
+                Metrics.set('realized_pnl', self.total_profit, symbol=self.symbol)
+                Metrics.set('position', 0, symbol=self.symbol)
+                Metrics.set('unrealized_pnl', 0, symbol=self.symbol)
+
                 self.logger.info(f'✅ Sell order placed: ID {sell_order["orderId"]}')
                 self.logger.info(f'   Profit: {profit:.8f} ({profit_pct:.2f}%)')
                 self.logger.info(f'   Buy Price: {buy_price:.8f}, Sell Price: {sell_price:.8f}')
@@ -359,80 +392,129 @@ class BollingerTradingBot:
             else:
                 asset = 'USDT'  # Default
 
-            account = self.client.get_account()
-            balances = {item['asset']: item for item in account['balances']}
-
-            if asset in balances:
-                return float(balances[asset]['free'])
+            # Streamed balance when available, REST /account otherwise
+            balance = Orders.get_balance(asset)
+            if balance is not None:
+                return balance
 
         except Exception as e:
             self.logger.error(f'Error getting balance: {e}')
 
         return 0.0
 
+    def setup(self) -> bool:
+        """
+        Validate the symbol and attach the shared stream, if any
+
+        Returns:
+            True if the bot can start trading
+        """
+        if not self.validate_symbol():
+            self.logger.error('Symbol validation failed. Exiting.')
+            return False
+
+        if self.stream is not None:
+            self.use_stream()
+
+        return True
+
+    @timed('cycle.bollinger')
+    def step(self) -> bool:
+        """
+        Run one analysis/trading cycle
+
+        Returns:
+            False once the bot should stop (max trades reached)
+        """
+        self.cycle += 1
+        cycle = self.cycle
+        self.logger.debug(f'=== Cycle {cycle} starting ===')
+
+        # Check max trades limit
+        if self.finished():
+            self.logger.info(f'Max trades limit reached ({self.args.max_trades}). Stopping.')
+            return False
+
+        # Analyze market
+        self.logger.debug(f'Cycle {cycle}: Calling analyze_market()...')
+        analysis = self.analyze_market()
+        self.logger.debug(f'Cycle {cycle}: analyze_market() returned')
+
+        if not analysis:
+            self.logger.warning('Analysis failed, skipping cycle')
+            return True
+
+        self.act(analysis)
+        return True
+
+    def finished(self) -> bool:
+        """True once max trades is reached"""
+        return self.args.max_trades > 0 and self.trades_executed >= self.args.max_trades
+
+    def act(self, analysis: Dict):
+        """
+        Trade on an analysis result (from analyze_market() or a shard worker)
+
+        Args:
+            analysis: price, signal, confidence, reason, entry_price, stop_loss, take_profit
+        """
+        cycle = self.cycle
+
+        Metrics.inc('cycles_total', symbol=self.symbol, bot='bollinger')
+        Metrics.inc('signals_total', symbol=self.symbol, signal=analysis['signal'])
+        if self.position is not None:
+            Metrics.set('unrealized_pnl', (analysis['price'] - self.position['price']) * self.position['quantity'],
+                        symbol=self.symbol)
+
+        # Log current state (always visible, not just debug)
+        self.logger.info(f'Cycle {cycle}: Price={analysis["price"]:.8f}, Signal={analysis["signal"]}, Confidence={analysis["confidence"]:.0f}%')
+
+        # Trading logic
+        if self.position is None:
+            # No position - look for buy signal
+            if analysis['signal'] == 'BUY' and analysis['confidence'] >= self.args.min_confidence:
+                self.logger.info(f'📊 BUY Signal: {analysis["reason"]} (Confidence: {analysis["confidence"]:.0f}%)')
+                self.execute_buy(analysis)
+
+        else:
+            # Have position - look for sell signal
+            # Check stop loss
+            if analysis['price'] <= self.position['stop_loss']:
+                self.logger.warning(f'⚠️  Stop Loss triggered at {analysis["price"]:.8f}')
+                self.execute_sell(analysis, 'Stop Loss')
+
+            # Check take profit
+            elif analysis['price'] >= self.position['take_profit']:
+                self.logger.info(f'🎯 Take Profit target reached at {analysis["price"]:.8f}')
+                self.execute_sell(analysis, 'Take Profit')
+
+            # Check sell signals
+            elif analysis['signal'] in ['SELL', 'TAKE_PROFIT'] and analysis['confidence'] >= self.args.min_confidence:
+                self.logger.info(f'📊 SELL Signal: {analysis["reason"]} (Confidence: {analysis["confidence"]:.0f}%)')
+                self.execute_sell(analysis, 'Signal')
+
     def run(self):
         """Main bot loop"""
         self.logger.info('Starting Bollinger Bands Trading Bot...')
 
+        # Open keep-alive connections before the first order
+        self.client.warm_up()
+
         # Validate symbol
-        if not self.validate_symbol():
-            self.logger.error('Symbol validation failed. Exiting.')
+        if not self.setup():
             return
 
+        if getattr(self.args, 'stream', False):
+            self.start_stream()
+
         self.logger.info('Bot started successfully. Running...')
-        cycle = 0
 
         try:
-            while True:
-                cycle += 1
-                self.logger.debug(f'=== Cycle {cycle} starting ===')
-
-                # Check max trades limit
-                if self.args.max_trades > 0 and self.trades_executed >= self.args.max_trades:
-                    self.logger.info(f'Max trades limit reached ({self.args.max_trades}). Stopping.')
-                    break
-
-                # Analyze market
-                self.logger.debug(f'Cycle {cycle}: Calling analyze_market()...')
-                analysis = self.analyze_market()
-                self.logger.debug(f'Cycle {cycle}: analyze_market() returned')
-
-                if not analysis:
-                    self.logger.warning('Analysis failed, skipping cycle')
-                    time.sleep(self.args.wait_time)
-                    continue
-
-                # Log current state (always visible, not just debug)
-                self.logger.info(f'Cycle {cycle}: Price={analysis["price"]:.8f}, Signal={analysis["signal"]}, Confidence={analysis["confidence"]:.0f}%')
-
-                # Trading logic
-                if self.position is None:
-                    # No position - look for buy signal
-                    if analysis['signal'] == 'BUY' and analysis['confidence'] >= self.args.min_confidence:
-                        self.logger.info(f'📊 BUY Signal: {analysis["reason"]} (Confidence: {analysis["confidence"]:.0f}%)')
-                        self.execute_buy(analysis)
-
-                else:
-                    # Have position - look for sell signal
-                    # Check stop loss
-                    if analysis['price'] <= self.position['stop_loss']:
-                        self.logger.warning(f'⚠️  Stop Loss triggered at {analysis["price"]:.8f}')
-                        self.execute_sell(analysis, 'Stop Loss')
-
-                    # Check take profit
-                    elif analysis['price'] >= self.position['take_profit']:
-                        self.logger.info(f'🎯 Take Profit target reached at {analysis["price"]:.8f}')
-                        self.execute_sell(analysis, 'Take Profit')
-
-                    # Check sell signals
-                    elif analysis['signal'] in ['SELL', 'TAKE_PROFIT'] and analysis['confidence'] >= self.args.min_confidence:
-                        self.logger.info(f'📊 SELL Signal: {analysis["reason"]} (Confidence: {analysis["confidence"]:.0f}%)')
-                        self.execute_sell(analysis, 'Signal')
-
+            while self.step():
                 # Wait for next cycle
-                self.logger.debug(f'Cycle {cycle}: Waiting {self.args.wait_time}s before next cycle...')
+                self.logger.debug(f'Cycle {self.cycle}: Waiting {self.args.wait_time}s before next cycle...')
                 time.sleep(self.args.wait_time)
-                self.logger.debug(f'Cycle {cycle}: Resuming after wait')
+                self.logger.debug(f'Cycle {self.cycle}: Resuming after wait')
 
         except KeyboardInterrupt:
             self.logger.info('Bot stopped by user')
@@ -441,4 +523,6 @@ class BollingerTradingBot:
             self.logger.error(f'Runtime error: {e}', exc_info=True)
 
         finally:
+            if self.user_stream is not None:
+                self.user_stream.stop()
             self.logger.info('Bot shutdown complete')
@@ -0,0 +1,148 @@
+# -*- coding: UTF-8 -*-
+# Server clock offset tracking for Binance Trader
+# Keeps signed request timestamps on the exchange clock
+
+import time
+import logging
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+
+class ClockSync:
+    """
+    Smoothed estimate of the exchange clock offset and round-trip time
+
+    Each sync sends a short burst of /time requests and keeps the sample
+    with the lowest round trip (the one least skewed by asymmetric delay):
+
+        offset = serverTime - (sent + received) / 2
+
+    Offset and RTT are smoothed with an EWMA, and jitter tracks how far new
+    samples land from the estimate. A jump larger than `step_ms` (local
+    clock changed, VM resumed) replaces the estimate instead of being
+    averaged in. A background thread resyncs every `interval` seconds,
+    or immediately after resync() (e.g. on a -1021 rejection).
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], int],
+        interval: float = 60.0,
+        burst: int = 3,
+        alpha: float = 0.25,
+        step_ms: float = 500.0
+    ):
+        """
+        Args:
+            fetch: Returns the server time in milliseconds
+            interval: Seconds between background syncs
+            burst: Samples per sync (lowest RTT wins)
+            alpha: EWMA weight of a new sample
+            step_ms: Offset change applied at once instead of smoothed
+        """
+        self.fetch = fetch
+        self.interval = interval
+        self.burst = burst
+        self.alpha = alpha
+        self.step_ms = step_ms
+
+        self.logger = logging.getLogger('ClockSync')
+
+        self.offset = 0.0   # ms to add to the local clock
+        self.rtt = None     # ms
+        self.jitter = 0.0   # ms
+        self.samples = 0
+        self.failures = 0
+        self.last_sync = None
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._running = False
+
+    def now(self) -> int:
+        """Current server time in milliseconds"""
+        if self._thread is None:
+            self.start()
+        return int(time.time() * 1000 + self.offset)
+
+    def sample(self) -> Tuple[float, float]:
+        """One measurement: (offset ms, round trip ms)"""
+        sent = time.time()
+        server = self.fetch()
+        received = time.time()
+        return server - (sent + received) * 500, (received - sent) * 1000
+
+    def sync(self) -> bool:
+        """Take a burst of samples and fold the best one into the estimate"""
+        best = None
+        for _ in range(self.burst):
+            try:
+                measured = self.sample()
+            except Exception as e:
+                # Don't stack timeouts; the next sync tries again
+                self.logger.debug('Server time sample failed: %s' % e)
+                break
+            if best is None or measured[1] < best[1]:
+                best = measured
+
+        if best is None:
+            self.failures += 1
+            self.logger.warning('Server time sync failed, keeping offset %.1fms' % self.offset)
+            return False
+
+        offset, rtt = best
+        with self._lock:
+            if self.rtt is None or abs(offset - self.offset) > self.step_ms:
+                if self.rtt is not None:
+                    self.logger.info('Server clock offset stepped %.1fms -> %.1fms' % (self.offset, offset))
+                self.offset = offset
+                self.rtt = rtt
+                self.jitter = 0.0
+            else:
+                a = self.alpha
+                self.jitter = (1 - a) * self.jitter + a * abs(offset - self.offset)
+                self.offset = (1 - a) * self.offset + a * offset
+                self.rtt = (1 - a) * self.rtt + a * rtt
+            self.samples += 1
+            self.last_sync = time.time()
+
+        return True
+
+    def resync(self):
+        """Ask the background thread to sync now"""
+        self._wake.set()
+
+    def start(self):
+        """Sync once, then keep syncing in the background"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._loop, name='ClockSync')
+            self._thread.daemon = True
+
+        self.sync()
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+
+    def _loop(self):
+        while self._running:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._running:
+                self.sync()
+
+    def metrics(self) -> Dict[str, Optional[float]]:
+        """Offset, RTT and jitter in milliseconds, plus sync counters"""
+        return {
+            'offset_ms': self.offset,
+            'rtt_ms': self.rtt,
+            'jitter_ms': self.jitter,
+            'samples': self.samples,
+            'failures': self.failures,
+            'age_s': time.time() - self.last_sync if self.last_sync else None
+        }
@@ -0,0 +1,170 @@
+# -*- coding: UTF-8 -*-
+# Keep-alive HTTP connection pool for BinanceAPI
+
+import time
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    from urlparse import urlsplit
+# python3
+except ImportError:
+    from urllib.parse import urlsplit
+
+
+class ConnectionPool:
+    """
+    Pooled keep-alive HTTP sessions shared by every BinanceAPI client
+
+    Each host gets its own requests.Session with a sized HTTPAdapter, so
+    TCP + TLS handshakes are paid once per connection instead of once per
+    call. Sessions are safe to share between threads; connections are
+    checked out of the per-host pool for the duration of a request.
+
+    Idle hosts are closed by a background reaper so long pauses between
+    trades do not leave half-dead sockets behind.
+    """
+
+    def __init__(self, pool_size=10, host_pool_sizes=None, idle_timeout=60, timeout=30):
+        """
+        Args:
+            pool_size: Default number of keep-alive connections per host
+            host_pool_sizes: Optional {host: size} overrides (e.g. {'api.binance.com': 20})
+            idle_timeout: Seconds without traffic before a host's connections are closed (0 = never)
+            timeout: Default request timeout in seconds
+        """
+        self.pool_size = pool_size
+        self.host_pool_sizes = host_pool_sizes or {}
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+
+        self._sessions = {}
+        self._last_used = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._reaper = None
+        self._closed = False
+
+        self.logger = logging.getLogger('ConnectionPool')
+
+    def _session(self, host):
+        session = self._sessions.get(host)
+        if session is not None:
+            return session
+
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                size = self.host_pool_sizes.get(host, self.pool_size)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size, pool_block=False)
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._sessions[host] = session
+                self._in_flight[host] = 0
+                self._start_reaper()
+
+        return session
+
+    def request(self, method, url, **kwargs):
+        """
+        Send a request over a pooled connection
+
+        Returns:
+            requests.Response
+        """
+        host = urlsplit(url).netloc
+        session = self._session(host)
+        kwargs.setdefault('timeout', self.timeout)
+        kwargs.setdefault('verify', True)
+
+        with self._lock:
+            self._in_flight[host] = self._in_flight.get(host, 0) + 1
+        try:
+            return session.request(method, url, **kwargs)
+        finally:
+            with self._lock:
+                self._in_flight[host] = self._in_flight.get(host, 1) - 1
+                self._last_used[host] = time.monotonic()
+
+    def warm(self, urls, connections=1):
+        """
+        Pre-open keep-alive connections so the first real order is not the slow one
+
+        Args:
+            urls: Cheap endpoints to hit, one per host (e.g. /ping)
+            connections: Connections to open per url
+        """
+        threads = []
+        for url in urls:
+            for _ in range(connections):
+                thread = threading.Thread(target=self._warm_one, args=(url,))
+                thread.daemon = True
+                threads.append(thread)
+                thread.start()
+
+        for thread in threads:
+            thread.join(self.timeout)
+
+    def _warm_one(self, url):
+        try:
+            # Reading the body hands the connection back to the pool
+            self.request('GET', url).content
+        except Exception as e:
+            self.logger.debug('Warm-up failed for %s: %s' % (url, e))
+
+    def reap(self, now=None):
+        """Close connections of hosts that have been idle longer than idle_timeout"""
+        if not self.idle_timeout:
+            return 0
+
+        now = time.monotonic() if now is None else now
+        reaped = 0
+
+        with self._lock:
+            for host, session in self._sessions.items():
+                if self._in_flight.get(host, 0) > 0:
+                    continue
+                last_used = self._last_used.get(host)
+                if last_used is None or now - last_used < self.idle_timeout:
+                    continue
+
+                # Adapters rebuild their pools lazily on the next request
+                session.close()
+                del self._last_used[host]
+                reaped += 1
+
+        if reaped:
+            self.logger.debug('Closed idle connections for %d host(s)' % reaped)
+
+        return reaped
+
+    def _start_reaper(self):
+        if self._reaper is not None or not self.idle_timeout:
+            return
+
+        self._reaper = threading.Thread(target=self._reap_loop, name='ConnectionPoolReaper')
+        self._reaper.daemon = True
+        self._reaper.start()
+
+    def _reap_loop(self):
+        interval = max(self.idle_timeout / 2.0, 1)
+        while not self._closed:
+            time.sleep(interval)
+            try:
+                self.reap()
+            except Exception as e:
+                self.logger.debug('Reaper error: %s' % e)
+
+    def close(self):
+        """Close every pooled connection"""
+        self._closed = True
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+            self._last_used.clear()
+            self._in_flight.clear()
@@ -3,25 +3,42 @@
 
 import os
 import sqlite3
+import logging
+import threading
+
+from Latency import timed
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
 
 # Define Custom import vars
 path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../db/orders.db')
 conn = sqlite3.connect(path, check_same_thread = False)
 
+# Background writer (Database.start_writer), None = write on the caller's thread
+writer = None
+
 class Database():
-         
+
     # Database (Todo: Not complated)
     @staticmethod
+    @timed('database.write')
     def write(data):
-        '''    
+        '''
         Save order
         data = orderid,symbol,amount,price,side,quantity,profit
         Create a database connection
         '''
+        if writer is not None:
+            writer.put(data)
+            return
+
         cur = conn.cursor()
         cur.execute('''INSERT INTO orders VALUES (?, ?, ?, ?, ?, ?, ?)''', data)
         conn.commit()
-    
+
     @staticmethod
     def read(orderid):
         '''
@@ -29,7 +46,81 @@ class Database():
         :param orderid: the buy/sell order id
         :return:
         '''
+        if writer is not None:
+            writer.flush()
+
         cur = conn.cursor()
         cur.execute('SELECT * FROM orders WHERE orderid = ?', (orderid,))
         return cur.fetchone()
-    
\ No newline at end of file
+
+    @staticmethod
+    def start_writer(batch=100):
+        '''
+        Queue writes to one background thread, so many bots in a process
+        share a connection and never wait on a commit.
+        '''
+        global writer
+        if writer is None:
+            writer = DatabaseWriter(conn, batch)
+            writer.start()
+        return writer
+
+    @staticmethod
+    def stop_writer():
+        global writer
+        if writer is not None:
+            writer.stop()
+            writer = None
+
+
+class DatabaseWriter(threading.Thread):
+    '''
+    Single writer thread: rows are queued by write() and inserted in
+    batches, one commit per batch.
+    '''
+
+    def __init__(self, connection, batch=100):
+        threading.Thread.__init__(self, name='DatabaseWriter')
+        self.daemon = True
+        self.connection = connection
+        self.batch = batch
+        self.queue = queue.Queue()
+        self.written = 0
+        self.logger = logging.getLogger('Database')
+
+    def put(self, data):
+        self.queue.put(data)
+
+    def flush(self):
+        # Wait until everything queued so far is committed
+        self.queue.join()
+
+    def stop(self):
+        self.queue.put(None)
+        self.join()
+
+    def run(self):
+        while True:
+            rows = [self.queue.get()]
+            while len(rows) < self.batch:
+                try:
+                    rows.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = None in rows
+            rows = [row for row in rows if row is not None]
+
+            try:
+                if rows:
+                    self.connection.executemany('''INSERT INTO orders VALUES (?, ?, ?, ?, ?, ?, ?)''', rows)
+                    self.connection.commit()
+                    self.written += len(rows)
+            except Exception as e:
+                self.logger.error('Database write failed (%d rows): %s' % (len(rows), e))
+
+            for _ in range(len(rows) + (1 if stop else 0)):
+                self.queue.task_done()
+
+            if stop:
+                return
@@ -0,0 +1,191 @@
+# -*- coding: UTF-8 -*-
+# Cached exchangeInfo and per-symbol trading filters for Binance Trader
+
+import os
+import json
+import time
+import logging
+import threading
+from decimal import Decimal, ROUND_DOWN
+from typing import Dict, Iterable, Optional
+
+
+class SymbolFilters:
+    """
+    Trading rules of one symbol, parsed once into Decimals
+
+    `info` keeps the raw exchangeInfo entry and `filters` its filters
+    keyed by filterType, for anything not pre-parsed here.
+    """
+
+    def __init__(self, info: Dict):
+        self.info = info
+        self.symbol = info['symbol']
+        self.status = info.get('status')
+        self.base_asset = info.get('baseAsset')
+        self.quote_asset = info.get('quoteAsset')
+        self.filters = {item['filterType']: item for item in info.get('filters', [])}
+
+        lot = self.filters.get('LOT_SIZE', {})
+        self.step_size = Decimal(lot.get('stepSize', '0'))
+        self.min_qty = Decimal(lot.get('minQty', '0'))
+        self.max_qty = Decimal(lot.get('maxQty', '0'))
+
+        price = self.filters.get('PRICE_FILTER', {})
+        self.tick_size = Decimal(price.get('tickSize', '0'))
+        self.min_price = Decimal(price.get('minPrice', '0'))
+        self.max_price = Decimal(price.get('maxPrice', '0'))
+
+        # Newer symbols carry NOTIONAL, older ones MIN_NOTIONAL
+        notional = self.filters.get('NOTIONAL') or self.filters.get('MIN_NOTIONAL') or {}
+        self.min_notional = Decimal(notional.get('minNotional', '0'))
+
+    def format_quantity(self, quantity) -> Decimal:
+        """Round quantity down to a multiple of stepSize"""
+        return self._floor(Decimal(str(quantity)), self.step_size)
+
+    def format_price(self, price) -> Decimal:
+        """Round price down to a multiple of tickSize"""
+        return self._floor(Decimal(str(price)), self.tick_size)
+
+    @staticmethod
+    def _floor(value, step):
+        if not step:
+            return value
+        return (value / step).to_integral_value(rounding=ROUND_DOWN) * step
+
+    def __repr__(self):
+        return 'SymbolFilters(%s step=%s tick=%s minNotional=%s)' % (
+            self.symbol, self.step_size, self.tick_size, self.min_notional)
+
+
+class ExchangeInfoCache:
+    """
+    Symbol metadata cache backed by a JSON file
+
+    Entries are fetched per symbol (exchangeInfo?symbols=[...]) instead of
+    downloading the whole exchange, kept for `ttl` seconds and written to
+    disk, so a restart or a second bot reads them without any request.
+    Only missing or expired symbols are refreshed; if a refresh fails the
+    expired entry is still served.
+    """
+
+    def __init__(self, client, path: str = None, ttl: float = 3600):
+        """
+        Args:
+            client: BinanceAPI used for exchangeInfo
+            path: JSON file for the cache (None = memory only)
+            ttl: Seconds before an entry is refreshed
+        """
+        self.client = client
+        self.path = path
+        self.ttl = ttl
+
+        self.logger = logging.getLogger('ExchangeInfoCache')
+
+        self._entries = {}  # symbol -> (fetched at, SymbolFilters)
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self._load()
+
+    def get(self, symbol: str) -> Optional[SymbolFilters]:
+        """Filters for symbol, None when the symbol does not exist"""
+        self.preload([symbol])
+        entry = self._entries.get(symbol)
+        return entry[1] if entry else None
+
+    def preload(self, symbols: Iterable[str]):
+        """Fetch every missing or expired symbol in one request"""
+        now = time.time()
+        stale = [symbol for symbol in symbols if self._expired(symbol, now)]
+        if not stale:
+            return
+
+        with self._lock:
+            # Another bot may have fetched them since
+            self._load()
+            stale = [symbol for symbol in stale if self._expired(symbol, time.time())]
+            if not stale:
+                return
+
+            try:
+                infos = self._fetch(stale)
+            except Exception as e:
+                self.logger.warning('exchangeInfo refresh failed: %s' % e)
+                return
+
+            fetched = time.time()
+            for info in infos:
+                self._entries[info['symbol']] = (fetched, SymbolFilters(info))
+            self._save()
+
+    def invalidate(self, symbol: str = None):
+        """Drop one symbol (or everything) so the next get() refetches it"""
+        with self._lock:
+            dropped = list(self._entries) if symbol is None else [symbol]
+            for name in dropped:
+                self._entries.pop(name, None)
+            self._save(dropped)
+
+    def _expired(self, symbol, now):
+        entry = self._entries.get(symbol)
+        return entry is None or now - entry[0] >= self.ttl
+
+    def _fetch(self, symbols):
+        self.requests += 1
+        info = self.client.get_exchange_info(symbols)
+
+        if 'symbols' in info:
+            return info['symbols']
+
+        # One unknown symbol fails the whole request; retry them one by one
+        if len(symbols) > 1:
+            infos = []
+            for symbol in symbols:
+                infos.extend(self._fetch([symbol]))
+            return infos
+
+        self.logger.warning('exchangeInfo %s: %s' % (symbols[0], info.get('msg', info)))
+        return []
+
+    # --- persistence ---
+
+    def _read(self) -> Dict:
+        if not self.path or not os.path.exists(self.path):
+            return {}
+
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except Exception as e:
+            self.logger.warning('Ignoring unreadable exchangeInfo cache %s: %s' % (self.path, e))
+            return {}
+
+    def _load(self):
+        """Take entries from disk that are newer than ours"""
+        for symbol, entry in self._read().items():
+            current = self._entries.get(symbol)
+            if current is None or current[0] < entry['fetched']:
+                self._entries[symbol] = (entry['fetched'], SymbolFilters(entry['info']))
+
+    def _save(self, dropped=()):
+        """Merge our entries into the file, keeping newer ones written by other bots"""
+        if not self.path:
+            return
+
+        stored = self._read()
+        for symbol in dropped:
+            stored.pop(symbol, None)
+        for symbol, (fetched, filters) in self._entries.items():
+            if symbol not in stored or stored[symbol]['fetched'] <= fetched:
+                stored[symbol] = {'fetched': fetched, 'info': filters.info}
+
+        # Write then rename, so other processes never read a partial file
+        tmp = '%s.%d.tmp' % (self.path, os.getpid())
+        try:
+            with open(tmp, 'w') as f:
+                json.dump(stored, f)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            self.logger.warning('Could not write exchangeInfo cache %s: %s' % (self.path, e))
@@ -0,0 +1,213 @@
+# -*- coding: UTF-8 -*-
+# HTTP record / replay for BinanceAPI
+# Captures REST traffic to an append-only JSON lines file and serves it back offline
+
+import json
+import time
+import logging
+import threading
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+try:
+    from urlparse import urlsplit, parse_qsl
+    from urllib import urlencode
+# python3
+except ImportError:
+    from urllib.parse import urlsplit, parse_qsl, urlencode
+
+# Never written to the file
+SECRET_PARAMS = ('signature', 'listenKey')
+SCRUBBED = '***'
+
+# Differ between a recording and its replay, so requests are matched without them
+VOLATILE_PARAMS = ('signature', 'timestamp', 'recvWindow', 'startTime', 'endTime', 'listenKey')
+
+# Response headers the rate governor reads
+KEPT_HEADERS = ('X-MBX-USED-WEIGHT-1M', 'X-MBX-USED-WEIGHT', 'X-MBX-ORDER-COUNT-10S',
+                'X-MBX-ORDER-COUNT-1D', 'Retry-After')
+
+
+def scrub(query: str) -> str:
+    """Query string with the signature and listen key replaced"""
+    if not query:
+        return query
+    params = [(name, SCRUBBED if name in SECRET_PARAMS else value)
+              for name, value in parse_qsl(query, keep_blank_values=True)]
+    return urlencode(params, safe='*')
+
+
+def request_key(method: str, url: str, data=None) -> Tuple[str, str, str]:
+    """(method, scheme://host/path, stable params) identifying a request across runs"""
+    parts = urlsplit(url)
+    if isinstance(data, bytes):
+        data = data.decode('ascii', 'replace')
+
+    params = parse_qsl(parts.query, keep_blank_values=True) + parse_qsl(data or '', keep_blank_values=True)
+    stable = sorted((name, value) for name, value in params if name not in VOLATILE_PARAMS)
+    return method, '%s://%s%s' % (parts.scheme, parts.netloc, parts.path), urlencode(stable)
+
+
+class RecordingPool:
+    """
+    ConnectionPool wrapper writing every request and response to a file
+
+    One JSON object per line, appended and flushed as each request
+    completes, so a crash loses nothing:
+
+        {"t": ms since start, "m": method, "u": url, "d": body,
+         "s": status, "ms": duration, "h": {rate headers}, "b": JSON body}
+
+    ("x" holds a non-JSON body, "e" the exception of a failed request.)
+    Signatures and listen keys are replaced before writing and the API key
+    header is never written.
+    """
+
+    def __init__(self, pool, path: str):
+        """
+        Args:
+            pool: ConnectionPool doing the real requests
+            path: Recording file, appended to
+        """
+        self.pool = pool
+        self.path = path
+        self._file = open(path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+
+        self.recorded = 0
+
+    def request(self, method, url, **kwargs):
+        started = time.monotonic()
+        entry = {'t': int((started - self._started) * 1000), 'm': method}
+
+        parts = url.split('?', 1)
+        entry['u'] = parts[0] + ('?' + scrub(parts[1]) if len(parts) > 1 else '')
+        data = kwargs.get('data')
+        if data:
+            entry['d'] = scrub(data.decode('ascii', 'replace') if isinstance(data, bytes) else data)
+
+        try:
+            response = self.pool.request(method, url, **kwargs)
+        except Exception as e:
+            entry['ms'] = round((time.monotonic() - started) * 1000, 3)
+            entry['e'] = '%s: %s' % (type(e).__name__, e)
+            self._write(entry)
+            raise
+
+        entry['ms'] = round((time.monotonic() - started) * 1000, 3)
+        entry['s'] = response.status_code
+        headers = {name: response.headers.get(name) for name in KEPT_HEADERS if response.headers.get(name)}
+        if headers:
+            entry['h'] = headers
+        try:
+            body = response.json()
+            if isinstance(body, dict) and 'listenKey' in body:
+                body = dict(body, listenKey=SCRUBBED)
+            entry['b'] = body
+        except ValueError:
+            entry['x'] = response.text
+
+        self._write(entry)
+        return response
+
+    def _write(self, entry: Dict):
+        line = json.dumps(entry, separators=(',', ':')) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self.recorded += 1
+
+    def warm(self, urls, connections=1):
+        self.pool.warm(urls, connections)
+
+    def close(self):
+        self.pool.close()
+        with self._lock:
+            self._file.close()
+
+
+class ReplayResponse:
+    """The parts of requests.Response that BinanceAPI reads"""
+
+    def __init__(self, status_code: int, headers: Dict, body=None, text: str = None):
+        self.status_code = status_code
+        self.headers = headers
+        self._body = body
+        self.text = text if text is not None else json.dumps(body)
+
+    def json(self):
+        if self._body is None and self.text:
+            return json.loads(self.text)
+        return self._body
+
+
+class ReplayMiss(LookupError):
+    """A request with no recorded response left"""
+
+
+class ReplayPool:
+    """
+    Serves a RecordingPool file back in place of the ConnectionPool
+
+    Requests are matched on method, path and parameters, leaving out the
+    ones that change from run to run (timestamp, signature, recvWindow,
+    startTime/endTime, listenKey). Responses to the same request are served
+    in the order they were recorded, so a replayed run takes the same
+    branches as the recorded one; a request that was never recorded (or
+    asked for more often) raises ReplayMiss. Recorded failures are raised
+    again as ConnectionError.
+
+    With `speed` each request takes its recorded duration divided by
+    speed; without it, responses are returned immediately.
+    """
+
+    def __init__(self, path: str, speed: Optional[float] = None):
+        """
+        Args:
+            path: Recording file
+            speed: 1 = recorded latency, 2 = twice as fast, None = no waiting
+        """
+        self.path = path
+        self.speed = speed
+        self.logger = logging.getLogger('ReplayPool')
+
+        self._responses = {}  # request key -> deque of entries
+        self._lock = threading.Lock()
+        self.served = 0
+        self.missed = 0
+
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                entry = json.loads(line)
+                key = request_key(entry['m'], entry['u'], entry.get('d'))
+                self._responses.setdefault(key, deque()).append(entry)
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._responses.values())
+
+    def request(self, method, url, **kwargs):
+        key = request_key(method, url, kwargs.get('data'))
+        with self._lock:
+            entries = self._responses.get(key)
+            if not entries:
+                self.missed += 1
+                raise ReplayMiss('No recorded response for %s %s' % (method, url.split('?', 1)[0]))
+            entry = entries.popleft()
+            self.served += 1
+
+        if self.speed:
+            time.sleep(entry.get('ms', 0) / 1000.0 / self.speed)
+
+        if 'e' in entry:
+            raise ConnectionError(entry['e'])
+        return ReplayResponse(entry.get('s', 200), dict(entry.get('h', {})), entry.get('b'), entry.get('x'))
+
+    def warm(self, urls, connections=1):
+        pass
+
+    def close(self):
+        pass
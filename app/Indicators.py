@@ -5,6 +5,8 @@
 import math
 from typing import List, Tuple, Dict
 
+from Latency import timed
+
 
 class Indicators:
     """
@@ -12,6 +14,7 @@ class Indicators:
     """
 
     @staticmethod
+    @timed('indicators.bollinger_bands')
     def bollinger_bands(prices: List[float], period: int = 20, std_dev: float = 2.0) -> Tuple[float, float, float]:
         """
         Calculate Bollinger Bands
@@ -41,6 +44,7 @@ class Indicators:
         return upper_band, sma, lower_band
 
     @staticmethod
+    @timed('indicators.rsi')
     def rsi(prices: List[float], period: int = 14) -> float:
         """
         Calculate Relative Strength Index (RSI)
@@ -76,6 +80,7 @@ class Indicators:
         return rsi
 
     @staticmethod
+    @timed('indicators.ema')
     def ema(prices: List[float], period: int) -> float:
         """
         Calculate Exponential Moving Average (EMA)
@@ -99,6 +104,7 @@ class Indicators:
         return ema
 
     @staticmethod
+    @timed('indicators.volume_analysis')
     def volume_analysis(volumes: List[float], period: int = 20) -> Dict[str, float]:
         """
         Analyze volume patterns
@@ -130,6 +136,7 @@ class Indicators:
         }
 
     @staticmethod
+    @timed('indicators.atr')
     def atr(high: List[float], low: List[float], close: List[float], period: int = 14) -> float:
         """
         Calculate Average True Range (ATR) for volatility measurement
@@ -193,6 +200,7 @@ class Indicators:
         return (price - lower) / (upper - lower)
 
     @staticmethod
+    @timed('indicators.macd')
     def macd(prices: List[float], fast: int = 12, slow: int = 26, signal: int = 9) -> Tuple[float, float, float]:
         """
         Calculate MACD (Moving Average Convergence Divergence)
@@ -219,38 +227,67 @@ class Indicators:
         if len(prices) < slow:
             return 0.0, 0.0, 0.0
 
-        # Calculate EMAs
-        ema_fast = Indicators.ema(prices, fast)
-        ema_slow = Indicators.ema(prices, slow)
-
-        # MACD Line = Fast EMA - Slow EMA
-        macd_line = ema_fast - ema_slow
-
-        # Signal Line = 9-period EMA of MACD values (simplified with last N values)
-        # For proper calculation, we need historical MACD values
-        # Using simplified approach: approximate signal line
-        if len(prices) >= slow + signal:
-            # Calculate MACD values for last signal+slow periods
-            macd_values = []
-            for i in range(slow, len(prices)):
-                fast_ema = Indicators.ema(prices[:i+1], fast)
-                slow_ema = Indicators.ema(prices[:i+1], slow)
-                macd_values.append(fast_ema - slow_ema)
-
-            # Signal line is EMA of MACD values
-            if len(macd_values) >= signal:
-                signal_line = Indicators.ema(macd_values[-signal:], signal)
+        macd_line, signal_line, histogram = Indicators.macd_series(prices, fast, slow, signal)
+
+        return macd_line[-1], signal_line[-1], histogram[-1]
+
+    @staticmethod
+    @timed('indicators.macd_series')
+    def macd_series(prices: List[float], fast: int = 12, slow: int = 26, signal: int = 9) -> Tuple[List[float], List[float], List[float]]:
+        """
+        Calculate the full MACD, signal and histogram series in one O(n) pass
+
+        The fast and slow EMAs are carried forward recursively, so the MACD
+        value at each bar equals Indicators.ema(prices[:i+1], fast) -
+        Indicators.ema(prices[:i+1], slow). The signal line is the EMA of
+        the MACD series (the mean of the available values until `signal`
+        MACD values exist).
+
+        Args:
+            prices: List of closing prices (most recent last)
+            fast: Fast EMA period (default: 12)
+            slow: Slow EMA period (default: 26)
+            signal: Signal line EMA period (default: 9)
+
+        Returns:
+            Tuple of (MACD_line, Signal_line, Histogram) lists, one value per
+            bar starting at prices[slow - 1]; empty if len(prices) < slow
+        """
+        if len(prices) < slow:
+            return [], [], []
+
+        k_fast = 2 / (fast + 1)
+        k_slow = 2 / (slow + 1)
+        k_signal = 2 / (signal + 1)
+
+        # Seed both EMAs with their SMA and walk the fast one up to the slow seed
+        ema_fast = sum(prices[:fast]) / fast
+        for price in prices[fast:slow]:
+            ema_fast = (price * k_fast) + (ema_fast * (1 - k_fast))
+        ema_slow = sum(prices[:slow]) / slow
+
+        macd_line = [ema_fast - ema_slow]
+        for price in prices[slow:]:
+            ema_fast = (price * k_fast) + (ema_fast * (1 - k_fast))
+            ema_slow = (price * k_slow) + (ema_slow * (1 - k_slow))
+            macd_line.append(ema_fast - ema_slow)
+
+        signal_line = []
+        total = 0.0
+        for i, value in enumerate(macd_line):
+            if i < signal:
+                total += value
+                signal_value = total / (i + 1)
             else:
-                signal_line = sum(macd_values) / len(macd_values) if macd_values else 0.0
-        else:
-            signal_line = macd_line * 0.8  # Fallback approximation
+                signal_value = (value * k_signal) + (signal_value * (1 - k_signal))
+            signal_line.append(signal_value)
 
-        # Histogram = MACD - Signal
-        histogram = macd_line - signal_line
+        histogram = [m - s for m, s in zip(macd_line, signal_line)]
 
         return macd_line, signal_line, histogram
 
     @staticmethod
+    @timed('indicators.macd_signal_cross')
     def macd_signal_cross(prices: List[float], fast: int = 12, slow: int = 26, signal: int = 9) -> str:
         """
         Detect MACD signal line crossovers
@@ -265,28 +302,44 @@ class Indicators:
         if len(prices) < slow + 2:
             return 'none'
 
-        # Current values
-        macd_curr, signal_curr, hist_curr = Indicators.macd(prices[-slow:] if len(prices) >= slow else prices, fast, slow, signal)
+        macd_line, _, histogram = Indicators.macd_series(prices, fast, slow, signal)
 
-        # Previous values
-        if len(prices) >= slow + 1:
-            macd_prev, signal_prev, hist_prev = Indicators.macd(prices[-(slow+1):-1] if len(prices) > slow else prices, fast, slow, signal)
-        else:
-            return 'none'
+        return Indicators.macd_cross(histogram[-2], histogram[-1], Indicators.MACD_EPSILON * abs(macd_line[-1]))
+
+    # Histogram values this small relative to the MACD line are rounding noise
+    MACD_EPSILON = 1e-9
+
+    @staticmethod
+    def macd_cross(hist_prev: float, hist_curr: float, tolerance: float = 0.0) -> str:
+        """
+        Classify a crossover from the last two histogram values (MACD - signal)
+
+        Args:
+            hist_prev: Histogram value of the previous bar
+            hist_curr: Histogram value of the current bar
+            tolerance: Absolute values up to this are treated as zero
+
+        Returns:
+            Same values as macd_signal_cross
+        """
+        if abs(hist_prev) <= tolerance:
+            hist_prev = 0.0
+        if abs(hist_curr) <= tolerance:
+            hist_curr = 0.0
 
-        # Detect crossovers
-        if macd_prev <= signal_prev and macd_curr > signal_curr:
+        if hist_prev <= 0 and hist_curr > 0:
             return 'bullish_cross'
-        elif macd_prev >= signal_prev and macd_curr < signal_curr:
+        elif hist_prev >= 0 and hist_curr < 0:
             return 'bearish_cross'
-        elif macd_curr > signal_curr:
+        elif hist_curr > 0:
             return 'bullish_momentum'
-        elif macd_curr < signal_curr:
+        elif hist_curr < 0:
             return 'bearish_momentum'
 
         return 'none'
 
     @staticmethod
+    @timed('indicators.support_resistance')
     def support_resistance(prices: List[float], window: int = 20) -> Tuple[float, float]:
         """
         Identify support and resistance levels
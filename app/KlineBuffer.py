@@ -0,0 +1,155 @@
+# -*- coding: UTF-8 -*-
+# Columnar kline store for Binance Trader
+# Fixed-capacity ring buffers of open time, OHLC and volume per symbol/interval
+
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+
+class KlineBuffer:
+    """
+    Rolling kline window stored column by column
+
+    Each field lives in an array('d') of twice the capacity and every value
+    is written to both halves, so the current window is always one
+    contiguous slice. view() and columns() hand out memoryviews of that
+    slice: no parsing or copying per cycle, and NumPy can wrap them as-is.
+
+    The buffer also behaves as a read-only sequence of REST-style rows
+    (open_time, open, high, low, close, volume), so code written for the
+    raw kline list (IndicatorEngine.sync, len(), slicing) works unchanged.
+
+    Writers take `lock`; readers that need a consistent window across
+    several calls should hold it too. Views are live: they show whatever
+    the slice holds, so read them before the next append.
+    """
+
+    FIELDS = ('time', 'open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, capacity: int, symbol: str = None, interval: str = None):
+        """
+        Args:
+            capacity: Number of candles kept (oldest dropped first)
+            symbol: Trading pair, for reference
+            interval: Kline interval, for reference
+        """
+        self.capacity = max(1, int(capacity))
+        self.symbol = symbol
+        self.interval = interval
+        self.lock = threading.RLock()
+
+        self._data = {field: array('d', bytes(16 * self.capacity)) for field in self.FIELDS}
+        self._columns = [self._data[field] for field in self.FIELDS]
+        self._start = 0
+        self._count = 0
+
+    # --- writers ---
+
+    def append(self, kline) -> bool:
+        """
+        Add a candle, or revise the last one when the open time matches
+
+        Args:
+            kline: REST kline row [open_time, open, high, low, close, volume, ...]
+
+        Returns:
+            False when the candle is older than the last one (ignored)
+        """
+        open_time = float(kline[0])
+
+        with self.lock:
+            if self._count:
+                last = self._columns[0][self._start + self._count - 1]
+                if open_time < last:
+                    return False
+                if open_time == last:
+                    self._write((self._start + self._count - 1) % self.capacity, kline)
+                    return True
+
+            if self._count < self.capacity:
+                slot = (self._start + self._count) % self.capacity
+                self._count += 1
+            else:
+                slot = self._start
+                self._start = (self._start + 1) % self.capacity
+
+            self._write(slot, kline)
+            return True
+
+    def replace(self, kline):
+        """Overwrite the last candle (in-progress candle update)"""
+        with self.lock:
+            if not self._count:
+                raise IndexError('replace on empty KlineBuffer')
+            self._write((self._start + self._count - 1) % self.capacity, kline)
+
+    def extend(self, klines: Iterable):
+        """Append candles in order; ones older than the last candle are skipped"""
+        with self.lock:
+            for kline in klines:
+                self.append(kline)
+
+    def load(self, klines: Iterable):
+        """Replace the contents with klines"""
+        with self.lock:
+            self.clear()
+            self.extend(klines)
+
+    def clear(self):
+        with self.lock:
+            self._start = 0
+            self._count = 0
+
+    def _write(self, slot, kline):
+        mirror = slot + self.capacity
+        for column, value in zip(self._columns, kline):
+            value = float(value)
+            column[slot] = value
+            column[mirror] = value
+
+    # --- readers ---
+
+    def view(self, field: str) -> memoryview:
+        """Zero-copy view of one column over the current window (oldest first)"""
+        return memoryview(self._data[field])[self._start:self._start + self._count]
+
+    def columns(self) -> Dict[str, memoryview]:
+        """Zero-copy views of every column"""
+        with self.lock:
+            return {field: self.view(field) for field in self.FIELDS}
+
+    def last(self, field: str = 'close') -> Optional[float]:
+        if not self._count:
+            return None
+        return self._data[field][self._start + self._count - 1]
+
+    def last_time(self) -> Optional[int]:
+        value = self.last('time')
+        return int(value) if value is not None else None
+
+    def rows(self) -> List[List]:
+        """Copy of the window as REST-style rows"""
+        with self.lock:
+            return [list(row) for row in self]
+
+    def _row(self, i):
+        pos = self._start + i
+        c = self._columns
+        return (int(c[0][pos]), c[1][pos], c[2][pos], c[3][pos], c[4][pos], c[5][pos])
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._row(i) for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError('KlineBuffer index out of range')
+        return self._row(index)
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self._row(i)
@@ -0,0 +1,137 @@
+# -*- coding: UTF-8 -*-
+# Incremental kline fetching for Binance Trader
+# Fetches only new candles, backfills gaps and paginates long ranges in parallel
+
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+from KlineBuffer import KlineBuffer
+
+
+class KlineSync:
+    """
+    Keeps KlineBuffers current with as few REST calls as possible
+
+    The first sync loads the whole window. After that each sync asks only
+    for candles from the last open time onwards (the in-progress candle is
+    revised, new ones appended), which is one small request per cycle
+    instead of the full window. After downtime the missing range is
+    backfilled; a range longer than one request is split into pages that
+    are fetched in parallel, and a gap longer than the window just reloads
+    the window.
+    """
+
+    LIMIT = 1000  # candles per request (Binance maximum)
+
+    UNITS = {
+        's': 1000,
+        'm': 60 * 1000,
+        'h': 3600 * 1000,
+        'd': 86400 * 1000,
+        'w': 7 * 86400 * 1000,
+        'M': 31 * 86400 * 1000
+    }
+
+    def __init__(self, client, max_workers: int = 4):
+        """
+        Args:
+            client: BinanceAPI (synchronous) used for /klines
+            max_workers: Parallel requests when paginating a long range
+        """
+        self.client = client
+        self.max_workers = max_workers
+        self.buffers: Dict[Tuple[str, str], KlineBuffer] = {}
+        self.logger = logging.getLogger('KlineSync')
+
+        self.requests = 0
+        self.candles = 0
+        self.backfills = 0
+
+    @classmethod
+    def interval_ms(cls, interval: str) -> int:
+        """Length of one candle in milliseconds (e.g. '5m' -> 300000)"""
+        unit = interval[-1]
+        if unit not in cls.UNITS:
+            raise ValueError('Unknown kline interval: %s' % interval)
+        return int(interval[:-1]) * cls.UNITS[unit]
+
+    def buffer(self, symbol: str, interval: str, limit: int) -> KlineBuffer:
+        """KlineBuffer for symbol/interval, created with `limit` candles on first use"""
+        key = (symbol, interval)
+        if key not in self.buffers:
+            self.buffers[key] = KlineBuffer(limit, symbol, interval)
+        return self.buffers[key]
+
+    def sync(self, symbol: str, interval: str, limit: int = 500, now: int = None) -> KlineBuffer:
+        """
+        Bring the window for symbol/interval up to date
+
+        Args:
+            symbol: Trading pair
+            interval: Kline interval
+            limit: Window size (used when the buffer is created)
+            now: Current time in ms (default: local clock)
+
+        Returns:
+            The updated KlineBuffer
+        """
+        buffer = self.buffer(symbol, interval, limit)
+        step = self.interval_ms(interval)
+        if now is None:
+            now = int(time.time() * 1000)
+
+        last = buffer.last_time()
+        window_start = (now // step - (buffer.capacity - 1)) * step
+
+        if last is None or last < window_start:
+            if last is not None:
+                self.backfills += 1
+                self.logger.info('%s %s: %d candles missed, reloading window'
+                                 % (symbol, interval, (now - last) // step))
+            buffer.load(self.fetch_range(symbol, interval, window_start, now))
+            return buffer
+
+        missed = (now - last) // step
+        if missed > 1:
+            self.backfills += 1
+            self.logger.info('%s %s: backfilling %d candles' % (symbol, interval, missed))
+
+        buffer.extend(self.fetch_range(symbol, interval, last, now))
+        return buffer
+
+    def fetch_range(self, symbol: str, interval: str, start: int, end: int) -> List[List]:
+        """
+        All candles with open time in [start, end], paginated in parallel
+
+        Returns:
+            Kline rows in REST format, oldest first
+        """
+        step = self.interval_ms(interval)
+        span = self.LIMIT * step
+        starts = list(range(start, end + 1, span))
+
+        if len(starts) <= 1:
+            return self._fetch(symbol, interval, start, None)
+
+        pages = [(page, min(page + span - 1, end)) for page in starts]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pages))) as executor:
+            results = list(executor.map(lambda page: self._fetch(symbol, interval, *page), pages))
+
+        klines = []
+        for rows in results:
+            for row in rows:
+                if not klines or row[0] > klines[-1][0]:
+                    klines.append(row)
+        return klines
+
+    def _fetch(self, symbol, interval, start, end):
+        klines = self.client.get_klines(symbol, interval, start, end, limit=self.LIMIT)
+        self.requests += 1
+
+        if not isinstance(klines, list):
+            raise ValueError('Kline request failed: %s' % klines)
+
+        self.candles += len(klines)
+        return klines
@@ -0,0 +1,301 @@
+# -*- coding: UTF-8 -*-
+# Asynchronous logging for Binance Trader
+# Trading threads only queue records; one writer thread formats and writes them in batches
+
+import os
+import sys
+import json
+import queue
+import atexit
+import logging
+import threading
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+# Arguments of these types are formatted on the writer thread; anything else
+# (dicts, orders, ...) could change before then and is formatted when logged
+IMMUTABLE = (str, int, float, bool, type(None), Decimal, bytes)
+
+
+class LogFile:
+    """
+    Log file written in batches, rotated by size like RotatingFileHandler
+
+        trader.log -> trader.log.1 -> ... -> trader.log.<backup_count>
+    """
+
+    def __init__(self, path: str, max_bytes: int = 0, backup_count: int = 5):
+        """
+        Args:
+            path: Log file, appended to
+            max_bytes: Rotate before the file would grow past this size (0 = never)
+            backup_count: Rotated files kept
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.rotations = 0
+        self._file = open(path, 'a', encoding='utf-8')
+        self._size = self._file.tell()
+
+    def write(self, text: str):
+        data = text.encode('utf-8')
+        if self.max_bytes and self._size and self._size + len(data) > self.max_bytes:
+            self.rotate()
+        self._file.write(text)
+        self._size += len(data)
+
+    def rotate(self):
+        self._file.close()
+        if self.backup_count > 0:
+            for index in range(self.backup_count - 1, 0, -1):
+                source = '%s.%d' % (self.path, index)
+                if os.path.exists(source):
+                    os.replace(source, '%s.%d' % (self.path, index + 1))
+            os.replace(self.path, self.path + '.1')
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._size = 0
+        self.rotations += 1
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class JsonFormatter(logging.Formatter):
+    """One compact JSON object per record: ts (epoch s), level, logger, thread, msg[, exc]"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': round(record.created, 6),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'msg': record.getMessage()
+        }
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, separators=(',', ':'), default=str)
+
+
+class LogWriter(threading.Thread):
+    """
+    Background thread doing all log formatting and I/O
+
+    submit() is a put_nowait() on a bounded queue: it never waits for a
+    disk or a terminal. While one batch is written the next one queues up,
+    so under load a single write() and flush() covers many records. When
+    the queue is full records are dropped and counted, never blocked on.
+    """
+
+    BATCH = 512
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_queue: int = 100000):
+        threading.Thread.__init__(self, name='LogWriter')
+        self.daemon = True
+        self.queue = queue.Queue(max_queue)
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self._reported = 0
+        self._stopped = False
+
+    @classmethod
+    def shared(cls) -> 'LogWriter':
+        """One started writer per process, stopped (and drained) at exit"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = LogWriter()
+                cls._shared.start()
+                atexit.register(cls._shared.stop)
+            return cls._shared
+
+    def submit(self, handler: 'AsyncHandler', record: logging.LogRecord):
+        try:
+            self.queue.put_nowait((handler, record))
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything queued so far is written"""
+        if not self.is_alive() or threading.current_thread() is self:
+            return False
+        written = threading.Event()
+        try:
+            self.queue.put((None, written), timeout=timeout)
+        except queue.Full:
+            return False
+        return written.wait(timeout)
+
+    def stop(self, timeout: float = 5.0):
+        """Write what is queued, then end the thread"""
+        if self._stopped:
+            return
+        self._stopped = True
+        try:
+            self.queue.put((None, None), timeout=timeout)
+        except queue.Full:
+            return
+        self.join(timeout)
+
+    def run(self):
+        get = self.queue.get
+        get_nowait = self.queue.get_nowait
+        while True:
+            batch = [get()]
+            try:
+                while len(batch) < self.BATCH:
+                    batch.append(get_nowait())
+            except queue.Empty:
+                pass
+
+            # (None, None) stops the thread, (None, event) is a flush() waiting for this point
+            self.write([item for item in batch if item[0] is not None])
+            markers = [record for handler, record in batch if handler is None]
+            for marker in markers:
+                if marker is not None:
+                    marker.set()
+            if None in markers:
+                return
+
+    def write(self, batch: List):
+        texts: Dict[int, List[str]] = {}
+        sinks = {}
+        for handler, record in batch:
+            try:
+                text = handler.format(record) + handler.terminator
+            except Exception:
+                handler.handleError(record)
+                continue
+            key = id(handler.sink)
+            sinks[key] = handler.sink
+            texts.setdefault(key, []).append(text)
+
+        for key, sink in sinks.items():
+            try:
+                sink.write(''.join(texts[key]))
+                sink.flush()
+            except Exception as e:
+                sys.stderr.write('LogWriter: %s\n' % e)
+
+        self.written += len(batch)
+        self.batches += 1
+
+        if self.dropped != self._reported:
+            sys.stderr.write('LogWriter: %d log records dropped (queue full)\n' % (self.dropped - self._reported))
+            self._reported = self.dropped
+
+
+class AsyncHandler(logging.Handler):
+    """
+    Handler that hands records to a LogWriter
+
+    Nothing is formatted on the logging thread: logger.debug('%s', x)
+    with DEBUG off costs a level check, and an enabled record is queued
+    with its arguments and formatted by the writer (see IMMUTABLE).
+    """
+
+    terminator = '\n'
+
+    def __init__(self, sink, level: int = logging.NOTSET, writer: Optional[LogWriter] = None):
+        """
+        Args:
+            sink: Object with write(text) and flush(), e.g. a LogFile or sys.stdout
+            level: Lowest level handled
+            writer: Writer thread (the shared one if omitted)
+        """
+        logging.Handler.__init__(self, level)
+        self.sink = sink
+        self.writer = writer or LogWriter.shared()
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        # No handler lock: the queue is the only shared state
+        if not self.filter(record):
+            return False
+        self.emit(record)
+        return True
+
+    def emit(self, record: logging.LogRecord):
+        args = record.args
+        if args and not (type(args) is tuple and all(type(arg) in IMMUTABLE for arg in args)):
+            record.msg = record.getMessage()
+            record.args = None
+        self.writer.submit(self, record)
+
+    def flush(self):
+        # Called by logging.shutdown(); the writer drains itself at exit
+        pass
+
+    def close(self):
+        """Write the records still queued, then close the sink (a LogFile; never stdout/stderr)"""
+        self.writer.flush()
+        if hasattr(self.sink, 'close') and self.sink not in (sys.stdout, sys.stderr, sys.__stdout__, sys.__stderr__):
+            self.sink.close()
+        logging.Handler.close(self)
+
+
+def setup_logging(
+    filename: str = None,
+    level: int = logging.INFO,
+    fmt: str = '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    datefmt: str = None,
+    stdout: bool = False,
+    json_lines: bool = False,
+    max_bytes: int = 0,
+    backup_count: int = 5,
+    force: bool = False
+) -> List[AsyncHandler]:
+    """
+    logging.basicConfig() with asynchronous handlers
+
+    Args:
+        filename: Log file (None = no file)
+        level: Root logger level
+        fmt, datefmt: Text format (ignored for the file when json_lines)
+        stdout: Also print to stdout (always as text)
+        json_lines: Write the file as JSON lines (JsonFormatter)
+        max_bytes, backup_count: Size-based rotation of the file (0 = never)
+        force: Replace handlers already on the root logger (otherwise a no-op if there are any)
+
+    Returns:
+        The handlers added to the root logger
+    """
+    root = logging.getLogger()
+    if root.handlers and not force:
+        return []
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+    formatter = logging.Formatter(fmt, datefmt)
+    handlers = []
+    if filename:
+        handler = AsyncHandler(LogFile(filename, max_bytes, backup_count))
+        handler.setFormatter(JsonFormatter() if json_lines else formatter)
+        handlers.append(handler)
+    if stdout:
+        handler = AsyncHandler(sys.stdout)
+        handler.setFormatter(formatter)
+        handlers.append(handler)
+
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+    return handlers
+
+
+def config_options(config) -> Dict:
+    """setup_logging() options from config.py"""
+    return {
+        'json_lines': getattr(config, 'log_json', False),
+        'max_bytes': getattr(config, 'log_max_bytes', 0),
+        'backup_count': getattr(config, 'log_backup_count', 5)
+    }
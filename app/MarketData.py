@@ -0,0 +1,355 @@
+# -*- coding: UTF-8 -*-
+# Streaming market data (WebSocket) for Binance Trader
+# Keeps an in-memory view of bookTicker, trade, miniTicker, kline and depth streams
+
+import json
+import time
+import asyncio
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from OrderBook import OrderBook
+from KlineBuffer import KlineBuffer
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+class MarketView:
+    """
+    Latest market state per symbol, updated by MarketDataStream
+
+    Every entry is replaced as a whole tuple, so readers on other threads
+    always see a consistent value without taking a lock. Kline windows are
+    KlineBuffers updated in place under the buffer's own lock.
+    """
+
+    def __init__(self):
+        self._books = {}    # symbol -> (bid, bid_qty, ask, ask_qty, monotonic ts)
+        self._trades = {}   # symbol -> (price, qty, trade time ms, monotonic ts)
+        self._tickers = {}  # symbol -> (last price, 24h base volume, monotonic ts)
+        self._klines = {}   # (symbol, interval) -> KlineBuffer
+        self.books = {}     # symbol -> OrderBook (depth diff stream)
+        self._updated = threading.Condition()
+
+    # --- writers (stream thread) ---
+
+    def set_book(self, symbol: str, bid: float, bid_qty: float, ask: float, ask_qty: float):
+        self._books[symbol] = (bid, bid_qty, ask, ask_qty, time.monotonic())
+        self._notify()
+
+    def set_trade(self, symbol: str, price: float, qty: float, trade_time: int):
+        self._trades[symbol] = (price, qty, trade_time, time.monotonic())
+
+    def set_ticker(self, symbol: str, price: float, volume: float):
+        self._tickers[symbol] = (price, volume, time.monotonic())
+
+    def seed_klines(self, symbol: str, interval: str, klines, limit: int = None):
+        """
+        Install a kline window that the kline stream keeps current
+
+        klines is either a KlineBuffer, installed as-is, or a REST kline
+        list loaded into a new buffer of `limit` candles.
+        """
+        if not isinstance(klines, KlineBuffer):
+            rows = klines
+            klines = KlineBuffer(limit or len(rows), symbol, interval)
+            klines.load(rows)
+        self._klines[(symbol, interval)] = klines
+
+    def set_kline(self, symbol: str, interval: str, kline: List):
+        buffer = self._klines.get((symbol, interval))
+        if buffer is not None:
+            buffer.append(kline)
+
+    def _notify(self):
+        with self._updated:
+            self._updated.notify_all()
+
+    # --- readers (trading threads) ---
+
+    def top(self, symbol: str, max_age: float = None) -> Optional[Tuple[float, float]]:
+        """Best (bid, ask) or None when missing or older than max_age seconds"""
+        book = self._books.get(symbol)
+        if book is not None and self._fresh(book[4], max_age):
+            return book[0], book[2]
+
+        # Fall back to the local depth book when bookTicker is quiet
+        order_book = self.book(symbol)
+        if order_book is not None and self._fresh(order_book.updated, max_age):
+            bid, ask = order_book.top()
+            if bid is not None and ask is not None:
+                return bid, ask
+
+        return None
+
+    def book(self, symbol: str) -> Optional[OrderBook]:
+        """Local order book for symbol, None unless streamed and in sync"""
+        order_book = self.books.get(symbol)
+        if order_book is None or not order_book.synced:
+            return None
+        return order_book
+
+    def last_price(self, symbol: str, max_age: float = None) -> Optional[float]:
+        """Last traded price, falling back to the miniTicker close"""
+        trade = self._trades.get(symbol)
+        if trade is not None and self._fresh(trade[3], max_age):
+            return trade[0]
+
+        ticker = self._tickers.get(symbol)
+        if ticker is not None and self._fresh(ticker[2], max_age):
+            return ticker[0]
+
+        return None
+
+    def volume(self, symbol: str) -> Optional[float]:
+        ticker = self._tickers.get(symbol)
+        return ticker[1] if ticker is not None else None
+
+    def klines(self, symbol: str, interval: str) -> Optional[KlineBuffer]:
+        return self._klines.get((symbol, interval))
+
+    def wait(self, symbol: str, timeout: float = 5.0) -> bool:
+        """Block until a book for symbol has arrived"""
+        deadline = time.monotonic() + timeout
+        with self._updated:
+            while symbol not in self._books:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._updated.wait(remaining)
+        return True
+
+    @staticmethod
+    def _fresh(ts: float, max_age: float = None) -> bool:
+        return max_age is None or time.monotonic() - ts <= max_age
+
+
+class AiohttpTransport:
+    """Default WebSocket transport built on aiohttp"""
+
+    def __init__(self, heartbeat: float = 20.0):
+        if aiohttp is None:
+            raise ImportError('MarketDataStream requires aiohttp (pip install aiohttp)')
+        self.heartbeat = heartbeat
+
+    async def connect(self, url: str):
+        return _AiohttpConnection(url, self.heartbeat)
+
+
+class _AiohttpConnection:
+
+    def __init__(self, url, heartbeat):
+        self.url = url
+        self.heartbeat = heartbeat
+        self._session = None
+        self._ws = None
+
+    async def open(self):
+        self._session = aiohttp.ClientSession()
+        self._ws = await self._session.ws_connect(self.url, heartbeat=self.heartbeat)
+        return self
+
+    async def recv(self) -> Optional[str]:
+        """Next text frame, or None once the socket is closed"""
+        msg = await self._ws.receive()
+        if msg.type == aiohttp.WSMsgType.TEXT:
+            return msg.data
+        if msg.type == aiohttp.WSMsgType.BINARY:
+            return msg.data.decode('utf-8')
+        return None
+
+    async def close(self):
+        if self._ws is not None:
+            await self._ws.close()
+        if self._session is not None:
+            await self._session.close()
+
+
+class MarketDataStream:
+    """
+    WebSocket client for Binance market streams
+
+    Subscribes to a combined stream (bookTicker, trade, miniTicker, kline and
+    depth diff per symbol) on a background event loop and keeps a MarketView
+    and its OrderBooks current, so the trading loop reads the latest price
+    from memory instead of issuing a REST call per tick.
+
+    The transport is pluggable: anything with `async connect(url)` returning
+    an object with `open()`, `recv()` and `close()` coroutines will do, which
+    lets tests drive the stream from a local fake server.
+    """
+
+    STREAM_URL = "wss://stream.binance.com:9443/stream?streams=%s"
+
+    RECONNECT_MIN = 1.0   # seconds
+    RECONNECT_MAX = 30.0  # seconds
+
+    def __init__(
+        self,
+        symbols: List[str],
+        interval: Union[str, List[str]] = None,
+        depth: bool = False,
+        snapshot: Callable[[str], Dict] = None,
+        view: MarketView = None,
+        transport=None
+    ):
+        """
+        Args:
+            symbols: Symbols to subscribe (e.g. ['BTCUSDT'])
+            interval: Kline interval(s) to stream (e.g. '5m' or ['1m', '5m']), None to skip klines
+            depth: Subscribe to depth diff updates (@depth@100ms) and keep an OrderBook per symbol
+            snapshot: Callable returning a REST depth snapshot, used to (re)sync the order books
+            view: MarketView to update (a new one is created if omitted)
+            transport: WebSocket transport (default: AiohttpTransport)
+        """
+        self.symbols = [symbol.upper() for symbol in symbols]
+        self.interval = interval
+        self.intervals = [interval] if isinstance(interval, str) else list(interval or [])
+        self.depth = depth
+        self.view = view or MarketView()
+        self.transport = transport
+
+        self.logger = logging.getLogger('MarketDataStream')
+
+        self._listeners = {}
+        self._loop = None
+        self._thread = None
+        self._running = False
+        self._connection = None
+
+        self.messages = 0
+        self.reconnects = 0
+
+        if depth:
+            for symbol in self.symbols:
+                self.view.books[symbol] = OrderBook(symbol, snapshot)
+
+    def streams(self) -> List[str]:
+        names = []
+        for symbol in self.symbols:
+            lower = symbol.lower()
+            names.append('%s@bookTicker' % lower)
+            names.append('%s@trade' % lower)
+            names.append('%s@miniTicker' % lower)
+            for interval in self.intervals:
+                names.append('%s@kline_%s' % (lower, interval))
+            if self.depth:
+                names.append('%s@depth@100ms' % lower)
+        return names
+
+    def url(self) -> str:
+        return self.STREAM_URL % '/'.join(self.streams())
+
+    def add_listener(self, event: str, callback: Callable[[Dict], None]):
+        """Call callback(data) for every event of the given type (e.g. 'depthUpdate')"""
+        self._listeners.setdefault(event, []).append(callback)
+
+    # --- lifecycle ---
+
+    def start(self):
+        """Run the stream on a background thread"""
+        if self._thread is not None:
+            return
+
+        if self.transport is None:
+            self.transport = AiohttpTransport()
+
+        self._running = True
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name='MarketDataStream')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._running = False
+        if self._loop is not None and self._connection is not None:
+            asyncio.run_coroutine_threadsafe(self._connection.close(), self._loop)
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self.run())
+        finally:
+            self._loop.close()
+
+    async def run(self):
+        """Connect, dispatch messages and reconnect with backoff until stopped"""
+        delay = self.RECONNECT_MIN
+
+        while self._running:
+            try:
+                self._connection = await (await self.transport.connect(self.url())).open()
+                self.logger.info('Market stream connected (%d streams)' % len(self.streams()))
+                delay = self.RECONNECT_MIN
+
+                while self._running:
+                    raw = await self._connection.recv()
+                    if raw is None:
+                        break
+                    self.handle(raw)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.warning('Market stream error: %s' % e)
+
+            finally:
+                if self._connection is not None:
+                    try:
+                        await self._connection.close()
+                    except Exception:
+                        pass
+                    self._connection = None
+
+            if self._running:
+                self.reconnects += 1
+                self.logger.info('Market stream reconnecting in %.0fs' % delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.RECONNECT_MAX)
+
+    # --- dispatch ---
+
+    def handle(self, raw: str):
+        """Apply one raw stream message to the view"""
+        message = json.loads(raw)
+        data = message.get('data', message)
+        self.messages += 1
+
+        event = data.get('e')
+
+        if event is None and 'b' in data and 'a' in data:
+            # bookTicker carries no event type
+            event = 'bookTicker'
+            self.view.set_book(data['s'], float(data['b']), float(data['B']),
+                               float(data['a']), float(data['A']))
+
+        elif event == 'trade':
+            self.view.set_trade(data['s'], float(data['p']), float(data['q']), data['T'])
+
+        elif event == '24hrMiniTicker':
+            self.view.set_ticker(data['s'], float(data['c']), float(data['v']))
+
+        elif event == 'depthUpdate':
+            order_book = self.view.books.get(data['s'])
+            if order_book is not None:
+                order_book.apply(data)
+
+        elif event == 'kline':
+            k = data['k']
+            self.view.set_kline(data['s'], k['i'], [
+                k['t'], k['o'], k['h'], k['l'], k['c'], k['v'],
+                k['T'], k['q'], k['n'], k['V'], k['Q'], '0'
+            ])
+
+        for callback in self._listeners.get(event, ()):
+            try:
+                callback(data)
+            except Exception as e:
+                self.logger.error('Listener error (%s): %s' % (event, e))
@@ -0,0 +1,160 @@
+# -*- coding: UTF-8 -*-
+# Prometheus-style counters and gauges for Binance Trader
+# Cycles, signals, orders, position and PnL per symbol, REST weight and span latencies
+
+import math
+import threading
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from Latency import Latency
+
+PREFIX = 'binance_'
+
+# name -> (type, help); names not listed are exported as untyped
+METRICS = {
+    'cycles_total': ('counter', 'Trading cycles run'),
+    'signals_total': ('counter', 'Strategy signals by type'),
+    'orders_placed_total': ('counter', 'Orders accepted by the exchange'),
+    'orders_rejected_total': ('counter', 'Orders rejected by the exchange'),
+    'orders_filled_total': ('counter', 'Tracked orders that ended FILLED'),
+    'orders_cancelled_total': ('counter', 'Cancel requests accepted by the exchange'),
+    'trades_total': ('counter', 'Closed buy/sell round trips by result'),
+    'position': ('gauge', 'Base asset quantity held by the bot'),
+    'open_trades': ('gauge', 'Buy/sell cycles in progress'),
+    'realized_pnl': ('gauge', 'Profit of closed trades in quote asset'),
+    'unrealized_pnl': ('gauge', 'Profit of the open position at the last price in quote asset'),
+    'request_weight': ('gauge', 'REST request weight used in the last minute'),
+    'request_weight_limit': ('gauge', 'REST request weight allowed per minute'),
+    'orders_10s': ('gauge', 'Orders placed in the last 10 seconds'),
+    'rate_limit_banned_seconds': ('gauge', 'Seconds left of an IP ban'),
+    'rate_limit_waits_total': ('counter', 'Requests that waited for the rate limit'),
+    'rate_limit_wait_seconds_total': ('counter', 'Time spent waiting for the rate limit'),
+    'span_seconds': ('summary', 'Latency of API endpoints, indicators, strategy and cycles (latency_enabled)'),
+}
+
+QUANTILES = (0.5, 0.99, 0.999)
+
+Labels = Tuple[Tuple[str, str], ...]
+Sample = Tuple[str, Dict[str, str], float]
+
+
+class Metrics:
+    """
+    Process-wide counters and gauges
+
+    Updating a value takes a dict update under a short lock, on events
+    that are far rarer than the REST calls around them (cycles, signals,
+    orders). A scrape copies the values under the same lock and formats
+    them on the server thread, so it never holds up a trading thread.
+
+    Collectors are called at scrape time for values that other components
+    already keep (rate governor usage); they return (name, labels, value).
+    """
+
+    values: Dict[Tuple[str, Labels], float] = {}
+    collectors: List[Callable[[], Iterable[Sample]]] = []
+
+    _lock = threading.Lock()
+
+    @classmethod
+    def inc(cls, name: str, amount: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with cls._lock:
+            cls.values[key] = cls.values.get(key, 0) + amount
+
+    @classmethod
+    def set(cls, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with cls._lock:
+            cls.values[key] = value
+
+    @classmethod
+    def get(cls, name: str, **labels) -> float:
+        return cls.values.get((name, tuple(sorted(labels.items()))), 0)
+
+    @classmethod
+    def collect(cls, collector: Callable[[], Iterable[Sample]]):
+        cls.collectors.append(collector)
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls.values.clear()
+        del cls.collectors[:]
+
+    @classmethod
+    def samples(cls) -> List[Sample]:
+        """Every value, collector and span histogram as (name, labels, value)"""
+        with cls._lock:
+            values = list(cls.values.items())
+        samples = [(name, dict(labels), value) for (name, labels), value in values]
+
+        for collector in list(cls.collectors):
+            samples.extend(collector())
+
+        for name, entry in Latency.summary().items():
+            for q, key in zip(QUANTILES, ('p50_ms', 'p99_ms', 'p999_ms')):
+                samples.append(('span_seconds', {'span': name, 'quantile': str(q)}, entry[key] / 1000.0))
+            samples.append(('span_seconds_sum', {'span': name}, entry['total_ms'] / 1000.0))
+            samples.append(('span_seconds_count', {'span': name}, entry['count']))
+        return samples
+
+    @classmethod
+    def render(cls) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        families: Dict[str, List[str]] = {}
+        for name, labels, value in cls.samples():
+            family = name
+            for suffix in ('_sum', '_count'):
+                if name.endswith(suffix) and METRICS.get(name[:-len(suffix)], ('',))[0] == 'summary':
+                    family = name[:-len(suffix)]
+            families.setdefault(family, []).append('%s%s%s %s' % (
+                PREFIX, name, format_labels(labels), format_value(value)))
+
+        lines = []
+        for family in sorted(families):
+            kind, text = METRICS.get(family, ('untyped', ''))
+            if text:
+                lines.append('# HELP %s%s %s' % (PREFIX, family, text))
+            lines.append('# TYPE %s%s %s' % (PREFIX, family, kind))
+            lines.extend(sorted(families[family]))
+        return '\n'.join(lines) + '\n'
+
+    @classmethod
+    def serve(cls, server):
+        """Add /metrics (Prometheus text format) to a MetricsServer"""
+        server.route('/metrics', lambda: ('text/plain; version=0.0.4; charset=utf-8', cls.render()))
+
+    @staticmethod
+    def governor(governor) -> Callable[[], Iterable[Sample]]:
+        """Collector for a RateGovernor's usage()"""
+        def collect():
+            if governor is None:
+                return []
+            usage = governor.usage()
+            return [
+                ('request_weight', {}, usage['weight']),
+                ('request_weight_limit', {}, usage['weight_limit']),
+                ('orders_10s', {}, usage['orders_10s']),
+                ('rate_limit_banned_seconds', {}, usage['banned_for']),
+                ('rate_limit_waits_total', {}, usage['waits']),
+                ('rate_limit_wait_seconds_total', {}, usage['waited'])
+            ]
+        return collect
+
+
+def format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{%s}' % ','.join('%s="%s"' % (key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+                             for key, value in sorted(labels.items()))
+
+
+def format_value(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
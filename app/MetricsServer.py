@@ -0,0 +1,89 @@
+# -*- coding: UTF-8 -*-
+# Local HTTP endpoint for Binance Trader metrics
+
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Tuple, Union
+
+
+class MetricsServer:
+    """
+    Read-only HTTP server on a background thread
+
+    Each path is served by a handler returning (content type, body). The
+    server and every request run on their own threads, so a slow or
+    stuck scraper never blocks a trading thread; handlers should only
+    read state that the bots already keep.
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, port: int, host: str = '127.0.0.1'):
+        """
+        Args:
+            port: TCP port (0 = any free port, see .port after start())
+            host: Interface to listen on, local only by default
+        """
+        self.host = host
+        self.port = port
+        self.routes: Dict[str, Callable[[], Tuple[str, Union[str, bytes]]]] = {}
+        self.logger = logging.getLogger('MetricsServer')
+
+        self._server = None
+        self._thread = None
+
+    @classmethod
+    def shared(cls, port: int, host: str = '127.0.0.1') -> 'MetricsServer':
+        """One started server per process, for every component's routes"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = MetricsServer(port, host)
+                cls._shared.start()
+            return cls._shared
+
+    def route(self, path: str, handler: Callable[[], Tuple[str, Union[str, bytes]]]):
+        self.routes[path] = handler
+
+    def start(self):
+        routes = self.routes
+        logger = self.logger
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                handler = routes.get(self.path.split('?', 1)[0])
+                if handler is None:
+                    self.send_error(404)
+                    return
+                try:
+                    content_type, body = handler()
+                except Exception as e:
+                    logger.error('%s failed: %s' % (self.path, e))
+                    self.send_error(500)
+                    return
+
+                if isinstance(body, str):
+                    body = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+
+        self._thread = threading.Thread(target=self._server.serve_forever, name='MetricsServer', daemon=True)
+        self._thread.start()
+        self.logger.info('Listening on http://%s:%d' % (self.host, self.port))
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,519 @@
+# -*- coding: UTF-8 -*-
+# Parameter sweep for the Bollinger Bands strategy
+# Vectorized signals over shared indicator series, a process pool and early stopping
+
+import csv
+import time
+import bisect
+import random
+import logging
+import itertools
+import multiprocessing
+from array import array
+from argparse import Namespace
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+from Indicators import Indicators
+from VectorIndicators import VectorIndicators, np
+from BollingerStrategy import BollingerStrategy
+from Backtester import Backtester, FixedSlippage
+
+# Tunables, named after the trader_bollinger.py options
+PARAMETERS = {
+    'bb_period': int,
+    'bb_stddev': float,
+    'rsi_period': int,
+    'rsi_oversold': float,
+    'rsi_overbought': float,
+    'volume_threshold': float,
+    'stop_loss_atr': float,
+    'take_profit': str,
+    'min_bb_width': float,
+    'max_bb_width': float,
+    'min_confidence': float,
+    'risk_per_trade': float
+}
+
+METRICS = ('trades', 'win_rate', 'return_pct', 'max_drawdown_pct', 'profit_factor', 'exposure_pct', 'fees')
+
+# Bars scanned one by one before switching to array scans (most positions are short)
+SCAN = 32
+
+# MACD crossover codes (Indicators.macd_cross)
+NONE, BULLISH_CROSS, BEARISH_CROSS, BULLISH_MOMENTUM, BEARISH_MOMENTUM = range(5)
+
+
+class SeriesCache:
+    """
+    Indicator series of one kline history, computed once per parameter
+
+    Bollinger mean and deviation are kept per bb_period (bands for any
+    bb_stddev are one multiply-add away), RSI per rsi_period; volume ratio,
+    ATR and MACD use the strategy's fixed periods and are computed once.
+    """
+
+    def __init__(self, columns: Dict):
+        self.open = np.asarray(columns['open'], dtype=float)
+        self.high = np.asarray(columns['high'], dtype=float)
+        self.low = np.asarray(columns['low'], dtype=float)
+        self.close = np.asarray(columns['close'], dtype=float)
+        self.volume = np.asarray(columns['volume'], dtype=float)
+        self.size = len(self.close)
+
+        # Plain float columns for per-trade scalar reads (numpy scalars are slow one at a time)
+        self.bars = tuple(columns[field] if isinstance(columns[field], array) else array('d', columns[field])
+                          for field in ('open', 'high', 'low', 'close'))
+
+        self._bollinger = {}
+        self._rsi = {}
+        self._fixed = None
+
+    def bollinger(self, period: int):
+        """(middle, standard deviation) series"""
+        if period not in self._bollinger:
+            upper, middle, lower = VectorIndicators.bollinger_bands(self.close, period, 1.0)
+            self._bollinger[period] = (middle, upper - middle)
+        return self._bollinger[period]
+
+    def rsi(self, period: int):
+        if period not in self._rsi:
+            self._rsi[period] = VectorIndicators.rsi(self.close, period)
+        return self._rsi[period]
+
+    def fixed(self):
+        """(volume ratio, ATR, MACD histogram, MACD cross codes) with the strategy defaults"""
+        if self._fixed is None:
+            strategy = BollingerStrategy()
+            volume_ratio = VectorIndicators.volume_ratio(self.volume, strategy.volume_period)
+            atr = VectorIndicators.atr(self.high, self.low, self.close, 14)
+            line, signal, hist = VectorIndicators.macd(self.close, strategy.macd_fast, strategy.macd_slow, strategy.macd_signal)
+            self._fixed = (volume_ratio, atr, hist, self._cross(line, hist, strategy.macd_slow))
+        return self._fixed
+
+    @staticmethod
+    def _cross(line, hist, slow):
+        """Indicators.macd_cross per bar, 'none' until slow + 2 bars exist"""
+        tolerance = Indicators.MACD_EPSILON * np.abs(line)
+        current = np.where(np.abs(hist) <= tolerance, 0.0, hist)
+        previous = np.zeros(len(hist))
+        previous[1:] = np.where(np.abs(hist[:-1]) <= tolerance[1:], 0.0, hist[:-1])
+
+        codes = np.select(
+            [(previous <= 0) & (current > 0), (previous >= 0) & (current < 0), current > 0, current < 0],
+            [BULLISH_CROSS, BEARISH_CROSS, BULLISH_MOMENTUM, BEARISH_MOMENTUM], NONE)
+        codes[:slow + 1] = NONE
+        return codes
+
+    def preload(self, configs: Sequence[Dict]):
+        """Compute every series the configs need"""
+        self.fixed()
+        for period in sorted(set(config['bb_period'] for config in configs)):
+            self.bollinger(period)
+        for period in sorted(set(config['rsi_period'] for config in configs)):
+            self.rsi(period)
+
+
+def signals(cache: SeriesCache, options) -> Dict:
+    """
+    BollingerStrategy.evaluate() + should_buy()/should_sell() for every bar at once
+
+    Returns:
+        'buy' and 'sell' masks (min_confidence applied), entry 'stop' and 'take_profit' series
+    """
+    price = cache.close
+    middle, deviation = cache.bollinger(options.bb_period)
+    upper = middle + options.bb_stddev * deviation
+    lower = middle - options.bb_stddev * deviation
+    rsi = cache.rsi(options.rsi_period)
+    volume_ratio, atr, hist, cross = cache.fixed()
+
+    with np.errstate(invalid='ignore'):
+        width = VectorIndicators.bb_width(upper, lower, middle)
+        percent = VectorIndicators.bb_percent(price, upper, lower)
+        tradable = (width >= options.min_bb_width) & (width <= options.max_bb_width)
+
+        # Price at the lower band
+        buy_zone = tradable & (price <= lower * 1.005)
+        buy_conf = (30.0
+                    + np.where(rsi < options.rsi_oversold, 25, np.where(rsi < 40, 15, 0))
+                    + np.where(volume_ratio > options.volume_threshold, 20, np.where(volume_ratio > 1.0, 10, 0))
+                    + np.where(percent < 0.1, 15, 0)
+                    + np.where(cross == BULLISH_CROSS, 25, np.where(cross == BULLISH_MOMENTUM, 15, np.where(hist < 0, -10, 0))))
+        buy = buy_zone & (buy_conf >= 50)
+
+        # Price at the upper band
+        sell_zone = tradable & ~buy_zone & (price >= upper * 0.995)
+        sell_conf = (30.0
+                     + np.where(rsi > options.rsi_overbought, 25, np.where(rsi > 60, 15, 0))
+                     + np.where(volume_ratio > options.volume_threshold, 20, 0)
+                     + np.where(percent > 0.9, 15, 0)
+                     + np.where(cross == BEARISH_CROSS, 25, np.where(cross == BEARISH_MOMENTUM, 15, np.where(hist > 0, -10, 0))))
+        sell = sell_zone & (sell_conf >= 50)
+
+        # Middle band take profit when neither fired
+        take = tradable & ~buy & ~sell & (middle * 0.99 <= price) & (price <= middle * 1.01)
+
+    stop = price - atr * options.stop_loss_atr
+    target = options.take_profit
+    if target == 'middle':
+        take_profit = middle
+    elif target == 'upper':
+        take_profit = upper
+    else:
+        take_profit = price * (1 + float(target) / 100)
+
+    confidence = options.min_confidence
+    buy_signal = buy & (np.minimum(buy_conf, 100) >= confidence)
+
+    return {
+        'buy': buy_signal,
+        # should_sell(): SELL / TAKE_PROFIT, or a BUY whose own stop is at the price
+        'sell': ((sell & (np.minimum(sell_conf, 100) >= confidence))
+                 | (take & (70 >= confidence))
+                 | (buy_signal & (stop > 0) & (price <= stop))),
+        'stop': stop,
+        'take_profit': take_profit
+    }
+
+
+def simulate(cache: SeriesCache, options, balance: float = 1000.0, slippage=None, end: int = None,
+             stop_drawdown: float = None) -> Dict:
+    """
+    Trade the signals like Backtester.run(), jumping from entry to exit
+
+    Flat stretches are skipped with the buy mask and each position's exit
+    is found with a vectorized scan, so a config costs little more than
+    its number of trades.
+
+    Args:
+        end: Only use the first `end` bars
+        stop_drawdown: Give up once the max drawdown exceeds this percentage
+
+    Returns:
+        METRICS, plus 'stopped' when stop_drawdown cut the run short
+    """
+    slippage = slippage or FixedSlippage(0)
+    commission = Backtester.BNB_COMMISSION if options.commission == 'BNB' else Backtester.TOKEN_COMMISSION
+    sizer = BollingerStrategy(BollingerStrategy.config_from_args(options))
+
+    n = cache.size if end is None else min(end, cache.size)
+    sig = signals(cache, options)
+    buy, sell, stops, targets = sig['buy'], sig['sell'], sig['stop'], sig['take_profit']
+    highs, lows, closes = cache.high, cache.low, cache.close
+    opens_at, highs_at, lows_at, closes_at = cache.bars
+    sell_at = sell.tobytes()
+
+    entry_bars = np.flatnonzero(buy[:n])
+    entries = entry_bars.tolist()
+    entry_stops = stops[entry_bars].tolist()
+    entry_targets = targets[entry_bars].tolist()
+
+    start_balance = balance
+    peak = balance
+    worst = worst_pct = 0.0
+    pnls = []
+    fees = 0.0
+    in_position = 0
+    stopped = False
+
+    k = 0
+    while k < len(entries):
+        i = entries[k]
+        stop, target = entry_stops[k], entry_targets[k]
+        candle = (None, opens_at[i], highs_at[i], lows_at[i], closes_at[i])
+        price = slippage.fill('BUY', closes_at[i], candle)
+
+        if options.quantity > 0:
+            quantity = options.quantity
+        elif options.amount > 0:
+            quantity = options.amount / closes_at[i]
+        else:
+            quantity = sizer.calculate_position_size(balance, closes_at[i], options.risk_per_trade, stop)
+        quantity = min(quantity, balance / (price * (1 + commission)))
+        if quantity <= 0:
+            k += 1
+            continue
+
+        buy_fee = price * quantity * commission
+        cost = price * quantity + buy_fee
+        balance -= cost
+
+        # First bar after the entry that exits: stop, take profit, or a sell signal at the close
+        j = None
+        start = min(n, i + 1 + SCAN)
+        for bar in range(i + 1, start):
+            if lows_at[bar] <= stop or highs_at[bar] >= target or sell_at[bar]:
+                j = bar
+                break
+
+        step = 64
+        while j is None and start < n:
+            stop_at = min(n, start + step)
+            hits = (lows[start:stop_at] <= stop) | (highs[start:stop_at] >= target) | sell[start:stop_at]
+            first = int(hits.argmax())
+            if hits[first]:
+                j = start + first
+                break
+            start, step = stop_at, step * 2
+
+        last_mark = n - 1 if j is None else j
+        marks = None
+        if last_mark - i > SCAN:
+            marks = balance + quantity * closes[i:last_mark] * (1 - commission)
+        else:
+            for bar in range(i, last_mark):
+                value = balance + quantity * closes_at[bar] * (1 - commission)
+                if value > peak:
+                    peak = value
+                elif peak - value > worst:
+                    worst, worst_pct = peak - value, (peak - value) / peak * 100
+
+        if j is None:
+            candle = (None, opens_at[n - 1], highs_at[n - 1], lows_at[n - 1], closes_at[n - 1])
+            exit_price, intrabar = slippage.fill('SELL', closes_at[n - 1], candle), False
+            in_position += n - 1 - i
+        else:
+            candle = (None, opens_at[j], highs_at[j], lows_at[j], closes_at[j])
+            if lows_at[j] <= stop:
+                exit_price, intrabar = slippage.fill('SELL', min(opens_at[j], stop), candle), True
+            elif highs_at[j] >= target:
+                exit_price, intrabar = slippage.fill('SELL', max(opens_at[j], target), candle), True
+            else:
+                exit_price, intrabar = slippage.fill('SELL', closes_at[j], candle), False
+            in_position += j - i
+
+        proceeds = exit_price * quantity
+        sell_fee = proceeds * commission
+        balance += proceeds - sell_fee
+        pnls.append(proceeds - sell_fee - cost)
+        fees += buy_fee + sell_fee
+
+        # After a stop / take profit the same bar may buy again
+        if j is not None:
+            k = bisect.bisect_left(entries, j if intrabar else j + 1)
+        rebuy = j is not None and k < len(entries) and entries[k] == j
+
+        # Drawdown over the position's marks, then the flat balance after it
+        if marks is not None:
+            if marks.max() <= peak:
+                # No new high inside the position: the deepest mark is the drop
+                drop = peak - float(marks.min())
+                if drop > worst:
+                    worst, worst_pct = drop, drop / peak * 100
+            else:
+                peaks = np.maximum.accumulate(np.maximum(marks, peak))
+                drops = peaks - marks
+                at = int(drops.argmax())
+                if drops[at] > worst:
+                    worst, worst_pct = float(drops[at]), float(drops[at] / peaks[at] * 100)
+                peak = float(peaks[-1])
+        if not rebuy:
+            if balance > peak:
+                peak = balance
+            elif peak - balance > worst:
+                worst, worst_pct = peak - balance, (peak - balance) / peak * 100
+
+        if stop_drawdown is not None and worst_pct > stop_drawdown:
+            stopped = True
+            break
+        if j is None:
+            break
+
+    wins = [pnl for pnl in pnls if pnl > 0]
+    losses = [pnl for pnl in pnls if pnl <= 0]
+    result = {
+        'trades': len(pnls),
+        'win_rate': len(wins) / len(pnls) * 100 if pnls else 0.0,
+        'return_pct': (balance - start_balance) / start_balance * 100 if start_balance else 0.0,
+        'max_drawdown_pct': worst_pct,
+        'profit_factor': sum(wins) / -sum(losses) if sum(losses) < 0 else float('inf') if wins else 0.0,
+        'exposure_pct': in_position / n * 100 if n else 0.0,
+        'fees': fees
+    }
+    if stopped:
+        result['stopped'] = True
+    return result
+
+
+# --- process pool ---
+
+_worker = {}
+
+
+def _init_worker(cache, base, settings):
+    # With fork the parent's precomputed series are inherited, not copied
+    _worker['cache'] = cache
+    _worker['base'] = base
+    _worker['settings'] = settings
+
+
+def _evaluate(batch: List[Dict], end: Optional[int]) -> List[Dict]:
+    cache, base, settings = _worker['cache'], _worker['base'], _worker['settings']
+    return [simulate(cache, merge(base, params), end=end, **settings) for params in batch]
+
+
+def merge(base, params: Dict) -> Namespace:
+    """trader_bollinger.py options with params applied"""
+    options = Namespace(**vars(base))
+    for name, value in params.items():
+        setattr(options, name, value)
+    return options
+
+
+class Optimizer:
+    """
+    Sweeps BollingerStrategy parameters over one kline history
+
+    Indicator series are computed once in the parent (SeriesCache) and
+    shared with the worker processes; each config is then a handful of
+    array expressions plus one step per trade (simulate()), with the same
+    fills, commission and accounting as Backtester.
+
+    Early stopping: configs whose drawdown passes `stop_drawdown` are
+    dropped as soon as it happens, and with `screen` every config first
+    runs on that fraction of the history and only the best `keep` fraction
+    (by `score`) runs on all of it.
+    """
+
+    def __init__(self, klines: Dict, base, balance: float = 1000.0, slippage=None, workers: int = None,
+                 stop_drawdown: float = None, screen: float = 0.0, keep: float = 0.25,
+                 score: str = 'return_pct', batch: int = 32):
+        """
+        Args:
+            klines: Columns from load_klines()
+            base: trader_bollinger.py options the sweep starts from
+            balance: Starting balance per run
+            slippage: FixedSlippage / RangeSlippage
+            workers: Processes (default: CPU count, 1 = in this process)
+            stop_drawdown: Drop configs once their max drawdown exceeds this percentage
+            screen: Fraction of the history for the first round (0 = no screening)
+            keep: Fraction of the screened configs that run on the full history
+            score: Metric to rank by (higher is better)
+            batch: Configs per task
+        """
+        if np is None:
+            raise ImportError('The optimizer needs NumPy')
+
+        self.cache = SeriesCache(klines)
+        self.base = base
+        self.settings = {'balance': balance, 'slippage': slippage, 'stop_drawdown': stop_drawdown}
+        self.workers = workers or multiprocessing.cpu_count()
+        self.screen = screen
+        self.keep = keep
+        self.score = score
+        self.batch = batch
+
+        self.logger = logging.getLogger('Optimizer')
+        self.elapsed = 0.0
+
+    # --- search spaces ---
+
+    @staticmethod
+    def grid(space: Dict[str, Sequence]) -> List[Dict]:
+        """Every combination of the listed values"""
+        names = list(space)
+        return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+    @staticmethod
+    def sample(space: Dict[str, Sequence], samples: int, seed: int = None) -> List[Dict]:
+        """`samples` distinct random combinations (random search)"""
+        rng = random.Random(seed)
+        total = 1
+        for values in space.values():
+            total *= len(values)
+
+        configs, seen = [], set()
+        while len(configs) < min(samples, total):
+            config = {name: rng.choice(list(values)) for name, values in space.items()}
+            key = tuple(config.items())
+            if key not in seen:
+                seen.add(key)
+                configs.append(config)
+        return configs
+
+    # --- running ---
+
+    def run(self, configs: List[Dict]) -> List[Dict]:
+        """
+        Evaluate configs
+
+        Returns:
+            One row per config (its params plus METRICS and 'status'), best first
+        """
+        started = time.perf_counter()
+        full = [merge(self.base, params) for params in configs]
+        self.cache.preload([{'bb_period': options.bb_period, 'rsi_period': options.rsi_period} for options in full])
+
+        rows = [dict(params) for params in configs]
+        remaining = list(range(len(rows)))
+
+        if self.screen and 0 < self.screen < 1:
+            end = int(self.cache.size * self.screen)
+            for index, result in zip(remaining, self._map([configs[i] for i in remaining], end)):
+                rows[index].update(result)
+                rows[index]['status'] = 'stopped' if result.pop('stopped', False) else 'screened'
+                rows[index].pop('stopped', None)
+
+            candidates = [i for i in remaining if rows[i]['status'] == 'screened']
+            candidates.sort(key=lambda i: rows[i][self.score], reverse=True)
+            remaining = candidates[:max(1, int(len(candidates) * self.keep))] if candidates else []
+            self.logger.info('Screened %d configs on %d bars, %d go on' % (len(rows), end, len(remaining)))
+
+        for index, result in zip(remaining, self._map([configs[i] for i in remaining], None)):
+            status = 'stopped' if result.pop('stopped', False) else 'done'
+            rows[index].update(result)
+            rows[index]['status'] = status
+
+        self.elapsed = time.perf_counter() - started
+
+        order = {'done': 0, 'screened': 1, 'stopped': 2}
+        rows.sort(key=lambda row: (order[row['status']], -row[self.score]))
+        return rows
+
+    def _map(self, configs: List[Dict], end: Optional[int]) -> List[Dict]:
+        batches = [configs[i:i + self.batch] for i in range(0, len(configs), self.batch)]
+
+        if self.workers <= 1 or len(batches) <= 1:
+            _init_worker(self.cache, self.base, self.settings)
+            return [result for batch in batches for result in _evaluate(batch, end)]
+
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+        with ProcessPoolExecutor(self.workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(self.cache, self.base, self.settings)) as pool:
+            return [result for results in pool.map(_evaluate, batches, [end] * len(batches)) for result in results]
+
+    @staticmethod
+    def write(rows: List[Dict], path: str, params: Sequence[str]):
+        """Results table as CSV, numbers rounded to 4 decimals"""
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(list(params) + list(METRICS) + ['status'])
+            for row in rows:
+                values = [row.get(name) for name in list(params) + list(METRICS)]
+                writer.writerow([round(value, 4) if isinstance(value, float) else value for value in values] + [row['status']])
+
+
+def parse_space(specs: Sequence[str]) -> Dict[str, List]:
+    """
+    Parse NAME=VALUES search space specs
+
+    VALUES is a comma list (10,20,30) or a start:stop:step range
+    (1.5:2.5:0.25, stop included).
+    """
+    space = {}
+    for spec in specs:
+        name, _, values = spec.partition('=')
+        if name not in PARAMETERS:
+            raise ValueError('Unknown parameter %r (one of %s)' % (name, ', '.join(PARAMETERS)))
+
+        kind = PARAMETERS[name]
+        if ':' in values:
+            start, stop, step = (float(part) for part in values.split(':'))
+            count = int(round((stop - start) / step)) + 1
+            items = [round(start + i * step, 10) for i in range(count)]
+            space[name] = [kind(item) if kind is int else item for item in items]
+        else:
+            space[name] = [value if kind is str else kind(value) for value in values.split(',')]
+    return space
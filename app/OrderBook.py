@@ -0,0 +1,269 @@
+# -*- coding: UTF-8 -*-
+# Local order book engine
+# Built from a REST depth snapshot and kept current with depth-diff events
+
+import time
+import logging
+import threading
+from bisect import bisect_left, insort
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class BookSide:
+    """
+    One side of the book: price levels in a sorted array plus a price -> qty map
+
+    Best price is always index 0, so top-of-book is O(1); inserting or
+    removing a level is a binary search into the sorted array.
+    """
+
+    def __init__(self, descending: bool):
+        self._sign = -1.0 if descending else 1.0
+        self._keys = []    # sign * price, ascending (best first)
+        self._levels = {}  # price -> qty
+
+    def set(self, price: float, qty: float):
+        """Set absolute quantity at a price level (0 removes the level)"""
+        key = self._sign * price
+
+        if qty == 0:
+            if price in self._levels:
+                del self._levels[price]
+                del self._keys[bisect_left(self._keys, key)]
+            return
+
+        if price not in self._levels:
+            insort(self._keys, key)
+        self._levels[price] = qty
+
+    def clear(self):
+        self._keys = []
+        self._levels = {}
+
+    def best(self) -> Optional[Tuple[float, float]]:
+        if not self._keys:
+            return None
+        price = self._sign * self._keys[0]
+        return price, self._levels[price]
+
+    def levels(self, n: int) -> List[Tuple[float, float]]:
+        """Best n (price, qty) levels"""
+        sign = self._sign
+        levels = self._levels
+        return [(sign * key, levels[sign * key]) for key in self._keys[:n]]
+
+    def qty_at(self, price: float) -> float:
+        return self._levels.get(price, 0.0)
+
+    def vwap(self, size: float) -> Optional[float]:
+        """Average fill price for taking `size` from this side, None if the book is too thin"""
+        if size <= 0:
+            # Nothing to take: the price of the first unit
+            best = self.best()
+            return best[0] if best else None
+
+        remaining = size
+        cost = 0.0
+        sign = self._sign
+
+        for key in self._keys:
+            price = sign * key
+            take = min(remaining, self._levels[price])
+            cost += take * price
+            remaining -= take
+            if remaining <= 0:
+                return cost / size
+
+        return None
+
+    def __len__(self):
+        return len(self._keys)
+
+
+class OrderBook:
+    """
+    Per-symbol local order book
+
+    Follows Binance's "how to manage a local order book" procedure:
+    - depth-diff events are buffered until a snapshot is loaded
+    - events with u <= lastUpdateId are dropped
+    - a gap (U > lastUpdateId + 1) marks the book out of sync, buffers
+      events again and triggers a resync from a fresh snapshot
+
+    Readers take the same short lock as writers, so they never see a half
+    applied update.
+    """
+
+    MAX_BUFFER = 10000  # events kept while waiting for a snapshot
+    RESYNC_RETRY = 1.0  # seconds between failed snapshot attempts
+
+    def __init__(self, symbol: str, snapshot: Callable[[str], Dict] = None):
+        """
+        Args:
+            symbol: Market symbol
+            snapshot: Callable returning a REST depth snapshot for resync
+                      ({'lastUpdateId', 'bids', 'asks'}), None disables resync
+        """
+        self.symbol = symbol
+        self.snapshot = snapshot
+
+        self.bids = BookSide(descending=True)
+        self.asks = BookSide(descending=False)
+        self.last_update_id = 0
+        self.synced = False
+        self.updated = 0.0  # monotonic time of last change
+        self.resyncs = 0
+
+        self._buffer = []
+        self._resyncing = False
+        self._lock = threading.Lock()
+
+        self.logger = logging.getLogger('OrderBook-%s' % symbol)
+
+    @classmethod
+    def from_snapshot(cls, symbol: str, snapshot: Dict) -> 'OrderBook':
+        book = cls(symbol)
+        book.load(snapshot)
+        return book
+
+    # --- writers ---
+
+    def load(self, snapshot: Dict):
+        """Replace book contents with a REST snapshot and replay buffered diffs"""
+        with self._lock:
+            self.bids.clear()
+            self.asks.clear()
+            for price, qty in snapshot['bids']:
+                self.bids.set(float(price), float(qty))
+            for price, qty in snapshot['asks']:
+                self.asks.set(float(price), float(qty))
+
+            self.last_update_id = snapshot.get('lastUpdateId', 0)
+            self.synced = True
+            self.updated = time.monotonic()
+
+            buffered, self._buffer = self._buffer, []
+            for i, event in enumerate(buffered):
+                if not self._apply(event):
+                    self._buffer = buffered[i:]
+                    break
+
+    def apply(self, event: Dict) -> bool:
+        """
+        Apply a depthUpdate event ({'U', 'u', 'b', 'a'})
+
+        Returns:
+            True if the book is in sync after the event
+        """
+        with self._lock:
+            if not self.synced:
+                self._buffer_event(event)
+                resync = self._should_resync()
+            else:
+                if self._apply(event):
+                    return True
+                resync = self._should_resync()
+
+        if resync:
+            self._start_resync()
+        return False
+
+    def _apply(self, event: Dict) -> bool:
+        first, last = event['U'], event['u']
+
+        if last <= self.last_update_id:
+            return True
+
+        if first > self.last_update_id + 1:
+            self.logger.warning('Depth gap: expected %d, got %d-%d' % (self.last_update_id + 1, first, last))
+            self.synced = False
+            self._buffer = [event]
+            return False
+
+        for price, qty in event['b']:
+            self.bids.set(float(price), float(qty))
+        for price, qty in event['a']:
+            self.asks.set(float(price), float(qty))
+
+        self.last_update_id = last
+        self.updated = time.monotonic()
+        return True
+
+    def _buffer_event(self, event: Dict):
+        self._buffer.append(event)
+        if len(self._buffer) > self.MAX_BUFFER:
+            del self._buffer[0]
+
+    def _should_resync(self) -> bool:
+        if self.snapshot is None or self._resyncing:
+            return False
+        self._resyncing = True
+        return True
+
+    def _start_resync(self):
+        thread = threading.Thread(target=self.resync, name='OrderBookResync-%s' % self.symbol)
+        thread.daemon = True
+        thread.start()
+
+    def resync(self):
+        """Fetch a fresh snapshot and replay buffered diffs on top of it"""
+        try:
+            snapshot = self.snapshot(self.symbol)
+            self.load(snapshot)
+            self.resyncs += 1
+            self.logger.info('Order book synced at lastUpdateId %d' % self.last_update_id)
+        except Exception as e:
+            self.logger.error('Order book resync failed: %s' % e)
+            time.sleep(self.RESYNC_RETRY)
+        finally:
+            with self._lock:
+                self._resyncing = False
+                retry = not self.synced and self._buffer and self._should_resync()
+            if retry:
+                self._start_resync()
+
+    # --- readers ---
+
+    def best_bid(self) -> Optional[Tuple[float, float]]:
+        with self._lock:
+            return self.bids.best()
+
+    def best_ask(self) -> Optional[Tuple[float, float]]:
+        with self._lock:
+            return self.asks.best()
+
+    def top(self) -> Tuple[Optional[float], Optional[float]]:
+        """Best (bid, ask) prices; None for an empty side"""
+        with self._lock:
+            bid = self.bids.best()
+            ask = self.asks.best()
+        return (bid[0] if bid else None), (ask[0] if ask else None)
+
+    def spread(self) -> Optional[float]:
+        bid, ask = self.top()
+        if bid is None or ask is None:
+            return None
+        return ask - bid
+
+    def mid(self) -> Optional[float]:
+        bid, ask = self.top()
+        if bid is None or ask is None:
+            return None
+        return (bid + ask) / 2
+
+    def depth(self, n: int = 5) -> Tuple[List[Tuple[float, float]], List[Tuple[float, float]]]:
+        """Best n (price, qty) levels per side"""
+        with self._lock:
+            return self.bids.levels(n), self.asks.levels(n)
+
+    def vwap(self, side: str, size: float) -> Optional[float]:
+        """
+        Average price to fill `size` against the book
+
+        Args:
+            side: 'BUY' walks the asks, 'SELL' walks the bids
+            size: Base quantity
+        """
+        with self._lock:
+            book_side = self.asks if side == 'BUY' else self.bids
+            return book_side.vwap(size)
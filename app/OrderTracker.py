@@ -0,0 +1,273 @@
+# -*- coding: UTF-8 -*-
+# Order lifecycle tracking for Binance Trader
+# NEW -> PARTIALLY_FILLED -> FILLED / CANCELED / EXPIRED, driven by order updates
+
+import time
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+
+from Scheduler import Scheduler
+from Metrics import Metrics
+from UserDataStream import FINAL_STATUSES
+
+# Order in which statuses can follow each other; finals never change again
+STATUS_RANK = {
+    'NEW': 0,
+    'PARTIALLY_FILLED': 1,
+    'PENDING_CANCEL': 2,
+}
+
+
+class TrackedOrder:
+    """
+    One order and its fill accounting
+
+    executed_qty and quote_qty are the exchange's cumulative values, so
+    avg_price is exact however many partial fills there were. `context`
+    holds whatever the owner needs when the callbacks fire.
+    """
+
+    def __init__(self, symbol: str, order_id: int, side: str, quantity: float, price: float, context: Dict = None):
+        self.symbol = symbol
+        self.order_id = order_id
+        self.side = side
+        self.quantity = quantity
+        self.price = price
+        self.context = context or {}
+
+        self.status = None
+        self.executed_qty = 0.0
+        self.quote_qty = 0.0
+        self.fills = 0
+        self.created = time.monotonic()
+        self.updated = None
+
+        self.on_fill = None     # callback(order, qty, price)
+        self.on_done = None     # callback(order)
+        self.on_timeout = None  # callback(order)
+
+        self._timer = None
+        self._lock = threading.Lock()
+
+    @property
+    def avg_price(self) -> float:
+        return self.quote_qty / self.executed_qty if self.executed_qty else 0.0
+
+    @property
+    def remaining(self) -> float:
+        return max(self.quantity - self.executed_qty, 0.0)
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINAL_STATUSES
+
+    def __repr__(self):
+        return 'TrackedOrder(%s %s #%s %s %.8f/%.8f @ %.8f)' % (
+            self.symbol, self.side, self.order_id, self.status, self.executed_qty, self.quantity, self.avg_price)
+
+
+class OrderTracker:
+    """
+    Event-driven order state machine
+
+    Order updates (executionReport via AccountView, REST query_order or
+    the response of the order itself) are applied with update(). Stale or
+    out-of-order updates are dropped: a final status never changes and the
+    cumulative fill never goes back. Each accepted fill calls on_fill, the
+    final status calls on_done once, and a timeout set with track() or
+    expire_in() calls on_timeout from the scheduler unless the order is
+    done by then. Callbacks run on the scheduler's workers, never on the
+    thread that delivered the update.
+
+    Each order has its own lock, so unrelated orders never wait on each
+    other. Without a stream, open orders are re-fetched every
+    `poll_interval` seconds through `fetch(symbol, order_id)`.
+    """
+
+    def __init__(self, scheduler: Scheduler = None, fetch: Callable = None, poll_interval: float = 1.0):
+        """
+        Args:
+            scheduler: Runs timeouts, polls and callbacks (a new one if omitted)
+            fetch: fetch(symbol, order_id) -> query_order dict, for polling
+            poll_interval: Seconds between polls of an open order
+        """
+        self.scheduler = scheduler or Scheduler(name='OrderTracker')
+        self.fetch = fetch
+        self.poll_interval = poll_interval
+
+        self.logger = logging.getLogger('OrderTracker')
+
+        self._orders = {}
+        self._orders_lock = threading.Lock()
+
+        self.updates = 0
+        self.stale = 0
+
+    def track(
+        self,
+        symbol: str,
+        order_id: int,
+        side: str,
+        quantity: float,
+        price: float = 0.0,
+        timeout: float = None,
+        on_fill: Callable = None,
+        on_done: Callable = None,
+        on_timeout: Callable = None,
+        **context
+    ) -> TrackedOrder:
+        """
+        Start tracking an order placed on the exchange
+
+        Args:
+            timeout: Seconds until on_timeout (None = no timeout)
+            on_fill: callback(order, qty, price) for each new fill
+            on_done: callback(order) once the status is final
+            on_timeout: callback(order) if still open after timeout
+            **context: Stored on order.context for the callbacks
+
+        Returns:
+            The TrackedOrder
+        """
+        order = TrackedOrder(symbol, order_id, side, float(quantity), float(price), context)
+        order.on_fill = on_fill
+        order.on_done = on_done
+        order.on_timeout = on_timeout
+
+        with self._orders_lock:
+            self._orders[order_id] = order
+
+        if timeout is not None:
+            self.expire_in(order, timeout, on_timeout)
+        if self.fetch is not None:
+            self.scheduler.call_later(self.poll_interval, self._poll, order)
+
+        return order
+
+    def expire_in(self, order: TrackedOrder, timeout: float, on_timeout: Callable = None):
+        """(Re)arm the timeout of an open order"""
+        with order._lock:
+            if order.done:
+                return
+            if on_timeout is not None:
+                order.on_timeout = on_timeout
+            if order._timer is not None:
+                order._timer.cancel()
+            order._timer = self.scheduler.call_later(timeout, self._expire, order)
+
+    def update(self, data: Dict) -> bool:
+        """
+        Apply an order update in query_order format
+
+        Returns:
+            True if the update changed a tracked order
+        """
+        order = self._orders.get(data.get('orderId'))
+        if order is None:
+            return False
+
+        status = data['status']
+        executed = float(data.get('executedQty', 0))
+        quote = float(data.get('cummulativeQuoteQty', 0))
+
+        with order._lock:
+            if not self._accept(order, status, executed):
+                self.stale += 1
+                return False
+
+            fill_qty = executed - order.executed_qty
+            fill_quote = quote - order.quote_qty
+            if fill_qty > 0:
+                # Orders from before 2018 report a negative cummulativeQuoteQty
+                if quote < 0:
+                    fill_quote = fill_qty * float(data.get('price') or order.price)
+                    quote = order.quote_qty + fill_quote
+                order.executed_qty = executed
+                order.quote_qty = quote
+                order.fills += 1
+
+            previous = order.status
+            order.status = status
+            order.updated = time.monotonic()
+            self.updates += 1
+
+            finished = order.done
+            if finished and order._timer is not None:
+                order._timer.cancel()
+                order._timer = None
+
+        if previous != status:
+            self.logger.debug('%s %s #%s %s -> %s' % (order.symbol, order.side, order.order_id, previous, status))
+
+        if finished:
+            self.forget(order.order_id)
+            if status == 'FILLED':
+                Metrics.inc('orders_filled_total', symbol=order.symbol, side=order.side)
+
+        fill_price = fill_quote / fill_qty if fill_qty > 0 else None
+        if (fill_price is not None and order.on_fill is not None) or (finished and order.on_done is not None):
+            self.scheduler.submit(self._notify, order, fill_qty, fill_price, finished)
+
+        return True
+
+    def attach(self, view):
+        """Apply every order update of a UserDataStream.AccountView"""
+        view.add_listener(lambda data, previous: self.update(data))
+
+    def get(self, order_id: int) -> Optional[TrackedOrder]:
+        return self._orders.get(order_id)
+
+    def open_orders(self, symbol: str = None) -> List[TrackedOrder]:
+        with self._orders_lock:
+            orders = list(self._orders.values())
+        return [order for order in orders if symbol is None or order.symbol == symbol]
+
+    def forget(self, order_id: int):
+        """Stop tracking an order (done orders are forgotten automatically)"""
+        with self._orders_lock:
+            order = self._orders.pop(order_id, None)
+        if order is not None and order._timer is not None:
+            order._timer.cancel()
+
+    @staticmethod
+    def _accept(order, status, executed) -> bool:
+        if order.done or executed < order.executed_qty:
+            return False
+        if status in FINAL_STATUSES or order.status is None:
+            return True
+        if executed > order.executed_qty:
+            return True
+        return STATUS_RANK.get(status, 0) > STATUS_RANK.get(order.status, 0)
+
+    @staticmethod
+    def _notify(order, fill_qty, fill_price, finished):
+        # One job per update, so on_fill always runs before on_done
+        if fill_price is not None and order.on_fill is not None:
+            order.on_fill(order, fill_qty, fill_price)
+        if finished and order.on_done is not None:
+            order.on_done(order)
+
+    def _expire(self, order):
+        with order._lock:
+            if order.done or order._timer is None:
+                return
+            order._timer = None
+        if order.on_timeout is not None:
+            order.on_timeout(order)
+
+    def _poll(self, order):
+        if order.done or self._orders.get(order.order_id) is not order:
+            return
+
+        # Skip the request if a stream update arrived since the last poll
+        if order.updated is None or time.monotonic() - order.updated >= self.poll_interval:
+            try:
+                data = self.fetch(order.symbol, order.order_id)
+                if data:
+                    self.update(data)
+            except Exception as e:
+                self.logger.warning('Order #%s poll failed: %s' % (order.order_id, e))
+
+        if not order.done:
+            self.scheduler.call_later(self.poll_interval, self._poll, order)
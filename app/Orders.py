@@ -1,19 +1,103 @@
 # -*- coding: UTF-8 -*-
 # @yasinkuyu
+import os
+import time
 import config 
 
 from BinanceAPI import BinanceAPI
 from Messages import Messages
+from OrderBook import OrderBook
+from ExchangeInfo import ExchangeInfoCache
+from UserDataStream import UserDataStream, FINAL_STATUSES
+from Latency import Latency
+from MetricsServer import MetricsServer
+from Metrics import Metrics
 
 # Define Custom import vars
 client = BinanceAPI(config.api_key, config.api_secret)
 
+# Symbol filters, cached on disk and shared by every bot in this checkout
+exchange_info_file = getattr(config, 'exchange_info_file', None)
+if exchange_info_file is None:
+    exchange_info_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../db/exchange_info.json')
+exchange_info = ExchangeInfoCache(client, exchange_info_file or None, getattr(config, 'exchange_info_ttl', 3600))
+
+# Streaming market view (MarketData.MarketView), None = REST only
+market = None
+market_max_age = getattr(config, 'stream_max_age', 5)
+
+# Streaming orders and balances (UserDataStream.AccountView), None = REST only
+user_data = None
+
+# CANCEL_REJECTED (-2011) and NO_SUCH_ORDER (-2013): the order is not open on the exchange
+UNKNOWN_ORDER = (-2011, -2013)
+
+# Latency spans (API endpoints, indicators, strategy, database), logged every latency_log_interval seconds
+if getattr(config, 'latency_enabled', False):
+    Latency.enable(getattr(config, 'latency_log_interval', 60))
+
+# Local metrics endpoint (/latency JSON, /metrics Prometheus text), None = off
+metrics_port = getattr(config, 'metrics_port', None)
+if metrics_port:
+    metrics_server = MetricsServer.shared(metrics_port)
+    Latency.serve(metrics_server)
+    Metrics.serve(metrics_server)
+    Metrics.collect(Metrics.governor(BinanceAPI.shared_governor()))
+
 class Orders():
+
+    @staticmethod
+    def use_client(api):
+        '''
+        Send every call through another client with the BinanceAPI surface,
+        e.g. SimExchange.SimExchange to run offline.
+        Its symbol filters are cached in memory only.
+        '''
+        global client, exchange_info
+        client = api
+        exchange_info = ExchangeInfoCache(api, None, getattr(config, 'exchange_info_ttl', 3600))
+
+    @staticmethod
+    def use_market(view):
+        '''
+        Read ticker and order book from a streaming MarketView.
+        REST is still used whenever the view is missing or stale.
+        '''
+        global market
+        market = view
+
+    @staticmethod
+    def user_data_stream():
+        # listenKey stream on the shared client; start() it and pass .view to use_user_data
+        return UserDataStream(client)
+
+    @staticmethod
+    def use_user_data(view):
+        '''
+        Read order status and balances from a streaming AccountView.
+        REST is still used while the stream is down or the order is unknown.
+        '''
+        global user_data
+        user_data = view
+
+    @staticmethod
+    def warm_up():
+        try:
+            client.warm_up()
+        except Exception as e:
+            print('warm_up Exception: %s' % e)
  
+    @staticmethod
+    def count(order, symbol, side, type):
+        # orders_placed_total / orders_rejected_total for /metrics
+        name = 'orders_rejected_total' if 'msg' in order else 'orders_placed_total'
+        Metrics.inc(name, symbol=symbol, side=side, type=type)
+
     @staticmethod
     def buy_limit(symbol, quantity, buyPrice):
 
         order = client.buy_limit(symbol, quantity, buyPrice)
+        Orders.count(order, symbol, 'BUY', 'LIMIT')
 
         if 'msg' in order:
             Messages.get(order['msg'])
@@ -25,7 +109,8 @@ class Orders():
     @staticmethod
     def sell_limit(symbol, quantity, sell_price):
 
-        order = client.sell_limit(symbol, quantity, sell_price)  
+        order = client.sell_limit(symbol, quantity, sell_price)
+        Orders.count(order, symbol, 'SELL', 'LIMIT')
 
         if 'msg' in order:
             Messages.get(order['msg'])
@@ -35,7 +120,8 @@ class Orders():
     @staticmethod
     def buy_market(symbol, quantity):
 
-        order = client.buy_market(symbol, quantity)  
+        order = client.buy_market(symbol, quantity)
+        Orders.count(order, symbol, 'BUY', 'MARKET')
 
         if 'msg' in order:
             Messages.get(order['msg'])
@@ -45,7 +131,8 @@ class Orders():
     @staticmethod
     def sell_market(symbol, quantity):
 
-        order = client.sell_market(symbol, quantity)  
+        order = client.sell_market(symbol, quantity)
+        Orders.count(order, symbol, 'SELL', 'MARKET')
 
         if 'msg' in order:
             Messages.get(order['msg'])
@@ -58,8 +145,14 @@ class Orders():
         try:
             
             order = client.cancel(symbol, orderId)
+            if order.get('code') in UNKNOWN_ORDER:
+                # Already filled, cancelled or never placed: nothing to cancel
+                print('cancel_order %s: %s' % (orderId, order['msg']))
+                return False
             if 'msg' in order:
                 Messages.get(order['msg'])
+            else:
+                Metrics.inc('orders_cancelled_total', symbol=symbol)
             
             print('Profit loss, called order, %s' % (orderId))
         
@@ -71,11 +164,18 @@ class Orders():
 
     @staticmethod
     def get_order_book(symbol):
+        if market is not None:
+            top = market.top(symbol, market_max_age)
+            if top is not None:
+                return top
+
         try:
 
-            orders = client.get_order_books(symbol, 5)
-            lastBid = float(orders['bids'][0][0]) #last buy price (bid)
-            lastAsk = float(orders['asks'][0][0]) #last sell price (ask)
+            book = OrderBook.from_snapshot(symbol, client.get_order_books(symbol, 5))
+            lastBid, lastAsk = book.top() #last buy price (bid), last sell price (ask)
+
+            if lastBid is None or lastAsk is None:
+                raise ValueError('empty order book')
      
             return lastBid, lastAsk
     
@@ -83,17 +183,36 @@ class Orders():
             print('get_order_book Exception: %s' % e)
             return 0, 0
 
+    @staticmethod
+    def get_depth_snapshot(symbol, limit=1000):
+        # Full depth used to (re)sync a streamed OrderBook
+        return client.get_order_books(symbol, limit)
+
     @staticmethod
     def get_order(symbol, orderId):
+        if user_data is not None and user_data.connected:
+            order = user_data.order(orderId)
+            if order is not None:
+                return order
+
         try:
 
             order = client.query_order(symbol, orderId)
 
+            if order.get('code') in UNKNOWN_ORDER:
+                print('get_order %s: %s' % (orderId, order['msg']))
+                return False
+
             if 'msg' in order:
                 #import ipdb; ipdb.set_trace()
                 Messages.get(order['msg']) # TODO
                 return False
 
+            # Later updates of this order arrive on the stream,
+            # which may already have a newer one than this snapshot
+            if user_data is not None and not user_data.set_order(order):
+                return user_data.order(orderId)
+
             return order
 
         except Exception as e:
@@ -102,21 +221,53 @@ class Orders():
     
     @staticmethod
     def get_order_status(symbol, orderId):
+        order = Orders.get_order(symbol, orderId)
+        return order['status'] if order else None
+
+    @staticmethod
+    def wait_order(symbol, orderId, timeout):
+        '''
+        Wait up to timeout seconds for the order to be filled, canceled or expired.
+        Streaming returns as soon as the executionReport arrives,
+        otherwise the order is queried once after the full wait.
+        '''
+        if user_data is not None and user_data.connected and user_data.order(orderId) is not None:
+            return user_data.wait_order(orderId, FINAL_STATUSES, timeout)
+
+        time.sleep(timeout)
+        return Orders.get_order(symbol, orderId)
+
+    @staticmethod
+    def get_balance(asset):
+        if user_data is not None and user_data.connected:
+            free = user_data.balance(asset)
+            if free is not None:
+                return free
+
         try:
 
-            order = client.query_order(symbol, orderId)
-    
-            if 'msg' in order:
-                Messages.get(order['msg'])
-        
-            return order['status']
- 
+            account = client.get_account()
+            if 'msg' in account:
+                Messages.get(account['msg'])
+                return None
+
+            if user_data is not None:
+                user_data.seed_balances(account['balances'])
+
+            balances = {item['asset']: item for item in account['balances']}
+            return float(balances[asset]['free']) if asset in balances else 0.0
+
         except Exception as e:
-            print('get_order_status Exception: %s' % e)
+            print('get_balance Exception: %s' % e)
             return None
     
     @staticmethod
     def get_ticker(symbol):
+        if market is not None:
+            price = market.last_price(symbol, market_max_age)
+            if price is not None:
+                return price
+
         try:        
     
             ticker = client.get_ticker(symbol)
@@ -129,12 +280,22 @@ class Orders():
     def get_info(symbol):
         try:        
     
-            info = client.get_exchange_info()
-            
             if symbol != "":
-                return [market for market in info['symbols'] if market['symbol'] == symbol][0]
- 
-            return info
+                filters = exchange_info.get(symbol)
+                return filters.info if filters else None
+
+            return client.get_exchange_info()
             
         except Exception as e:
-            print('get_info Exception: %s' % e)
\ No newline at end of file
+            print('get_info Exception: %s' % e)
+
+    @staticmethod
+    def get_filters(symbol):
+        '''
+        Parsed LOT_SIZE / PRICE_FILTER / NOTIONAL rules (ExchangeInfo.SymbolFilters),
+        None if the symbol does not exist.
+        '''
+        try:
+            return exchange_info.get(symbol)
+        except Exception as e:
+            print('get_filters Exception: %s' % e)
\ No newline at end of file
@@ -0,0 +1,384 @@
+# -*- coding: UTF-8 -*-
+# Request weight and order rate governor for Binance Trader
+# Shares the IP's limit budget between threads and trader processes
+
+import time
+import sqlite3
+import asyncio
+import heapq
+import logging
+import itertools
+import threading
+from typing import Dict
+
+try:
+    from urlparse import urlsplit, parse_qs
+# python3
+except ImportError:
+    from urllib.parse import urlsplit, parse_qs
+
+
+class RateLimitError(Exception):
+    """Raised when a request cannot get budget before its timeout"""
+
+
+class RateGovernor:
+    """
+    Sliding-window accounting of Binance request weight and order counts
+
+    Every request asks for its endpoint's weight before it is sent. Usage is
+    kept per second for the last minute (request weight, orders per 10s) and
+    per minute for the last day (orders per day), and reconciled with the
+    X-MBX-USED-WEIGHT-1M / X-MBX-ORDER-COUNT-* headers the exchange returns,
+    which also cover traffic this process cannot see. A 429/418 response
+    stops all requests until its Retry-After has passed.
+
+    Waiting requests are served by priority: order placement and cancels
+    first, then account queries, then market data. Market data may only use
+    the budget up to `reserve` below the limit, so orders still go through
+    when polling has exhausted its share.
+
+    The usage lives in SQLite: in memory for a single process, or in a file
+    (`path`) that every trader process on the same IP opens to share one
+    budget.
+    """
+
+    ORDER = 0
+    ACCOUNT = 1
+    MARKET = 2
+
+    # Request weight per endpoint (last path segment), Binance spot API
+    WEIGHTS = {
+        'ping': 1,
+        'time': 1,
+        'exchangeInfo': 20,
+        'trades': 25,
+        'historicalTrades': 25,
+        'klines': 2,
+        'account': 20,
+        'myTrades': 20,
+        'userDataStream': 2,
+    }
+
+    # Order book weight by limit (upper bound -> weight)
+    DEPTH_WEIGHTS = ((100, 5), (500, 25), (1000, 50), (5000, 250))
+
+    def __init__(
+        self,
+        weight_limit: int = 6000,
+        order_limit_10s: int = 100,
+        order_limit_day: int = 200000,
+        reserve: float = 0.1,
+        path: str = None
+    ):
+        """
+        Args:
+            weight_limit: Request weight per minute for the IP
+            order_limit_10s: New orders per 10 seconds for the account
+            order_limit_day: New orders per day for the account
+            reserve: Share of each limit kept back from market data requests
+            path: SQLite file shared between processes (None = this process only)
+        """
+        self.weight_limit = weight_limit
+        self.order_limit_10s = order_limit_10s
+        self.order_limit_day = order_limit_day
+        self.reserve = reserve
+        self.path = path
+
+        self.logger = logging.getLogger('RateGovernor')
+
+        self._db = sqlite3.connect(path or ':memory:', timeout=10, check_same_thread=False,
+                                   isolation_level=None)
+        if path:
+            # Readers never block the writer; commits skip the fsync (a crash only loses recent usage)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript('''
+            CREATE TABLE IF NOT EXISTS usage (second INTEGER PRIMARY KEY, weight INTEGER, orders INTEGER);
+            CREATE TABLE IF NOT EXISTS daily (minute INTEGER PRIMARY KEY, orders INTEGER);
+            CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value REAL);
+        ''')
+
+        self._cond = threading.Condition()
+        self._waiters = []
+        self._sequence = itertools.count()
+
+        # Header values last written by update(), unchanged ones are not written again
+        self._reported: Dict[str, float] = {}
+
+        self.requests = 0
+        self.waits = 0
+        self.waited = 0.0
+        self.bans = 0
+
+    # --- classification ---
+
+    @classmethod
+    def weight(cls, method: str, url: str) -> int:
+        """Request weight of a call"""
+        parts = urlsplit(url)
+        endpoint = parts.path.rstrip('/').rsplit('/', 1)[-1]
+        query = parse_qs(parts.query)
+
+        if endpoint == 'depth':
+            limit = int(query.get('limit', ['100'])[0])
+            for bound, weight in cls.DEPTH_WEIGHTS:
+                if limit <= bound:
+                    return weight
+            return cls.DEPTH_WEIGHTS[-1][1]
+
+        if endpoint == 'order':
+            return 4 if method == 'GET' else 1
+
+        if endpoint == 'openOrders':
+            return 6 if 'symbol' in query else 80
+
+        if endpoint in ('24hr', 'price', 'bookTicker'):
+            if 'symbol' in query:
+                return 2
+            return 80 if endpoint == '24hr' else 4
+
+        return cls.WEIGHTS.get(endpoint, 1)
+
+    @staticmethod
+    def priority(method: str, url: str) -> int:
+        """ORDER for placement and cancels, ACCOUNT for other signed calls, MARKET otherwise"""
+        path = urlsplit(url).path.rstrip('/')
+        if path.endswith(('/order', '/openOrders')) and method in ('POST', 'DELETE'):
+            return RateGovernor.ORDER
+        if path.endswith(('/order', '/openOrders', '/account', '/myTrades', '/userDataStream')):
+            return RateGovernor.ACCOUNT
+        return RateGovernor.MARKET
+
+    @staticmethod
+    def orders(method: str, url: str) -> int:
+        """New orders counted against the order rate limits"""
+        return 1 if method == 'POST' and urlsplit(url).path.rstrip('/').endswith('/order') else 0
+
+    # --- acquiring budget ---
+
+    def acquire(self, method: str, url: str, priority: int = None, timeout: float = None) -> int:
+        """
+        Block until the call fits in the budget, then record it
+
+        Args:
+            method: HTTP method
+            url: Request url (with query string)
+            priority: ORDER, ACCOUNT or MARKET (default: derived from the call)
+            timeout: Seconds to wait at most (None = no limit)
+
+        Returns:
+            The weight recorded
+
+        Raises:
+            RateLimitError: No budget within timeout
+        """
+        weight = self.weight(method, url)
+        orders = self.orders(method, url)
+        if priority is None:
+            priority = self.priority(method, url)
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        ticket = (priority, next(self._sequence))
+        started = time.monotonic()
+
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    # Only the most urgent waiter may take budget
+                    wait = 0.05
+                    if self._waiters[0] == ticket:
+                        wait = self._reserve(weight, orders, priority)
+                        if wait == 0:
+                            break
+
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise RateLimitError('No rate limit budget for %s %s within %.1fs'
+                                                 % (method, urlsplit(url).path, timeout))
+                        wait = min(wait, remaining)
+                    self._cond.wait(wait)
+            finally:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+        self._count(time.monotonic() - started)
+        return weight
+
+    async def acquire_async(self, method: str, url: str, priority: int = None, timeout: float = None) -> int:
+        """acquire() for event loops: sleeps with asyncio instead of blocking the loop"""
+        weight = self.weight(method, url)
+        orders = self.orders(method, url)
+        if priority is None:
+            priority = self.priority(method, url)
+
+        def reserve():
+            with self._cond:
+                return self._reserve(weight, orders, priority) if not self._waiters else 0.05
+
+        started = time.monotonic()
+        while True:
+            # A shared state file can wait on another process's lock: keep it off the loop
+            wait = await asyncio.to_thread(reserve) if self.path else reserve()
+            if wait == 0:
+                break
+            if timeout is not None and time.monotonic() - started + wait > timeout:
+                raise RateLimitError('No rate limit budget for %s %s within %.1fs'
+                                     % (method, urlsplit(url).path, timeout))
+            await asyncio.sleep(wait)
+
+        self._count(time.monotonic() - started)
+        return weight
+
+    def _count(self, waited):
+        self.requests += 1
+        if waited > 0.001:
+            self.waits += 1
+            self.waited += waited
+
+    def _reserve(self, weight: int, orders: int, priority: int) -> float:
+        """Record the call if it fits; otherwise return seconds to wait before retrying"""
+        now = time.time()
+        second = int(now)
+        share = 1.0 if priority == self.ORDER else 1.0 - self.reserve
+
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            banned_until = self._state('banned_until')
+            if banned_until > now:
+                return banned_until - now
+
+            db.execute('DELETE FROM usage WHERE second <= ?', (second - 60,))
+            db.execute('DELETE FROM daily WHERE minute <= ?', ((second - 86400) // 60,))
+
+            used_weight = db.execute('SELECT COALESCE(SUM(weight), 0) FROM usage').fetchone()[0]
+            if self._state('server_minute') == second // 60:
+                used_weight = max(used_weight, self._state('server_weight'))
+
+            if used_weight + weight > self.weight_limit * share:
+                return self._expiry(second, 60)
+
+            if orders:
+                used_10s = db.execute('SELECT COALESCE(SUM(orders), 0) FROM usage WHERE second > ?',
+                                      (second - 10,)).fetchone()[0]
+                used_day = db.execute('SELECT COALESCE(SUM(orders), 0) FROM daily').fetchone()[0]
+                if self._state('server_orders_second') > second - 10:
+                    used_10s = max(used_10s, self._state('server_orders_10s'))
+                used_day = max(used_day, self._state('server_orders_day'))
+
+                if used_10s + orders > self.order_limit_10s:
+                    return self._expiry(second, 10)
+                if used_day + orders > self.order_limit_day:
+                    return 60.0
+
+            db.execute('INSERT INTO usage VALUES (?, ?, ?) ON CONFLICT(second) DO UPDATE SET '
+                       'weight = weight + excluded.weight, orders = orders + excluded.orders',
+                       (second, weight, orders))
+            if orders:
+                db.execute('INSERT INTO daily VALUES (?, ?) ON CONFLICT(minute) DO UPDATE SET '
+                           'orders = orders + excluded.orders', (second // 60, orders))
+            return 0
+        finally:
+            db.execute('COMMIT')
+
+    def _expiry(self, second, window):
+        """Seconds until the oldest bucket of the window expires"""
+        oldest = self._db.execute('SELECT MIN(second) FROM usage WHERE second > ?',
+                                  (second - window,)).fetchone()[0]
+        if oldest is None:
+            return 1.0
+        return max(oldest + window - time.time(), 0.05)
+
+    def _state(self, key: str) -> float:
+        row = self._db.execute('SELECT value FROM state WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else 0
+
+    def _set_state(self, values: Dict[str, float]):
+        self._db.executemany('INSERT OR REPLACE INTO state VALUES (?, ?)', values.items())
+
+    # --- feedback from responses ---
+
+    def update(self, status: int, headers) -> None:
+        """
+        Reconcile with a response: used-weight and order-count headers, 429/418 bans
+
+        Args:
+            status: HTTP status code
+            headers: Response headers (case-insensitive mapping)
+        """
+        now = time.time()
+        values = {}
+
+        used = headers.get('X-MBX-USED-WEIGHT-1M') or headers.get('X-MBX-USED-WEIGHT')
+        if used is not None:
+            values['server_weight'] = float(used)
+            values['server_minute'] = int(now) // 60
+
+        orders_10s = headers.get('X-MBX-ORDER-COUNT-10S')
+        if orders_10s is not None:
+            values['server_orders_10s'] = float(orders_10s)
+            values['server_orders_second'] = int(now)
+
+        orders_day = headers.get('X-MBX-ORDER-COUNT-1D')
+        if orders_day is not None:
+            values['server_orders_day'] = float(orders_day)
+
+        if status in (418, 429):
+            retry_after = float(headers.get('Retry-After') or 60)
+            values['banned_until'] = now + retry_after
+            self.bans += 1
+            self.logger.warning('Rate limited (HTTP %d), pausing requests for %.1fs' % (status, retry_after))
+
+        if 'banned_until' not in values and all(
+                self._reported.get(key) == value for key, value in values.items() if key != 'server_orders_second'):
+            return
+
+        with self._cond:
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                if 'banned_until' in values:
+                    values['banned_until'] = max(values['banned_until'], self._state('banned_until'))
+                self._set_state(values)
+            finally:
+                self._db.execute('COMMIT')
+            self._reported.update(values)
+            self._cond.notify_all()
+
+    async def update_async(self, status: int, headers) -> None:
+        """update() for event loops, on a worker thread when the state is in a shared file"""
+        if self.path:
+            await asyncio.to_thread(self.update, status, headers)
+        else:
+            self.update(status, headers)
+
+    def usage(self) -> Dict[str, float]:
+        """Current weight and order usage as seen by this governor"""
+        second = int(time.time())
+        with self._cond:
+            db = self._db
+            weight = db.execute('SELECT COALESCE(SUM(weight), 0) FROM usage WHERE second > ?',
+                                (second - 60,)).fetchone()[0]
+            orders_10s = db.execute('SELECT COALESCE(SUM(orders), 0) FROM usage WHERE second > ?',
+                                    (second - 10,)).fetchone()[0]
+            orders_day = db.execute('SELECT COALESCE(SUM(orders), 0) FROM daily WHERE minute > ?',
+                                    ((second - 86400) // 60,)).fetchone()[0]
+            server_weight = self._state('server_weight') if self._state('server_minute') == second // 60 else 0
+            banned_until = self._state('banned_until')
+
+        return {
+            'weight': max(weight, server_weight),
+            'weight_limit': self.weight_limit,
+            'orders_10s': orders_10s,
+            'orders_day': orders_day,
+            'banned_for': max(banned_until - time.time(), 0.0),
+            'requests': self.requests,
+            'waits': self.waits,
+            'waited': self.waited
+        }
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,249 @@
+# -*- coding: UTF-8 -*-
+# Timer and worker pool for Binance Trader
+# Runs periodic ticks and delayed callbacks (order timeouts, polls) without blocking sleeps
+
+import time
+import heapq
+import logging
+import itertools
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Hashable
+
+
+class Timer:
+    """Handle of a scheduled call; cancel() before it is due to drop it"""
+
+    __slots__ = ('when', 'seq', 'fn', 'args', 'cancelled', 'inline')
+
+    def __init__(self, when: float, seq: int, fn: Callable, args: tuple, inline: bool = False):
+        self.when = when
+        self.seq = seq
+        self.fn = fn
+        self.args = args
+        self.cancelled = False
+        self.inline = inline  # run on the timer thread (short bookkeeping only)
+
+    def cancel(self):
+        self.cancelled = True
+
+    def __lt__(self, other):
+        return (self.when, self.seq) < (other.when, other.seq)
+
+
+class Job:
+    """
+    A periodic call created by Scheduler.every()
+
+    Ticks are due at start + n * interval, so timing does not drift with
+    the run time of the callback. A tick that comes due while the previous
+    run (or another job with the same key) is still going is skipped, not
+    queued. Lateness (start of the run minus its due time) of the last
+    `window` runs is kept for stats().
+    """
+
+    def __init__(self, interval: float, fn: Callable, args: tuple, key: Hashable = None,
+                 count: int = None, window: int = 1000):
+        self.interval = interval
+        self.fn = fn
+        self.args = args
+        self.key = key
+        self.count = count
+
+        self.ticks = 0      # runs started
+        self.skipped = 0    # ticks dropped because the previous run was busy
+        self.lateness = deque(maxlen=window)
+
+        self.cancelled = False
+        self._timer = None
+        self._finished = threading.Event()
+
+    def cancel(self):
+        self.cancelled = True
+        if self._timer is not None:
+            self._timer.cancel()
+        self._finished.set()
+
+    def wait(self, timeout: float = None) -> bool:
+        """Block until the job ran `count` times or was cancelled"""
+        return self._finished.wait(timeout)
+
+    def stats(self) -> Dict[str, float]:
+        """Tick counters and lateness in milliseconds"""
+        late = sorted(self.lateness)
+        if not late:
+            return {'ticks': self.ticks, 'skipped': self.skipped, 'late_avg_ms': 0.0, 'late_p99_ms': 0.0, 'late_max_ms': 0.0}
+        return {
+            'ticks': self.ticks,
+            'skipped': self.skipped,
+            'late_avg_ms': sum(late) / len(late) * 1000,
+            'late_p99_ms': late[min(int(len(late) * 0.99), len(late) - 1)] * 1000,
+            'late_max_ms': late[-1] * 1000
+        }
+
+
+class Scheduler:
+    """
+    One timer thread plus a fixed pool of worker threads
+
+    Due timers are handed to the pool, so a slow callback (a REST call)
+    never delays the timers behind it. Callback exceptions are logged and
+    do not stop the scheduler. Times are time.monotonic() seconds.
+
+    Periodic jobs (every()) with the same key never run at the same time,
+    which keeps one action per symbol in flight.
+    """
+
+    def __init__(self, workers: int = 4, name: str = 'Scheduler'):
+        """
+        Args:
+            workers: Worker threads running callbacks
+            name: Thread name prefix
+        """
+        self.name = name
+        self.logger = logging.getLogger(name)
+
+        self._timers = []
+        self._seq = itertools.count()
+        self._wake = threading.Condition()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self._thread = None
+        self._running = False
+
+        self._busy = set()  # keys of jobs running now
+        self._busy_lock = threading.Lock()
+
+    def every(self, interval: float, fn: Callable, *args, key: Hashable = None, count: int = None,
+              delay: float = 0.0) -> Job:
+        """
+        Run fn(*args) every interval seconds
+
+        Args:
+            key: Jobs sharing a key never overlap (default: the job itself)
+            count: Stop after this many runs (None = until cancelled)
+            delay: Seconds until the first tick
+
+        Returns:
+            The Job (cancel(), wait(), stats())
+        """
+        job = Job(interval, fn, args, key, count)
+        if job.key is None:
+            job.key = job
+        self._schedule(job, time.monotonic() + delay)
+        return job
+
+    def call_later(self, delay: float, fn: Callable, *args) -> Timer:
+        """Run fn(*args) on a worker after delay seconds"""
+        return self.call_at(time.monotonic() + delay, fn, *args)
+
+    def call_at(self, when: float, fn: Callable, *args) -> Timer:
+        """Run fn(*args) on a worker at monotonic time `when`"""
+        return self._push(Timer(when, next(self._seq), fn, args))
+
+    def _push(self, timer: Timer) -> Timer:
+        with self._wake:
+            heapq.heappush(self._timers, timer)
+            if self._timers[0] is timer:
+                self._wake.notify()
+        if self._thread is None:
+            self.start()
+        return timer
+
+    def submit(self, fn: Callable, *args):
+        """Run fn(*args) on a worker now"""
+        return self._pool.submit(self._call, fn, args)
+
+    def pending(self) -> int:
+        """Timers not yet due (cancelled ones included until they are popped)"""
+        return len(self._timers)
+
+    def start(self):
+        with self._wake:
+            if self._thread is not None:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._loop, name='%s-timer' % self.name)
+            self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self, wait: bool = True):
+        with self._wake:
+            self._running = False
+            self._wake.notify()
+        self._pool.shutdown(wait=wait)
+
+    def _loop(self):
+        while True:
+            with self._wake:
+                while self._running:
+                    now = time.monotonic()
+                    if self._timers and self._timers[0].when <= now:
+                        timer = heapq.heappop(self._timers)
+                        break
+                    self._wake.wait(self._timers[0].when - now if self._timers else None)
+                else:
+                    return
+
+            if timer.cancelled:
+                continue
+            if timer.inline:
+                self._call(timer.fn, timer.args)
+                continue
+
+            try:
+                self._pool.submit(self._call, timer.fn, timer.args)
+            except RuntimeError:
+                # Pool shut down
+                return
+
+    def _schedule(self, job, when):
+        job._timer = self._push(Timer(when, next(self._seq), self._tick, (job, when), inline=True))
+
+    def _tick(self, job, due):
+        # Timer thread: start the run unless the key is busy, then book the next tick
+        if job.cancelled:
+            return
+
+        with self._busy_lock:
+            busy = job.key in self._busy
+            if not busy:
+                self._busy.add(job.key)
+
+        if busy:
+            job.skipped += 1
+        else:
+            job.ticks += 1
+            last = job.count is not None and job.ticks >= job.count
+            try:
+                self._pool.submit(self._run_job, job, due, last)
+            except RuntimeError:
+                return
+
+            if last:
+                return
+
+        # Drift-free: next slot on the original grid, skipping slots already missed
+        now = time.monotonic()
+        due += job.interval
+        if due < now:
+            missed = int((now - due) // job.interval) + 1
+            job.skipped += missed
+            due += missed * job.interval
+        self._schedule(job, due)
+
+    def _run_job(self, job, due, last):
+        job.lateness.append(time.monotonic() - due)
+        try:
+            self._call(job.fn, job.args)
+        finally:
+            with self._busy_lock:
+                self._busy.discard(job.key)
+            if last:
+                job._finished.set()
+
+    def _call(self, fn, args):
+        try:
+            return fn(*args)
+        except Exception as e:
+            self.logger.error('Scheduled call %s failed: %s' % (getattr(fn, '__name__', fn), e), exc_info=True)
@@ -0,0 +1,294 @@
+# -*- coding: UTF-8 -*-
+# Process-pool sharding of strategy analysis for Binance Trader
+# Symbols are spread over worker processes by consistent hashing
+
+import bisect
+import hashlib
+import logging
+import pickle
+import struct
+import time
+import multiprocessing
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from KlineBuffer import KlineBuffer
+from BollingerStrategy import BollingerStrategy
+
+# Cycle message: header, then per symbol a record and its candles
+HEADER = struct.Struct('<II')        # cycle number, symbol records
+RECORD = struct.Struct('<HHd')       # symbol index in the shard, candles, current price
+CANDLE = struct.Struct('<dddddd')    # open time, open, high, low, close, volume
+
+# Fields of the analysis sent back to the execution process
+RESULT_FIELDS = ('signal', 'confidence', 'reason', 'entry_price', 'stop_loss', 'take_profit')
+
+
+class HashRing:
+    """
+    Consistent hash ring
+
+    Each node owns `replicas` points on a 64-bit ring and a key belongs to
+    the first point at or after its hash. Adding or removing a node only
+    moves the keys of that node, so symbols keep their shard (and its warm
+    indicator state) when the pool is resized.
+    """
+
+    def __init__(self, nodes: Iterable = (), replicas: int = 64):
+        self.replicas = replicas
+        self._points = []  # sorted hashes
+        self._owners = {}  # hash -> node
+        for node in nodes:
+            self.add(node)
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.md5(key.encode('utf-8')).digest()[:8], 'big')
+
+    def add(self, node):
+        for i in range(self.replicas):
+            point = self._hash('%s#%d' % (node, i))
+            if point not in self._owners:
+                bisect.insort(self._points, point)
+                self._owners[point] = node
+
+    def remove(self, node):
+        for point in [point for point, owner in self._owners.items() if owner == node]:
+            del self._owners[point]
+            self._points.remove(point)
+
+    def node(self, key: str):
+        if not self._points:
+            raise LookupError('empty hash ring')
+        i = bisect.bisect_left(self._points, self._hash(key))
+        return self._owners[self._points[i % len(self._points)]]
+
+    def nodes(self) -> List:
+        return sorted(set(self._owners.values()))
+
+
+# --- wire format ---
+
+def pack_cycle(cycle: int, records: Sequence[Tuple[int, float, Sequence[Sequence[float]]]]) -> bytes:
+    """
+    Encode one cycle for a shard
+
+    Args:
+        records: (symbol index, current price, candles) per symbol, candles
+                 being (open time, open, high, low, close, volume) rows
+
+    Returns:
+        HEADER + (RECORD + CANDLE * n) per symbol
+    """
+    parts = [HEADER.pack(cycle, len(records))]
+    for index, price, candles in records:
+        parts.append(RECORD.pack(index, len(candles), price))
+        parts.extend(CANDLE.pack(*candle[:6]) for candle in candles)
+    return b''.join(parts)
+
+
+def unpack_cycle(data: bytes) -> Tuple[int, List[Tuple[int, float, List[Tuple]]]]:
+    """Inverse of pack_cycle()"""
+    cycle, count = HEADER.unpack_from(data, 0)
+    offset = HEADER.size
+    records = []
+    for _ in range(count):
+        index, n, price = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        candles = [CANDLE.unpack_from(data, offset + i * CANDLE.size) for i in range(n)]
+        offset += n * CANDLE.size
+        records.append((index, price, candles))
+    return cycle, records
+
+
+# --- worker process ---
+
+def _shard_main(conn, symbols: List[Tuple[str, Dict, int]]):
+    """
+    Worker loop: keep a kline window and a strategy per symbol, analyze every
+    symbol of a cycle and send back (index, signal, confidence, reason,
+    entry_price, stop_loss, take_profit) tuples. An empty message stops it.
+    """
+    logger = logging.getLogger('ShardWorker')
+    buffers = [KlineBuffer(capacity, symbol) for symbol, config, capacity in symbols]
+    strategies = [BollingerStrategy(config) for symbol, config, capacity in symbols]
+
+    while True:
+        try:
+            data = conn.recv_bytes()
+        except EOFError:
+            return
+        if not data:
+            return
+
+        cycle, records = unpack_cycle(data)
+        results = []
+        for index, price, candles in records:
+            try:
+                buffers[index].extend(candles)
+                analysis = strategies[index].analyze(buffers[index], price)
+                results.append((index,) + tuple(analysis.get(field) for field in RESULT_FIELDS))
+            except Exception as e:
+                # One bad symbol never fails the cycle of the others
+                logger.error('%s: analysis failed: %s' % (symbols[index][0], e))
+                results.append((index, 'ERROR', 0.0, str(e), 0.0, 0.0, 0.0))
+
+        conn.send_bytes(pickle.dumps((cycle, results), pickle.HIGHEST_PROTOCOL))
+
+
+class ShardPool:
+    """
+    BollingerStrategy.analyze for many symbols on several processes
+
+    Symbols are assigned to shards with a HashRing. Every cycle sends each
+    shard only the candles that changed since the previous cycle (packed
+    with struct, 48 bytes per candle), so the workers' incremental
+    indicators stay incremental and the execution process never ships a
+    whole window. Shards work in parallel; analyze() returns when all of
+    them answered.
+
+    A shard whose process died, or that has not answered `timeout`
+    seconds after the cycle was sent, is restarted empty; its symbols get
+    no analysis that cycle and on_restart(symbols) asks the caller to send
+    their whole window again.
+    """
+
+    def __init__(self, symbols: Dict[str, Tuple[Dict, int]], shards: int = None, replicas: int = 64,
+                 on_restart: Callable[[List[str]], None] = None, timeout: float = None):
+        """
+        Args:
+            symbols: symbol -> (strategy config, kline capacity)
+            shards: Worker processes (default: CPU count)
+            replicas: Ring points per shard
+            on_restart: Called with the symbols of a restarted shard
+            timeout: Seconds to wait for the replies of a cycle (None = no limit)
+        """
+        self.shards = shards or multiprocessing.cpu_count()
+        self.ring = HashRing(range(self.shards), replicas)
+
+        self.members = {shard: [] for shard in range(self.shards)}  # shard -> [(symbol, config, capacity)]
+        self.index = {}  # symbol -> (shard, index in shard)
+        for symbol in sorted(symbols):
+            shard = self.ring.node(symbol)
+            self.index[symbol] = (shard, len(self.members[shard]))
+            self.members[shard].append((symbol,) + tuple(symbols[symbol]))
+
+        self.on_restart = on_restart
+        self.timeout = timeout
+        self.logger = logging.getLogger('ShardPool')
+
+        self._pipes = {}
+        self._processes = {}
+        self.cycle = 0
+        self.bytes_sent = 0
+        self.restarts = 0
+        self.stale = 0  # replies to an earlier cycle, dropped
+
+    def start(self):
+        for shard, members in self.members.items():
+            if members:
+                self._start_shard(shard)
+
+    def _start_shard(self, shard: int):
+        # spawn: workers never inherit the execution process' threads or sockets
+        context = multiprocessing.get_context('spawn')
+        parent, child = context.Pipe()
+        process = context.Process(target=_shard_main, args=(child, self.members[shard]), name='Shard-%d' % shard)
+        process.daemon = True
+        process.start()
+        child.close()
+        self._pipes[shard] = parent
+        self._processes[shard] = process
+
+    def _restart_shard(self, shard: int, error: Exception):
+        """Replace a dead worker; its symbols start from an empty window"""
+        self.logger.error('Shard %d failed (%s), restarting it' % (shard, error or 'exited'))
+        self._pipes[shard].close()
+        process = self._processes[shard]
+        if process.is_alive():
+            process.terminate()
+            process.join(1.0)
+        if process.is_alive():
+            # Stopped processes ignore SIGTERM
+            process.kill()
+        process.join(1.0)
+
+        self._start_shard(shard)
+        self.restarts += 1
+        if self.on_restart is not None:
+            self.on_restart([member[0] for member in self.members[shard]])
+
+    def stop(self, timeout: float = 5.0):
+        for pipe in self._pipes.values():
+            try:
+                pipe.send_bytes(b'')
+            except (OSError, ValueError):
+                pass
+        for process in self._processes.values():
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self._pipes.clear()
+        self._processes.clear()
+
+    def analyze(self, updates: Dict[str, Tuple[float, Sequence]]) -> Dict[str, Dict]:
+        """
+        Analyze one cycle
+
+        Args:
+            updates: symbol -> (current price, candles changed since the last cycle)
+
+        Returns:
+            symbol -> analysis (price, signal, confidence, reason, entry_price, stop_loss, take_profit)
+        """
+        self.cycle = (self.cycle + 1) & 0xFFFFFFFF
+
+        records = {}
+        for symbol, (price, candles) in updates.items():
+            shard, index = self.index[symbol]
+            records.setdefault(shard, []).append((index, price, candles))
+
+        # Send to every shard first so they all work at the same time
+        sent = []
+        for shard, shard_records in records.items():
+            message = pack_cycle(self.cycle, shard_records)
+            try:
+                self._pipes[shard].send_bytes(message)
+            except (OSError, ValueError) as e:
+                self._restart_shard(shard, e)
+                continue
+            sent.append(shard)
+            self.bytes_sent += len(message)
+
+        deadline = time.monotonic() + self.timeout if self.timeout is not None else None
+
+        analyses = {}
+        for shard in sent:
+            try:
+                results = self._receive(shard, deadline)
+            except (EOFError, OSError) as e:
+                # OSError includes TimeoutError: a hung worker is replaced like a dead one
+                self._restart_shard(shard, e)
+                continue
+            members = self.members[shard]
+            for row in results:
+                symbol = members[row[0]][0]
+                analysis = dict(zip(RESULT_FIELDS, row[1:]))
+                analysis['price'] = updates[symbol][0]
+                analyses[symbol] = analysis
+
+        return analyses
+
+    def _receive(self, shard: int, deadline: float = None) -> List[Tuple]:
+        """The shard's results for this cycle; replies left over from an earlier one are dropped"""
+        pipe = self._pipes[shard]
+        while True:
+            if deadline is not None and not pipe.poll(max(deadline - time.monotonic(), 0.0)):
+                raise TimeoutError('no reply in %.1fs' % self.timeout)
+            cycle, results = pickle.loads(pipe.recv_bytes())
+            if cycle == self.cycle:
+                return results
+            self.stale += 1
+
+    def shard_of(self, symbol: str) -> Optional[int]:
+        entry = self.index.get(symbol)
+        return entry[0] if entry else None
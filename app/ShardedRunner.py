@@ -0,0 +1,243 @@
+# -*- coding: UTF-8 -*-
+# Sharded Bollinger runner for Binance Trader
+# Analysis on worker processes, market data and orders in this (execution) process
+
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import Orders as orders
+from Orders import Orders
+from Database import Database
+from Scheduler import Scheduler
+from KlineSync import KlineSync
+from MarketData import MarketDataStream
+from ShardWorker import ShardPool
+from BollingerTradingBot import BollingerTradingBot
+
+
+class ShardedRunner:
+    """
+    Runs a large Bollinger symbol universe on a process pool
+
+    The indicator work, which is what stops one process from keeping up
+    with hundreds of symbols, runs on ShardPool workers; symbols are placed
+    by consistent hashing. This process stays the single execution process:
+    it fetches or streams market data, ships each shard only the candles
+    that changed, and places every order through the shared API client, so
+    the rate governor, server clock and connection pool see all traffic.
+
+    All symbols tick together every `wait_time` (the smallest of the
+    entries). Without a stream the current price is the close of the
+    in-progress candle, which saves a ticker request per symbol.
+    """
+
+    STATS_INTERVAL = 60.0  # seconds
+    REPLY_CYCLES = 3       # wait_time periods a shard may take to answer before it is restarted
+
+    def __init__(self, entries: List, shards: int = None, workers: int = 8, stream: bool = False):
+        """
+        Args:
+            entries: trader_bollinger.py options, one per symbol
+            shards: Worker processes (default: CPU count)
+            workers: Threads fetching klines over REST
+            stream: Read market data and fills from WebSocket streams
+        """
+        symbols = [options.symbol for options in entries]
+        duplicates = set(symbol for symbol in symbols if symbols.count(symbol) > 1)
+        if duplicates:
+            raise ValueError('Symbols listed more than once: %s' % ', '.join(sorted(duplicates)))
+
+        self.entries = entries
+        self.shards = shards
+        self.stream_enabled = stream
+        self.wait_time = min(options.wait_time for options in entries)
+
+        self.logger = logging.getLogger('ShardedRunner')
+
+        self.client = orders.client
+        self.kline_sync = KlineSync(self.client)
+        self.scheduler = Scheduler(workers=1, name='ShardedRunner')
+        self._fetch_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ShardFetch')
+
+        self.pool = None
+        self.stream = None
+        self.user_stream = None
+        self.bots = {}   # symbol -> BollingerTradingBot, running ones only
+        self._sent = {}  # symbol -> open time of the last candle sent to its shard
+        self.job = None
+        self._stopped = threading.Event()
+
+        self.cycles = 0
+        self.analyze_time = 0.0  # seconds spent waiting on the shards, in total
+
+    # --- lifecycle ---
+
+    def start(self):
+        bots = {}
+        for options in self.entries:
+            options.stream = False  # the runner owns the streams
+            bots[options.symbol] = BollingerTradingBot(options, client=self.client, kline_sync=self.kline_sync)
+
+        # Workers first, before this process opens sockets and threads
+        self.pool = ShardPool({symbol: (bot.strategy.config, bot.args.kline_limit) for symbol, bot in bots.items()},
+                              self.shards, on_restart=self._resend, timeout=self.wait_time * self.REPLY_CYCLES)
+        self.pool.start()
+
+        Orders.warm_up()
+        orders.exchange_info.preload(list(bots))
+        Database.start_writer()
+
+        if self.stream_enabled:
+            self.start_streams(list(bots))
+
+        for symbol, bot in bots.items():
+            bot.stream = self.stream
+            try:
+                if not bot.setup():
+                    raise ValueError('setup failed')
+            except Exception as e:
+                self.logger.error('%s: not started (%s)' % (symbol, e))
+                continue
+            self.bots[symbol] = bot
+
+        self.logger.info('Running %d of %d symbols on %d shards' % (len(self.bots), len(self.entries), self.pool.shards))
+
+    def start_streams(self, symbols: List[str]):
+        intervals = sorted(set(options.interval for options in self.entries))
+
+        try:
+            self.stream = MarketDataStream(symbols, interval=intervals, depth=True,
+                                           snapshot=Orders.get_depth_snapshot)
+            self.stream.start()
+        except ImportError as e:
+            self.logger.warning('Streaming disabled: %s' % e)
+            self.stream = None
+            return
+
+        Orders.use_market(self.stream.view)
+
+        try:
+            self.user_stream = Orders.user_data_stream()
+            self.user_stream.start()
+            Orders.use_user_data(self.user_stream.view)
+        except Exception as e:
+            self.logger.warning('User data stream disabled: %s' % e)
+            self.user_stream = None
+
+    def run(self):
+        """start(), then cycle every wait_time until every symbol stopped or Ctrl+C"""
+        self.start()
+        self.job = self.scheduler.every(self.wait_time, self.cycle, key='cycle')
+
+        try:
+            while self.bots and not self._stopped.wait(self.STATS_INTERVAL):
+                self.log_stats()
+        except KeyboardInterrupt:
+            self.logger.info('Runner stopped by user')
+        finally:
+            self.stop()
+
+    def stop(self):
+        self._stopped.set()
+        if self.job is not None:
+            self.job.cancel()
+        self.scheduler.stop(wait=True)
+
+        if self.user_stream is not None:
+            self.user_stream.stop()
+        if self.stream is not None:
+            self.stream.stop()
+        if self.pool is not None:
+            self.pool.stop()
+
+        self._fetch_pool.shutdown(wait=False)
+        Database.stop_writer()
+        self.log_stats()
+
+    # --- cycle ---
+
+    def cycle(self):
+        """Refresh market data, analyze every symbol on the shards, then trade on the results"""
+        bots = dict(self.bots)
+        if not bots:
+            self._stopped.set()
+            return
+
+        if self.stream is None:
+            list(self._fetch_pool.map(lambda bot: bot._sync_klines(), bots.values()))
+
+        updates = {}
+        for symbol, bot in bots.items():
+            with bot.klines.lock:
+                if not len(bot.klines):
+                    continue
+                candles = self._changed(symbol, bot.klines)
+                price = bot.klines.last('close')
+            if self.stream is not None:
+                price = self.stream.view.last_price(symbol, bot.stream_max_age) or price
+            updates[symbol] = (price, candles)
+
+        started = time.monotonic()
+        analyses = self.pool.analyze(updates)
+        self.analyze_time += time.monotonic() - started
+        self.cycles += 1
+
+        # Orders go out from here only, through the shared client and its governor
+        for symbol, analysis in analyses.items():
+            bot = bots[symbol]
+            if analysis['signal'] == 'ERROR':
+                self.logger.warning('%s: analysis failed on shard %d: %s' % (symbol, self.pool.shard_of(symbol), analysis['reason']))
+                continue
+
+            bot.cycle += 1
+            try:
+                bot.act(analysis)
+            except Exception as e:
+                self.logger.error('%s: trading failed: %s' % (symbol, e), exc_info=True)
+
+            if bot.finished():
+                self.logger.info('%s: max trades reached, stopping' % symbol)
+                self.bots.pop(symbol, None)
+
+    def _changed(self, symbol: str, klines) -> List:
+        """Candles at or after the last one sent (that one may have been revised since)"""
+        times = klines.view('time')
+        since = self._sent.get(symbol)
+
+        start = 0
+        if since is not None:
+            start = len(times)
+            while start > 0 and times[start - 1] >= since:
+                start -= 1
+
+        candles = klines[start:]
+        if candles:
+            self._sent[symbol] = candles[-1][0]
+        return candles
+
+    def _resend(self, symbols: List[str]):
+        """A restarted shard lost its windows: send them whole next cycle"""
+        for symbol in symbols:
+            self._sent.pop(symbol, None)
+
+    # --- stats ---
+
+    def stats(self) -> Dict[str, float]:
+        result = {
+            'symbols': len(self.bots),
+            'cycles': self.cycles,
+            'analyze_avg_ms': self.analyze_time / self.cycles * 1000 if self.cycles else 0.0,
+            'bytes_sent': self.pool.bytes_sent if self.pool is not None else 0
+        }
+        if self.job is not None:
+            result.update(self.job.stats())
+        return result
+
+    def log_stats(self):
+        entry = self.stats()
+        self.logger.info('%d symbols, %d cycles, analyze avg: %.1fms, sent: %d bytes, skipped: %d, late p99: %.1fms' % (
+            entry['symbols'], entry['cycles'], entry['analyze_avg_ms'], entry['bytes_sent'],
+            entry.get('skipped', 0), entry.get('late_p99_ms', 0.0)))
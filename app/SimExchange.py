@@ -0,0 +1,899 @@
+# -*- coding: UTF-8 -*-
+# Simulated exchange for Binance Trader
+# Same surface as BinanceAPI, backed by an in-process price-time priority order book
+
+import bisect
+import itertools
+import math
+import random
+import threading
+import time
+from collections import deque
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from KlineSync import KlineSync
+
+FINAL_STATUSES = ('FILLED', 'CANCELED', 'EXPIRED')
+
+# Error responses, as the REST API returns them
+INVALID_SYMBOL = {'code': -1121, 'msg': 'Invalid symbol.'}
+INVALID_INTERVAL = {'code': -1120, 'msg': 'Invalid interval.'}
+INSUFFICIENT_BALANCE = {'code': -2010, 'msg': 'Account has insufficient balance for requested action.'}
+UNKNOWN_ORDER = {'code': -2011, 'msg': 'Unknown order sent.'}
+NO_SUCH_ORDER = {'code': -2013, 'msg': 'Order does not exist.'}
+
+
+def _fmt(value: float) -> str:
+    return '%.8f' % value
+
+
+class SimSymbol:
+    """
+    Trading rules of one simulated symbol
+
+    Rules are the exchangeInfo filters the live exchange enforces: price on
+    the tick grid within [min_price, max_price] (PRICE_FILTER), quantity on
+    the step grid within [min_qty, max_qty] (LOT_SIZE) and price * quantity
+    of at least min_notional (NOTIONAL).
+    """
+
+    def __init__(self, symbol: str, base: str, quote: str, tick_size: str = '0.01', step_size: str = '0.00001',
+                 min_qty: str = '0.00001', max_qty: str = '9000', min_price: str = '0.01',
+                 max_price: str = '1000000', min_notional: str = '5'):
+        self.symbol = symbol
+        self.base = base
+        self.quote = quote
+
+        self.tick_size = Decimal(tick_size)
+        self.step_size = Decimal(step_size)
+        self.min_qty = Decimal(min_qty)
+        self.max_qty = Decimal(max_qty)
+        self.min_price = Decimal(min_price)
+        self.max_price = Decimal(max_price)
+        self.min_notional = Decimal(min_notional)
+
+        self.tick = float(self.tick_size)
+        self.step = float(self.step_size)
+
+    def info(self) -> Dict:
+        """exchangeInfo entry of the symbol"""
+        return {
+            'symbol': self.symbol, 'status': 'TRADING', 'baseAsset': self.base, 'quoteAsset': self.quote,
+            'orderTypes': ['LIMIT', 'MARKET'], 'isSpotTradingAllowed': True,
+            'filters': [
+                {'filterType': 'PRICE_FILTER', 'minPrice': str(self.min_price), 'maxPrice': str(self.max_price),
+                 'tickSize': str(self.tick_size)},
+                {'filterType': 'LOT_SIZE', 'minQty': str(self.min_qty), 'maxQty': str(self.max_qty),
+                 'stepSize': str(self.step_size)},
+                {'filterType': 'NOTIONAL', 'minNotional': str(self.min_notional), 'applyMinToMarket': True,
+                 'maxNotional': '9000000.00', 'applyMaxToMarket': False, 'avgPriceMins': 5},
+            ]
+        }
+
+    def check(self, quantity: float, price: float) -> Optional[str]:
+        """Name of the first filter the order fails, None if it passes"""
+        quantity = Decimal(_fmt(quantity))
+        price = Decimal(_fmt(price))
+
+        if quantity < self.min_qty or quantity > self.max_qty or (quantity - self.min_qty) % self.step_size:
+            return 'LOT_SIZE'
+        if price < self.min_price or price > self.max_price or (price - self.min_price) % self.tick_size:
+            return 'PRICE_FILTER'
+        if price * quantity < self.min_notional:
+            return 'NOTIONAL'
+        return None
+
+    def ticks(self, price: float) -> int:
+        return int(round(price / self.tick))
+
+    def steps(self, quantity: float) -> int:
+        return int(round(quantity / self.step))
+
+
+class SimOrder:
+    """An order in the book; price in ticks (None = MARKET), quantities in steps"""
+
+    __slots__ = ('order_id', 'client_id', 'symbol', 'side', 'type', 'price', 'quantity', 'filled', 'quote',
+                 'status', 'time', 'update_time', 'user', 'locked')
+
+    def __init__(self, order_id: int, symbol: str, side: str, order_type: str, price: Optional[int],
+                 quantity: int, now: int, user: bool = True):
+        self.order_id = order_id
+        self.client_id = 'sim%d' % order_id
+        self.symbol = symbol
+        self.side = side
+        self.type = order_type
+        self.price = price
+        self.quantity = quantity
+        self.filled = 0
+        self.quote = 0.0     # cumulative quote quantity
+        self.status = 'NEW'
+        self.time = now
+        self.update_time = now
+        self.user = user     # False for the simulated market's own liquidity
+        self.locked = 0.0    # balance still held for this order
+
+    @property
+    def remaining(self) -> int:
+        return self.quantity - self.filled
+
+
+class MatchingBook:
+    """
+    Price-time priority limit order book of one symbol
+
+    Each side maps a price (in ticks) to a FIFO queue of orders, with the
+    prices kept sorted for the best level. An incoming order trades against
+    the best opposite level first and, within a level, against the oldest
+    order first.
+    """
+
+    def __init__(self):
+        self.levels = {'BUY': {}, 'SELL': {}}  # side -> price -> deque of SimOrder
+        self.prices = {'BUY': [], 'SELL': []}  # side -> sorted prices
+        self.update_id = 0
+
+    def best(self, side: str) -> Optional[int]:
+        prices = self.prices[side]
+        if not prices:
+            return None
+        return prices[-1] if side == 'BUY' else prices[0]
+
+    def rest(self, order: SimOrder):
+        levels = self.levels[order.side]
+        queue = levels.get(order.price)
+        if queue is None:
+            queue = levels[order.price] = deque()
+            bisect.insort(self.prices[order.side], order.price)
+        queue.append(order)
+        self.update_id += 1
+
+    def remove(self, order: SimOrder) -> bool:
+        queue = self.levels[order.side].get(order.price)
+        if queue is None or order not in queue:
+            return False
+        queue.remove(order)
+        if not queue:
+            self._drop(order.side, order.price)
+        self.update_id += 1
+        return True
+
+    def _drop(self, side: str, price: int):
+        del self.levels[side][price]
+        prices = self.prices[side]
+        del prices[bisect.bisect_left(prices, price)]
+
+    @staticmethod
+    def _crosses(side: str, best: int, limit: Optional[int]) -> bool:
+        if limit is None:
+            return True
+        return best <= limit if side == 'BUY' else best >= limit
+
+    def match(self, taker: SimOrder, fill: Callable[[SimOrder, int, int], None]):
+        """
+        Trade taker against the opposite side up to its limit price
+
+        fill(maker, price, quantity) is called for each trade and must
+        update both orders' filled quantity.
+        """
+        opposite = 'SELL' if taker.side == 'BUY' else 'BUY'
+        while taker.remaining > 0:
+            best = self.best(opposite)
+            if best is None or not self._crosses(taker.side, best, taker.price):
+                break
+
+            queue = self.levels[opposite][best]
+            maker = queue[0]
+            fill(maker, best, min(taker.remaining, maker.remaining))
+            if maker.remaining <= 0:
+                queue.popleft()
+                if not queue:
+                    self._drop(opposite, best)
+            self.update_id += 1
+
+    def cost(self, side: str, quantity: int, limit: Optional[int] = None) -> Tuple[int, int]:
+        """(quantity, sum of price * quantity) an order could fill now, in steps and ticks * steps"""
+        opposite = 'SELL' if side == 'BUY' else 'BUY'
+        prices = self.prices[opposite] if opposite == 'SELL' else reversed(self.prices[opposite])
+
+        filled = total = 0
+        for price in prices:
+            if filled >= quantity or not self._crosses(side, price, limit):
+                break
+            available = sum(order.remaining for order in self.levels[opposite][price])
+            qty = min(available, quantity - filled)
+            filled += qty
+            total += qty * price
+        return filled, total
+
+    def depth(self, side: str, limit: int) -> List[Tuple[int, int]]:
+        """Top `limit` levels as (price, quantity), best first"""
+        prices = self.prices[side]
+        prices = prices[::-1][:limit] if side == 'BUY' else prices[:limit]
+        return [(price, sum(order.remaining for order in self.levels[side][price])) for price in prices]
+
+
+class SimExchange:
+    """
+    In-process exchange with the BinanceAPI surface
+
+    Pass it wherever a BinanceAPI goes (Orders.use_client, KlineSync,
+    ExchangeInfoCache, TradingEngine) to run the bots offline: orders are
+    matched in a MatchingBook per symbol, with LIMIT and MARKET orders,
+    partial fills, cancels, balances, commissions and the same LOT_SIZE /
+    PRICE_FILTER / NOTIONAL rejections as the live API, in the same
+    response format.
+
+    Market data comes from tick() (or play() over a feed): each tick moves
+    the simulated market's own quotes around the new price, trading with
+    any user order they cross, and updates the klines of every interval.
+    Every request waits `latency` seconds (half before, half after it is
+    processed), which may be a callable for a latency distribution.
+    """
+
+    def __init__(self, symbols: Iterable[SimSymbol], balances: Dict[str, float] = None,
+                 latency: Union[float, Callable[[], float]] = 0.0, commission: float = 0.001,
+                 levels: int = 5, spread: int = 1, liquidity: float = 10000.0,
+                 intervals: Iterable[str] = ('1m', '5m', '15m', '1h'), history: int = 1000,
+                 clock: Callable[[], int] = None):
+        """
+        Args:
+            symbols: Tradable symbols
+            balances: Starting free balance per asset
+            latency: Seconds per request, or a callable returning them
+            commission: Fee rate, charged in the asset received
+            levels: Quote levels of the simulated market per side
+            spread: Ticks between the simulated market's levels (and from the mid)
+            liquidity: Quote value of each simulated level
+            intervals: Kline intervals kept for get_klines
+            history: Candles kept per interval
+            clock: Current time in ms (default: local clock)
+        """
+        self.symbols = {spec.symbol: spec for spec in symbols}
+        self.latency = latency
+        self.commission = commission
+        self.levels = levels
+        self.spread = spread
+        self.liquidity = liquidity
+        self.clock = clock or (lambda: int(time.time() * 1000))
+
+        self.intervals = {interval: KlineSync.interval_ms(interval) for interval in intervals}
+        self.history = history
+
+        self._lock = threading.RLock()
+        self._ids = itertools.count(1)
+        self._trade_ids = itertools.count(1)
+
+        self.books = {symbol: MatchingBook() for symbol in self.symbols}
+        self._liquidity = {symbol: [] for symbol in self.symbols}  # the simulated market's resting orders
+        self._orders = {}                                           # orderId -> SimOrder, user orders only
+        self._my_trades = {symbol: deque(maxlen=history) for symbol in self.symbols}
+        self._trades = {symbol: deque(maxlen=history) for symbol in self.symbols}
+        self._klines = {symbol: {interval: deque(maxlen=history) for interval in self.intervals}
+                        for symbol in self.symbols}
+        self._stats = {symbol: None for symbol in self.symbols}     # open, high, low, last, volume, quote volume, count
+
+        self._balances = {}
+        for asset, free in (balances or {}).items():
+            self._balances[asset] = [float(free), 0.0]
+
+        self._listeners = []
+        self._feed = None
+        self._feed_stop = threading.Event()
+
+        self.requests = 0
+        self.orders_placed = 0
+        self.fills = 0
+
+    # --- simulation ---
+
+    def _wait(self):
+        latency = self.latency() if callable(self.latency) else self.latency
+        if latency > 0:
+            time.sleep(latency / 2)
+
+    def _call(self, method: Callable, *args):
+        """Request round trip: half the latency out, processing, half back"""
+        self.requests += 1
+        self._wait()
+        with self._lock:
+            response = method(*args)
+        self._wait()
+        return response
+
+    def now(self) -> int:
+        return self.clock()
+
+    def add_listener(self, callback: Callable[[Dict], None]):
+        """Call callback(event) with every executionReport / outboundAccountPosition"""
+        self._listeners.append(callback)
+
+    def attach(self, view):
+        """
+        Feed a UserDataStream.AccountView as the user data stream would,
+        for Orders.use_user_data
+        """
+        with self._lock:
+            view.seed_balances(self._account()['balances'])
+
+        def route(event):
+            if event['e'] == 'executionReport':
+                view.apply_execution(event)
+            else:
+                view.apply_account(event)
+
+        self.add_listener(route)
+        view.connected = True
+        return view
+
+    def _emit(self, event: Dict):
+        for callback in list(self._listeners):
+            callback(event)
+
+    def tick(self, symbol: str, price: float, volume: float = 0.0, timestamp: int = None):
+        """
+        Move the market of symbol to price
+
+        The simulated market's quotes are replaced by `levels` per side
+        around price and placed like incoming orders, so resting user orders
+        they cross are filled (partially when a level is smaller). The trade
+        also goes into the klines, ticker and public trades.
+        """
+        spec = self.symbols[symbol]
+        now = self.now() if timestamp is None else timestamp
+        with self._lock:
+            mid = spec.ticks(price)
+            self._record_trade(symbol, mid * spec.tick, volume, now)
+            self._quote(symbol, mid, now)
+
+    def _quote(self, symbol: str, mid: int, now: int):
+        spec = self.symbols[symbol]
+        book = self.books[symbol]
+        for order in self._liquidity[symbol]:
+            book.remove(order)
+
+        quotes = []
+        for level in range(1, self.levels + 1):
+            for side, price in (('BUY', mid - level * self.spread), ('SELL', mid + level * self.spread)):
+                if price <= 0:
+                    continue
+                quantity = max(1, spec.steps(self.liquidity / (price * spec.tick)))
+                order = SimOrder(next(self._ids), symbol, side, 'LIMIT', price, quantity, now, user=False)
+                book.match(order, lambda maker, at, qty: self._fill(order, maker, at, qty, now))
+                if order.remaining > 0:
+                    book.rest(order)
+                    quotes.append(order)
+        self._liquidity[symbol] = quotes
+
+    def _record_trade(self, symbol: str, price: float, volume: float, now: int):
+        stats = self._stats[symbol]
+        if stats is None:
+            stats = self._stats[symbol] = [price, price, price, price, 0.0, 0.0, 0]
+        stats[1] = max(stats[1], price)
+        stats[2] = min(stats[2], price)
+        stats[3] = price
+        stats[4] += volume
+        stats[5] += volume * price
+        stats[6] += 1
+
+        self._trades[symbol].append((next(self._trade_ids), price, volume, now))
+        self._candle(symbol, now, price, price, price, price, volume, 0)
+
+    def _candle(self, symbol: str, now: int, open: float, high: float, low: float, close: float,
+                volume: float, span: int):
+        """Merge a trade (span 0) or a candle of span ms into every interval at least that long"""
+        for interval, step in self.intervals.items():
+            if step < span:
+                continue
+            start = now - now % step
+            candles = self._klines[symbol][interval]
+            last = candles[-1] if candles else None
+            if last is not None and last[0] == start:
+                last[2] = max(last[2], high)
+                last[3] = min(last[3], low)
+                last[4] = close
+                last[5] += volume
+                last[7] += volume * close
+                last[8] += 1
+            elif last is None or start > last[0]:
+                candles.append([start, open, high, low, close, volume, start + step - 1, volume * close, 1])
+
+    def load_history(self, symbol: str, klines, interval: str = '1m', end: int = None):
+        """
+        Install past candles, e.g. Backtester.load_klines() columns or REST rows
+
+        Times are shifted so the last candle is the one before the current
+        (end, default now) candle, and candles are merged into every longer
+        interval, so a bot's first KlineSync window is full.
+        """
+        if isinstance(klines, dict):
+            rows = list(zip(*(klines[field] for field in ('time', 'open', 'high', 'low', 'close', 'volume'))))
+        else:
+            rows = [tuple(float(value) for value in row[:6]) for row in klines]
+        if not rows:
+            return
+
+        step = KlineSync.interval_ms(interval)
+        end = self.now() if end is None else end
+        shift = (end - end % step - step) - int(rows[-1][0])
+
+        with self._lock:
+            for row in rows:
+                self._candle(symbol, int(row[0]) + shift, *row[1:6], span=step)
+            last = rows[-1][4]
+            self._stats[symbol] = [rows[0][1], max(row[2] for row in rows), min(row[3] for row in rows),
+                                   last, sum(row[5] for row in rows), sum(row[5] * row[4] for row in rows), len(rows)]
+            self._quote(symbol, self.symbols[symbol].ticks(last), end)
+
+    def play(self, ticks: Iterable[Tuple[int, str, float, float]], speed: float = None, count: int = None) -> int:
+        """
+        Apply (timestamp ms, symbol, price, volume) ticks
+
+        Args:
+            ticks: e.g. SyntheticFeed.ticks() or KlineReplay.ticks()
+            speed: 1 = at recorded pace, 10 = ten times faster, None = as fast as possible
+            count: Stop after this many ticks
+
+        Returns:
+            Ticks applied
+        """
+        applied = 0
+        first = started = None
+        for timestamp, symbol, price, volume in ticks:
+            if self._feed_stop.is_set() or (count is not None and applied >= count):
+                break
+            if speed:
+                if first is None:
+                    first, started = timestamp, time.monotonic()
+                delay = (timestamp - first) / 1000.0 / speed - (time.monotonic() - started)
+                if delay > 0 and self._feed_stop.wait(delay):
+                    break
+            self.tick(symbol, price, volume, timestamp)
+            applied += 1
+        return applied
+
+    def start(self, ticks: Iterable[Tuple[int, str, float, float]], speed: float = 1.0):
+        """play() on a background thread until the feed ends or stop()"""
+        self._feed_stop.clear()
+        self._feed = threading.Thread(target=self.play, args=(ticks, speed), name='SimExchangeFeed', daemon=True)
+        self._feed.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._feed_stop.set()
+        if self._feed is not None:
+            self._feed.join(timeout)
+            self._feed = None
+
+    # --- matching ---
+
+    def _balance(self, asset: str) -> List[float]:
+        balance = self._balances.get(asset)
+        if balance is None:
+            balance = self._balances[asset] = [0.0, 0.0]
+        return balance
+
+    def _lock_funds(self, order: SimOrder, asset: str, amount: float) -> bool:
+        balance = self._balance(asset)
+        if balance[0] < amount - 1e-12:
+            return False
+        balance[0] -= amount
+        balance[1] += amount
+        order.locked = amount
+        return True
+
+    def _release(self, order: SimOrder, amount: float = None):
+        """Return locked funds of order to free (all of them by default)"""
+        spec = self.symbols[order.symbol]
+        amount = order.locked if amount is None else min(amount, order.locked)
+        balance = self._balance(spec.quote if order.side == 'BUY' else spec.base)
+        balance[1] = max(0.0, balance[1] - amount)
+        balance[0] += amount
+        order.locked -= amount
+
+    def _place(self, symbol: str, side: str, quantity: float, price: float = None) -> Dict:
+        spec = self.symbols.get(symbol)
+        if spec is None:
+            return dict(INVALID_SYMBOL)
+
+        book = self.books[symbol]
+        now = self.now()
+        order_type = 'LIMIT' if price is not None else 'MARKET'
+
+        if price is None:
+            # MARKET: filters apply at the price it would fill at
+            reference = book.best('SELL' if side == 'BUY' else 'BUY')
+            check_price = reference * spec.tick if reference is not None else (self._stats[symbol] or [0] * 4)[3]
+            check_price = float(spec.min_price) if not check_price else check_price
+        else:
+            check_price = price
+
+        rejected = spec.check(quantity, check_price)
+        if rejected:
+            return {'code': -1013, 'msg': 'Filter failure: %s' % rejected}
+
+        ticks = spec.ticks(price) if price is not None else None
+        order = SimOrder(next(self._ids), symbol, side, order_type, ticks, spec.steps(quantity), now)
+
+        if side == 'SELL':
+            funded = self._lock_funds(order, spec.base, order.quantity * spec.step)
+        elif ticks is not None:
+            funded = self._lock_funds(order, spec.quote, order.quantity * spec.step * ticks * spec.tick)
+        else:
+            _, cost = book.cost(side, order.quantity)
+            funded = self._lock_funds(order, spec.quote, cost * spec.step * spec.tick)
+        if not funded:
+            return dict(INSUFFICIENT_BALANCE)
+
+        self._orders[order.order_id] = order
+        self.orders_placed += 1
+        self._report(order, 'NEW', now)
+
+        fills = []
+        book.match(order, lambda maker, at, qty: fills.append(self._fill(order, maker, at, qty, now)))
+
+        if order.remaining > 0:
+            if order_type == 'LIMIT':
+                book.rest(order)
+            else:
+                # Not enough liquidity: the rest of a MARKET order expires
+                order.status = 'EXPIRED'
+                self._release(order)
+                self._report(order, 'EXPIRED', now)
+                self._account_update(order)
+
+        response = self._query(order)
+        response['transactTime'] = now
+        response['fills'] = fills
+        return response
+
+    def _fill(self, taker: SimOrder, maker: SimOrder, price: int, quantity: int, now: int) -> Dict:
+        """One trade between taker and maker; settles whichever of them are user orders"""
+        spec = self.symbols[taker.symbol]
+        trade_id = next(self._trade_ids)
+        self.fills += 1
+
+        result = None
+        for order, is_maker in ((maker, True), (taker, False)):
+            order.filled += quantity
+            order.quote += quantity * spec.step * price * spec.tick
+            order.update_time = now
+            if order.user:
+                fill = self._settle(order, price, quantity, is_maker, trade_id, now)
+                if not is_maker:
+                    result = fill
+
+        base_qty = quantity * spec.step
+        self._trades[taker.symbol].append((trade_id, price * spec.tick, base_qty, now))
+        return result
+
+    def _settle(self, order: SimOrder, price: int, quantity: int, is_maker: bool, trade_id: int, now: int) -> Dict:
+        """Balances, status and stream events of a user order after a trade"""
+        spec = self.symbols[order.symbol]
+        fill_price = price * spec.tick
+        base_qty = quantity * spec.step
+        quote_qty = base_qty * fill_price
+
+        if order.side == 'BUY':
+            # Locked at the limit price (MARKET: at the fill price), spent at the fill price
+            held = base_qty * (order.price * spec.tick if order.price is not None else fill_price)
+            self._balance(spec.quote)[1] -= min(held, order.locked)
+            order.locked -= min(held, order.locked)
+            self._balance(spec.quote)[0] += max(0.0, held - quote_qty)
+            fee, fee_asset = base_qty * self.commission, spec.base
+            self._balance(spec.base)[0] += base_qty - fee
+        else:
+            self._balance(spec.base)[1] -= min(base_qty, order.locked)
+            order.locked -= min(base_qty, order.locked)
+            fee, fee_asset = quote_qty * self.commission, spec.quote
+            self._balance(spec.quote)[0] += quote_qty - fee
+
+        order.status = 'FILLED' if order.remaining <= 0 else 'PARTIALLY_FILLED'
+        if order.status == 'FILLED':
+            self._release(order)
+
+        self._my_trades[order.symbol].append({
+            'symbol': order.symbol, 'id': trade_id, 'orderId': order.order_id, 'orderListId': -1,
+            'price': _fmt(fill_price), 'qty': _fmt(base_qty), 'quoteQty': _fmt(quote_qty),
+            'commission': _fmt(fee), 'commissionAsset': fee_asset, 'time': now,
+            'isBuyer': order.side == 'BUY', 'isMaker': is_maker, 'isBestMatch': True
+        })
+        self._report(order, 'TRADE', now, (base_qty, fill_price, fee, fee_asset, trade_id, is_maker))
+        self._account_update(order)
+
+        return {'price': _fmt(fill_price), 'qty': _fmt(base_qty), 'commission': _fmt(fee),
+                'commissionAsset': fee_asset, 'tradeId': trade_id}
+
+    def _cancel(self, symbol: str, order_id) -> Dict:
+        order = self._orders.get(int(order_id))
+        if order is None or order.symbol != symbol or order.status in FINAL_STATUSES:
+            return dict(UNKNOWN_ORDER)
+
+        self.books[symbol].remove(order)
+        order.status = 'CANCELED'
+        order.update_time = self.now()
+        self._release(order)
+        self._report(order, 'CANCELED', order.update_time)
+        self._account_update(order)
+
+        response = self._query(order)
+        response['origClientOrderId'] = order.client_id
+        return response
+
+    # --- events ---
+
+    def _report(self, order: SimOrder, execution: str, now: int, trade: Tuple = None):
+        if not self._listeners:
+            return
+        spec = self.symbols[order.symbol]
+        last_qty, last_price, fee, fee_asset, trade_id, is_maker = trade or (0.0, 0.0, 0.0, None, -1, False)
+        self._emit({
+            'e': 'executionReport', 'E': now, 's': order.symbol, 'c': order.client_id, 'S': order.side,
+            'o': order.type, 'f': 'GTC', 'q': _fmt(order.quantity * spec.step),
+            'p': _fmt(order.price * spec.tick if order.price is not None else 0.0), 'P': _fmt(0.0),
+            'x': execution, 'X': order.status, 'r': 'NONE', 'i': order.order_id,
+            'l': _fmt(last_qty), 'z': _fmt(order.filled * spec.step), 'L': _fmt(last_price),
+            'n': _fmt(fee), 'N': fee_asset, 'T': now, 't': trade_id, 'm': is_maker,
+            'O': order.time, 'Z': _fmt(order.quote), 'Y': _fmt(last_qty * last_price), 'Q': _fmt(0.0)
+        })
+
+    def _account_update(self, order: SimOrder):
+        if not self._listeners:
+            return
+        spec = self.symbols[order.symbol]
+        self._emit({
+            'e': 'outboundAccountPosition', 'E': self.now(), 'u': self.now(),
+            'B': [{'a': asset, 'f': _fmt(self._balance(asset)[0]), 'l': _fmt(self._balance(asset)[1])}
+                  for asset in (spec.base, spec.quote)]
+        })
+
+    # --- responses ---
+
+    def _query(self, order: SimOrder) -> Dict:
+        spec = self.symbols[order.symbol]
+        return {
+            'symbol': order.symbol, 'orderId': order.order_id, 'orderListId': -1, 'clientOrderId': order.client_id,
+            'price': _fmt(order.price * spec.tick if order.price is not None else 0.0),
+            'origQty': _fmt(order.quantity * spec.step), 'executedQty': _fmt(order.filled * spec.step),
+            'cummulativeQuoteQty': _fmt(order.quote), 'status': order.status,
+            'timeInForce': 'GTC', 'type': order.type, 'side': order.side, 'stopPrice': _fmt(0.0),
+            'icebergQty': _fmt(0.0), 'time': order.time, 'updateTime': order.update_time,
+            'isWorking': order.status in ('NEW', 'PARTIALLY_FILLED'),
+            'origQuoteOrderQty': _fmt(0.0)
+        }
+
+    def _account(self) -> Dict:
+        return {
+            'makerCommission': int(self.commission * 10000), 'takerCommission': int(self.commission * 10000),
+            'canTrade': True, 'canWithdraw': False, 'canDeposit': False, 'updateTime': self.now(),
+            'accountType': 'SPOT', 'permissions': ['SPOT'],
+            'balances': [{'asset': asset, 'free': _fmt(free), 'locked': _fmt(locked)}
+                         for asset, (free, locked) in sorted(self._balances.items())]
+        }
+
+    def _ticker(self, symbol: str) -> Dict:
+        if symbol not in self.symbols:
+            return dict(INVALID_SYMBOL)
+        spec = self.symbols[symbol]
+        book = self.books[symbol]
+        bid, ask = book.depth('BUY', 1), book.depth('SELL', 1)
+        open_, high, low, last, volume, quote_volume, count = self._stats[symbol] or [0.0] * 6 + [0]
+        return {
+            'symbol': symbol, 'priceChange': _fmt(last - open_),
+            'priceChangePercent': '%.3f' % ((last - open_) / open_ * 100 if open_ else 0.0),
+            'lastPrice': _fmt(last), 'openPrice': _fmt(open_), 'highPrice': _fmt(high), 'lowPrice': _fmt(low),
+            'bidPrice': _fmt(bid[0][0] * spec.tick if bid else 0.0), 'bidQty': _fmt(bid[0][1] * spec.step if bid else 0.0),
+            'askPrice': _fmt(ask[0][0] * spec.tick if ask else 0.0), 'askQty': _fmt(ask[0][1] * spec.step if ask else 0.0),
+            'volume': _fmt(volume), 'quoteVolume': _fmt(quote_volume), 'count': count,
+            'closeTime': self.now()
+        }
+
+    def _depth(self, symbol: str, limit: int) -> Dict:
+        if symbol not in self.symbols:
+            return dict(INVALID_SYMBOL)
+        spec = self.symbols[symbol]
+        book = self.books[symbol]
+        return {
+            'lastUpdateId': book.update_id,
+            'bids': [[_fmt(price * spec.tick), _fmt(qty * spec.step)] for price, qty in book.depth('BUY', limit)],
+            'asks': [[_fmt(price * spec.tick), _fmt(qty * spec.step)] for price, qty in book.depth('SELL', limit)]
+        }
+
+    def _klines_of(self, symbol: str, interval: str, start: int = None, end: int = None, limit: int = None):
+        if symbol not in self.symbols:
+            return dict(INVALID_SYMBOL)
+        if interval not in self.intervals:
+            return dict(INVALID_INTERVAL)
+
+        # With a start: the first `limit` candles from it, otherwise the last `limit` up to end
+        limit = min(limit or 500, 1000)
+        candles = [candle for candle in self._klines[symbol][interval]
+                   if (start is None or candle[0] >= start) and (end is None or candle[0] <= end)]
+        candles = candles[:limit] if start is not None else candles[-limit:]
+        return [[candle[0], _fmt(candle[1]), _fmt(candle[2]), _fmt(candle[3]), _fmt(candle[4]), _fmt(candle[5]),
+                 candle[6], _fmt(candle[7]), candle[8], '0', '0', '0'] for candle in candles]
+
+    def _public_trades(self, symbol: str, limit: int) -> List:
+        if symbol not in self.symbols:
+            return dict(INVALID_SYMBOL)
+        trades = list(self._trades[symbol])[-limit:]
+        return [{'id': trade_id, 'price': _fmt(price), 'qty': _fmt(qty), 'quoteQty': _fmt(price * qty),
+                 'time': timestamp, 'isBuyerMaker': False, 'isBestMatch': True}
+                for trade_id, price, qty, timestamp in trades]
+
+    # --- BinanceAPI surface ---
+
+    def warm_up(self, connections=None):
+        pass
+
+    def ping(self):
+        return self._call(dict)
+
+    def get_server_time(self):
+        return self._call(lambda: {'serverTime': self.now()})
+
+    def get_exchange_info(self, symbols=None):
+        def info():
+            if symbols is None:
+                return {'timezone': 'UTC', 'serverTime': self.now(),
+                        'symbols': [spec.info() for spec in self.symbols.values()]}
+            if any(symbol not in self.symbols for symbol in symbols):
+                return dict(INVALID_SYMBOL)
+            return {'timezone': 'UTC', 'serverTime': self.now(),
+                    'symbols': [self.symbols[symbol].info() for symbol in symbols]}
+        return self._call(info)
+
+    def get_products(self):
+        return self._call(lambda: {'data': [{'s': spec.symbol, 'b': spec.base, 'q': spec.quote, 'st': 'TRADING'}
+                                            for spec in self.symbols.values()]})
+
+    def get_history(self, market, limit=50):
+        return self._call(self._public_trades, market, limit)
+
+    def get_trades(self, market, limit=50):
+        return self._call(self._public_trades, market, limit)
+
+    def get_klines(self, market, interval, startTime=None, endTime=None, limit=None):
+        return self._call(self._klines_of, market, interval, startTime, endTime, limit)
+
+    def get_ticker(self, market):
+        return self._call(self._ticker, market)
+
+    def get_order_books(self, market, limit=50):
+        return self._call(self._depth, market, limit)
+
+    def get_account(self):
+        return self._call(self._account)
+
+    def get_open_orders(self, market, limit=100):
+        return self._call(lambda: [self._query(order) for order in self._orders.values()
+                                   if order.symbol == market and order.status in ('NEW', 'PARTIALLY_FILLED')][:limit])
+
+    def get_my_trades(self, market, limit=50):
+        return self._call(lambda: list(self._my_trades.get(market, ()))[-limit:])
+
+    def buy_limit(self, market, quantity, rate):
+        return self._call(self._place, market, 'BUY', quantity, rate)
+
+    def sell_limit(self, market, quantity, rate):
+        return self._call(self._place, market, 'SELL', quantity, rate)
+
+    def buy_market(self, market, quantity):
+        return self._call(self._place, market, 'BUY', quantity)
+
+    def sell_market(self, market, quantity):
+        return self._call(self._place, market, 'SELL', quantity)
+
+    def query_order(self, market, orderId):
+        def query():
+            order = self._orders.get(int(orderId))
+            if order is None or order.symbol != market:
+                return dict(NO_SUCH_ORDER)
+            return self._query(order)
+        return self._call(query)
+
+    def cancel(self, market, order_id):
+        return self._call(self._cancel, market, order_id)
+
+    def create_listen_key(self):
+        return self._call(lambda: {'listenKey': 'sim'})
+
+    def keepalive_listen_key(self, listen_key):
+        return self._call(dict)
+
+    def close_listen_key(self, listen_key):
+        return self._call(dict)
+
+    # --- inspection ---
+
+    def balance(self, asset: str) -> Tuple[float, float]:
+        """(free, locked) of asset"""
+        with self._lock:
+            free, locked = self._balances.get(asset, (0.0, 0.0))
+            return free, locked
+
+
+# --- market data feeds ---
+
+class SyntheticFeed:
+    """
+    Random-walk ticks for one or more symbols
+
+    Prices follow a geometric random walk with `volatility` per tick;
+    symbols tick in turn every `step` ms of feed time.
+    """
+
+    def __init__(self, prices: Dict[str, float], volatility: float = 0.0005, volume: float = 0.5,
+                 step: int = 100, seed: int = None):
+        """
+        Args:
+            prices: Starting price per symbol
+            volatility: Standard deviation of the log return per tick
+            volume: Mean traded quantity per tick
+            step: Milliseconds between ticks
+            seed: Random seed, for repeatable runs
+        """
+        self.prices = dict(prices)
+        self.volatility = volatility
+        self.volume = volume
+        self.step = step
+        self.random = random.Random(seed)
+
+    def ticks(self, start: int = None) -> Iterator[Tuple[int, str, float, float]]:
+        """Endless (timestamp ms, symbol, price, volume) ticks"""
+        timestamp = int(time.time() * 1000) if start is None else start
+        symbols = itertools.cycle(list(self.prices))
+        while True:
+            symbol = next(symbols)
+            price = self.prices[symbol] * math.exp(self.random.gauss(0.0, self.volatility))
+            self.prices[symbol] = price
+            yield timestamp, symbol, price, self.random.expovariate(1.0 / self.volume)
+            timestamp += self.step
+
+    def candles(self, symbol: str, count: int, interval: str = '1m', ticks: int = 20) -> List[Tuple]:
+        """`count` past candles of `ticks` random steps each, ending at the current price (for load_history)"""
+        step = KlineSync.interval_ms(interval)
+        price = self.prices[symbol]
+        closes = []
+        for _ in range(count * ticks):
+            closes.append(price)
+            price /= math.exp(self.random.gauss(0.0, self.volatility))
+        closes.reverse()
+
+        rows = []
+        for i in range(count):
+            chunk = closes[i * ticks:(i + 1) * ticks]
+            rows.append((i * step, chunk[0], max(chunk), min(chunk), chunk[-1], self.volume * ticks))
+        return rows
+
+
+class KlineReplay:
+    """
+    Ticks from recorded klines (Backtester.load_klines columns)
+
+    Each candle becomes four ticks: open, then low and high in the order
+    the candle most likely traded them (low first on an up candle), then
+    close, each with a quarter of the volume. Timestamps are shifted to
+    start at `start` (default now), so the replay lines up with the clock.
+    """
+
+    def __init__(self, symbol: str, klines: Dict, start: int = None):
+        self.symbol = symbol
+        self.klines = klines
+        self.start = start
+
+    def ticks(self) -> Iterator[Tuple[int, str, float, float]]:
+        times = self.klines['time']
+        if not len(times):
+            return
+        start = int(time.time() * 1000) if self.start is None else self.start
+        shift = start - int(times[0])
+        span = int(times[1] - times[0]) if len(times) > 1 else 60000
+        quarter = span // 4
+
+        columns = [self.klines[field] for field in ('time', 'open', 'high', 'low', 'close', 'volume')]
+        for open_time, open_, high, low, close, volume in zip(*columns):
+            timestamp = int(open_time) + shift
+            path = (open_, low, high, close) if close >= open_ else (open_, high, low, close)
+            for i, price in enumerate(path):
+                yield timestamp + i * quarter, self.symbol, price, volume / 4
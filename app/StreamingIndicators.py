@@ -0,0 +1,528 @@
+# -*- coding: UTF-8 -*-
+# Incremental (streaming) Technical Indicators for Binance Trader
+# O(1) per bar counterparts of the batch functions in Indicators
+
+import math
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+from Indicators import Indicators
+
+
+# Running sums are rebuilt from the window every N updates to bound float drift
+RESUM_INTERVAL = 1024
+
+
+def _close(candle) -> float:
+    return float(candle[4])
+
+
+class RollingWindow:
+    """
+    Fixed-size ring buffer with a running sum
+
+    Used for the rolling averages behind volume analysis, RSI and ATR.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values = deque(maxlen=size)
+        self.total = 0.0
+        self.nonzero = 0
+        self._updates = 0
+
+    def push(self, value: float):
+        if len(self.values) == self.size:
+            self._remove(self.values[0])
+        self.values.append(value)
+        self._add(value)
+        self._tick()
+
+    def replace_last(self, value: float):
+        self._remove(self.values[-1])
+        self.values[-1] = value
+        self._add(value)
+        self._tick()
+
+    def _add(self, value):
+        self.total += value
+        if value:
+            self.nonzero += 1
+
+    def _remove(self, value):
+        self.total -= value
+        if value:
+            self.nonzero -= 1
+
+    def _tick(self):
+        self._updates += 1
+        if self.nonzero == 0:
+            # An all-zero window sums to exactly zero (RSI relies on it)
+            self.total = 0.0
+        elif self._updates >= RESUM_INTERVAL:
+            self.total = math.fsum(self.values)
+            self._updates = 0
+
+    def __len__(self):
+        return len(self.values)
+
+
+class StreamingBollinger:
+    """
+    Bollinger Bands over a rolling window
+
+    Keeps a running sum and sum of squares of (close - reference) so the
+    variance stays accurate for large prices with a small spread.
+    Matches Indicators.bollinger_bands.
+    """
+
+    def __init__(self, period: int = 20, std_dev: float = 2.0):
+        self.period = period
+        self.std_dev = std_dev
+        self.values = deque(maxlen=period)
+        self.ref = None
+        self.sum = 0.0
+        self.sum_sq = 0.0
+        self._updates = 0
+
+    def update(self, candle):
+        self.push(_close(candle))
+
+    def replace(self, candle):
+        self.replace_last(_close(candle))
+
+    def push(self, price: float):
+        if self.ref is None:
+            self.ref = price
+        if len(self.values) == self.period:
+            self._remove(self.values[0])
+        self.values.append(price)
+        self._add(price)
+        self._tick()
+
+    def replace_last(self, price: float):
+        self._remove(self.values[-1])
+        self.values[-1] = price
+        self._add(price)
+        self._tick()
+
+    def _add(self, price):
+        d = price - self.ref
+        self.sum += d
+        self.sum_sq += d * d
+
+    def _remove(self, price):
+        d = price - self.ref
+        self.sum -= d
+        self.sum_sq -= d * d
+
+    def _tick(self):
+        self._updates += 1
+        if self._updates >= RESUM_INTERVAL:
+            # Re-centre on the current mean and rebuild the sums exactly
+            self.ref = sum(self.values) / len(self.values)
+            self.sum = math.fsum(v - self.ref for v in self.values)
+            self.sum_sq = math.fsum((v - self.ref) ** 2 for v in self.values)
+            self._updates = 0
+
+    def value(self) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        """(upper_band, middle_band, lower_band), or Nones until period closes are seen"""
+        if len(self.values) < self.period:
+            return None, None, None
+
+        mean_d = self.sum / self.period
+        variance = max(self.sum_sq / self.period - mean_d * mean_d, 0.0)
+        std = math.sqrt(variance)
+        sma = self.ref + mean_d
+
+        return sma + (self.std_dev * std), sma, sma - (self.std_dev * std)
+
+
+class StreamingEMA:
+    """
+    Recursive Exponential Moving Average
+
+    Seeded with the SMA of the first `period` values, like Indicators.ema.
+    """
+
+    def __init__(self, period: int):
+        self.period = period
+        self.multiplier = 2 / (period + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.ema = None
+        self._prev = (0, 0.0, None)
+
+    def update(self, candle):
+        self.push(_close(candle))
+
+    def replace(self, candle):
+        self.replace_last(_close(candle))
+
+    def push(self, price: float):
+        self._prev = (self.count, self.sum, self.ema)
+        self.count += 1
+
+        if self.count <= self.period:
+            self.sum += price
+            if self.count == self.period:
+                self.ema = self.sum / self.period
+        else:
+            self.ema = (price * self.multiplier) + (self.ema * (1 - self.multiplier))
+
+    def replace_last(self, price: float):
+        self.count, self.sum, self.ema = self._prev
+        self.push(price)
+
+    def value(self) -> Optional[float]:
+        if self.count == 0:
+            return None
+        if self.count < self.period:
+            return self.sum / self.count
+        return self.ema
+
+
+class StreamingMACD:
+    """
+    Incremental MACD, signal line and histogram
+
+    Matches Indicators.macd_series bar for bar: the signal EMA is fed with
+    every MACD value from bar `slow` onwards. The previous histogram value
+    is kept so crossovers are read without recomputing anything.
+    """
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.period = slow
+        self.fast = StreamingEMA(fast)
+        self.slow = StreamingEMA(slow)
+        self.signal = StreamingEMA(signal)
+        self.count = 0
+        self.hist = 0.0
+        self.prev_hist = 0.0
+
+    def update(self, candle):
+        self.push(_close(candle))
+
+    def replace(self, candle):
+        self.replace_last(_close(candle))
+
+    def push(self, price: float):
+        self.count += 1
+        self.prev_hist = self.hist
+        self.fast.push(price)
+        self.slow.push(price)
+        if self.count >= self.period:
+            self.signal.push(self._macd())
+            self.hist = self._macd() - self.signal.value()
+
+    def replace_last(self, price: float):
+        self.fast.replace_last(price)
+        self.slow.replace_last(price)
+        if self.count >= self.period:
+            self.signal.replace_last(self._macd())
+            self.hist = self._macd() - self.signal.value()
+
+    def _macd(self):
+        return self.fast.value() - self.slow.value()
+
+    def value(self) -> Tuple[float, float, float]:
+        """(MACD_line, Signal_line, Histogram), zeros until `slow` closes are seen"""
+        if self.count < self.period:
+            return 0.0, 0.0, 0.0
+        return self._macd(), self.signal.value(), self.hist
+
+    def cross(self) -> str:
+        """Crossover state from the last two histogram values (see Indicators.macd_cross)"""
+        if self.count < self.period + 2:
+            return 'none'
+        return Indicators.macd_cross(self.prev_hist, self.hist, Indicators.MACD_EPSILON * abs(self._macd()))
+
+
+class StreamingRSI:
+    """
+    Relative Strength Index
+
+    By default averages the last `period` gains and losses over a ring
+    buffer, matching Indicators.rsi. With wilder=True it uses Wilder's
+    smoothing instead (the classic RSI definition).
+    """
+
+    def __init__(self, period: int = 14, wilder: bool = False):
+        self.period = period
+        self.wilder = wilder
+        self.gains = RollingWindow(period)
+        self.losses = RollingWindow(period)
+        self.count = 0
+        self.prev_close = None
+        self.last_close = None
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self._prev_avgs = (0.0, 0.0)
+
+    def update(self, candle):
+        self.push(_close(candle))
+
+    def replace(self, candle):
+        self.replace_last(_close(candle))
+
+    def push(self, price: float):
+        self.count += 1
+        self.prev_close = self.last_close
+        self.last_close = price
+
+        if self.prev_close is None:
+            return
+
+        delta = price - self.prev_close
+        self.gains.push(delta if delta > 0 else 0)
+        self.losses.push(-delta if delta < 0 else 0)
+        self._smooth(delta, replace=False)
+
+    def replace_last(self, price: float):
+        self.last_close = price
+
+        if self.prev_close is None:
+            return
+
+        delta = price - self.prev_close
+        self.gains.replace_last(delta if delta > 0 else 0)
+        self.losses.replace_last(-delta if delta < 0 else 0)
+        self._smooth(delta, replace=True)
+
+    def _smooth(self, delta, replace):
+        if not self.wilder:
+            return
+
+        if replace:
+            self.avg_gain, self.avg_loss = self._prev_avgs
+        else:
+            self._prev_avgs = (self.avg_gain, self.avg_loss)
+
+        deltas = self.count - 1
+        if deltas < self.period:
+            return
+        if deltas == self.period:
+            self.avg_gain = self.gains.total / self.period
+            self.avg_loss = self.losses.total / self.period
+            return
+
+        gain = delta if delta > 0 else 0
+        loss = -delta if delta < 0 else 0
+        self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+        self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+
+    def value(self) -> float:
+        if self.count < self.period + 1:
+            return 50.0  # Neutral value if not enough data
+
+        if self.wilder:
+            avg_gain, avg_loss = self.avg_gain, self.avg_loss
+        else:
+            avg_gain = self.gains.total / self.period
+            avg_loss = self.losses.total / self.period
+
+        if avg_loss <= 0:
+            return 100.0
+
+        rs = avg_gain / avg_loss
+        return 100 - (100 / (1 + rs))
+
+
+class StreamingATR:
+    """
+    Average True Range
+
+    Averages the last `period` true ranges over a ring buffer, matching
+    Indicators.atr. With wilder=True it uses Wilder's smoothing instead.
+    """
+
+    def __init__(self, period: int = 14, wilder: bool = False):
+        self.period = period
+        self.wilder = wilder
+        self.ranges = RollingWindow(period)
+        self.count = 0
+        self.prev_close = None
+        self.last_close = None
+        self.atr = 0.0
+        self._prev_atr = 0.0
+
+    def update(self, candle):
+        self.push(float(candle[2]), float(candle[3]), _close(candle))
+
+    def replace(self, candle):
+        self.replace_last(float(candle[2]), float(candle[3]), _close(candle))
+
+    def push(self, high: float, low: float, close: float):
+        self.count += 1
+        self.prev_close = self.last_close
+        self.last_close = close
+
+        if self.prev_close is None:
+            return
+
+        tr = self._true_range(high, low)
+        self.ranges.push(tr)
+        self._prev_atr = self.atr
+        self._smooth(tr)
+
+    def replace_last(self, high: float, low: float, close: float):
+        self.last_close = close
+
+        if self.prev_close is None:
+            return
+
+        tr = self._true_range(high, low)
+        self.ranges.replace_last(tr)
+        self.atr = self._prev_atr
+        self._smooth(tr)
+
+    def _true_range(self, high, low):
+        return max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+
+    def _smooth(self, tr):
+        if not self.wilder:
+            return
+
+        ranges = self.count - 1
+        if ranges == self.period:
+            self.atr = self.ranges.total / self.period
+        elif ranges > self.period:
+            self.atr = (self.atr * (self.period - 1) + tr) / self.period
+
+    def value(self) -> float:
+        if self.count < self.period + 1:
+            return 0.0
+        if self.wilder:
+            return self.atr
+        return self.ranges.total / self.period
+
+
+class StreamingVolume:
+    """Rolling volume average over a ring buffer, matching Indicators.volume_analysis"""
+
+    def __init__(self, period: int = 20):
+        self.period = period
+        self.window = RollingWindow(period)
+        self.count = 0
+        self.total = 0.0  # all-time sum, only used until `period` bars are seen
+
+    def update(self, candle):
+        self.push(float(candle[5]))
+
+    def replace(self, candle):
+        self.replace_last(float(candle[5]))
+
+    def push(self, volume: float):
+        self.count += 1
+        if self.count <= self.period:
+            self.total += volume
+        self.window.push(volume)
+
+    def replace_last(self, volume: float):
+        if self.count <= self.period:
+            self.total += volume - self.window.values[-1]
+        self.window.replace_last(volume)
+
+    def value(self) -> Dict[str, float]:
+        current_volume = self.window.values[-1] if self.count else 0
+
+        if self.count < self.period:
+            return {
+                'avg_volume': self.total / self.count if self.count else 0,
+                'current_volume': current_volume,
+                'volume_ratio': 1.0
+            }
+
+        avg_volume = self.window.total / self.period
+        volume_ratio = current_volume / avg_volume if avg_volume > 0 else 1.0
+
+        return {
+            'avg_volume': avg_volume,
+            'current_volume': current_volume,
+            'volume_ratio': volume_ratio,
+            'is_high_volume': volume_ratio > 1.5,
+            'is_low_volume': volume_ratio < 0.5
+        }
+
+
+class IndicatorEngine:
+    """
+    Keeps a set of streaming indicators in step with a kline window
+
+    sync() is called with the same rolling kline list every cycle. It works
+    out which candles are new since the last call, revises the in-progress
+    candle and feeds only the new ones, so each cycle costs O(1) regardless
+    of the window length. Any mismatch (gap, different series) triggers a
+    full rebuild from the window.
+    """
+
+    def __init__(self, factory: Callable[[], Dict[str, object]]):
+        """
+        Args:
+            factory: Returns a fresh {name: streaming indicator} dict; called
+                     again whenever the engine has to rebuild
+        """
+        self.factory = factory
+        self.indicators = factory()
+        self.bars = 0
+        self._last_open = None
+        self._anchor = None
+
+    def __getitem__(self, name):
+        return self.indicators[name]
+
+    def reset(self):
+        self.indicators = self.factory()
+        self.bars = 0
+        self._last_open = None
+        self._anchor = None
+
+    @staticmethod
+    def _row(candle):
+        return (candle[0], float(candle[2]), float(candle[3]), float(candle[4]), float(candle[5]))
+
+    def update(self, candle):
+        """Feed a new bar"""
+        for indicator in self.indicators.values():
+            indicator.update(candle)
+        self.bars += 1
+
+    def replace(self, candle):
+        """Revise the latest bar (in-progress candle)"""
+        for indicator in self.indicators.values():
+            indicator.replace(candle)
+
+    def sync(self, klines: List[List]):
+        """Bring indicators up to date with a kline window (most recent last)"""
+        if not klines:
+            return
+
+        if self._last_open is None:
+            return self._rebuild(klines)
+
+        i = len(klines) - 1
+        while i >= 0 and klines[i][0] > self._last_open:
+            i -= 1
+
+        if i < 0 or klines[i][0] != self._last_open:
+            return self._rebuild(klines)
+
+        # The last closed candle we saw must be unchanged
+        if self._anchor is not None and (i == 0 or self._row(klines[i - 1]) != self._anchor):
+            return self._rebuild(klines)
+
+        self.replace(klines[i])
+        for candle in klines[i + 1:]:
+            self.update(candle)
+
+        self._mark(klines)
+
+    def _rebuild(self, klines):
+        self.reset()
+        for candle in klines:
+            self.update(candle)
+        self._mark(klines)
+
+    def _mark(self, klines):
+        self._last_open = klines[-1][0]
+        self._anchor = self._row(klines[-2]) if len(klines) > 1 else None
@@ -16,6 +16,12 @@ from decimal import Decimal
 # Define Custom imports
 from Database import Database
 from Orders import Orders
+from MarketData import MarketDataStream
+from Scheduler import Scheduler
+from OrderTracker import OrderTracker
+from Latency import timed
+from Metrics import Metrics
+from LogPipeline import AsyncHandler, setup_logging, config_options
 
 
 formater_str = '%(asctime)s,%(msecs)d %(levelname)s %(name)s: %(message)s'
@@ -27,9 +33,8 @@ LOGGER_ENUM = {'debug':'debug.log', 'trading':'trades.log','errors':'general.log
 LOGGER_FILE = "binance-trader.log"
 FORMAT = '%(asctime)-15s - %(levelname)s:  %(message)s'
 
-logger = logging.basicConfig(filename=LOGGER_FILE, filemode='a',
-                             format=formater_str, datefmt=datefmt,
-                             level=logging.INFO)
+# Records are written by a background thread, never by the trading thread
+logger = setup_logging(LOGGER_FILE, logging.INFO, formater_str, datefmt, **config_options(config))
 
 # Approximated value to get back the commission for sell and buy
 TOKEN_COMMISION = 0.001
@@ -41,13 +46,10 @@ class Trading():
 
     # Define trade vars  
     order_id = 0
-    order_data = None
 
-    buy_filled = True
-    sell_filled = True
-
-    buy_filled_qty = 0
-    sell_filled_qty = 0
+    # Buy/sell cycles running at once (--max_orders)
+    max_orders = 1
+    open_trades = 0
 
     # percent (When you drop 10%, sell panic.)
     stop_loss = 0
@@ -66,13 +68,22 @@ class Trading():
     WAIT_TIME_CHECK_BUY_SELL = 0.2 # seconds
     WAIT_TIME_CHECK_SELL = 5 # seconds
     WAIT_TIME_STOP_LOSS = 20 # seconds
+    WAIT_TIME_POLL = 1 # seconds (order status without the user data stream)
+
+    MAX_CANCEL_ATTEMPTS = 3 # cancels sent before an order is given up on
+
+    STATS_INTERVAL = 60 # seconds between tick lateness logs
 
     MAX_TRADE_SIZE = 7 # int
 
     # Type of commision, Default BNB_COMMISION
     commision = BNB_COMMISION
 
-    def __init__(self, option):
+    # WebSocket market data and user data (--stream)
+    stream = None
+    user_stream = None
+
+    def __init__(self, option, scheduler=None, tracker=None):
         print("options: {0}".format(option))
 
         # Get argument parse options
@@ -94,8 +105,15 @@ class Trading():
         if self.option.commision == 'TOKEN':
             self.commision = TOKEN_COMMISION
 
-        # Thread safety lock
-        self._lock = threading.Lock()
+        self.max_orders = getattr(self.option, 'max_orders', 1)
+
+        # Guards only the open_trades counter, never held across a request
+        self._slots_lock = threading.Lock()
+
+        # Order lifecycle: fills and timeouts arrive as tracker callbacks
+        # (TradingEngine passes one scheduler and tracker shared by every symbol)
+        self.scheduler = scheduler or Scheduler(workers=4, name='Trading')
+        self.tracker = tracker or OrderTracker(self.scheduler, fetch=Orders.get_order, poll_interval=self.WAIT_TIME_POLL)
 
         # setup Logger
         self.logger =  self.setup_logger(self.option.symbol, debug=self.option.debug)
@@ -107,7 +125,7 @@ class Trading():
         #logger.addHandler(handler)
         logger = logging.getLogger(symbol)
 
-        stout_handler = logging.StreamHandler(sys.stdout)
+        stout_handler = AsyncHandler(sys.stdout)
         if debug:
             logger.setLevel(logging.DEBUG)
             stout_handler.setLevel(logging.DEBUG)
@@ -119,110 +137,140 @@ class Trading():
         return logger
 
 
-    def buy(self, symbol, quantity, buyPrice, profitableSellingPrice):
+    def acquire_slot(self):
+        with self._slots_lock:
+            if self.open_trades >= self.max_orders:
+                return False
+            self.open_trades += 1
+            Metrics.set('open_trades', self.open_trades, symbol=self.option.symbol)
+            return True
 
-        # Do you have an open order?
-        with self._lock:
-            self.check_order()
+    def release_slot(self):
+        with self._slots_lock:
+            self.open_trades -= 1
+            Metrics.set('open_trades', self.open_trades, symbol=self.option.symbol)
 
-            try:
+    def closed(self, order):
+        # Position and PnL for /metrics once a sell order is final
+        if order.executed_qty <= 0:
+            return
+        profit = (order.avg_price - order.context['buy_price']) * order.executed_qty
+        Metrics.inc('position', -order.executed_qty, symbol=order.symbol)
+        Metrics.inc('realized_pnl', profit, symbol=order.symbol)
 
-                # Create order
-                orderId = Orders.buy_limit(symbol, quantity, buyPrice)
+    def buy(self, symbol, quantity, buyPrice, profitableSellingPrice):
 
-                if orderId is None:
-                    self.logger.error('Buy order failed - no orderId returned')
-                    return None
+        # Every buy/sell cycle holds a slot until it is closed
+        if not self.acquire_slot():
+            return None
 
-                # Database log
-                Database.write([orderId, symbol, 0, buyPrice, 'BUY', quantity, self.option.profit])
+        try:
 
-                #print('Buy order created id:%d, q:%.8f, p:%.8f' % (orderId, quantity, float(buyPrice)))
-                self.logger.info('%s : Buy order created id:%d, q:%.8f, p:%.8f, Take profit aprox :%.8f' % (symbol, orderId, quantity, float(buyPrice), profitableSellingPrice))
+            # Create order
+            orderId = Orders.buy_limit(symbol, quantity, buyPrice)
 
-                self.order_id = orderId
+            if orderId is None:
+                self.logger.error('Buy order failed - no orderId returned')
+                self.release_slot()
+                return None
 
-                return orderId
+            '''
+            Not filled by the next tick: sell what was filled, cancel the rest.
+            bought() runs once the order is FILLED or CANCELED.
+            '''
+            self.tracker.track(symbol, orderId, 'BUY', quantity, buyPrice,
+                               timeout=self.wait_time + self.WAIT_TIME_CHECK_BUY_SELL,
+                               on_done=self.bought, on_timeout=self.buy_timeout,
+                               sell_price=profitableSellingPrice)
 
-            except Exception as e:
-                #print('bl: %s' % (e))
-                self.logger.debug('Buy error: %s' % (e))
-                time.sleep(self.WAIT_TIME_BUY_SELL)
-                return None
+        except Exception as e:
+            #print('bl: %s' % (e))
+            self.logger.debug('Buy error: %s', e)
+            self.release_slot()
+            return None
 
-    def sell(self, symbol, quantity, orderId, sell_price, last_price):
+        # Database log
+        Database.write([orderId, symbol, 0, buyPrice, 'BUY', quantity, self.option.profit])
 
-        '''
-        The specified limit will try to sell until it reaches.
-        If not successful, the order will be canceled.
-        '''
+        #print('Buy order created id:%d, q:%.8f, p:%.8f' % (orderId, quantity, float(buyPrice)))
+        self.logger.info('%s : Buy order created id:%d, q:%.8f, p:%.8f, Take profit aprox :%.8f', symbol, orderId, quantity, float(buyPrice), profitableSellingPrice)
 
-        buy_order = Orders.get_order(symbol, orderId)
+        return orderId
 
-        if not buy_order:
-            self.logger.error('Could not get order info for orderId: %d' % orderId)
+    def resume(self, symbol, orderId):
+        # Manually defined --orderid: sell it once it is filled
+        order = Orders.get_order(symbol, orderId)
+
+        if not order:
+            self.logger.error('Could not get order info for orderId: %d', orderId)
+            return
+
+        if not self.acquire_slot():
             return
 
-        if buy_order['status'] == 'FILLED' and buy_order['side'] == 'BUY':
-            #print('Buy order filled... Try sell...')
-            self.logger.info('Buy order filled... Try sell...')
+        if self.option.mode == 'range':
+            sell_price = float(self.option.sellprice)
         else:
-            time.sleep(self.WAIT_TIME_CHECK_BUY_SELL)
-            if buy_order['status'] == 'FILLED' and buy_order['side'] == 'BUY':
-                #print('Buy order filled after 0.1 second... Try sell...')
-                self.logger.info('Buy order filled after 0.1 second... Try sell...')
-            elif buy_order['status'] == 'PARTIALLY_FILLED' and buy_order['side'] == 'BUY':
-                #print('Buy order partially filled... Try sell... Cancel remaining buy...')
-                self.logger.info('Buy order partially filled... Try sell... Cancel remaining buy...')
-                self.cancel(symbol, orderId)
-            else:
-                self.cancel(symbol, orderId)
-                #print('Buy order fail (Not filled) Cancel order...')
-                self.logger.warning('Buy order fail (Not filled) Cancel order...')
-                with self._lock:
-                    self.order_id = 0
-                return
+            sell_price = self.calc(float(order['price']))
+
+        self.tracker.track(symbol, orderId, 'BUY', float(order['origQty']), float(order['price']),
+                           timeout=self.wait_time + self.WAIT_TIME_CHECK_BUY_SELL,
+                           on_done=self.bought, on_timeout=self.buy_timeout,
+                           sell_price=sell_price)
+        self.tracker.update(order)
+
+    def buy_timeout(self, order):
 
-        # Use actual executed quantity instead of original quantity
-        actual_quantity = float(buy_order.get('executedQty', 0))
-        if actual_quantity > 0:
-            sell_order = Orders.sell_limit(symbol, actual_quantity, sell_price)
+        if order.executed_qty > 0:
+            #print('Buy order partially filled... Try sell... Cancel remaining buy...')
+            self.logger.info('Buy order partially filled... Try sell... Cancel remaining buy...')
         else:
-            self.logger.warning('No quantity to sell - executedQty not available or zero')
-            with self._lock:
-                self.order_id = 0
-                self.order_data = None
+            #print('Buy order fail (Not filled) Cancel order...')
+            self.logger.warning('Buy order fail (Not filled) Cancel order...')
+
+        self.cancel(order)
+
+    def bought(self, order):
+
+        if order.executed_qty <= 0:
+            self.logger.warning('No quantity to sell - buy order %d %s', order.order_id, order.status)
+            self.release_slot()
             return
 
+        Metrics.inc('position', order.executed_qty, symbol=order.symbol)
+
+        #print('Buy order filled... Try sell...')
+        self.logger.info('Buy order %s (%.8f @ %.8f)... Try sell...', order.status.lower(), order.executed_qty, order.avg_price)
+
+        self.sell(order.symbol, order.executed_qty, order.context['sell_price'], order.avg_price)
+
+    def sell(self, symbol, quantity, sell_price, buy_price):
+
+        '''
+        The specified limit will try to sell until it reaches.
+        If not successful, the order will be canceled.
+        '''
+
+        sell_order = Orders.sell_limit(symbol, quantity, sell_price)
+
         if not sell_order or 'orderId' not in sell_order:
             self.logger.error('Sell order failed - no orderId returned')
-            with self._lock:
-                self.order_id = 0
-                self.order_data = None
+            self.release_slot()
             return
 
         sell_id = sell_order['orderId']
         #print('Sell order create id: %d' % sell_id)
-        self.logger.info('Sell order create id: %d' % sell_id)
-
-        time.sleep(self.WAIT_TIME_CHECK_SELL)
-
-        if sell_order['status'] == 'FILLED':
+        self.logger.info('Sell order create id: %d', sell_id)
 
-            #print('Sell order (Filled) Id: %d' % sell_id)
-            #print('LastPrice : %.8f' % last_price)
-            #print('Profit: %%%s. Buy price: %.8f Sell price: %.8f' % (self.option.profit, float(sell_order['price']), sell_price))
+        self.tracker.track(symbol, sell_id, 'SELL', quantity, sell_price,
+                           timeout=self.WAIT_TIME_CHECK_SELL,
+                           on_done=self.sold, on_timeout=self.sell_timeout,
+                           buy_price=buy_price)
 
-            self.logger.info('Sell order (Filled) Id: %d' % sell_id)
-            self.logger.info('LastPrice : %.8f' % last_price)
-            self.logger.info('Profit: %%%s. Buy price: %.8f Sell price: %.8f' % (self.option.profit, float(sell_order['price']), sell_price))
+        # The response already carries the first status, possibly FILLED
+        self.tracker.update(sell_order)
 
-
-            with self._lock:
-                self.order_id = 0
-                self.order_data = None
-
-            return
+    def sell_timeout(self, order):
 
         '''
         If all sales trials fail, 
@@ -230,192 +278,116 @@ class Trading():
         '''
 
         if self.stop_loss > 0:
-
             # If sell order failed after 5 seconds, 5 seconds more wait time before selling at loss
-            time.sleep(self.WAIT_TIME_CHECK_SELL)
-
-            if self.stop(symbol, actual_quantity, sell_id, last_price):
-
-                sell_order_status = Orders.get_order(symbol, sell_id)
-                if sell_order_status and sell_order_status['status'] != 'FILLED':
-                    #print('We apologize... Sold at loss...')
-                    self.logger.info('We apologize... Sold at loss...')
+            self.tracker.expire_in(order, self.WAIT_TIME_CHECK_SELL, self.stop)
+        else:
+            self.logger.info('Sell order %d not filled yet (%.8f/%.8f)... Waiting...', order.order_id, order.executed_qty, order.quantity)
 
-            else:
-                #print('We apologize... Cant sell even at loss... Please sell manually... Stopping program...')
-                self.logger.info('We apologize... Cant sell even at loss... Please sell manually... Stopping program...')
-                self.cancel(symbol, sell_id)
-                exit(1)
-
-            sell_status_obj = Orders.get_order(symbol, sell_id)
-            if not sell_status_obj:
-                self.logger.error('Could not get sell order status')
-                return
-            sell_status = sell_status_obj['status']
-            while (sell_status != 'FILLED'):
-                time.sleep(self.WAIT_TIME_CHECK_SELL)
-                sell_status_obj = Orders.get_order(symbol, sell_id)
-                if not sell_status_obj:
-                    self.logger.error('Could not get sell order status')
-                    break
-                sell_status = sell_status_obj['status']
-                lastPrice = Orders.get_ticker(symbol)
-                #print('Status: %s Current price: %.8f Sell price: %.8f' % (sell_status, lastPrice, sell_price))
-                #print('Sold! Continue trading...')
-
-                self.logger.info('Status: %s Current price: %.8f Sell price: %.8f' % (sell_status, lastPrice, sell_price))
-                self.logger.info('Sold! Continue trading...')
-
-
-            with self._lock:
-                self.order_id = 0
-                self.order_data = None
-
-    def stop(self, symbol, quantity, orderId, last_price):
+    def stop(self, order):
         # If the target is not reached, stop-loss.
-        stop_order = Orders.get_order(symbol, orderId)
-
-        stopprice =  self.calc(float(stop_order['price']))
-
-        lossprice = stopprice - (stopprice * self.stop_loss / 100)
-
-        status = stop_order['status']
-
-        # Order status
-        if status == 'NEW' or status == 'PARTIALLY_FILLED':
-
-            if self.cancel(symbol, orderId):
-
-                # Stop loss
-                if last_price >= lossprice:
-
-                    sello = Orders.sell_market(symbol, quantity)
-
-                    #print('Stop-loss, sell market, %s' % (last_price))
-                    self.logger.info('Stop-loss, sell market, %s' % (last_price))
-
-                    sell_id = sello['orderId']
-
-                    if sello == True:
-                        return True
-                    else:
-                        # Wait a while after the sale to the loss.
-                        time.sleep(self.WAIT_TIME_STOP_LOSS)
-                        statusloss = sello['status']
-                        if statusloss != 'NEW':
-                            print('Stop-loss, sold')
-                            self.logger.info('Stop-loss, sold')
-                            return True
-                        else:
-                            self.cancel(symbol, sell_id)
-                            return False
-                else:
-                    sello = Orders.sell_limit(symbol, quantity, lossprice)
-                    print('Stop-loss, sell limit, %s' % (lossprice))
-                    time.sleep(self.WAIT_TIME_STOP_LOSS)
-                    statusloss = sello['status']
-                    if statusloss != 'NEW':
-                        print('Stop-loss, sold')
-                        return True
-                    else:
-                        self.cancel(symbol, sell_id)
-                        return False
-            else:
-                print('Cancel did not work... Might have been sold before stop loss...')
-                return True
-
-        elif status == 'FILLED':
-            with self._lock:
-                self.order_id = 0
-                self.order_data = None
-            print('Order filled')
-            return True
-        else:
-            return False
+        stopprice = self.calc(order.price)
 
-    def check(self, symbol, orderId, quantity):
-        # If profit is available and there is no purchase from the specified price, take it with the market.
+        # sold() places the stop-loss order once the cancel is confirmed
+        order.context['loss_price'] = stopprice - (stopprice * self.stop_loss / 100)
 
-        # Do you have an open order?
-        with self._lock:
-            self.check_order()
+        self.cancel(order)
 
-        trading_size = 0
-        time.sleep(self.WAIT_TIME_BUY_SELL)
+    def sold(self, order):
 
-        while trading_size < self.MAX_TRADE_SIZE:
+        symbol = order.symbol
+        buy_price = order.context['buy_price']
 
-            # Order info
-            order = Orders.get_order(symbol, orderId)
+        self.closed(order)
 
-            if not order:
-                self.logger.error('Could not get order info for orderId: %d' % orderId)
-                break
+        if order.context.get('stop_loss'):
 
-            side  = order['side']
-            price = float(order['price'])
+            if order.status == 'FILLED':
+                print('Stop-loss, sold')
+                self.logger.info('Stop-loss, sold. Buy price: %.8f Sell price: %.8f', buy_price, order.avg_price)
+            else:
+                #print('We apologize... Cant sell even at loss... Please sell manually...')
+                self.logger.error('We apologize... Cant sell even at loss... Please sell manually... (%.8f %s)', order.remaining, symbol)
 
-            # TODO: Sell partial qty
-            orig_qty = float(order['origQty'])
-            self.buy_filled_qty = float(order['executedQty'])
+            self.release_slot()
+            return
 
-            status = order['status']
+        if order.status == 'FILLED':
 
-            #print('Wait buy order: %s id:%d, price: %.8f, orig_qty: %.8f' % (symbol, order['orderId'], price, orig_qty))
-            self.logger.info('Wait buy order: %s id:%d, price: %.8f, orig_qty: %.8f' % (symbol, order['orderId'], price, orig_qty))
+            #print('Sell order (Filled) Id: %d' % sell_id)
+            #print('Profit: %%%s. Buy price: %.8f Sell price: %.8f' % (self.option.profit, float(sell_order['price']), sell_price))
 
-            if status == 'NEW':
+            self.logger.info('Sell order (Filled) Id: %d', order.order_id)
+            self.logger.info('Profit: %%%s. Buy price: %.8f Sell price: %.8f', self.option.profit, buy_price, order.avg_price)
 
-                if self.cancel(symbol, orderId):
+            self.release_slot()
+            return
 
-                    buyo = Orders.buy_market(symbol, quantity)
+        loss_price = order.context.get('loss_price')
 
-                    #print('Buy market order')
-                    self.logger.info('Buy market order')
+        if loss_price is None or order.remaining <= 0:
+            self.logger.warning('Sell order %d %s, %.8f left unsold', order.order_id, order.status, order.remaining)
+            self.release_slot()
+            return
 
-                    with self._lock:
-                        self.order_id = buyo['orderId']
-                        self.order_data = buyo
+        quantity = self.format_step(order.remaining, self.step_size)
+        last_price = Orders.get_ticker(symbol)
 
-                    if buyo == True:
-                        break
-                    else:
-                        trading_size += 1
-                        continue
-                else:
-                    break
+        try:
 
-            elif status == 'FILLED':
-                with self._lock:
-                    self.order_id = order['orderId']
-                    self.order_data = order
-                #print('Filled')
-                self.logger.info('Filled')
-                break
-            elif status == 'PARTIALLY_FILLED':
-                #print('Partial filled')
-                self.logger.info('Partial filled')
-                break
+            # Stop loss (without a price, a limit order at the loss price)
+            if last_price is not None and last_price >= loss_price:
+                sello = Orders.sell_market(symbol, quantity)
+                #print('Stop-loss, sell market, %s' % (last_price))
+                self.logger.info('Stop-loss, sell market, %s', last_price)
             else:
-                trading_size += 1
-                continue
+                sello = Orders.sell_limit(symbol, quantity, loss_price)
+                #print('Stop-loss, sell limit, %s' % (loss_price))
+                self.logger.info('Stop-loss, sell limit, %s', loss_price)
 
-    def cancel(self, symbol, orderId):
-        # If order is not filled, cancel it.
-        check_order = Orders.get_order(symbol, orderId)
+        except Exception as e:
+            self.logger.debug('Stop-loss error: %s', e)
+            sello = None
 
-        if not check_order:
-            with self._lock:
-                self.order_id = 0
-                self.order_data = None
-            return True
+        if not sello or 'orderId' not in sello:
+            self.logger.error('We apologize... Cant sell even at loss... Please sell manually... (%.8f %s)', quantity, symbol)
+            self.release_slot()
+            return
 
-        if check_order['status'] == 'NEW' or check_order['status'] != 'CANCELLED':
-            Orders.cancel_order(symbol, orderId)
-            with self._lock:
-                self.order_id = 0
-                self.order_data = None
-            return True
+        # Wait a while after the sale to the loss, then give up on it
+        self.tracker.track(symbol, sello['orderId'], 'SELL', quantity, loss_price,
+                           timeout=self.WAIT_TIME_STOP_LOSS,
+                           on_done=self.sold, on_timeout=self.cancel,
+                           buy_price=buy_price, stop_loss=True)
+        self.tracker.update(sello)
+
+    def cancel(self, order):
+        attempts = order.context.get('cancel_attempts', 0)
+
+        if attempts:
+            # No final update since the last cancel: ask for the order itself
+            check_order = Orders.get_order(order.symbol, order.order_id)
+            if check_order:
+                self.tracker.update(check_order)
+            if order.done:
+                return
+
+            if not check_order or attempts >= self.MAX_CANCEL_ATTEMPTS:
+                self.abandon(order)
+                return
+
+        # The CANCELED update (or FILLED, if it was too late) arrives through the tracker
+        order.context['cancel_attempts'] = attempts + 1
+        Orders.cancel_order(order.symbol, order.order_id)
+
+        # Try again if the cancel got lost
+        self.tracker.expire_in(order, self.WAIT_TIME_CHECK_SELL, self.cancel)
+
+    def abandon(self, order):
+        # Unknown to the exchange or never cancelled: stop waiting for it and free its slot
+        self.logger.error('Order %d (%s %.8f/%.8f) could not be cancelled, no longer tracked',
+                          order.order_id, order.side, order.executed_qty, order.quantity)
+        self.tracker.forget(order.order_id)
+        self.release_slot()
 
     def calc(self, lastBid):
         try:
@@ -428,14 +400,11 @@ class Trading():
             print('Calc Error: %s' % (e))
             return
 
-    def check_order(self):
-        # If there is an open order, exit.
-        if self.order_id > 0:
-            exit(1)
-
+    @timed('cycle.trading')
     def action(self, symbol):
         #import ipdb; ipdb.set_trace()
 
+        Metrics.inc('cycles_total', symbol=symbol, bot='trading')
 
         # Order amount
         quantity = self.quantity
@@ -463,40 +432,16 @@ class Trading():
             profitableSellingPrice = sellPrice
 
         # Screen log
-        if self.option.prints and self.order_id == 0:
+        if self.option.prints and self.open_trades == 0:
             spreadPerc = (lastAsk/lastBid - 1) * 100.0
             #print('price:%.8f buyp:%.8f sellp:%.8f-bid:%.8f ask:%.8f spread:%.2f' % (lastPrice, buyPrice, profitableSellingPrice, lastBid, lastAsk, spreadPerc))
-            self.logger.debug('price:%.8f buyprice:%.8f sellprice:%.8f bid:%.8f ask:%.8f spread:%.2f  Originalsellprice:%.8f' % (lastPrice, buyPrice, profitableSellingPrice, lastBid, lastAsk, spreadPerc, profitableSellingPrice-(lastBid *self.commision)   ))
+            self.logger.debug('price:%.8f buyprice:%.8f sellprice:%.8f bid:%.8f ask:%.8f spread:%.2f  Originalsellprice:%.8f', lastPrice, buyPrice, profitableSellingPrice, lastBid, lastAsk, spreadPerc, profitableSellingPrice-(lastBid *self.commision))
 
         # analyze = threading.Thread(target=analyze, args=(symbol,))
         # analyze.start()
 
-        if self.order_id > 0:
-
-            # Profit mode
-            if self.order_data is not None:
-
-                order = self.order_data
-
-                # Last control
-                newProfitableSellingPrice = self.calc(float(order['price']))
-
-                if (lastAsk >= newProfitableSellingPrice):
-                    profitableSellingPrice = newProfitableSellingPrice
-
-            # range mode
-            if self.option.mode == 'range':
-                profitableSellingPrice = self.option.sellprice
-
-            '''            
-            If the order is complete, 
-            try to sell it.
-            '''
-
-            # Perform buy action
-            sellAction = threading.Thread(target=self.sell, args=(symbol, quantity, self.order_id, profitableSellingPrice, lastPrice,))
-            sellAction.start()
-
+        # Sells are placed by the tracker callbacks once the buy fills
+        if self.open_trades >= self.max_orders:
             return
 
         '''
@@ -506,33 +451,52 @@ class Trading():
         '''
         if (lastAsk >= profitableSellingPrice and self.option.mode == 'profit') or \
            (lastPrice <= float(self.option.buyprice) and self.option.mode == 'range'):
-            self.logger.info ("MOde: {0}, Lastsk: {1}, Profit Sell Price {2}, ".format(self.option.mode, lastAsk, profitableSellingPrice))
-
-            if self.order_id == 0:
-                self.buy(symbol, quantity, buyPrice, profitableSellingPrice)
+            self.logger.info('MOde: %s, Lastsk: %s, Profit Sell Price %s, ', self.option.mode, lastAsk, profitableSellingPrice)
+            Metrics.inc('signals_total', symbol=symbol, signal='BUY')
 
-                # Perform check/sell action
-                # checkAction = threading.Thread(target=self.check, args=(symbol, self.order_id, quantity,))
-                # checkAction.start()
+            self.buy(symbol, quantity, buyPrice, profitableSellingPrice)
 
     def logic(self):
         return 0
 
+    def start_stream(self, symbol):
+        # Ticker and order book are read from memory instead of REST on every tick
+        try:
+            self.stream = MarketDataStream([symbol], depth=True, snapshot=Orders.get_depth_snapshot)
+            self.stream.start()
+        except ImportError as e:
+            self.logger.warning('Streaming disabled: %s', e)
+            self.stream = None
+            return
+
+        Orders.use_market(self.stream.view)
+
+        if not self.stream.view.wait(symbol):
+            self.logger.warning('No streamed book for %s yet, using REST until it arrives', symbol)
+
+        # Order fills pushed by the exchange instead of query_order polling
+        try:
+            self.user_stream = Orders.user_data_stream()
+            self.user_stream.start()
+            Orders.use_user_data(self.user_stream.view)
+            self.tracker.attach(self.user_stream.view)
+        except Exception as e:
+            self.logger.warning('User data stream disabled: %s', e)
+            self.user_stream = None
+
     def filters(self):
 
         symbol = self.option.symbol
 
-        # Get symbol exchange info
-        symbol_info = Orders.get_info(symbol)
+        # Get symbol trading rules (cached exchange info)
+        symbol_filters = Orders.get_filters(symbol)
 
-        if not symbol_info:
+        if not symbol_filters:
             #print('Invalid symbol, please try again...')
             self.logger.error('Invalid symbol, please try again...')
             exit(1)
 
-        symbol_info['filters'] = {item['filterType']: item for item in symbol_info['filters']}
-
-        return symbol_info
+        return symbol_filters
 
     def format_step(self, quantity, stepSize):
         quantity = Decimal(str(quantity))
@@ -544,23 +508,23 @@ class Trading():
 
         valid = True
         symbol = self.option.symbol
-        filters = self.filters()['filters']
+        filters = self.filters()
 
         # Order book prices
         lastBid, lastAsk = Orders.get_order_book(symbol)
 
         lastPrice = Orders.get_ticker(symbol)
 
-        minQty = float(filters['LOT_SIZE']['minQty'])
-        minPrice = float(filters['PRICE_FILTER']['minPrice'])
-        minNotional = float(filters['NOTIONAL']['minNotional'])
+        minQty = float(filters.min_qty)
+        minPrice = float(filters.min_price)
+        minNotional = float(filters.min_notional)
         quantity = float(self.option.quantity)
 
         # stepSize defines the intervals that a quantity/icebergQty can be increased/decreased by.
-        stepSize = float(filters['LOT_SIZE']['stepSize'])
+        stepSize = float(filters.step_size)
 
         # tickSize defines the intervals that a price/stopPrice can be increased/decreased by
-        tickSize = float(filters['PRICE_FILTER']['tickSize'])
+        tickSize = float(filters.tick_size)
 
         # If option increasing default tickSize greater than
         if (float(self.option.increasing) < tickSize):
@@ -597,18 +561,18 @@ class Trading():
         # minQty = minimum order quantity
         if quantity < minQty:
             #print('Invalid quantity, minQty: %.8f (u: %.8f)' % (minQty, quantity))
-            self.logger.error('Invalid quantity, minQty: %.8f (u: %.8f)' % (minQty, quantity))
+            self.logger.error('Invalid quantity, minQty: %.8f (u: %.8f)', minQty, quantity)
             valid = False
 
         if lastPrice < minPrice:
             #print('Invalid price, minPrice: %.8f (u: %.8f)' % (minPrice, lastPrice))
-            self.logger.error('Invalid price, minPrice: %.8f (u: %.8f)' % (minPrice, lastPrice))
+            self.logger.error('Invalid price, minPrice: %.8f (u: %.8f)', minPrice, lastPrice)
             valid = False
 
         # minNotional = minimum order value (price * quantity)
         if notional < minNotional:
             #print('Invalid notional, minNotional: %.8f (u: %.8f)' % (minNotional, notional))
-            self.logger.error('Invalid notional, minNotional: %.8f (u: %.8f)' % (minNotional, notional))
+            self.logger.error('Invalid notional, minNotional: %.8f (u: %.8f)', minNotional, notional)
             valid = False
 
         if not valid:
@@ -616,17 +580,41 @@ class Trading():
 
     def run(self):
 
-        cycle = 0
-        actions = []
-
         symbol = self.option.symbol
 
         print('Auto Trading for Binance.com @yasinkuyu')
         print('\n')
 
+        # Open keep-alive connections before the first order
+        Orders.warm_up()
+
+        if getattr(self.option, 'stream', False):
+            self.start_stream(symbol)
+
+        self.setup()
+
+        job = self.schedule()
+
+        stats = 'Ticks: %(ticks)d skipped: %(skipped)d late avg: %(late_avg_ms).1fms p99: %(late_p99_ms).1fms max: %(late_max_ms).1fms'
+
+        try:
+            while not job.wait(self.STATS_INTERVAL):
+                self.logger.info(stats % job.stats())
+        except KeyboardInterrupt:
+            job.cancel()
+
+        self.logger.info(stats % job.stats())
+
+    def setup(self):
+
+        symbol = self.option.symbol
+
         # Validate symbol
         self.validate()
 
+        if self.order_id > 0:
+            self.resume(symbol, self.order_id)
+
         print('Started...')
         print('Trading Symbol: %s' % symbol)
         print('Buy Quantity: %.8f' % self.quantity)
@@ -651,40 +639,15 @@ class Trading():
 
         print('\n')
 
-        startTime = time.time()
-
-        """
-        # DEBUG LINES
-        actionTrader = threading.Thread(target=self.action, args=(symbol,))
-        actions.append(actionTrader)
-        actionTrader.start()
-
-        endTime = time.time()
-
-        if endTime - startTime < self.wait_time:
-
-            time.sleep(self.wait_time - (endTime - startTime))
-
-            # 0 = Unlimited loop
-            if self.option.loop > 0:
-                cycle = cycle + 1
-
-        """
+    def schedule(self):
 
-        while (cycle <= self.option.loop):
-
-           startTime = time.time()
-
-           actionTrader = threading.Thread(target=self.action, args=(symbol,))
-           actions.append(actionTrader)
-           actionTrader.start()
-
-           endTime = time.time()
-
-           if endTime - startTime < self.wait_time:
+        '''
+        One action per tick on the scheduler's workers. Ticks stay on a fixed
+        grid; a tick that comes while the last action is still running is skipped.
+        '''
 
-               time.sleep(self.wait_time - (endTime - startTime))
+        symbol = self.option.symbol
 
-               # 0 = Unlimited loop
-               if self.option.loop > 0:
-                   cycle = cycle + 1
+        # 0 = Unlimited loop
+        count = self.option.loop + 1 if self.option.loop > 0 else None
+        return self.scheduler.every(self.wait_time, self.action, symbol, key=symbol, count=count)
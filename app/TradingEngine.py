@@ -0,0 +1,240 @@
+# -*- coding: UTF-8 -*-
+# Multi-symbol trading engine for Binance Trader
+# Hosts many Trading / BollingerTradingBot instances in one process
+
+import time
+import logging
+import threading
+from typing import Dict, List, Tuple
+
+import Orders as orders
+from Orders import Orders
+from Database import Database
+from Scheduler import Scheduler
+from OrderTracker import OrderTracker
+from KlineSync import KlineSync
+from MarketData import MarketDataStream
+from Trading import Trading
+from BollingerTradingBot import BollingerTradingBot
+
+
+class SymbolRunner:
+    """One hosted bot and its own failure accounting"""
+
+    def __init__(self, symbol: str, kind: str, bot, step):
+        self.symbol = symbol
+        self.kind = kind
+        self.bot = bot
+        self.step = step
+
+        self.job = None
+        self.state = 'starting'   # running / paused / stopped / failed
+        self.errors = 0           # consecutive failed cycles
+        self.failures = 0         # failed cycles in total
+        self.paused_until = 0.0
+
+
+class TradingEngine:
+    """
+    Runs many symbols in one process on shared resources
+
+    Every bot uses the same API client (and so the same connection pool,
+    rate governor and server clock), one exchangeInfo request for all
+    symbols, one market WebSocket connection and one user data stream, one
+    scheduler with a fixed worker pool, one OrderTracker and one background
+    database writer. Per symbol there is only the bot itself and its
+    kline window.
+
+    Each symbol has its own options and ticks as its own scheduler job.
+    A failing cycle only affects its symbol: after MAX_ERRORS failures in a
+    row the symbol is paused for COOLDOWN seconds, and a symbol that fails
+    to set up is left out while the others run.
+    """
+
+    MAX_ERRORS = 5
+    COOLDOWN = 60.0        # seconds
+    STATS_INTERVAL = 60.0  # seconds
+
+    KINDS = ('trading', 'bollinger')
+
+    def __init__(self, entries: List[Tuple[str, object]], workers: int = 8, stream: bool = False):
+        """
+        Args:
+            entries: (kind, options) per symbol; kind is 'trading' (Trading,
+                     trader.py options) or 'bollinger' (BollingerTradingBot,
+                     trader_bollinger.py options)
+            workers: Worker threads shared by all symbols
+            stream: Read market data, fills and balances from WebSocket streams
+        """
+        symbols = [options.symbol for kind, options in entries]
+        duplicates = set(symbol for symbol in symbols if symbols.count(symbol) > 1)
+        if duplicates:
+            raise ValueError('Symbols listed more than once: %s' % ', '.join(sorted(duplicates)))
+        for kind, options in entries:
+            if kind not in self.KINDS:
+                raise ValueError('%s: unknown bot type %r (expected one of %s)' % (options.symbol, kind, ', '.join(self.KINDS)))
+
+        self.entries = entries
+        self.stream_enabled = stream
+
+        self.logger = logging.getLogger('TradingEngine')
+
+        self.client = orders.client
+        self.scheduler = Scheduler(workers=workers, name='TradingEngine')
+        self.tracker = OrderTracker(self.scheduler, fetch=Orders.get_order, poll_interval=Trading.WAIT_TIME_POLL)
+        self.kline_sync = KlineSync(self.client)
+
+        self.stream = None
+        self.user_stream = None
+        self.runners = {}  # symbol -> SymbolRunner
+        self._stopped = threading.Event()
+
+    # --- lifecycle ---
+
+    def start(self):
+        """Set up the shared resources, then every symbol"""
+        symbols = [options.symbol for kind, options in self.entries]
+
+        Orders.warm_up()
+
+        # One exchangeInfo request for every symbol
+        orders.exchange_info.preload(symbols)
+
+        Database.start_writer()
+
+        if self.stream_enabled:
+            self.start_streams(symbols)
+
+        for kind, options in self.entries:
+            self.add(kind, options)
+
+        self.logger.info('Engine running %d of %d symbols' % (
+            sum(1 for runner in self.runners.values() if runner.state == 'running'), len(self.entries)))
+
+    def start_streams(self, symbols: List[str]):
+        intervals = sorted(set(options.interval for kind, options in self.entries if kind == 'bollinger'))
+
+        try:
+            self.stream = MarketDataStream(symbols, interval=intervals or None, depth=True,
+                                           snapshot=Orders.get_depth_snapshot)
+            self.stream.start()
+        except ImportError as e:
+            self.logger.warning('Streaming disabled: %s' % e)
+            self.stream = None
+            return
+
+        Orders.use_market(self.stream.view)
+
+        try:
+            self.user_stream = Orders.user_data_stream()
+            self.user_stream.start()
+            Orders.use_user_data(self.user_stream.view)
+            self.tracker.attach(self.user_stream.view)
+        except Exception as e:
+            self.logger.warning('User data stream disabled: %s' % e)
+            self.user_stream = None
+
+    def add(self, kind: str, options) -> SymbolRunner:
+        """Create, set up and schedule one symbol; failures only disable that symbol"""
+        symbol = options.symbol
+
+        # The engine owns the streams
+        options.stream = False
+
+        try:
+            if kind == 'trading':
+                bot = Trading(options, self.scheduler, self.tracker)
+                bot.setup()
+                runner = SymbolRunner(symbol, kind, bot, lambda: bot.action(symbol))
+            else:
+                bot = BollingerTradingBot(options, client=self.client, kline_sync=self.kline_sync, stream=self.stream)
+                if not bot.setup():
+                    raise ValueError('setup failed')
+                runner = SymbolRunner(symbol, kind, bot, bot.step)
+
+        except (Exception, SystemExit) as e:
+            # Trading.validate() calls exit(1) on bad options
+            self.logger.error('%s: not started (%s)' % (symbol, 'invalid options' if isinstance(e, SystemExit) else e))
+            runner = SymbolRunner(symbol, kind, None, None)
+            runner.state = 'failed'
+            self.runners[symbol] = runner
+            return runner
+
+        runner.state = 'running'
+        runner.job = self.scheduler.every(options.wait_time, self._step, runner, key=symbol)
+        self.runners[symbol] = runner
+        return runner
+
+    def run(self):
+        """start(), then log stats until every symbol stopped or Ctrl+C"""
+        self.start()
+
+        try:
+            while not self._stopped.wait(self.STATS_INTERVAL):
+                self.log_stats()
+                if not any(runner.state in ('running', 'paused') for runner in self.runners.values()):
+                    break
+        except KeyboardInterrupt:
+            self.logger.info('Engine stopped by user')
+        finally:
+            self.stop()
+
+    def stop(self):
+        self._stopped.set()
+
+        for runner in self.runners.values():
+            if runner.job is not None:
+                runner.job.cancel()
+
+        if self.user_stream is not None:
+            self.user_stream.stop()
+        if self.stream is not None:
+            self.stream.stop()
+
+        Database.stop_writer()
+        self.scheduler.stop(wait=False)
+        self.log_stats()
+
+    # --- per symbol ---
+
+    def _step(self, runner: SymbolRunner):
+        if runner.state == 'paused':
+            if time.monotonic() < runner.paused_until:
+                return
+            runner.state = 'running'
+            self.logger.info('%s: resumed' % runner.symbol)
+
+        try:
+            if runner.step() is False:
+                runner.state = 'stopped'
+                runner.job.cancel()
+            runner.errors = 0
+
+        except (Exception, SystemExit) as e:
+            runner.errors += 1
+            runner.failures += 1
+            self.logger.error('%s: cycle failed (%d in a row): %s' % (runner.symbol, runner.errors, e), exc_info=True)
+
+            if runner.errors >= self.MAX_ERRORS:
+                runner.state = 'paused'
+                runner.paused_until = time.monotonic() + self.COOLDOWN
+                runner.errors = 0
+                self.logger.warning('%s: paused for %.0fs' % (runner.symbol, self.COOLDOWN))
+
+    # --- stats ---
+
+    def stats(self) -> Dict[str, Dict]:
+        """Per symbol: state, failures and tick stats"""
+        result = {}
+        for symbol, runner in self.runners.items():
+            entry = {'kind': runner.kind, 'state': runner.state, 'failures': runner.failures}
+            if runner.job is not None:
+                entry.update(runner.job.stats())
+            result[symbol] = entry
+        return result
+
+    def log_stats(self):
+        for symbol, entry in sorted(self.stats().items()):
+            self.logger.info('%s [%s] %s ticks: %d skipped: %d failures: %d late p99: %.1fms' % (
+                symbol, entry['kind'], entry['state'], entry.get('ticks', 0), entry.get('skipped', 0),
+                entry['failures'], entry.get('late_p99_ms', 0.0)))
@@ -0,0 +1,355 @@
+# -*- coding: UTF-8 -*-
+# User data stream (WebSocket) for Binance Trader
+# Keeps orders and balances current from executionReport / outboundAccountPosition events
+
+import json
+import time
+import asyncio
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+
+from MarketData import AiohttpTransport
+
+# Order statuses after which nothing changes any more
+FINAL_STATUSES = ('FILLED', 'CANCELED', 'EXPIRED', 'REJECTED', 'EXPIRED_IN_MATCH')
+
+
+class AccountView:
+    """
+    Orders and balances of the account, updated by UserDataStream
+
+    Orders are kept in the same shape as a REST query_order response, so
+    code reading Orders.get_order works unchanged. Every order is replaced
+    as a whole dict; waiters and order listeners are woken on each change.
+    """
+
+    def __init__(self):
+        self._orders = {}    # orderId -> order dict (REST query_order format)
+        self._balances = {}  # asset -> (free, locked)
+        self._listeners = []
+        self._changed = threading.Condition()
+        self.connected = False
+        self.updated = None
+
+    # --- writers (stream thread) ---
+
+    def set_order(self, order: Dict) -> bool:
+        """
+        Install or replace an order (REST response or stream update)
+
+        Updates older than the stored order are dropped, as in OrderTracker:
+        a final status never changes, and neither executedQty nor updateTime
+        go back (a REST snapshot sent before a fill can arrive after it).
+
+        Returns:
+            True if the order was stored
+        """
+        with self._changed:
+            previous = self._orders.get(order['orderId'])
+            if previous is not None and self._stale(previous, order):
+                return False
+            self._orders[order['orderId']] = order
+            self.updated = time.monotonic()
+            self._changed.notify_all()
+
+        status = previous['status'] if previous else None
+        if status != order['status'] or (previous and previous['executedQty'] != order['executedQty']):
+            for callback in list(self._listeners):
+                try:
+                    callback(order, status)
+                except Exception as e:
+                    logging.getLogger('AccountView').error('Order listener error: %s' % e)
+        return True
+
+    @staticmethod
+    def _stale(previous: Dict, order: Dict) -> bool:
+        if previous['status'] in FINAL_STATUSES:
+            return True
+        if float(order['executedQty']) < float(previous['executedQty']):
+            return True
+        # Both REST and executionReport carry it, older snapshots may not
+        if order.get('updateTime') and previous.get('updateTime'):
+            return order['updateTime'] < previous['updateTime']
+        return False
+
+    def apply_execution(self, event: Dict):
+        """executionReport -> order in query_order format"""
+        previous = self._orders.get(event['i'], {})
+        self.set_order({
+            'symbol': event['s'],
+            'orderId': event['i'],
+            'clientOrderId': event['c'],
+            'price': event['p'],
+            'origQty': event['q'],
+            'executedQty': event['z'],
+            'cummulativeQuoteQty': event['Z'],
+            'status': event['X'],
+            'timeInForce': event['f'],
+            'type': event['o'],
+            'side': event['S'],
+            'stopPrice': event['P'],
+            'time': previous.get('time', event['O']),
+            'updateTime': event['T'],
+            'lastExecutedQty': event['l'],
+            'lastExecutedPrice': event['L'],
+            'commission': event['n'],
+            'commissionAsset': event['N'],
+        })
+
+    def apply_account(self, event: Dict):
+        """outboundAccountPosition: free/locked of every changed asset"""
+        for balance in event['B']:
+            self._balances[balance['a']] = (float(balance['f']), float(balance['l']))
+        self.updated = time.monotonic()
+
+    def seed_balances(self, balances: Iterable[Dict]):
+        """Install the REST /account balances; the stream then keeps them current"""
+        for balance in balances:
+            self._balances[balance['asset']] = (float(balance['free']), float(balance['locked']))
+
+    # --- readers ---
+
+    def order(self, order_id: int) -> Optional[Dict]:
+        return self._orders.get(order_id)
+
+    def balance(self, asset: str) -> Optional[float]:
+        """Free balance of asset, None if unknown"""
+        balance = self._balances.get(asset)
+        return balance[0] if balance is not None else None
+
+    def add_listener(self, callback: Callable[[Dict, Optional[str]], None]):
+        """Call callback(order, previous_status) on every status change or fill"""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def wait_order(self, order_id: int, statuses: Iterable[str] = FINAL_STATUSES,
+                   timeout: float = None) -> Optional[Dict]:
+        """
+        Block until the order reaches one of statuses
+
+        Returns:
+            The order (in whatever status it has at timeout), None if never seen
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._changed:
+            while True:
+                order = self._orders.get(order_id)
+                if order is not None and order['status'] in statuses:
+                    return order
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return order
+                self._changed.wait(remaining)
+
+    async def order_update(self, order_id: int, statuses: Iterable[str] = FINAL_STATUSES,
+                           timeout: float = None) -> Optional[Dict]:
+        """Awaitable wait_order() for asyncio code"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def resolve(order, previous):
+            if order['orderId'] == order_id and order['status'] in statuses and not future.done():
+                loop.call_soon_threadsafe(lambda: future.done() or future.set_result(order))
+
+        self.add_listener(resolve)
+        try:
+            order = self._orders.get(order_id)
+            if order is not None and order['status'] in statuses:
+                return order
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return self._orders.get(order_id)
+        finally:
+            self.remove_listener(resolve)
+
+
+class UserDataStream:
+    """
+    listenKey-based user data stream
+
+    Creates a listenKey over REST, keeps it alive every `keepalive`
+    seconds and applies executionReport / outboundAccountPosition events
+    to an AccountView on a background event loop. A listenKeyExpired event
+    or a failed keepalive gets a new key and reconnects.
+
+    The transport is the same pluggable WebSocket transport as
+    MarketDataStream uses, so tests can drive it from a fake.
+    """
+
+    STREAM_URL = "wss://stream.binance.com:9443/ws/%s"
+
+    KEEPALIVE = 30 * 60   # seconds (keys expire after 60 minutes)
+    RECONNECT_MIN = 1.0   # seconds
+    RECONNECT_MAX = 30.0  # seconds
+
+    def __init__(self, client, view: AccountView = None, transport=None, keepalive: float = None):
+        """
+        Args:
+            client: BinanceAPI (synchronous) used for the listenKey endpoints
+            view: AccountView to update (a new one is created if omitted)
+            transport: WebSocket transport (default: AiohttpTransport)
+            keepalive: Seconds between listenKey keepalives
+        """
+        self.client = client
+        self.view = view or AccountView()
+        self.transport = transport
+        self.keepalive = keepalive or self.KEEPALIVE
+
+        self.logger = logging.getLogger('UserDataStream')
+
+        self.listen_key = None
+        self._listeners = {}
+        self._loop = None
+        self._thread = None
+        self._running = False
+        self._connection = None
+
+        self.messages = 0
+        self.reconnects = 0
+
+    def add_listener(self, event: str, callback: Callable[[Dict], None]):
+        """Call callback(data) for every event of the given type (e.g. 'executionReport')"""
+        self._listeners.setdefault(event, []).append(callback)
+
+    def url(self) -> str:
+        return self.STREAM_URL % self.listen_key
+
+    def new_listen_key(self) -> str:
+        response = self.client.create_listen_key()
+        if 'listenKey' not in response:
+            raise ValueError('listenKey request failed: %s' % response.get('msg', response))
+        self.listen_key = response['listenKey']
+        return self.listen_key
+
+    # --- lifecycle ---
+
+    def start(self):
+        """Create the listenKey and run the stream on a background thread"""
+        if self._thread is not None:
+            return
+
+        if self.transport is None:
+            self.transport = AiohttpTransport()
+
+        self.new_listen_key()
+
+        self._running = True
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name='UserDataStream')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._running = False
+        if self._loop is not None and self._connection is not None:
+            asyncio.run_coroutine_threadsafe(self._connection.close(), self._loop)
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+        if self.listen_key is not None:
+            try:
+                self.client.close_listen_key(self.listen_key)
+            except Exception as e:
+                self.logger.debug('listenKey close failed: %s' % e)
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self.run())
+        finally:
+            self._loop.close()
+
+    async def run(self):
+        """Connect, dispatch events, keep the key alive and reconnect until stopped"""
+        delay = self.RECONNECT_MIN
+        keepalive = asyncio.ensure_future(self._keepalive_loop())
+
+        try:
+            while self._running:
+                try:
+                    if self.listen_key is None:
+                        await asyncio.get_running_loop().run_in_executor(None, self.new_listen_key)
+
+                    self._connection = await (await self.transport.connect(self.url())).open()
+                    self.view.connected = True
+                    self.logger.info('User data stream connected')
+                    delay = self.RECONNECT_MIN
+
+                    while self._running:
+                        raw = await self._connection.recv()
+                        if raw is None:
+                            break
+                        if self.handle(raw) == 'listenKeyExpired':
+                            self.listen_key = None
+                            break
+
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.logger.warning('User data stream error: %s' % e)
+
+                finally:
+                    self.view.connected = False
+                    if self._connection is not None:
+                        try:
+                            await self._connection.close()
+                        except Exception:
+                            pass
+                        self._connection = None
+
+                if self._running:
+                    self.reconnects += 1
+                    self.logger.info('User data stream reconnecting in %.0fs' % delay)
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, self.RECONNECT_MAX)
+        finally:
+            keepalive.cancel()
+
+    async def _keepalive_loop(self):
+        loop = asyncio.get_running_loop()
+        while self._running:
+            await asyncio.sleep(self.keepalive)
+            if self.listen_key is None:
+                continue
+            try:
+                response = await loop.run_in_executor(None, self.client.keepalive_listen_key, self.listen_key)
+                if isinstance(response, dict) and 'code' in response:
+                    raise ValueError(response.get('msg', response))
+            except Exception as e:
+                # Expired or unknown key: reconnect with a new one
+                self.logger.warning('listenKey keepalive failed: %s' % e)
+                self.listen_key = None
+                if self._connection is not None:
+                    await self._connection.close()
+
+    # --- dispatch ---
+
+    def handle(self, raw: str) -> Optional[str]:
+        """Apply one raw stream message to the view, returning its event type"""
+        message = json.loads(raw)
+        data = message.get('data', message)
+        self.messages += 1
+
+        event = data.get('e')
+
+        if event == 'executionReport':
+            self.view.apply_execution(data)
+
+        elif event == 'outboundAccountPosition':
+            self.view.apply_account(data)
+
+        elif event == 'listenKeyExpired':
+            self.logger.info('listenKey expired, reconnecting')
+
+        for callback in self._listeners.get(event, ()):
+            try:
+                callback(data)
+            except Exception as e:
+                self.logger.error('Listener error (%s): %s' % (event, e))
+
+        return event
@@ -0,0 +1,261 @@
+# -*- coding: UTF-8 -*-
+# Vectorized (NumPy) Technical Indicators for Binance Trader
+# Whole-series counterparts of Indicators for backtests and parameter sweeps
+
+import math
+from typing import Dict, List, Tuple
+
+from StreamingIndicators import (StreamingBollinger, StreamingRSI, StreamingEMA,
+                                 StreamingATR, StreamingVolume)
+
+try:
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+except ImportError:
+    np = None
+
+NAN = float('nan')
+
+
+class VectorIndicators:
+    """
+    Batch indicator series over whole price arrays
+
+    Every function returns one value per bar, where value i equals what the
+    matching Indicators function returns for prices[:i+1] (bars before a
+    Bollinger window is full are NaN). With NumPy the work is done with
+    strided rolling windows, cumulative sums and a blocked EMA recurrence;
+    without it the same series come from the streaming indicators in pure
+    Python, as lists.
+    """
+
+    @staticmethod
+    def available() -> bool:
+        """True when the NumPy backend is in use"""
+        return np is not None
+
+    @staticmethod
+    def columns(klines) -> Dict[str, object]:
+        """
+        Split klines into float columns
+
+        Args:
+            klines: Kline rows [open_time, open, high, low, close, volume, ...],
+                    or anything exposing a columns() method (e.g. KlineBuffer)
+
+        Returns:
+            Dict of 'time', 'open', 'high', 'low', 'close', 'volume' columns
+        """
+        if hasattr(klines, 'columns'):
+            return klines.columns()
+
+        names = ('time', 'open', 'high', 'low', 'close', 'volume')
+
+        if np is not None:
+            block = np.array([k[:6] for k in klines], dtype=float).reshape(-1, 6)
+            return {name: block[:, i] for i, name in enumerate(names)}
+
+        return {name: [float(k[i]) for k in klines] for i, name in enumerate(names)}
+
+    # --- series ---
+
+    @staticmethod
+    def sma(prices, period: int):
+        """Rolling mean (mean of all bars so far until `period` bars exist)"""
+        if np is None:
+            out, window = [], StreamingVolume(period)
+            for price in prices:
+                window.push(price)
+                out.append(window.value()['avg_volume'])
+            return out
+
+        x = np.asarray(prices, dtype=float)
+        out = np.empty(len(x))
+        if len(x) == 0:
+            return out
+
+        head = min(period - 1, len(x))
+        out[:head] = np.cumsum(x[:head]) / np.arange(1, head + 1)
+        if len(x) >= period:
+            out[period - 1:] = sliding_window_view(x, period).mean(axis=1)
+        return out
+
+    @staticmethod
+    def bollinger_bands(prices, period: int = 20, std_dev: float = 2.0) -> Tuple:
+        """(upper, middle, lower) series; NaN until `period` prices exist"""
+        if np is None:
+            upper, middle, lower = [], [], []
+            bb = StreamingBollinger(period, std_dev)
+            for price in prices:
+                bb.push(price)
+                u, m, l = bb.value()
+                upper.append(NAN if u is None else u)
+                middle.append(NAN if m is None else m)
+                lower.append(NAN if l is None else l)
+            return upper, middle, lower
+
+        x = np.asarray(prices, dtype=float)
+        middle = np.full(len(x), np.nan)
+        std = np.full(len(x), np.nan)
+        if len(x) >= period:
+            windows = sliding_window_view(x, period)
+            middle[period - 1:] = windows.mean(axis=1)
+            std[period - 1:] = windows.std(axis=1)
+
+        return middle + std_dev * std, middle, middle - std_dev * std
+
+    @staticmethod
+    def rsi(prices, period: int = 14):
+        """RSI series (50 until period + 1 prices exist)"""
+        if np is None:
+            out, rsi = [], StreamingRSI(period)
+            for price in prices:
+                rsi.push(price)
+                out.append(rsi.value())
+            return out
+
+        x = np.asarray(prices, dtype=float)
+        out = np.full(len(x), 50.0)
+        if len(x) < period + 1:
+            return out
+
+        deltas = np.diff(x)
+        avg_gain = sliding_window_view(np.clip(deltas, 0, None), period).sum(axis=1) / period
+        avg_loss = sliding_window_view(np.clip(-deltas, 0, None), period).sum(axis=1) / period
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+        out[period:] = np.where(avg_loss == 0, 100.0, rsi)
+        return out
+
+    @staticmethod
+    def ema(prices, period: int):
+        """EMA series seeded with the SMA of the first `period` prices"""
+        if np is None:
+            out, ema = [], StreamingEMA(period)
+            for price in prices:
+                ema.push(price)
+                out.append(ema.value())
+            return out
+
+        x = np.asarray(prices, dtype=float)
+        n = len(x)
+        out = np.empty(n)
+        if n == 0:
+            return out
+
+        head = min(period, n)
+        out[:head] = np.cumsum(x[:head]) / np.arange(1, head + 1)
+        if n > period:
+            VectorIndicators._ema_recurrence(x, out, period)
+        return out
+
+    @staticmethod
+    def _ema_recurrence(x, out, period):
+        """
+        Fill out[period:] with e[i] = a*x[i] + (1-a)*e[i-1] in vectorized blocks
+
+        Inside a block, e[s+j] = b^(j+1) e[s-1] + a b^j cumsum(x[s+k] b^-k);
+        blocks are sized so b^-k stays below 1e8 to keep the cumsum accurate.
+        """
+        a = 2 / (period + 1)
+        b = 1 - a
+        n = len(x)
+
+        if b <= 0:
+            out[period:] = x[period:]
+            return
+
+        block = max(1, int(8 / -math.log10(b)))
+        powers = b ** np.arange(block + 1)
+        inverse = b ** -np.arange(block)
+
+        start = period
+        while start < n:
+            length = min(block, n - start)
+            chunk = x[start:start + length]
+            sums = np.cumsum(chunk * inverse[:length])
+            out[start:start + length] = powers[1:length + 1] * out[start - 1] + a * powers[:length] * sums
+            start += length
+
+    @staticmethod
+    def macd(prices, fast: int = 12, slow: int = 26, signal: int = 9) -> Tuple:
+        """
+        (MACD, signal, histogram) series, zeros until `slow` prices exist
+
+        Value i equals Indicators.macd(prices[:i+1]).
+        """
+        n = len(prices)
+        if np is None:
+            from Indicators import Indicators
+            line, sig, hist = Indicators.macd_series(list(prices), fast, slow, signal)
+            pad = [0.0] * min(slow - 1, n)
+            return pad + line, pad + sig, pad + hist
+
+        x = np.asarray(prices, dtype=float)
+        line = np.zeros(n)
+        sig = np.zeros(n)
+        if n >= slow:
+            line[slow - 1:] = VectorIndicators.ema(x, fast)[slow - 1:] - VectorIndicators.ema(x, slow)[slow - 1:]
+            sig[slow - 1:] = VectorIndicators.ema(line[slow - 1:], signal)
+        return line, sig, line - sig
+
+    @staticmethod
+    def atr(high, low, close, period: int = 14):
+        """ATR series (0 until period + 1 bars exist)"""
+        if np is None:
+            out, atr = [], StreamingATR(period)
+            for h, l, c in zip(high, low, close):
+                atr.push(h, l, c)
+                out.append(atr.value())
+            return out
+
+        h = np.asarray(high, dtype=float)
+        l = np.asarray(low, dtype=float)
+        c = np.asarray(close, dtype=float)
+        out = np.zeros(len(c))
+        if len(c) < period + 1:
+            return out
+
+        prev = c[:-1]
+        tr = np.maximum(h[1:] - l[1:], np.maximum(np.abs(h[1:] - prev), np.abs(l[1:] - prev)))
+        out[period:] = sliding_window_view(tr, period).mean(axis=1)
+        return out
+
+    @staticmethod
+    def volume_ratio(volumes, period: int = 20):
+        """Current volume / rolling average volume (1.0 until `period` bars exist)"""
+        if np is None:
+            out, volume = [], StreamingVolume(period)
+            for value in volumes:
+                volume.push(value)
+                out.append(volume.value()['volume_ratio'])
+            return out
+
+        v = np.asarray(volumes, dtype=float)
+        out = np.ones(len(v))
+        if len(v) >= period:
+            avg = sliding_window_view(v, period).mean(axis=1)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                out[period - 1:] = np.where(avg > 0, v[period - 1:] / avg, 1.0)
+        return out
+
+    @staticmethod
+    def bb_width(upper, lower, middle):
+        """Bollinger Band Width series (percent)"""
+        if np is None:
+            return [((u - l) / m) * 100 if m else 0.0 for u, l, m in zip(upper, lower, middle)]
+
+        u, l, m = np.asarray(upper), np.asarray(lower), np.asarray(middle)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(m == 0, 0.0, (u - l) / m * 100)
+
+    @staticmethod
+    def bb_percent(prices, upper, lower):
+        """%B series"""
+        if np is None:
+            return [0.5 if u == l else (p - l) / (u - l) for p, u, l in zip(prices, upper, lower)]
+
+        p, u, l = np.asarray(prices), np.asarray(upper), np.asarray(lower)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(u == l, 0.5, (p - l) / (u - l))
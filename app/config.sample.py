@@ -7,4 +7,59 @@ api_key = ''
 api_secret = ''
 
 # recvWindow should less than 60000
+# (signed requests use the synced server clock, so it can stay tight)
 recv_window = 5000
+
+# Track the server clock offset and resync every N seconds
+clock_sync = True
+clock_sync_interval = 60
+
+# Keep-alive HTTP connections per host (pool_host_sizes overrides per host)
+pool_size = 10
+pool_host_sizes = {'api.binance.com': 10, 'www.binance.com': 4}
+
+# Close a host's idle connections after N seconds (0 = never)
+pool_idle_timeout = 60
+
+# Connections opened per host at startup (0 = disabled)
+pool_prewarm = 2
+
+# Maximum concurrent connections for AsyncBinanceAPI
+async_pool_limit = 100
+
+# Streamed prices older than N seconds fall back to REST (--stream)
+stream_max_age = 5
+
+# Request weight / order rate governor (shared by every trader using the same state file)
+rate_limit = True
+rate_weight_limit = 6000       # request weight per minute (IP)
+rate_order_limit_10s = 100     # new orders per 10 seconds (account)
+rate_order_limit_day = 200000  # new orders per day (account)
+rate_reserve = 0.1             # share of the budget only orders may use
+rate_state_file = None         # None = this process only (in memory), e.g. 'db/rate_limits.db' to share
+
+# Symbol filters cache (exchangeInfo), refreshed after N seconds
+exchange_info_ttl = 3600
+exchange_info_file = None      # None = db/exchange_info.json, '' = memory only
+
+# Record every REST request and response to this JSON lines file (None = off);
+# signatures and listen keys are scrubbed
+record_file = None
+
+# Serve REST responses from a recording instead of the network (None = off)
+replay_file = None
+replay_speed = None            # 1 = recorded latency, None = as fast as possible
+
+# Time API endpoints, indicators, strategy and database writes (p50/p99/p999 per span),
+# logged every latency_log_interval seconds
+latency_enabled = False
+latency_log_interval = 60
+
+# Local HTTP endpoint for metrics (None = off), e.g. 9108:
+# http://127.0.0.1:9108/metrics (Prometheus text) and http://127.0.0.1:9108/latency (JSON)
+metrics_port = None
+
+# Log files are written by a background thread in batches; the trading thread only queues records
+log_json = False               # JSON lines (ts, level, logger, thread, msg) instead of text
+log_max_bytes = 10 * 1024 * 1024  # rotate the log file at this size (0 = never)
+log_backup_count = 5           # rotated files kept (trader.log.1 ... trader.log.5)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Backtest the Bollinger Bands strategy on local kline files
+
+import sys
+
+sys.path.insert(0, './app')
+
+import trader_bollinger
+from Backtester import Backtester, FixedSlippage, RangeSlippage, load_klines
+
+
+def build_parser():
+    """trader_bollinger.py options plus the backtest ones"""
+    parser = trader_bollinger.build_parser()
+    parser.description = 'Backtest the Bollinger Bands strategy on historical klines'
+    parser.epilog = '''
+Examples:
+  # A year of 1m candles from data.binance.vision
+  python backtest.py --symbol BTCUSDT --data "data/BTCUSDT-1m-2024-*.zip" --slippage_bps 2
+
+  # REST kline dump, trade log to CSV
+  python backtest.py --symbol ETHUSDT --data klines.json --bb_period 30 --trades trades.csv
+        '''
+
+    parser.add_argument('--data', type=str, nargs='+', required=True,
+                        help='Kline files or glob patterns (CSV, zipped CSV or REST JSON)')
+    parser.add_argument('--balance', type=float, default=1000,
+                        help='Starting balance in the quote asset (default: 1000)')
+    parser.add_argument('--slippage_bps', type=float, default=0,
+                        help='Fixed slippage per fill in basis points (default: 0)')
+    parser.add_argument('--slippage_range', type=float, default=0,
+                        help='Slippage as a fraction of the candle range instead (e.g. 0.1) (default: 0 = off)')
+    parser.add_argument('--trades', type=str, default=None,
+                        help='Write the trade log to this CSV file')
+    return parser
+
+
+if __name__ == '__main__':
+    args = build_parser().parse_args()
+
+    slippage = RangeSlippage(args.slippage_range) if args.slippage_range > 0 else FixedSlippage(args.slippage_bps)
+    klines = load_klines(args.data)
+    if not len(klines['time']):
+        print('No candles in %s' % ' '.join(args.data))
+        sys.exit(1)
+
+    result = Backtester.from_args(args, balance=args.balance, slippage=slippage).run(klines)
+    stats = result.summary()
+
+    print('=' * 70)
+    print('BACKTEST %s %s' % (args.symbol, args.interval))
+    print('=' * 70)
+    print('Candles:        %d (%.1fs, %.0f candles/s)' % (stats['candles'], stats['elapsed'], stats['candles_per_sec']))
+    print('Trades:         %d (%d wins, %d losses, win rate %.1f%%)' % (
+        stats['trades'], stats['wins'], stats['losses'], stats['win_rate']))
+    print('Balance:        %.8f -> %.8f' % (stats['start_balance'], stats['final_balance']))
+    print('P/L:            %.8f (%.2f%%)' % (stats['pnl'], stats['return_pct']))
+    print('Max drawdown:   %.8f (%.2f%%)' % (stats['max_drawdown'], stats['max_drawdown_pct']))
+    print('Profit factor:  %.2f' % stats['profit_factor'])
+    print('Avg trade:      %.8f' % stats['avg_trade'])
+    print('Fees:           %.8f' % stats['fees'])
+    print('Exposure:       %.1f%%' % stats['exposure_pct'])
+    print('=' * 70)
+
+    if args.trades:
+        result.write_trades(args.trades)
+        print('Trade log written to %s' % args.trades)
@@ -7,9 +7,12 @@ import sys
 sys.path.insert(0, './app')
 
 import time
+import asyncio
 import config
 from datetime import timedelta, datetime
 from BinanceAPI import BinanceAPI
+from AsyncBinanceAPI import AsyncBinanceAPI
+from OrderBook import OrderBook
 
 class Binance:
 
@@ -51,29 +54,48 @@ class Binance:
             print('\nNot good. System time ahead server time (lag < 0ms)')
         else:  
             print('\nGood (0ms > lag > 1000ms)')              
+
+        # Smoothed estimate used to timestamp signed requests
+        if self.client.clock and self.client.clock.sync():
+            clock = self.client.clock.metrics()
+            print('\nServer clock offset: %.1fms (RTT: %.1fms, jitter: %.1fms, %d samples)'
+                  % (clock['offset_ms'], clock['rtt_ms'], clock['jitter_ms'], clock['samples']))
         return
 
     def openorders(self):
         
         return self.client.get_open_orders()
 
+    def order_books(self, symbols, limit=5):
+        # Fetch all books concurrently on one event loop when aiohttp is installed
+        if AsyncBinanceAPI.available():
+            return asyncio.run(self._order_books(symbols, limit))
+
+        return [self.client.get_order_books(symbol, limit) for symbol in symbols]
+
+    async def _order_books(self, symbols, limit):
+        async with AsyncBinanceAPI(config.api_key, config.api_secret) as client:
+            return await asyncio.gather(*[client.get_order_books(symbol, limit) for symbol in symbols],
+                                        return_exceptions=True)
+
     def profits(self, asset='BTC'):
         coins = self.client.get_products()
-        
-        for coin in coins['data']:
-            if coin['quoteAsset'] == asset:
-                orders = self.client.get_order_books(coin['symbol'], 5)             
-                if len(orders['bids'])>0 and len(orders['asks'])>0: 
-                    lastBid = float(orders['bids'][0][0]) #last buy price (bid)
-                    lastAsk = float(orders['asks'][0][0]) #last sell price (ask)
-                    
-                    if lastBid!=0: 
-                        profit = (lastAsk - lastBid) /  lastBid * 100
-                    else:
-                        profit = 0
-                    print('%6.2f%% profit : %s (bid: %.8f / ask: %.8f)' % (profit, coin['symbol'], lastBid, lastAsk))
+        symbols = [coin['symbol'] for coin in coins['data'] if coin['quoteAsset'] == asset]
+
+        for symbol, orders in zip(symbols, self.order_books(symbols)):
+            book = OrderBook.from_snapshot(symbol, orders) if isinstance(orders, dict) and 'bids' in orders else None
+            spread = book.spread() if book is not None else None
+
+            if spread is not None: 
+                lastBid, lastAsk = book.top() #last buy price (bid), last sell price (ask)
+                
+                if lastBid!=0: 
+                    profit = spread /  lastBid * 100
                 else:
-                    print('---.--%% profit : %s (No bid/ask info retrieved)' % (coin['symbol']))
+                    profit = 0
+                print('%6.2f%% profit : %s (bid: %.8f / ask: %.8f)' % (profit, symbol, lastBid, lastAsk))
+            else:
+                print('---.--%% profit : %s (No bid/ask info retrieved)' % (symbol))
 
     def market_value(self, symbol, kline_size, dateS, dateF="" ):                 
         dateS=datetime.strptime(dateS, "%d/%m/%Y %H:%M:%S")
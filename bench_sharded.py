@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+Sharding Benchmark
+Cycle time for a large symbol universe: in-process analysis vs ShardPool with 1..N worker processes
+"""
+
+import sys
+sys.path.insert(0, './app')
+
+import math
+import time
+import argparse
+import multiprocessing
+from KlineBuffer import KlineBuffer
+from BollingerStrategy import BollingerStrategy
+from ShardWorker import ShardPool
+
+
+def candle(i, phase):
+    close = 100 + 5 * math.sin(i / 7.0 + phase) + (i % 5) * 0.1
+    return (i * 60000, close - 0.2, close + 0.5, close - 0.6, close, 10 + (i % 13))
+
+
+def bench_local(symbols, warm, cycles):
+    state = {symbol: (KlineBuffer(100), BollingerStrategy({})) for symbol in symbols}
+    for n, symbol in enumerate(symbols):
+        state[symbol][0].extend(candle(i, n) for i in range(warm))
+
+    started = time.perf_counter()
+    for c in range(cycles):
+        for n, symbol in enumerate(symbols):
+            buffer, strategy = state[symbol]
+            row = candle(warm + c, n)
+            buffer.append(row)
+            strategy.analyze(buffer, row[4])
+    return (time.perf_counter() - started) / cycles
+
+
+def bench_pool(symbols, shards, warm, cycles):
+    pool = ShardPool({symbol: ({}, 100) for symbol in symbols}, shards)
+    pool.start()
+    try:
+        pool.analyze({symbol: (0.0, [candle(i, n) for i in range(warm)]) for n, symbol in enumerate(symbols)})
+
+        started = time.perf_counter()
+        for c in range(cycles):
+            updates = {}
+            for n, symbol in enumerate(symbols):
+                row = candle(warm + c, n)
+                updates[symbol] = (row[4], [row])
+            pool.analyze(updates)
+        return (time.perf_counter() - started) / cycles
+    finally:
+        pool.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='ShardPool benchmark')
+    parser.add_argument('--symbols', type=int, default=400)
+    parser.add_argument('--cycles', type=int, default=20)
+    parser.add_argument('--max_shards', type=int, default=multiprocessing.cpu_count())
+    args = parser.parse_args()
+
+    symbols = ['SYM%04dUSDT' % i for i in range(args.symbols)]
+    warm = 100
+
+    print('%d symbols, %d CPUs' % (len(symbols), multiprocessing.cpu_count()))
+    local = bench_local(symbols, warm, args.cycles)
+    print('in-process   %8.1f ms/cycle' % (local * 1000))
+
+    for shards in sorted(set([1, 2, 4, 8, args.max_shards])):
+        if shards > args.max_shards:
+            continue
+        took = bench_pool(symbols, shards, warm, args.cycles)
+        print('%2d shard(s)  %8.1f ms/cycle  (x%.2f)' % (shards, took * 1000, local / took))
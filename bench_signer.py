@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+Signer Benchmark
+Signing cost per order: the previous per-call HMAC setup vs the pre-keyed Signer
+"""
+
+import sys
+sys.path.insert(0, './app')
+
+import hmac
+import time
+import hashlib
+from urllib.parse import urlencode
+from Signer import Signer
+
+SECRET = 'NhqPtmdSJYdKjVHjA7PZj4Mge3R5YNiP1e3UZjInClVN65XAbvqqM6A7H5fATj0j'
+ORDER = {'symbol': 'BTCUSDT', 'side': 'SELL', 'type': 'LIMIT', 'quantity': '0.00100000',
+         'price': '27123.45000000', 'timeInForce': 'GTC'}
+
+
+def legacy(params, timestamp):
+    """BinanceAPI._sign + _post before the Signer: copy, re-key, encode twice"""
+    params = dict(params)
+    params.update({"recvWindow": 5000})
+    data = params.copy()
+    data.update({"timestamp": timestamp})
+    h = urlencode(data)
+    b = bytearray()
+    b.extend(SECRET.encode())
+    signature = hmac.new(b, msg=h.encode('utf-8'), digestmod=hashlib.sha256).hexdigest()
+    data.update({"signature": signature})
+    return urlencode(data)
+
+
+def bench(name, sign, rounds=50000):
+    ts = 1700000000000
+    best = None
+    for _ in range(5):
+        started = time.perf_counter()
+        for i in range(rounds):
+            sign(ORDER, ts + i)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    per_call = best / rounds * 1e6
+    print('%-8s %7.2f us/order  (%d orders/s)' % (name, per_call, 1e6 / per_call))
+    return per_call
+
+
+def main():
+    signer = Signer(SECRET)
+    assert signer.query(ORDER, 1, 5000) == legacy(ORDER, 1)
+
+    before = bench('legacy', legacy)
+    after = bench('signer', lambda params, ts: signer.body(params, ts, 5000))
+    print('speedup  %.2fx' % (before / after))
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+Simulated Exchange Benchmark
+Matching engine throughput, and tick-to-order latency through KlineSync, BollingerStrategy and Orders
+"""
+
+import sys
+sys.path.insert(0, './app')
+
+import time
+import random
+import argparse
+from SimExchange import SimExchange, SimSymbol, SyntheticFeed
+from KlineSync import KlineSync
+from BollingerStrategy import BollingerStrategy
+from UserDataStream import AccountView
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def bench_engine(orders):
+    """Random limit orders around a moving mid, a quarter of them canceled"""
+    sim = SimExchange([SimSymbol('BTCUSDT', 'BTC', 'USDT')], balances={'USDT': 1e12, 'BTC': 1e9})
+    rng = random.Random(1)
+    sim.tick('BTCUSDT', 100.0)
+
+    resting = []
+    started = time.perf_counter()
+    for i in range(orders):
+        if i % 50 == 0:
+            sim.tick('BTCUSDT', 100.0 + rng.uniform(-1, 1))
+        price = round(100.0 + rng.uniform(-0.2, 0.2), 2)
+        quantity = round(rng.uniform(0.1, 1.0), 5)
+        order = (sim.buy_limit if rng.random() < 0.5 else sim.sell_limit)('BTCUSDT', quantity, price)
+        if order['status'] in ('NEW', 'PARTIALLY_FILLED'):
+            resting.append(order['orderId'])
+        if resting and rng.random() < 0.25:
+            sim.cancel('BTCUSDT', resting.pop(rng.randrange(len(resting))))
+    took = time.perf_counter() - started
+    return orders / took, sim.fills
+
+
+def bench_tick_to_order(ticks, latency):
+    """Per tick: sync klines, analyze, read the book and trade it through Orders"""
+    from Orders import Orders
+
+    sim = SimExchange([SimSymbol('BTCUSDT', 'BTC', 'USDT')], balances={'USDT': 1e9, 'BTC': 1e6}, latency=latency)
+    feed = SyntheticFeed({'BTCUSDT': 100.0}, seed=1)
+    sim.load_history('BTCUSDT', feed.candles('BTCUSDT', 100))
+
+    Orders.use_client(sim)
+    Orders.use_user_data(sim.attach(AccountView()))
+    kline_sync = KlineSync(sim)
+    strategy = BollingerStrategy({})
+
+    latencies = []
+    stream = feed.ticks()
+    started = time.perf_counter()
+    for i in range(ticks):
+        timestamp, symbol, price, volume = next(stream)
+        sim.tick(symbol, price, volume)
+        ticked = time.perf_counter()
+
+        klines = kline_sync.sync(symbol, '1m', 100)
+        strategy.analyze(klines, price)
+        bid, ask = Orders.get_order_book(symbol)
+        if i % 2 == 0:
+            order_id = Orders.buy_limit(symbol, 0.1, ask)
+        else:
+            order_id = Orders.sell_limit(symbol, 0.1, bid)['orderId']
+        Orders.get_order(symbol, order_id)
+        latencies.append(time.perf_counter() - ticked)
+    took = time.perf_counter() - started
+    return ticks / took, latencies, sim.requests
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='SimExchange benchmark')
+    parser.add_argument('--orders', type=int, default=50000)
+    parser.add_argument('--ticks', type=int, default=2000)
+    parser.add_argument('--latency_ms', type=float, default=0.0, help='Simulated round trip per request')
+    args = parser.parse_args()
+
+    rate, fills = bench_engine(args.orders)
+    print('engine        %8.0f orders/s  (%d fills)' % (rate, fills))
+
+    rate, latencies, requests = bench_tick_to_order(args.ticks, args.latency_ms / 1000.0)
+    print('tick-to-order %8.0f ticks/s   p50 %.3fms  p99 %.3fms  (%d requests, %.1fms simulated each)' % (
+        rate, percentile(latencies, 0.5) * 1000, percentile(latencies, 0.99) * 1000, requests, args.latency_ms))
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Sweep Bollinger strategy parameters over local kline files
+
+import sys
+import logging
+
+sys.path.insert(0, './app')
+
+import backtest
+from Backtester import FixedSlippage, RangeSlippage, load_klines
+from Optimizer import Optimizer, METRICS, parse_space
+
+
+def build_parser():
+    """backtest.py options (the fixed part of every config) plus the sweep ones"""
+    parser = backtest.build_parser()
+    parser.description = 'Sweep Bollinger Bands strategy parameters over historical klines'
+    parser.epilog = '''
+Examples:
+  # Grid over band period and width, ranked by return
+  python optimize.py --symbol BTCUSDT --data "data/BTCUSDT-1m-2024-*.zip" \\
+      --param bb_period=10,20,30,40 --param bb_stddev=1.5:3.0:0.25 --param take_profit=middle,upper,1.5
+
+  # 2000 random configs, screen on the first quarter, drop runs past 30% drawdown
+  python optimize.py --symbol ETHUSDT --data klines.json --search random --samples 2000 \\
+      --param bb_period=10:50:2 --param rsi_oversold=20:40:5 --param min_confidence=50:80:5 \\
+      --screen 0.25 --stop_drawdown 30
+        '''
+
+    parser.add_argument('--param', type=str, action='append', required=True,
+                        help='NAME=v1,v2,... or NAME=start:stop:step, once per swept option')
+    parser.add_argument('--search', type=str, default='grid', choices=('grid', 'random'),
+                        help='Every combination or random samples (default: grid)')
+    parser.add_argument('--samples', type=int, default=500,
+                        help='Configs drawn by random search (default: 500)')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Random search seed')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='Processes (default: 0 = CPU count)')
+    parser.add_argument('--screen', type=float, default=0,
+                        help='Run every config on this fraction of the data first (default: 0 = off)')
+    parser.add_argument('--keep', type=float, default=0.25,
+                        help='Fraction of screened configs run on all data (default: 0.25)')
+    parser.add_argument('--stop_drawdown', type=float, default=None,
+                        help='Drop a config once its drawdown exceeds this percentage')
+    parser.add_argument('--score', type=str, default='return_pct', choices=METRICS,
+                        help='Metric to rank by, higher is better (default: return_pct)')
+    parser.add_argument('--top', type=int, default=10,
+                        help='Rows to print (default: 10)')
+    parser.add_argument('--out', type=str, default='optimize_results.csv',
+                        help='Results table (default: optimize_results.csv)')
+    return parser
+
+
+if __name__ == '__main__':
+    args = build_parser().parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.INFO, format='%(asctime)s - %(message)s')
+
+    space = parse_space(args.param)
+    if args.search == 'grid':
+        configs = Optimizer.grid(space)
+    else:
+        configs = Optimizer.sample(space, args.samples, args.seed)
+
+    klines = load_klines(args.data)
+    if not len(klines['time']):
+        print('No candles in %s' % ' '.join(args.data))
+        sys.exit(1)
+
+    slippage = RangeSlippage(args.slippage_range) if args.slippage_range > 0 else FixedSlippage(args.slippage_bps)
+    optimizer = Optimizer(klines, args, balance=args.balance, slippage=slippage, workers=args.workers or None,
+                          stop_drawdown=args.stop_drawdown, screen=args.screen, keep=args.keep, score=args.score)
+    rows = optimizer.run(configs)
+    Optimizer.write(rows, args.out, list(space))
+
+    names = list(space)
+    print('%d configs over %d candles in %.1fs (%.0f configs/s)' % (
+        len(rows), len(klines['time']), optimizer.elapsed, len(rows) / optimizer.elapsed if optimizer.elapsed else 0))
+    print('  '.join(names + ['trades', 'win%', 'return%', 'maxDD%', 'status']))
+    for row in rows[:args.top]:
+        print('  '.join([str(row[name]) for name in names] + [
+            '%d' % row.get('trades', 0), '%.1f' % row.get('win_rate', 0), '%.2f' % row.get('return_pct', 0),
+            '%.2f' % row.get('max_drawdown_pct', 0), row['status']]))
+    print('Results written to %s' % args.out)
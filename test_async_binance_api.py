@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+Async Binance API Test Script
+Drives AsyncBinanceAPI with a fake aiohttp session: rate governor feedback and -1021 clock resync
+"""
+
+import sys
+sys.path.insert(0, './app')
+
+import os
+import types
+import asyncio
+import time
+import tempfile
+import threading
+
+try:
+    import config
+except ImportError:
+    # No config.py in a fresh checkout: only the settings the client reads
+    config = types.ModuleType('config')
+    config.api_key = config.api_secret = ''
+    config.recv_window = 5000
+    sys.modules['config'] = config
+
+from BinanceAPI import BinanceAPI
+from AsyncBinanceAPI import AsyncBinanceAPI
+from RateGovernor import RateGovernor
+from ClockSync import ClockSync
+
+
+class FakeResponse:
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def json(self, content_type=None):
+        return self.body
+
+
+class FakeSession:
+    """aiohttp.ClientSession stand-in answering from a list of (status, headers, body)"""
+
+    closed = False
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def request(self, method, url, headers=None, data=None):
+        self.requests.append((method, url))
+        return FakeResponse(*self.responses.pop(0))
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeClock:
+    def __init__(self):
+        self.resyncs = 0
+
+    def now(self):
+        return 1700000000000
+
+    def resync(self):
+        self.resyncs += 1
+
+
+def make_client(governor, responses, clock=None):
+    BinanceAPI._shared_governor = governor
+    BinanceAPI._shared_clock = clock or FakeClock()
+    try:
+        client = AsyncBinanceAPI('key', 'secret')
+    finally:
+        BinanceAPI._shared_governor = None
+        BinanceAPI._shared_clock = None
+    client._session = FakeSession(responses)
+    return client
+
+
+def test_governor():
+    print('\n=== Rate governor ===')
+    governor = RateGovernor(weight_limit=1000)
+    client = make_client(governor, [
+        (200, {'X-MBX-USED-WEIGHT-1M': '321'}, {'symbol': 'BTCUSDT', 'bids': [], 'asks': []}),
+        (429, {'Retry-After': '30'}, {'code': -1003, 'msg': 'Too many requests'})
+    ])
+
+    book = asyncio.run(client.get_order_books('BTCUSDT', 5))
+    assert book['symbol'] == 'BTCUSDT'
+    usage = governor.usage()
+    assert usage['requests'] == 1 and usage['weight'] == 321
+
+    asyncio.run(client.get_ticker('BTCUSDT'))
+    assert governor.bans == 1 and governor.usage()['banned_for'] > 29
+    governor.close()
+
+    print('✓ Weight acquired per call, headers and bans fed back')
+
+
+def test_clock_resync():
+    print('\n=== -1021 resync ===')
+    client = make_client(None, [
+        (400, {}, {'code': -1021, 'msg': 'Timestamp for this request is outside of the recvWindow.'}),
+        (200, {}, {'orderId': 1, 'status': 'NEW'})
+    ])
+
+    assert asyncio.run(client.query_order('BTCUSDT', 1))['code'] == -1021
+    assert client.clock.resyncs == 1
+    assert asyncio.run(client.query_order('BTCUSDT', 1))['status'] == 'NEW'
+    assert client.clock.resyncs == 1
+
+    print('✓ Clock resynced after a recvWindow rejection')
+
+
+def test_clock_start_off_loop():
+    print('\n=== Clock start ===')
+    fetched = []
+
+    def fetch():
+        fetched.append(threading.current_thread())
+        time.sleep(0.1)
+        return int(time.time() * 1000)
+
+    clock = ClockSync(fetch, interval=3600, burst=3)
+    client = make_client(None, [(200, {}, {'orderId': 1, 'status': 'NEW'})], clock=clock)
+
+    async def run():
+        ticks = []
+
+        async def ticker():
+            while True:
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+
+        task = asyncio.ensure_future(ticker())
+        await asyncio.sleep(0)
+        async with client:
+            result = await client.query_order('BTCUSDT', 1)
+        task.cancel()
+        return ticks, result
+
+    try:
+        ticks, result = asyncio.run(run())
+    finally:
+        clock.stop()
+
+    assert result['status'] == 'NEW'
+    assert len(fetched) == 3 and threading.main_thread() not in fetched
+    stall = max(later - earlier for earlier, later in zip(ticks, ticks[1:]))
+    assert stall < 0.1, stall
+
+    print('✓ First clock sync (%d x 100ms) ran off the loop, longest stall %.1fms' % (len(fetched), stall * 1000))
+
+
+def test_shared_file_off_loop():
+    print('\n=== Shared state file ===')
+    with tempfile.TemporaryDirectory() as directory:
+        governor = RateGovernor(path=os.path.join(directory, 'rate_limits.db'))
+        threads = []
+        reserve, update = governor._reserve, governor.update
+        governor._reserve = lambda *args: threads.append(threading.current_thread()) or reserve(*args)
+        governor.update = lambda *args: threads.append(threading.current_thread()) or update(*args)
+
+        client = make_client(governor, [(200, {'X-MBX-USED-WEIGHT-1M': '5'}, {'serverTime': 1})])
+        asyncio.run(client._request('GET', '%s/time' % client.BASE_URL_V3))
+
+        assert len(threads) == 2 and threading.main_thread() not in threads
+        assert governor.usage()['weight'] == 5
+        governor.close()
+
+    print('✓ SQLite file access runs on worker threads, not the event loop')
+
+
+def main():
+    test_governor()
+    test_clock_resync()
+    test_clock_start_off_loop()
+    test_shared_file_off_loop()
+    print('✓ ALL TESTS COMPLETED')
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
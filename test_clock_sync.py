@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+Clock Sync Test Script
+Verifies offset/RTT estimation, smoothing, steps and failure handling
+"""
+
+import sys
+sys.path.insert(0, './app')
+
+import time
+from ClockSync import ClockSync
+
+
+class FakeServer:
+    """Server clock `offset` ms ahead of ours, answering after `delay` seconds"""
+
+    def __init__(self, offset, delay=0.005):
+        self.offset = offset
+        self.delay = delay
+        self.calls = 0
+        self.fail = False
+
+    def time(self):
+        self.calls += 1
+        if self.fail:
+            raise IOError('network down')
+        time.sleep(self.delay / 2)
+        server = int(time.time() * 1000 + self.offset)
+        time.sleep(self.delay / 2)
+        return server
+
+
+def test_offset_estimate():
+    """Offset and RTT come from the lowest-RTT sample of a burst"""
+    server = FakeServer(1500)
+    clock = ClockSync(server.time, burst=3)
+    assert clock.sync()
+
+    assert server.calls == 3
+    assert abs(clock.offset - 1500) < 5
+    assert 4 <= clock.rtt < 50
+    assert abs(clock.now() - server.time()) < 10
+    clock.stop()
+    print('Clock: %s' % clock.metrics())
+
+
+def test_smoothing_and_step():
+    """Small changes are averaged in, large jumps replace the estimate"""
+    server = FakeServer(100, delay=0)
+    clock = ClockSync(server.time, burst=1, alpha=0.5, step_ms=500)
+    clock.sync()
+
+    server.offset = 140
+    clock.sync()
+    assert 110 < clock.offset < 130
+    assert clock.jitter > 0
+
+    server.offset = -3000
+    clock.sync()
+    assert abs(clock.offset + 3000) < 5
+    assert clock.jitter == 0.0
+
+
+def test_failure_keeps_offset():
+    """A failed sync keeps the last estimate and counts the failure"""
+    server = FakeServer(250, delay=0)
+    clock = ClockSync(server.time, burst=3)
+    clock.sync()
+
+    server.fail = True
+    calls = server.calls
+    assert not clock.sync()
+    assert server.calls == calls + 1
+    assert abs(clock.offset - 250) < 5
+    assert clock.metrics()['failures'] == 1
+
+
+def test_background_resync():
+    """resync() wakes the background thread"""
+    server = FakeServer(0, delay=0)
+    clock = ClockSync(server.time, interval=60, burst=1)
+    clock.now()
+    assert clock.samples == 1
+
+    server.offset = 2000
+    clock.resync()
+    deadline = time.time() + 2
+    while clock.samples < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    clock.stop()
+
+    assert abs(clock.offset - 2000) < 5
+
+
+def main():
+    test_offset_estimate()
+    test_smoothing_and_step()
+    test_failure_keeps_offset()
+    test_background_resync()
+    print('✓ ALL TESTS COMPLETED')
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
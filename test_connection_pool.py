@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+Connection Pool Test Script
+Checks per-host sizing, in-flight accounting, idle reaping and warm-up with stubbed sessions
+"""
+
+import sys
+sys.path.insert(0, './app')
+
+import threading
+from ConnectionPool import ConnectionPool
+
+
+class StubResponse:
+    content = b'{}'
+
+
+def stub(pool, host, handler=None):
+    """Replace the host's session.request (no network); returns the list of calls"""
+    session = pool._session(host)
+    calls = []
+
+    def request(method, url, **kwargs):
+        calls.append((method, url, kwargs))
+        if handler is not None:
+            handler()
+        return StubResponse()
+
+    session.request = request
+    return calls
+
+
+def test_host_sizes():
+    print('\n=== Per-host pool sizes ===')
+    pool = ConnectionPool(pool_size=4, host_pool_sizes={'api.binance.com': 20}, idle_timeout=3600)
+    try:
+        api = pool._session('api.binance.com')
+        other = pool._session('api1.binance.com')
+        assert pool._session('api.binance.com') is api and api is not other
+        assert api.get_adapter('https://api.binance.com/api/v3/ping')._pool_maxsize == 20
+        assert other.get_adapter('https://api1.binance.com/api/v3/ping')._pool_maxsize == 4
+
+        calls = stub(pool, 'api.binance.com')
+        pool.request('GET', 'https://api.binance.com/api/v3/ping')
+        assert calls[0][2]['timeout'] == 30 and calls[0][2]['verify'] is True
+        pool.request('GET', 'https://api.binance.com/api/v3/ping', timeout=2)
+        assert calls[1][2]['timeout'] == 2
+    finally:
+        pool.close()
+
+    print('✓ One sized session per host, default timeout')
+
+
+def test_in_flight():
+    print('\n=== In-flight counts ===')
+    pool = ConnectionPool(idle_timeout=3600)
+    entered = threading.Event()
+    release = threading.Event()
+
+    def block():
+        entered.set()
+        release.wait(5)
+
+    try:
+        stub(pool, 'api.binance.com', block)
+        thread = threading.Thread(target=pool.request, args=('GET', 'https://api.binance.com/api/v3/time'))
+        thread.start()
+        assert entered.wait(5)
+        assert pool._in_flight['api.binance.com'] == 1
+        assert 'api.binance.com' not in pool._last_used
+
+        # A host with a request in flight is never reaped
+        pool._last_used['api.binance.com'] = 0.0
+        assert pool.reap(now=10 ** 6) == 0
+
+        release.set()
+        thread.join(5)
+        assert pool._in_flight['api.binance.com'] == 0
+        assert pool._last_used['api.binance.com'] > 0.0
+    finally:
+        release.set()
+        pool.close()
+
+    print('✓ Counted while running, last use stamped when done')
+
+
+def test_reap():
+    print('\n=== Idle reaping ===')
+    pool = ConnectionPool(idle_timeout=60)
+    try:
+        stub(pool, 'api.binance.com')
+        stub(pool, 'stream.binance.com')
+        closed = []
+        for host, session in pool._sessions.items():
+            session.close = (lambda host: lambda: closed.append(host))(host)
+
+        pool._last_used['api.binance.com'] = 1000.0
+        pool._last_used['stream.binance.com'] = 1050.0
+
+        assert pool.reap(now=1055.0) == 0
+        assert pool.reap(now=1070.0) == 1 and closed == ['api.binance.com']
+        assert 'api.binance.com' not in pool._last_used
+        assert pool.reap(now=1070.0) == 0  # reaped hosts wait for their next request
+        assert pool.reap(now=2000.0) == 1 and closed == ['api.binance.com', 'stream.binance.com']
+
+        assert ConnectionPool(idle_timeout=0).reap(now=10 ** 6) == 0
+    finally:
+        pool.close()
+
+    print('✓ Only hosts idle past idle_timeout are closed')
+
+
+def test_warm():
+    print('\n=== Warm-up ===')
+    pool = ConnectionPool(idle_timeout=3600)
+    try:
+        calls = stub(pool, 'api.binance.com')
+
+        def fail():
+            raise IOError('connection refused')
+
+        stub(pool, 'api1.binance.com', fail)
+        pool.warm(['https://api.binance.com/api/v3/ping', 'https://api1.binance.com/api/v3/ping'], connections=3)
+
+        assert len(calls) == 3 and all(call[:2] == ('GET', 'https://api.binance.com/api/v3/ping') for call in calls)
+        assert pool._in_flight == {'api.binance.com': 0, 'api1.binance.com': 0}
+    finally:
+        pool.close()
+
+    print('✓ Connections opened per url, failures ignored')
+
+
+def main():
+    test_host_sizes()
+    test_in_flight()
+    test_reap()
+    test_warm()
+    print('✓ ALL TESTS COMPLETED')
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+Exchange Info Cache Test Script
+Verifies filter parsing, per-symbol fetching, TTL and the on-disk cache
+"""
+
+import sys
+sys.path.insert(0, './app')
+
+import os
+import tempfile
+from decimal import Decimal
+from ExchangeInfo import ExchangeInfoCache, SymbolFilters
+
+
+def symbol_info(symbol, notional='NOTIONAL'):
+    return {
+        'symbol': symbol, 'status': 'TRADING', 'baseAsset': symbol[:3], 'quoteAsset': symbol[3:],
+        'filters': [
+            {'filterType': 'PRICE_FILTER', 'minPrice': '0.01', 'maxPrice': '1000000.00', 'tickSize': '0.01'},
+            {'filterType': 'LOT_SIZE', 'minQty': '0.00001', 'maxQty': '9000.0', 'stepSize': '0.00001'},
+            {'filterType': notional, 'minNotional': '5.00'},
+        ]
+    }
+
+
+class FakeInfoClient:
+    """exchangeInfo?symbols=[...] over a fixed set of symbols"""
+
+    SYMBOLS = {'BTCUSDT': symbol_info('BTCUSDT'), 'ETHBTC': symbol_info('ETHBTC', 'MIN_NOTIONAL')}
+
+    def __init__(self):
+        self.calls = []
+
+    def get_exchange_info(self, symbols=None):
+        self.calls.append(list(symbols))
+        if any(symbol not in self.SYMBOLS for symbol in symbols):
+            return {'code': -1121, 'msg': 'Invalid symbol.'}
+        return {'symbols': [self.SYMBOLS[symbol] for symbol in symbols]}
+
+
+def test_symbol_filters():
+    """Filters are parsed into Decimals and used for rounding"""
+    filters = SymbolFilters(symbol_info('BTCUSDT'))
+    assert filters.step_size == Decimal('0.00001')
+    assert filters.tick_size == Decimal('0.01')
+    assert filters.min_notional == Decimal('5.00')
+    assert filters.format_quantity(0.123456789) == Decimal('0.12345')
+    assert filters.format_price('27123.456') == Decimal('27123.45')
+    assert SymbolFilters(symbol_info('ETHBTC', 'MIN_NOTIONAL')).min_notional == Decimal('5.00')
+
+
+def test_fetch_only_missing():
+    """One request for every missing symbol, none once cached"""
+    client = FakeInfoClient()
+    cache = ExchangeInfoCache(client)
+
+    cache.preload(['BTCUSDT', 'ETHBTC'])
+    assert client.calls == [['BTCUSDT', 'ETHBTC']]
+    assert cache.get('BTCUSDT').symbol == 'BTCUSDT'
+    assert cache.get('ETHBTC').quote_asset == 'BTC'
+    assert len(client.calls) == 1
+
+    # An unknown symbol is retried alone and reported as missing
+    assert cache.get('NOPEUSDT') is None
+
+
+def test_ttl_and_disk_cache():
+    """Entries persist across instances and are refetched after the TTL"""
+    path = os.path.join(tempfile.mkdtemp(), 'exchange_info.json')
+
+    client = FakeInfoClient()
+    ExchangeInfoCache(client, path).get('BTCUSDT')
+    assert len(client.calls) == 1
+
+    # Warm start: no request at all
+    warm = FakeInfoClient()
+    assert ExchangeInfoCache(warm, path).get('BTCUSDT').tick_size == Decimal('0.01')
+    assert warm.calls == []
+
+    # Expired: refetched; failing refresh still serves the old entry
+    expired = FakeInfoClient()
+    cache = ExchangeInfoCache(expired, path, ttl=0)
+    assert cache.get('BTCUSDT') is not None
+    assert expired.calls == [['BTCUSDT']]
+
+    def fail(symbols=None):
+        raise IOError('network down')
+    expired.get_exchange_info = fail
+    assert cache.get('BTCUSDT') is not None
+
+
+def main():
+    test_symbol_filters()
+    test_fetch_only_missing()
+    test_ttl_and_disk_cache()
+    print('✓ ALL TESTS COMPLETED')
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
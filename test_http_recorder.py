@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+HTTP Recorder Test Script
+Records signed traffic from a fake pool, checks scrubbing, then replays it
+"""
+
+import sys
+sys.path.insert(0, './app')
+
+import os
+import json
+import time
+import tempfile
+from HttpRecorder import RecordingPool, ReplayPool, ReplayMiss
+from Signer import Signer
+
+API = 'https://api.binance.com/api/v3'
+KEY = 'vmPUZE6mv9SD5VNHk4HlWFsOr6aKE2zvsw0MuIgwCIPy6utIco14y7Ju91duEh8A'
+SECRET = 'NhqPtmdSJYdKjVHjA7PZj4Mge3R5YNiP1e3UZjInClVN65XAbvqqM6A7H5fATj0j'
+
+
+class FakeResponse:
+    def __init__(self, status_code, body, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._body = body
+        self.text = body if isinstance(body, str) else json.dumps(body)
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class FakePool:
+    """Answers from a fixed list, in order"""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+
+    def request(self, method, url, **kwargs):
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def close(self):
+        pass
+
+
+def traffic(pool, signer, ts):
+    """The calls BinanceAPI makes for a short trading cycle"""
+    results = []
+    results.append(pool.request('GET', API + '/ticker/24hr?symbol=BTCUSDT').json())
+    results.append(pool.request('GET', API + '/klines?symbol=BTCUSDT&interval=1m&startTime=%d' % ts).json())
+    order = {'symbol': 'BTCUSDT', 'side': 'BUY', 'type': 'LIMIT', 'quantity': '0.00100000',
+             'price': '27000.00000000', 'timeInForce': 'GTC'}
+    results.append(pool.request('POST', API + '/order', headers={'X-MBX-APIKEY': KEY},
+                                data=signer.body(order, ts, 5000)).json())
+    results.append(pool.request('GET', API + '/order?' + signer.query({'symbol': 'BTCUSDT', 'orderId': 7}, ts, 5000),
+                                headers={'X-MBX-APIKEY': KEY}).json())
+    results.append(pool.request('GET', API + '/order?' + signer.query({'symbol': 'BTCUSDT', 'orderId': 7}, ts + 1, 5000),
+                                headers={'X-MBX-APIKEY': KEY}).json())
+    results.append(pool.request('POST', API + '/userDataStream', headers={'X-MBX-APIKEY': KEY}).json())
+    return results
+
+
+RESPONSES = [
+    FakeResponse(200, {'lastPrice': '27001.00'}, {'X-MBX-USED-WEIGHT-1M': '2'}),
+    FakeResponse(200, [[0, '1', '2', '0.5', '1.5', '10']]),
+    FakeResponse(200, {'orderId': 7, 'status': 'NEW'}, {'X-MBX-ORDER-COUNT-10S': '1'}),
+    FakeResponse(200, {'orderId': 7, 'status': 'NEW'}),
+    FakeResponse(200, {'orderId': 7, 'status': 'FILLED'}),
+    FakeResponse(200, {'listenKey': 'pqia91ma19a5s61cv6a81va65sdf19v8a65a1a5s61cv6a81va65sdf19v8a65a1'}),
+]
+
+
+def record(path):
+    pool = RecordingPool(FakePool(RESPONSES), path)
+    results = traffic(pool, Signer(SECRET), 1499827319559)
+    pool.close()
+    return results
+
+
+def test_record_scrubs_secrets():
+    print('\n=== Recording ===')
+    path = os.path.join(tempfile.mkdtemp(), 'recording.jsonl')
+    record(path)
+
+    with open(path) as f:
+        text = f.read()
+    entries = [json.loads(line) for line in text.splitlines()]
+    assert len(entries) == 6
+    assert KEY not in text and 'pqia91ma19a5' not in text
+    assert Signer(SECRET).query({'symbol': 'BTCUSDT', 'orderId': 7}, 1499827319559, 5000).split('signature=')[1] not in text
+    assert 'signature=***' in entries[2]['d'] and 'signature=***' in entries[3]['u']
+    assert entries[0]['h'] == {'X-MBX-USED-WEIGHT-1M': '2'} and entries[0]['s'] == 200
+    assert all('ms' in entry and 't' in entry for entry in entries)
+    assert ' ' not in text  # compact separators
+
+    print('✓ %d entries, %d bytes, no key, secret or signature' % (len(entries), len(text)))
+
+
+def test_replay_in_order():
+    print('\n=== Replay ===')
+    path = os.path.join(tempfile.mkdtemp(), 'recording.jsonl')
+    recorded = record(path)
+
+    replay = ReplayPool(path)
+    assert len(replay) == 6
+    # Another run signs with other timestamps and asks for other ranges
+    replayed = traffic(replay, Signer(SECRET), 1600000000000)
+    assert replayed[:5] == recorded[:5]
+    assert replayed[4]['status'] == 'FILLED'  # same request, next recorded answer
+    assert replayed[5] == {'listenKey': '***'}
+    assert replay.served == 6
+
+    try:
+        replay.request('GET', API + '/ticker/24hr?symbol=BTCUSDT')
+        assert False, 'expected ReplayMiss'
+    except ReplayMiss:
+        pass
+
+    response = ReplayPool(path).request('GET', API + '/ticker/24hr?symbol=BTCUSDT')
+    assert response.headers['X-MBX-USED-WEIGHT-1M'] == '2'
+
+    print('✓ Same responses in recorded order, misses detected')
+
+
+def test_failures_and_speed():
+    print('\n=== Failures and speed ===')
+    path = os.path.join(tempfile.mkdtemp(), 'recording.jsonl')
+    pool = RecordingPool(FakePool([ConnectionError('reset by peer'), FakeResponse(502, '<html>Bad Gateway</html>')]), path)
+    for _ in range(2):
+        try:
+            pool.request('GET', API + '/ping')
+        except ConnectionError:
+            pass
+    pool.close()
+
+    with open(path) as f:
+        entries = [json.loads(line) for line in f]
+    entries[1]['ms'] = 50.0
+    with open(path, 'w') as f:
+        f.write(''.join(json.dumps(entry) + '\n' for entry in entries))
+
+    replay = ReplayPool(path, speed=1.0)
+    try:
+        replay.request('GET', API + '/ping')
+        assert False, 'expected ConnectionError'
+    except ConnectionError as e:
+        assert 'reset by peer' in str(e)
+
+    started = time.monotonic()
+    response = replay.request('GET', API + '/ping')
+    assert time.monotonic() - started >= 0.045
+    assert response.status_code == 502 and response.text == '<html>Bad Gateway</html>'
+    try:
+        response.json()
+        assert False, 'expected ValueError'
+    except ValueError:
+        pass
+
+    print('✓ Errors raised again, recorded latency reproduced')
+
+
+def main():
+    test_record_scrubs_secrets()
+    test_replay_in_order()
+    test_failures_and_speed()
+    print('✓ ALL TESTS COMPLETED')
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
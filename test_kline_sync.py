@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+Kline Sync Test Script
+Verifies delta fetching, gap backfill and paginated range loading
+"""
+
+import sys
+sys.path.insert(0, './app')
+
+import threading
+from KlineSync import KlineSync
+
+MINUTE = 60000
+
+
+class FakeKlineClient:
+    """Serves synthetic 1m candles up to `now`, honouring startTime/endTime/limit"""
+
+    def __init__(self, now):
+        self.now = now
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def get_klines(self, market, interval, startTime=None, endTime=None, limit=None):
+        with self._lock:
+            self.calls.append((startTime, endTime, limit))
+
+        first = -(-startTime // MINUTE) * MINUTE
+        last = min(endTime if endTime is not None else self.now, self.now)
+        rows = []
+        for open_time in range(first, last + 1, MINUTE):
+            if len(rows) == limit:
+                break
+            price = 100.0 + open_time // MINUTE % 50 + (0.5 if open_time == self.now // MINUTE * MINUTE else 0)
+            rows.append([open_time, str(price), str(price + 1), str(price - 1), str(price), '1.0'])
+        return rows
+
+
+def check_window(buffer, now):
+    times = [row[0] for row in buffer]
+    assert times[-1] == now // MINUTE * MINUTE
+    assert all(b - a == MINUTE for a, b in zip(times, times[1:]))
+
+
+def test_initial_and_delta():
+    """First sync loads the window, later syncs fetch only from the last open time"""
+    now = 1000 * MINUTE + 30000
+    client = FakeKlineClient(now)
+    sync = KlineSync(client)
+
+    buffer = sync.sync('BTCUSDT', '1m', 100, now=now)
+    assert len(buffer) == 100
+    check_window(buffer, now)
+
+    # Same candle still open: one request, last candle revised in place
+    client.calls = []
+    sync.sync('BTCUSDT', '1m', now=now + 5000)
+    assert client.calls == [(1000 * MINUTE, None, KlineSync.LIMIT)]
+    assert len(buffer) == 100
+
+    # Two minutes later: the closed candle is revised and two are appended
+    client.now = now + 2 * MINUTE
+    client.calls = []
+    sync.sync('BTCUSDT', '1m', now=client.now)
+    assert len(client.calls) == 1
+    check_window(buffer, client.now)
+    assert buffer.last('close') == 100.5 + 1002 % 50
+    print('Delta sync: %d requests, %d candles' % (sync.requests, sync.candles))
+
+
+def test_gap_backfill_paginated():
+    """Downtime longer than one request is backfilled in parallel pages"""
+    now = 5000 * MINUTE
+    client = FakeKlineClient(now)
+    sync = KlineSync(client)
+    sync.sync('BTCUSDT', '1m', 3000, now=now)
+    assert len(client.calls) == 3
+
+    client.now = now + 2500 * MINUTE
+    client.calls = []
+    buffer = sync.sync('BTCUSDT', '1m', now=client.now)
+
+    assert len(client.calls) == 3
+    assert sync.backfills == 1
+    assert len(buffer) == 3000
+    check_window(buffer, client.now)
+
+
+def test_gap_longer_than_window():
+    """A gap past the whole window reloads just the window"""
+    now = 5000 * MINUTE
+    client = FakeKlineClient(now)
+    sync = KlineSync(client)
+    sync.sync('BTCUSDT', '1m', 50, now=now)
+
+    client.now = now + 10000 * MINUTE
+    client.calls = []
+    buffer = sync.sync('BTCUSDT', '1m', now=client.now)
+
+    assert client.calls == [(client.now - 49 * MINUTE, None, KlineSync.LIMIT)]
+    assert len(buffer) == 50
+    check_window(buffer, client.now)
+
+
+def test_interval_ms():
+    assert KlineSync.interval_ms('5m') == 5 * MINUTE
+    assert KlineSync.interval_ms('1h') == 60 * MINUTE
+    assert KlineSync.interval_ms('1d') == 1440 * MINUTE
+
+
+def main():
+    test_initial_and_delta()
+    test_gap_backfill_paginated()
+    test_gap_longer_than_window()
+    test_interval_ms()
+    print('✓ ALL TESTS COMPLETED')
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
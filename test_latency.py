@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+Latency Instrumentation Test Script
+Verifies histogram accuracy, spans, the log dump, the local endpoint and the overhead
+"""
+
+import sys
+sys.path.insert(0, './app')
+
+import json
+import math
+import time
+import random
+import urllib.request
+from Latency import Histogram, Latency, LatencyReporter, span, timed
+from MetricsServer import MetricsServer
+from KlineBuffer import KlineBuffer
+from BollingerStrategy import BollingerStrategy
+
+
+def test_histogram_accuracy():
+    print('\n=== Histogram accuracy ===')
+    rng = random.Random(3)
+    values = [int(rng.lognormvariate(14, 1.5)) for _ in range(50000)]  # ~1ms median, long tail
+    histogram = Histogram('test')
+    for value in values:
+        histogram.record(value)
+
+    values.sort()
+    for q in (0.5, 0.99, 0.999):
+        exact = values[int(math.ceil(q * len(values))) - 1]
+        assert abs(histogram.percentile(q) - exact) <= exact / 64 + 1, (q, exact, histogram.percentile(q))
+    assert histogram.max == values[-1] and histogram.count == len(values)
+    assert histogram.percentile(1.0) == values[-1]
+    assert Histogram('empty').percentile(0.99) == 0
+
+    later = histogram.copy()
+    for value in (10, 20, 30):
+        histogram.record(value * 1000000)
+    recent = histogram.since(later)
+    assert recent.count == 3 and recent.total == 60000000
+    assert abs(recent.percentile(0.5) - 20000000) <= 20000000 / 64
+
+    print('✓ p50/p99/p999 within bucket precision over %d samples' % len(values))
+
+
+def test_spans():
+    print('\n=== Spans ===')
+    Latency.reset()
+
+    @timed('test.sleep')
+    def sleep(seconds):
+        time.sleep(seconds)
+        return seconds
+
+    assert sleep(0.001) == 0.001
+    with span('test.block'):
+        pass
+    assert Latency.summary() == {}  # nothing recorded while disabled
+
+    Latency.enable(log_interval=0)
+    try:
+        for _ in range(5):
+            sleep(0.002)
+        with span('test.block'):
+            pass
+        try:
+            with span('test.error'):
+                raise ValueError('boom')
+        except ValueError:
+            pass
+    finally:
+        Latency.disable()
+
+    summary = Latency.summary()
+    assert summary['test.sleep']['count'] == 5
+    assert 2.0 <= summary['test.sleep']['p50_ms'] < 50.0
+    assert summary['test.block']['count'] == 1 and summary['test.error']['count'] == 1
+
+    reporter = LatencyReporter(60)
+    lines = reporter.report()
+    assert lines[0].startswith('test.sleep') and 'p999=' in lines[0]
+    assert reporter.report() is None  # nothing new since the last dump
+
+    print('✓ Decorator and block spans, interval dumps')
+
+
+def test_endpoint():
+    print('\n=== Local endpoint ===')
+    Latency.reset()
+    Latency.record('api GET /api/v3/ticker/24hr', 1500000)
+
+    server = MetricsServer(0)
+    Latency.serve(server)
+    server.start()
+    try:
+        url = 'http://127.0.0.1:%d' % server.port
+        body = json.loads(urllib.request.urlopen(url + '/latency', timeout=5).read())
+        assert body['api GET /api/v3/ticker/24hr']['count'] == 1
+        assert abs(body['api GET /api/v3/ticker/24hr']['p99_ms'] - 1.5) < 0.03
+        try:
+            urllib.request.urlopen(url + '/missing', timeout=5)
+            assert False, 'expected 404'
+        except urllib.error.HTTPError as e:
+            assert e.code == 404
+    finally:
+        server.stop()
+
+    print('✓ /latency served as JSON')
+
+
+def test_overhead():
+    print('\n=== Overhead ===')
+
+    @timed('test.noop')
+    def noop():
+        pass
+
+    def cost(enabled, calls=20000):
+        Latency.enabled = enabled
+        started = time.perf_counter()
+        for _ in range(calls):
+            noop()
+        return (time.perf_counter() - started) / calls
+
+    try:
+        per_span = min(cost(True) - cost(False) for _ in range(5))
+    finally:
+        Latency.enabled = False
+
+    # Spans in one Bollinger cycle without REST calls (the cheapest cycle there is)
+    rng = random.Random(5)
+    price = 100.0
+    buffer = KlineBuffer(100)
+    strategy = BollingerStrategy({})
+    Latency.reset()
+    Latency.enable(log_interval=0)
+    try:
+        for i in range(500):
+            price *= math.exp(rng.gauss(0, 0.002))
+            buffer.append((i * 60000, price, price * 1.001, price * 0.999, price, 10.0))
+            strategy.analyze(buffer, price)
+    finally:
+        Latency.disable()
+    spans = sum(entry['count'] for entry in Latency.summary().values()) / 500.0
+    analyze = Latency.summary()['strategy.analyze']['mean_ms']
+
+    # A REST cycle waits at least one round trip (>= 5ms to the exchange)
+    share = per_span * (spans + 1) / 0.005
+    print('  %.2fus per span, %.1f spans per analyze (%.3fms), %.3f%% of a 5ms REST cycle' % (
+        per_span * 1e6, spans, analyze, share * 100))
+    assert share < 0.01
+
+    print('✓ Overhead under 1%')
+
+
+def main():
+    test_histogram_accuracy()
+    test_spans()
+    test_endpoint()
+    test_overhead()
+    print('✓ ALL TESTS COMPLETED')
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
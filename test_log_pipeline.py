@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+Log Pipeline Test Script
+Verifies batching, rotation, JSON lines, lazy formatting and that logging never waits for I/O
+"""
+
+import sys
+sys.path.insert(0, './app')
+
+import os
+import json
+import time
+import logging
+import tempfile
+import threading
+from LogPipeline import LogFile, LogWriter, AsyncHandler, JsonFormatter, setup_logging
+
+
+def make_logger(name, handler, level=logging.INFO):
+    logger = logging.getLogger(name)
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(level)
+    return logger
+
+
+class SlowSink:
+    """A disk or terminal that takes `delay` seconds per write"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.writes = []
+
+    def write(self, text):
+        time.sleep(self.delay)
+        self.writes.append(text)
+
+    def flush(self):
+        pass
+
+
+def test_batches_and_order():
+    print('\n=== Batching ===')
+    sink = SlowSink(0.01)
+    writer = LogWriter()
+    writer.start()
+    handler = AsyncHandler(sink, writer=writer)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger = make_logger('test.batches', handler)
+
+    for i in range(2000):
+        logger.info('line %d', i)
+    writer.stop()
+
+    lines = ''.join(sink.writes).splitlines()
+    assert lines == ['line %d' % i for i in range(2000)]
+    assert writer.written == 2000 and len(sink.writes) < 100
+    print('✓ 2000 records in order in %d writes' % len(sink.writes))
+
+
+def test_rotation():
+    print('\n=== Rotation ===')
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'trader.log')
+        log = LogFile(path, max_bytes=1000, backup_count=2)
+        for i in range(100):
+            log.write('%04d %s\n' % (i, 'x' * 45))  # 51 bytes
+        log.close()
+
+        files = sorted(os.listdir(directory))
+        assert files == ['trader.log', 'trader.log.1', 'trader.log.2']
+        assert all(os.path.getsize(os.path.join(directory, name)) <= 1000 for name in files)
+        with open(path) as f:
+            assert f.read().splitlines()[-1].startswith('0099 ')
+        with open(path + '.2') as f:
+            first = int(f.readline()[:4])
+        with open(path + '.1') as f:
+            assert int(f.readline()[:4]) > first
+        assert log.rotations == 100 * 51 // 1000
+
+        # Appending to an existing file continues its size
+        log = LogFile(path, max_bytes=1000, backup_count=2)
+        assert log._size == os.path.getsize(path)
+        log.close()
+
+    print('✓ Size-based rotation keeps backup_count files')
+
+
+def test_json_lines():
+    print('\n=== JSON lines ===')
+    sink = SlowSink(0)
+    writer = LogWriter()
+    writer.start()
+    handler = AsyncHandler(sink, writer=writer)
+    handler.setFormatter(JsonFormatter())
+    logger = make_logger('test.json', handler)
+
+    logger.info('Buy order created id:%d, q:%.8f', 42, 0.5)
+    try:
+        raise ValueError('boom')
+    except ValueError:
+        logger.exception('Sell failed for %s', {'symbol': 'BTCUSDT'})
+    writer.stop()
+
+    entries = [json.loads(line) for line in ''.join(sink.writes).splitlines()]
+    assert entries[0]['msg'] == 'Buy order created id:42, q:0.50000000'
+    assert entries[0]['level'] == 'INFO' and entries[0]['logger'] == 'test.json'
+    assert abs(entries[0]['ts'] - time.time()) < 60
+    assert entries[1]['msg'] == "Sell failed for {'symbol': 'BTCUSDT'}"
+    assert 'ValueError: boom' in entries[1]['exc']
+    print('✓ One JSON object per record')
+
+
+def test_lazy_formatting():
+    print('\n=== Lazy formatting ===')
+
+    class Traced:
+        formatted_on = []
+
+        def __str__(self):
+            Traced.formatted_on.append(threading.current_thread().name)
+            return 'traced'
+
+    class ThreadFormatter(logging.Formatter):
+        threads = []
+
+        def format(self, record):
+            ThreadFormatter.threads.append(threading.current_thread().name)
+            return logging.Formatter.format(self, record)
+
+    sink = SlowSink(0)
+    writer = LogWriter()
+    writer.start()
+    handler = AsyncHandler(sink, writer=writer)
+    handler.setFormatter(ThreadFormatter('%(message)s'))
+    logger = make_logger('test.lazy', handler)
+
+    logger.debug('not logged %s', Traced())
+    values = {'price': 1.0}
+    logger.info('price:%.8f', 1.5)
+    logger.info('book %s', values)
+    values['price'] = 2.0  # changed after logging, before the writer ran
+    writer.stop()
+
+    assert Traced.formatted_on == []
+    assert set(ThreadFormatter.threads) == {'LogWriter'}
+    assert ''.join(sink.writes).splitlines() == ['price:1.50000000', "book {'price': 1.0}"]
+    print('✓ Disabled levels never format, enabled ones format on the writer thread')
+
+
+def test_non_blocking():
+    print('\n=== Non-blocking ===')
+    sink = SlowSink(0.2)
+    writer = LogWriter(max_queue=1000)
+    writer.start()
+    handler = AsyncHandler(sink, writer=writer)
+    logger = make_logger('test.blocking', handler)
+
+    started = time.perf_counter()
+    for i in range(5000):
+        logger.info('tick %d', i)
+    elapsed = time.perf_counter() - started
+
+    writer.stop()
+    assert writer.dropped > 0 and writer.written + writer.dropped == 5000
+    print('  %.1fus per call against a 200ms write' % (elapsed / 5000 * 1e6))
+    assert elapsed < 1.0, elapsed
+    print('✓ A stalled sink drops records instead of blocking')
+
+
+def test_close():
+    print('\n=== Close ===')
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'trader.log')
+        writer = LogWriter()
+        writer.start()
+        handler = AsyncHandler(LogFile(path), writer=writer)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger = make_logger('test.close', handler)
+
+        for i in range(500):
+            logger.info('line %d', i)
+        handler.close()
+        assert handler.sink._file.closed
+        with open(path) as f:
+            assert f.read().splitlines() == ['line %d' % i for i in range(500)]
+
+        stdout = AsyncHandler(sys.stdout, writer=writer)
+        stdout.close()
+        assert not sys.stdout.closed
+        writer.stop()
+
+        # Reconfiguring replaces the handlers and closes their files
+        root = logging.getLogger()
+        saved = root.handlers[:], root.level
+        try:
+            first = setup_logging(os.path.join(directory, 'first.log'), force=True)
+            logging.getLogger('test.reconfigure').info('to first')
+            second = setup_logging(os.path.join(directory, 'second.log'), force=True)
+            assert first[0].sink._file.closed and not second[0].sink._file.closed
+            for handler in second:
+                root.removeHandler(handler)
+                handler.close()
+        finally:
+            root.handlers[:], level = saved
+            root.setLevel(level)
+
+        with open(os.path.join(directory, 'first.log')) as f:
+            assert f.read().endswith('to first\n')
+
+    print('✓ close() writes what is queued and releases the file')
+
+
+def main():
+    test_batches_and_order()
+    test_rotation()
+    test_json_lines()
+    test_lazy_formatting()
+    test_non_blocking()
+    test_close()
+    print('✓ ALL TESTS COMPLETED')
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -41,8 +41,11 @@ def test_macd_signal_cross():
     print("TEST 2: MACD Signal Line Crossover Detection")
     print("=" * 60)
     
+    # A straight line has a constant MACD equal to its signal line,
+    # so use accelerating trends to get real momentum
+    
     # Test case 1: Bullish trend
-    bullish_prices = [100.0 + i*0.5 for i in range(35)]
+    bullish_prices = [100.0 + i*0.5 + 0.01*i*i for i in range(35)]
     cross_signal = Indicators.macd_signal_cross(bullish_prices)
     print(f"Bullish trend (rising prices):")
     print(f"  Cross signal: {cross_signal}")
@@ -50,7 +53,7 @@ def test_macd_signal_cross():
     print()
     
     # Test case 2: Bearish trend
-    bearish_prices = [110.0 - i*0.5 for i in range(35)]
+    bearish_prices = [110.0 - i*0.5 - 0.01*i*i for i in range(35)]
     cross_signal = Indicators.macd_signal_cross(bearish_prices)
     print(f"Bearish trend (falling prices):")
     print(f"  Cross signal: {cross_signal}")
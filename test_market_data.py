@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+Market Data Stream Test Script
+Drives MarketDataStream from a local fake WebSocket transport
+"""
+
+import sys
+sys.path.insert(0, './app')
+
+import json
+import asyncio
+from MarketData import MarketDataStream, MarketView
+
+
+class FakeConnection:
+    """In-memory WebSocket connection replaying a fixed list of frames"""
+
+    def __init__(self, frames, on_exhausted=None):
+        self.frames = list(frames)
+        self.on_exhausted = on_exhausted
+        self.closed = False
+
+    async def open(self):
+        return self
+
+    async def recv(self):
+        if not self.frames:
+            if self.on_exhausted is not None:
+                self.on_exhausted()
+            return None
+        return self.frames.pop(0)
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeTransport:
+    """Serves one FakeConnection per connect() and stops the stream when exhausted"""
+
+    def __init__(self, sessions, stream=None):
+        self.sessions = list(sessions)
+        self.stream = stream
+        self.urls = []
+
+    async def connect(self, url):
+        self.urls.append(url)
+        frames = self.sessions.pop(0)
+        on_exhausted = None
+        if not self.sessions and self.stream is not None:
+            on_exhausted = self.stop
+        return FakeConnection(frames, on_exhausted)
+
+    def stop(self):
+        self.stream._running = False
+
+
+def frame(stream, data):
+    return json.dumps({'stream': stream, 'data': data})
+
+
+def book_ticker(symbol, bid, ask):
+    return frame('%s@bookTicker' % symbol.lower(),
+                 {'u': 1, 's': symbol, 'b': str(bid), 'B': '1.0', 'a': str(ask), 'A': '2.0'})
+
+
+def trade(symbol, price):
+    return frame('%s@trade' % symbol.lower(),
+                 {'e': 'trade', 'E': 1, 's': symbol, 't': 1, 'p': str(price), 'q': '0.5', 'T': 1000})
+
+
+def kline(symbol, open_time, close, closed=False):
+    return frame('%s@kline_1m' % symbol.lower(), {
+        'e': 'kline', 'E': 1, 's': symbol,
+        'k': {'t': open_time, 'T': open_time + 59999, 's': symbol, 'i': '1m',
+              'o': '1.0', 'c': str(close), 'h': '2.0', 'l': '0.5', 'v': '10.0',
+              'n': 5, 'x': closed, 'q': '10.0', 'V': '5.0', 'Q': '5.0'}
+    })
+
+
+def run_stream(stream):
+    stream._running = True
+    asyncio.run(stream.run())
+
+
+def test_stream_url():
+    """Combined stream url lists every subscribed stream"""
+    stream = MarketDataStream(['BTCUSDT'], interval='1m', depth=True)
+    url = stream.url()
+
+    assert 'btcusdt@bookTicker' in url
+    assert 'btcusdt@trade' in url
+    assert 'btcusdt@kline_1m' in url
+    assert 'btcusdt@depth@100ms' in url
+    print('Stream url: %s' % url)
+
+    # One connection for many symbols and intervals
+    stream = MarketDataStream(['BTCUSDT', 'ethusdt'], interval=['1m', '5m'])
+    streams = stream.streams()
+    assert 'ethusdt@kline_1m' in streams and 'ethusdt@kline_5m' in streams
+    assert len(streams) == 2 * 5
+
+
+def test_view_updates():
+    """bookTicker, trade and kline frames update the view"""
+    stream = MarketDataStream(['BTCUSDT'], interval='1m')
+    stream.transport = FakeTransport([[
+        book_ticker('BTCUSDT', 100.0, 100.5),
+        trade('BTCUSDT', 100.25),
+        kline('BTCUSDT', 60000, 101.0),
+        kline('BTCUSDT', 120000, 102.0),
+    ]], stream)
+
+    stream.view.seed_klines('BTCUSDT', '1m', [[0, '1.0', '2.0', '0.5', '100.0', '10.0']], limit=2)
+    run_stream(stream)
+
+    assert stream.view.top('BTCUSDT') == (100.0, 100.5)
+    assert stream.view.last_price('BTCUSDT') == 100.25
+
+    klines = stream.view.klines('BTCUSDT', '1m')
+    assert [k[0] for k in klines] == [60000, 120000]
+    assert klines[-1][4] == 102.0
+    print('View: top=%s last=%s klines=%d' % (stream.view.top('BTCUSDT'), stream.view.last_price('BTCUSDT'), len(klines)))
+
+
+def test_in_progress_kline_replaced():
+    """A kline with the same open time replaces the in-progress candle"""
+    view = MarketView()
+    view.seed_klines('ETHUSDT', '1m', [[0, '1', '1', '1', '1', '1']])
+    view.set_kline('ETHUSDT', '1m', [0, '1', '1', '1', '5', '1'])
+
+    assert len(view.klines('ETHUSDT', '1m')) == 1
+    assert view.klines('ETHUSDT', '1m')[-1][4] == 5.0
+
+
+def test_reconnect():
+    """A closed socket reconnects and keeps updating the same view"""
+    stream = MarketDataStream(['BTCUSDT'])
+    stream.RECONNECT_MIN = 0
+    stream.transport = FakeTransport([
+        [book_ticker('BTCUSDT', 1.0, 2.0)],
+        [book_ticker('BTCUSDT', 3.0, 4.0)],
+    ], stream)
+
+    run_stream(stream)
+
+    assert stream.reconnects == 1
+    assert len(stream.transport.urls) == 2
+    assert stream.view.top('BTCUSDT') == (3.0, 4.0)
+
+
+def test_stale_view():
+    """Readers get None once data is older than max_age"""
+    view = MarketView()
+    view.set_book('BTCUSDT', 1.0, 1.0, 2.0, 1.0)
+
+    assert view.top('BTCUSDT', max_age=60) == (1.0, 2.0)
+    assert view.top('BTCUSDT', max_age=-1) is None
+    assert view.last_price('BTCUSDT') is None
+
+
+def main():
+    test_stream_url()
+    test_view_updates()
+    test_in_progress_kline_replaced()
+    test_reconnect()
+    test_stale_view()
+    print('✓ ALL TESTS COMPLETED')
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+Metrics Endpoint Test Script
+Verifies counters and gauges, the Prometheus text format, collectors and the /metrics scrape
+"""
+
+import sys
+sys.path.insert(0, './app')
+
+import time
+import threading
+import urllib.request
+from Metrics import Metrics
+from MetricsServer import MetricsServer
+from Latency import Latency
+from RateGovernor import RateGovernor
+from Scheduler import Scheduler
+from OrderTracker import OrderTracker
+
+
+def test_exposition():
+    print('\n=== Exposition format ===')
+    Metrics.reset()
+    Latency.reset()
+
+    Metrics.inc('cycles_total', symbol='BTCUSDT', bot='bollinger')
+    Metrics.inc('cycles_total', symbol='BTCUSDT', bot='bollinger')
+    Metrics.inc('signals_total', symbol='BTCUSDT', signal='BUY')
+    Metrics.set('position', 0.25, symbol='BTCUSDT')
+    Metrics.inc('realized_pnl', -1.5, symbol='ETHUSDT')
+    Metrics.inc('custom', symbol='a"b\\c')
+    assert Metrics.get('cycles_total', bot='bollinger', symbol='BTCUSDT') == 2
+
+    text = Metrics.render()
+    lines = text.splitlines()
+    assert text.endswith('\n')
+    assert '# TYPE binance_cycles_total counter' in lines
+    assert 'binance_cycles_total{bot="bollinger",symbol="BTCUSDT"} 2' in lines
+    assert 'binance_signals_total{signal="BUY",symbol="BTCUSDT"} 1' in lines
+    assert '# TYPE binance_position gauge' in lines
+    assert 'binance_position{symbol="BTCUSDT"} 0.25' in lines
+    assert 'binance_realized_pnl{symbol="ETHUSDT"} -1.5' in lines
+    assert '# TYPE binance_custom untyped' in lines
+    assert 'binance_custom{symbol="a\\"b\\\\c"} 1' in lines
+
+    # HELP and TYPE come once, before the family's samples
+    assert lines.index('# TYPE binance_position gauge') < lines.index('binance_position{symbol="BTCUSDT"} 0.25')
+    assert sum(1 for line in lines if line.startswith('# TYPE binance_cycles_total ')) == 1
+
+    print('✓ Counters, gauges, labels and escaping')
+
+
+def test_spans_and_collectors():
+    print('\n=== Span summaries and collectors ===')
+    Metrics.reset()
+    Latency.reset()
+    Latency.record('api GET /api/v3/order', 2000000)
+    Latency.record('api GET /api/v3/order', 4000000)
+
+    governor = RateGovernor(weight_limit=100)
+    governor.acquire('GET', '/api/v3/ticker/24hr')
+    Metrics.collect(Metrics.governor(governor))
+    Metrics.collect(Metrics.governor(None))
+
+    lines = Metrics.render().splitlines()
+    assert '# TYPE binance_span_seconds summary' in lines
+    assert 'binance_span_seconds_count{span="api GET /api/v3/order"} 2' in lines
+    assert 'binance_span_seconds_sum{span="api GET /api/v3/order"} 0.006' in lines
+    p99 = [line for line in lines if line.startswith('binance_span_seconds{quantile="0.99",span="api GET /api/v3/order"}')]
+    assert len(p99) == 1 and abs(float(p99[0].split()[-1]) - 0.004) < 0.0001
+    assert 'binance_request_weight 80' in lines  # 24hr ticker of every symbol
+    assert 'binance_request_weight_limit 100' in lines
+    assert not any(line.startswith('# TYPE binance_span_seconds_count') for line in lines)
+    governor.close()
+
+    print('✓ Latency spans as summaries, rate governor usage')
+
+
+def test_order_fills():
+    print('\n=== Order fills ===')
+    Metrics.reset()
+    done = threading.Event()
+    tracker = OrderTracker(Scheduler(workers=1))
+    tracker.track('BTCUSDT', 7, 'BUY', 1.0, 100.0, on_done=lambda order: done.set())
+    tracker.update({'orderId': 7, 'status': 'FILLED', 'executedQty': '1.0', 'cummulativeQuoteQty': '100.0'})
+    tracker.update({'orderId': 7, 'status': 'FILLED', 'executedQty': '1.0', 'cummulativeQuoteQty': '100.0'})
+    assert done.wait(2)
+    assert Metrics.get('orders_filled_total', symbol='BTCUSDT', side='BUY') == 1
+
+    print('✓ FILLED counted once per order')
+
+
+def test_scrape():
+    print('\n=== Scrape ===')
+    Metrics.reset()
+    Metrics.inc('orders_placed_total', symbol='BTCUSDT', side='BUY', type='LIMIT')
+
+    # A slow collector holds up the scrape, never the trading thread
+    Metrics.collect(lambda: time.sleep(0.5) or [('request_weight', {}, 1)])
+
+    server = MetricsServer(0)
+    Metrics.serve(server)
+    server.start()
+    try:
+        url = 'http://127.0.0.1:%d/metrics' % server.port
+        responses = []
+        scraper = threading.Thread(target=lambda: responses.append(urllib.request.urlopen(url, timeout=5)))
+        scraper.start()
+        time.sleep(0.1)
+
+        started = time.perf_counter()
+        for _ in range(1000):
+            Metrics.inc('cycles_total', symbol='BTCUSDT', bot='trading')
+        blocked = time.perf_counter() - started
+        scraper.join(5)
+
+        response = responses[0]
+        body = response.read().decode('utf-8')
+        assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+        assert 'binance_orders_placed_total{side="BUY",symbol="BTCUSDT",type="LIMIT"} 1' in body
+        assert 'binance_request_weight 1' in body
+        assert blocked < 0.25, blocked
+    finally:
+        server.stop()
+        Metrics.reset()
+
+    print('✓ /metrics served while 1000 updates took %.1fms' % (blocked * 1000))
+
+
+def main():
+    test_exposition()
+    test_spans_and_collectors()
+    test_order_fills()
+    test_scrape()
+    print('✓ ALL TESTS COMPLETED')
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
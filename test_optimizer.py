@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+Optimizer Test Script
+Checks the vectorized sweep against Backtester and the search / screening helpers
+"""
+
+import sys
+sys.path.insert(0, './app')
+
+from argparse import Namespace
+from VectorIndicators import VectorIndicators
+from Backtester import Backtester, FixedSlippage, RangeSlippage
+from Optimizer import Optimizer, SeriesCache, simulate, merge, parse_space
+from test_backtester import random_walk
+
+FIELDS = ('time', 'open', 'high', 'low', 'close', 'volume')
+
+BASE = Namespace(bb_period=20, bb_stddev=2.0, rsi_period=14, rsi_oversold=30, rsi_overbought=70,
+                 volume_threshold=1.2, stop_loss_atr=2.0, take_profit='middle', risk_per_trade=2.0,
+                 min_bb_width=0.1, max_bb_width=10.0, min_confidence=50, quantity=0, amount=0, commission='BNB')
+
+
+def test_matches_backtester():
+    if not VectorIndicators.available():
+        print('NumPy not installed, skipping')
+        return
+
+    rows = random_walk(8000, seed=3)
+    cache = SeriesCache({field: [row[i] for row in rows] for i, field in enumerate(FIELDS)})
+
+    configs = [{}, {'bb_period': 30, 'bb_stddev': 1.5, 'take_profit': 'upper'},
+               {'rsi_period': 10, 'take_profit': '1.5', 'min_confidence': 60}, {'amount': 100, 'commission': 'TOKEN'}]
+    for params in configs:
+        for slippage in (FixedSlippage(3), RangeSlippage(0.1)):
+            options = merge(BASE, params)
+            expected = Backtester.from_args(options, slippage=slippage).run(rows).summary()
+            got = simulate(cache, options, slippage=slippage)
+
+            assert got['trades'] == expected['trades'], (params, got['trades'], expected['trades'])
+            for metric in ('win_rate', 'return_pct', 'max_drawdown_pct', 'exposure_pct', 'fees'):
+                assert abs(got[metric] - expected[metric]) < 1e-6 * max(1.0, abs(expected[metric])), (params, metric)
+        print('%s: %d trades, return %.2f%% (same as Backtester)' % (params, got['trades'], got['return_pct']))
+
+
+def test_search_space():
+    space = parse_space(['bb_period=10,20', 'bb_stddev=1.5:2.5:0.5', 'take_profit=middle,2'])
+    assert space == {'bb_period': [10, 20], 'bb_stddev': [1.5, 2.0, 2.5], 'take_profit': ['middle', '2']}
+
+    grid = Optimizer.grid(space)
+    assert len(grid) == 12 and len(set(tuple(config.items()) for config in grid)) == 12
+
+    sample = Optimizer.sample(space, 5, seed=1)
+    assert len(sample) == 5 and all(config in grid for config in sample)
+    assert len(Optimizer.sample(space, 100, seed=1)) == 12
+
+    try:
+        parse_space(['nope=1'])
+        assert False, 'unknown parameter accepted'
+    except ValueError:
+        pass
+
+
+def test_sweep():
+    if not VectorIndicators.available():
+        print('NumPy not installed, skipping')
+        return
+
+    rows = random_walk(6000, seed=5)
+    columns = {field: [row[i] for row in rows] for i, field in enumerate(FIELDS)}
+    configs = Optimizer.grid(parse_space(['bb_period=10,20,30', 'bb_stddev=1.5,2.5', 'min_confidence=50,70']))
+
+    plain = Optimizer(columns, BASE, workers=1).run(configs)
+    assert len(plain) == len(configs) and all(row['status'] == 'done' for row in plain)
+    assert [row['return_pct'] for row in plain] == sorted((row['return_pct'] for row in plain), reverse=True)
+
+    # Same numbers from the process pool
+    pooled = Optimizer(columns, BASE, workers=2, batch=4).run(configs)
+    assert [(row['bb_period'], row['return_pct']) for row in pooled] == [(row['bb_period'], row['return_pct']) for row in plain]
+
+    # Screening keeps a quarter for the full run; drawdown stop drops the rest
+    screened = Optimizer(columns, BASE, workers=1, screen=0.5, keep=0.25, stop_drawdown=30).run(configs)
+    statuses = [row['status'] for row in screened]
+    assert statuses.count('done') + statuses.count('stopped') >= 1
+    assert statuses.count('done') <= 3
+    print('Sweep of %d configs, best return %.2f%%, screened: %s' % (
+        len(configs), plain[0]['return_pct'], {status: statuses.count(status) for status in set(statuses)}))
+
+
+def main():
+    test_matches_backtester()
+    test_search_space()
+    test_sweep()
+    print('✓ ALL TESTS COMPLETED')
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+Order Book Test Script
+Verifies snapshot loading, depth-diff application and gap resync
+"""
+
+import sys
+sys.path.insert(0, './app')
+
+import time
+from OrderBook import OrderBook
+
+
+SNAPSHOT = {
+    'lastUpdateId': 100,
+    'bids': [['99.0', '1.0'], ['98.0', '2.0'], ['97.0', '3.0']],
+    'asks': [['101.0', '1.0'], ['102.0', '2.0'], ['103.0', '3.0']],
+}
+
+
+def diff(first, last, bids=(), asks=()):
+    return {'e': 'depthUpdate', 's': 'BTCUSDT', 'U': first, 'u': last,
+            'b': [list(level) for level in bids], 'a': [list(level) for level in asks]}
+
+
+def test_snapshot():
+    """Top of book, spread and depth come from the snapshot"""
+    book = OrderBook.from_snapshot('BTCUSDT', SNAPSHOT)
+
+    assert book.top() == (99.0, 101.0)
+    assert book.spread() == 2.0
+    assert book.mid() == 100.0
+    bids, asks = book.depth(2)
+    assert bids == [(99.0, 1.0), (98.0, 2.0)]
+    assert asks == [(101.0, 1.0), (102.0, 2.0)]
+    print('Snapshot top: %s spread: %.2f' % (book.top(), book.spread()))
+
+
+def test_apply_diffs():
+    """Diffs insert, update and remove levels; stale diffs are dropped"""
+    book = OrderBook.from_snapshot('BTCUSDT', SNAPSHOT)
+
+    # Entirely before the snapshot: ignored
+    assert book.apply(diff(90, 100, bids=[('99.0', '0')]))
+    assert book.top() == (99.0, 101.0)
+
+    # Straddles lastUpdateId + 1: applied
+    assert book.apply(diff(95, 101, bids=[('99.5', '4.0')], asks=[('101.0', '0')]))
+    assert book.top() == (99.5, 102.0)
+    assert book.last_update_id == 101
+
+    assert book.apply(diff(102, 102, bids=[('99.5', '0'), ('99.0', '5.0')]))
+    assert book.best_bid() == (99.0, 5.0)
+
+
+def test_vwap():
+    """VWAP walks levels until the size is filled"""
+    book = OrderBook.from_snapshot('BTCUSDT', SNAPSHOT)
+
+    assert book.vwap('BUY', 1.0) == 101.0
+    assert abs(book.vwap('BUY', 3.0) - (101.0 + 2 * 102.0) / 3) < 1e-12
+    assert abs(book.vwap('SELL', 2.0) - (99.0 + 98.0) / 2) < 1e-12
+    assert book.vwap('BUY', 100.0) is None
+
+    # Zero size is the best price, not a division by zero
+    assert book.vwap('BUY', 0) == 101.0
+    assert book.vwap('SELL', 0.0) == 99.0
+    assert OrderBook('BTCUSDT').vwap('BUY', 0) is None
+
+
+def test_gap_detection():
+    """A missing update id marks the book out of sync and buffers events"""
+    book = OrderBook.from_snapshot('BTCUSDT', SNAPSHOT)
+
+    assert not book.apply(diff(105, 106, bids=[('99.0', '9.0')]))
+    assert not book.synced
+
+    # Buffered events replay on top of the next snapshot
+    book.load(dict(SNAPSHOT, lastUpdateId=104))
+    assert book.synced
+    assert book.best_bid() == (99.0, 9.0)
+    assert book.last_update_id == 106
+
+
+def test_automatic_resync():
+    """Events before the first snapshot trigger a snapshot fetch and replay"""
+    calls = []
+
+    def snapshot(symbol):
+        calls.append(symbol)
+        return dict(SNAPSHOT, lastUpdateId=200)
+
+    book = OrderBook('BTCUSDT', snapshot)
+    book.apply(diff(199, 201, asks=[('100.5', '1.0')]))
+
+    deadline = time.time() + 2
+    while not book.synced and time.time() < deadline:
+        time.sleep(0.01)
+
+    assert calls == ['BTCUSDT']
+    assert book.synced
+    assert book.top() == (99.0, 100.5)
+    assert book.resyncs == 1
+
+
+def main():
+    test_snapshot()
+    test_apply_diffs()
+    test_vwap()
+    test_gap_detection()
+    test_automatic_resync()
+    print('✓ ALL TESTS COMPLETED')
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+Order Tracker Test Script
+Drives OrderTracker with order updates, timeouts and a fake REST poll
+"""
+
+import sys
+sys.path.insert(0, './app')
+
+import time
+import threading
+from Scheduler import Scheduler
+from OrderTracker import OrderTracker
+
+
+def update(order_id, status, executed, quote):
+    return {'symbol': 'BTCUSDT', 'orderId': order_id, 'status': status, 'price': '100.0',
+            'origQty': '1.0', 'executedQty': str(executed), 'cummulativeQuoteQty': str(quote)}
+
+
+class Events:
+    """Collects callbacks and lets the test wait for on_done"""
+
+    def __init__(self):
+        self.fills = []
+        self.timeouts = []
+        self.done = threading.Event()
+
+    def on_fill(self, order, qty, price):
+        self.fills.append((qty, price))
+
+    def on_done(self, order):
+        self.done.set()
+
+    def on_timeout(self, order):
+        self.timeouts.append(order.status)
+
+
+def test_partial_fills():
+    """Cumulative fills give per-fill prices and the average price"""
+    tracker = OrderTracker(Scheduler(workers=1))
+    events = Events()
+    order = tracker.track('BTCUSDT', 1, 'BUY', 1.0, 100.0, on_fill=events.on_fill, on_done=events.on_done)
+
+    tracker.update(update(1, 'NEW', 0, 0))
+    tracker.update(update(1, 'PARTIALLY_FILLED', 0.4, 39.6))
+    tracker.update(update(1, 'FILLED', 1.0, 99.6))
+
+    assert events.done.wait(2)
+    assert order.status == 'FILLED'
+    assert abs(order.avg_price - 99.6) < 1e-9
+    assert [q for q, p in events.fills] == [0.4, 0.6]
+    assert abs(events.fills[0][1] - 99.0) < 1e-9 and abs(events.fills[1][1] - 100.0) < 1e-9
+    assert tracker.get(1) is None  # done orders are forgotten
+    print('Order: %s fills=%s' % (order, events.fills))
+
+
+def test_stale_updates():
+    """Out-of-order and post-final updates are dropped"""
+    tracker = OrderTracker(Scheduler(workers=1))
+    order = tracker.track('BTCUSDT', 2, 'SELL', 1.0, 100.0)
+
+    assert tracker.update(update(2, 'PARTIALLY_FILLED', 0.5, 50.0))
+    assert not tracker.update(update(2, 'NEW', 0, 0))
+    assert not tracker.update(update(2, 'PARTIALLY_FILLED', 0.5, 50.0))
+    assert tracker.update(update(2, 'CANCELED', 0.5, 50.0))
+    assert not tracker.update(update(2, 'FILLED', 1.0, 100.0))
+
+    assert order.status == 'CANCELED'
+    assert order.remaining == 0.5
+    assert tracker.stale == 2  # the FILLED after CANCELED is for a forgotten order
+    assert not tracker.update(update(99, 'NEW', 0, 0))
+
+
+def test_timeout():
+    """on_timeout fires for an open order and never for a finished one"""
+    tracker = OrderTracker(Scheduler(workers=1))
+    events = Events()
+
+    open_order = tracker.track('BTCUSDT', 3, 'BUY', 1.0, timeout=0.05, on_timeout=events.on_timeout)
+    tracker.update(update(3, 'NEW', 0, 0))
+    tracker.track('BTCUSDT', 4, 'BUY', 1.0, timeout=0.05, on_timeout=events.on_timeout)
+    tracker.update(update(4, 'FILLED', 1.0, 100.0))
+
+    time.sleep(0.3)
+    assert events.timeouts == ['NEW']
+
+    # Re-armed with a new callback
+    tracker.expire_in(open_order, 0.05, lambda order: events.timeouts.append('again'))
+    time.sleep(0.3)
+    assert events.timeouts == ['NEW', 'again']
+
+
+def test_polling():
+    """Without a stream, open orders are fetched until they are final"""
+    states = [update(5, 'NEW', 0, 0), update(5, 'PARTIALLY_FILLED', 0.5, 50.0), update(5, 'FILLED', 1.0, 100.0)]
+    calls = []
+
+    def fetch(symbol, order_id):
+        calls.append(order_id)
+        return states[min(len(calls) - 1, len(states) - 1)]
+
+    tracker = OrderTracker(Scheduler(workers=2), fetch=fetch, poll_interval=0.01)
+    events = Events()
+    order = tracker.track('BTCUSDT', 5, 'BUY', 1.0, on_done=events.on_done)
+
+    assert events.done.wait(2)
+    time.sleep(0.05)
+    assert order.status == 'FILLED'
+    assert len(calls) == 3
+    print('Polled %d times: %s' % (len(calls), order))
+
+
+def test_scheduler_order():
+    """Timers run in due order and cancelled ones never run"""
+    scheduler = Scheduler(workers=1)
+    ran = []
+    done = threading.Event()
+
+    scheduler.call_later(0.06, lambda: (ran.append('c'), done.set()))
+    scheduler.call_later(0.02, ran.append, 'a')
+    scheduler.call_later(0.04, ran.append, 'b')
+    scheduler.call_later(0.03, ran.append, 'x').cancel()
+
+    assert done.wait(2)
+    assert ran == ['a', 'b', 'c']
+    scheduler.stop()
+
+
+def test_scheduler_every():
+    """Ticks stay on the grid and a busy job skips instead of overlapping"""
+    scheduler = Scheduler(workers=4)
+    starts = []
+    running = []
+
+    def action(symbol):
+        running.append(symbol)
+        assert running.count(symbol) == 1
+        starts.append(time.monotonic())
+        time.sleep(0.025)
+        running.remove(symbol)
+
+    job = scheduler.every(0.01, action, 'BTCUSDT', key='BTCUSDT', count=5)
+    other = scheduler.every(0.01, action, 'BTCUSDT', key='BTCUSDT', count=5)
+
+    assert job.wait(2) and other.wait(2)
+    stats = job.stats()
+    assert stats['ticks'] == 5
+    assert stats['skipped'] + other.stats()['skipped'] > 0
+    assert min(b - a for a, b in zip(starts, starts[1:])) >= 0.025
+    print('Every: %s' % stats)
+
+    # A fast job keeps the grid: 10 ticks of 20ms take ~180ms, not 10 x (20ms + run time)
+    ticks = []
+    started = time.monotonic()
+    fast = scheduler.every(0.02, lambda: ticks.append(time.monotonic() - started), count=10)
+    assert fast.wait(2)
+    assert fast.stats()['skipped'] == 0
+    assert all(abs(t - i * 0.02) < 0.015 for i, t in enumerate(ticks))
+    scheduler.stop()
+
+
+def main():
+    test_partial_fills()
+    test_stale_updates()
+    test_timeout()
+    test_polling()
+    test_scheduler_order()
+    test_scheduler_every()
+    print('✓ ALL TESTS COMPLETED')
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
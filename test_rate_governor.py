@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+Rate Governor Test Script
+Verifies endpoint weights, budget limits, header reconciliation, bans and priorities
+"""
+
+import sys
+sys.path.insert(0, './app')
+
+import os
+import time
+import tempfile
+import threading
+from RateGovernor import RateGovernor, RateLimitError
+
+API = 'https://api.binance.com/api/v3'
+
+
+def test_weights():
+    """Weights and priorities follow the endpoint and its parameters"""
+    assert RateGovernor.weight('GET', API + '/depth?symbol=BTCUSDT&limit=5') == 5
+    assert RateGovernor.weight('GET', API + '/depth?symbol=BTCUSDT&limit=1000') == 50
+    assert RateGovernor.weight('GET', API + '/klines?symbol=BTCUSDT&interval=1m') == 2
+    assert RateGovernor.weight('GET', API + '/openOrders?symbol=BTCUSDT&signature=x') == 6
+    assert RateGovernor.weight('GET', API + '/ticker/24hr') == 80
+    assert RateGovernor.weight('POST', API + '/order') == 1
+
+    assert RateGovernor.priority('POST', API + '/order') == RateGovernor.ORDER
+    assert RateGovernor.priority('DELETE', API + '/order?orderId=1') == RateGovernor.ORDER
+    assert RateGovernor.priority('GET', API + '/order?orderId=1') == RateGovernor.ACCOUNT
+    assert RateGovernor.priority('GET', API + '/klines') == RateGovernor.MARKET
+    assert RateGovernor.orders('POST', API + '/order') == 1
+    assert RateGovernor.orders('DELETE', API + '/order') == 0
+
+
+def test_budget_and_reserve():
+    """Market data stops at the reserve; orders can still use the rest"""
+    governor = RateGovernor(weight_limit=100, reserve=0.2)
+    for _ in range(16):
+        governor.acquire('GET', API + '/depth?limit=100')  # 5 each, 80 total
+
+    try:
+        governor.acquire('GET', API + '/depth?limit=100', timeout=0.1)
+        assert False, 'market data should be over its share'
+    except RateLimitError:
+        pass
+
+    governor.acquire('POST', API + '/order', timeout=0.1)
+    assert governor.usage()['weight'] == 81
+    assert governor.usage()['orders_10s'] == 1
+
+
+def test_order_limit():
+    """New orders are capped per 10 seconds"""
+    governor = RateGovernor(order_limit_10s=3)
+    for _ in range(3):
+        governor.acquire('POST', API + '/order')
+    try:
+        governor.acquire('POST', API + '/order', timeout=0.1)
+        assert False, 'fourth order should wait'
+    except RateLimitError:
+        pass
+    # Cancels do not count as new orders
+    governor.acquire('DELETE', API + '/order?orderId=1', timeout=0.1)
+
+
+def test_headers_and_ban():
+    """Used-weight headers raise local usage; 429 pauses every request"""
+    governor = RateGovernor(weight_limit=100)
+    governor.update(200, {'X-MBX-USED-WEIGHT-1M': '95'})
+    assert governor.usage()['weight'] == 95
+    try:
+        governor.acquire('GET', API + '/klines', timeout=0.1)
+        assert False, 'server reported usage should count'
+    except RateLimitError:
+        pass
+
+    governor = RateGovernor()
+    governor.update(429, {'Retry-After': '0.3'})
+    assert governor.usage()['banned_for'] > 0
+    started = time.time()
+    governor.acquire('GET', API + '/ping')
+    assert time.time() - started >= 0.25
+
+
+def test_priority_order():
+    """Waiting orders are served before waiting market data"""
+    governor = RateGovernor()
+    governor.update(429, {'Retry-After': '0.3'})
+    served = []
+
+    def request(method, path):
+        governor.acquire(method, API + path)
+        served.append(path)
+
+    market = threading.Thread(target=request, args=('GET', '/klines'))
+    market.start()
+    time.sleep(0.05)
+    order = threading.Thread(target=request, args=('POST', '/order'))
+    order.start()
+    market.join()
+    order.join()
+
+    assert served == ['/order', '/klines']
+
+
+def test_shared_between_processes():
+    """Governors opened on the same state file share one budget"""
+    path = os.path.join(tempfile.mkdtemp(), 'rate_limits.db')
+    first = RateGovernor(weight_limit=50, reserve=0, path=path)
+    second = RateGovernor(weight_limit=50, reserve=0, path=path)
+
+    for _ in range(10):
+        first.acquire('GET', API + '/depth?limit=100')
+    assert second.usage()['weight'] == 50
+    try:
+        second.acquire('GET', API + '/ping', timeout=0.1)
+        assert False, 'budget used by the other governor'
+    except RateLimitError:
+        pass
+
+    first.close()
+    second.close()
+    print('Shared state file: %s' % path)
+
+
+def test_shared_file_writes():
+    """A state file uses WAL, and unchanged headers are not written again"""
+    path = os.path.join(tempfile.mkdtemp(), 'rate_limits.db')
+    governor = RateGovernor(path=path)
+    assert governor._db.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+    writes = []
+    governor._db.set_trace_callback(lambda sql: writes.append(sql) if sql.startswith('INSERT OR REPLACE') else None)
+    governor.update(200, {'X-MBX-USED-WEIGHT-1M': '10'})
+    governor.update(200, {'X-MBX-USED-WEIGHT-1M': '10'})
+    governor.update(200, {})
+    assert len(writes) == 2  # server_weight and server_minute, once
+    governor.update(200, {'X-MBX-USED-WEIGHT-1M': '12'})
+    assert len(writes) == 4
+    governor.update(429, {'Retry-After': '1', 'X-MBX-USED-WEIGHT-1M': '12'})
+    assert len(writes) == 7 and governor.usage()['banned_for'] > 0
+    governor.close()
+
+
+def main():
+    test_weights()
+    test_budget_and_reserve()
+    test_order_limit()
+    test_headers_and_ban()
+    test_priority_order()
+    test_shared_between_processes()
+    test_shared_file_writes()
+    print('✓ ALL TESTS COMPLETED')
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+Signer Test Script
+Verifies the pre-keyed signer matches a freshly keyed HMAC over the same query
+"""
+
+import sys
+sys.path.insert(0, './app')
+
+import hmac
+import hashlib
+from urllib.parse import urlencode
+from Signer import Signer
+
+SECRET = 'NhqPtmdSJYdKjVHjA7PZj4Mge3R5YNiP1e3UZjInClVN65XAbvqqM6A7H5fATj0j'
+
+
+def reference(params, timestamp, recv_window):
+    """The query and signature as BinanceAPI built them before the signer"""
+    data = dict(params, recvWindow=recv_window, timestamp=timestamp)
+    query = urlencode(data)
+    signature = hmac.new(SECRET.encode(), query.encode('utf-8'), hashlib.sha256).hexdigest()
+    return urlencode(dict(data, signature=signature))
+
+
+def test_matches_reference():
+    """Same parameter order and signature as the reference"""
+    signer = Signer(SECRET)
+    params = {'symbol': 'BTCUSDT', 'side': 'BUY', 'type': 'LIMIT', 'quantity': '0.00100000',
+              'price': '27123.45000000', 'timeInForce': 'GTC'}
+
+    for ts in (1499827319559, 1499827319560):
+        assert signer.query(params, ts, 5000) == reference(params, ts, 5000)
+
+    assert signer.body(params, 1, 5000) == reference(params, 1, 5000).encode()
+    assert 'recvWindow' not in params
+
+
+def test_binance_doc_example():
+    """Example from the Binance API documentation (SIGNED endpoint security)"""
+    signer = Signer(SECRET)
+    query = 'symbol=LTCBTC&side=BUY&type=LIMIT&timeInForce=GTC&quantity=1&price=0.1&recvWindow=5000&timestamp=1499827319559'
+    assert signer.signature(query) == 'c8db56825ae71d6d79447849e617115f4a920fa2acdcab2b053c4b2838bd6b71'
+
+    params = {'symbol': 'LTCBTC', 'side': 'BUY', 'type': 'LIMIT', 'timeInForce': 'GTC', 'quantity': 1, 'price': 0.1}
+    assert signer.query(params, 1499827319559, 5000).endswith('&signature=c8db56825ae71d6d79447849e617115f4a920fa2acdcab2b053c4b2838bd6b71')
+
+
+def main():
+    test_matches_reference()
+    test_binance_doc_example()
+    print('✓ ALL TESTS COMPLETED')
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+Simulated Exchange Test Script
+Verifies matching priority, partial fills, cancels, filter rejections, balances and market data
+"""
+
+import sys
+sys.path.insert(0, './app')
+
+from SimExchange import SimExchange, SimSymbol, SyntheticFeed, KlineReplay
+from ExchangeInfo import ExchangeInfoCache
+from KlineSync import KlineSync
+from OrderBook import OrderBook
+from UserDataStream import AccountView
+
+START = 1699999800000  # ms, on a 5 minute boundary
+
+
+def exchange(**kw):
+    kw.setdefault('balances', {'USDT': 10000.0, 'BTC': 1.0})
+    kw.setdefault('commission', 0.0)
+    kw.setdefault('levels', 0)
+    return SimExchange([SimSymbol('BTCUSDT', 'BTC', 'USDT')], clock=lambda: START, **kw)
+
+
+def test_price_time_priority():
+    print('\n=== Price-time priority ===')
+    sim = exchange()
+
+    first = sim.sell_limit('BTCUSDT', 0.1, 101.0)['orderId']
+    second = sim.sell_limit('BTCUSDT', 0.1, 101.0)['orderId']
+    better = sim.sell_limit('BTCUSDT', 0.1, 100.5)['orderId']
+
+    order = sim.buy_limit('BTCUSDT', 0.15, 101.0)
+    assert order['status'] == 'FILLED'
+    assert [fill['price'] for fill in order['fills']] == ['100.50000000', '101.00000000']
+    assert sim.query_order('BTCUSDT', better)['status'] == 'FILLED'
+    assert sim.query_order('BTCUSDT', first)['status'] == 'PARTIALLY_FILLED'
+    assert sim.query_order('BTCUSDT', first)['executedQty'] == '0.05000000'
+    assert sim.query_order('BTCUSDT', second)['status'] == 'NEW'
+
+    print('✓ Better price first, then oldest first')
+
+
+def test_partial_fill_and_cancel():
+    print('\n=== Partial fill and cancel ===')
+    sim = exchange()
+
+    sim.sell_limit('BTCUSDT', 0.05, 100.0)
+    order = sim.buy_limit('BTCUSDT', 0.2, 100.0)
+    assert order['status'] == 'PARTIALLY_FILLED' and order['executedQty'] == '0.05000000'
+
+    book = OrderBook.from_snapshot('BTCUSDT', sim.get_order_books('BTCUSDT', 5))
+    assert book.top() == (100.0, None)
+    assert book.best_bid() == (100.0, 0.15)
+
+    canceled = sim.cancel('BTCUSDT', order['orderId'])
+    assert canceled['status'] == 'CANCELED' and canceled['executedQty'] == '0.05000000'
+    assert sim.cancel('BTCUSDT', order['orderId'])['code'] == -2011
+    assert sim.query_order('BTCUSDT', 999)['code'] == -2013
+    assert sim.get_open_orders('BTCUSDT') == []
+
+    # Both sides were this account: only the locks moved
+    assert sim.balance('USDT') == (10000.0, 0.0)
+    assert sim.balance('BTC') == (1.0, 0.0)
+
+    print('✓ Rest stays on the book, cancel releases the locked quote')
+
+
+def test_market_orders():
+    print('\n=== Market orders ===')
+    sim = exchange()
+
+    sim.sell_limit('BTCUSDT', 0.1, 100.0)
+    sim.sell_limit('BTCUSDT', 0.1, 102.0)
+
+    order = sim.buy_market('BTCUSDT', 0.15)
+    assert order['status'] == 'FILLED' and order['type'] == 'MARKET'
+    assert abs(float(order['cummulativeQuoteQty']) - (0.1 * 100.0 + 0.05 * 102.0)) < 1e-9
+
+    # Only 0.05 left: the rest expires
+    order = sim.buy_market('BTCUSDT', 0.1)
+    assert order['status'] == 'EXPIRED' and order['executedQty'] == '0.05000000'
+    assert abs(sim.balance('USDT')[1]) < 1e-9
+
+    print('✓ Walks the book, expires what it cannot fill')
+
+
+def test_filter_rejections():
+    print('\n=== Filter rejections ===')
+    sim = exchange()
+
+    assert sim.buy_limit('BTCUSDT', 0.000001, 100.0)['msg'] == 'Filter failure: LOT_SIZE'
+    assert sim.buy_limit('BTCUSDT', 0.123456, 100.0)['msg'] == 'Filter failure: LOT_SIZE'
+    assert sim.buy_limit('BTCUSDT', 0.1, 100.005)['msg'] == 'Filter failure: PRICE_FILTER'
+    assert sim.buy_limit('BTCUSDT', 0.01, 100.0)['msg'] == 'Filter failure: NOTIONAL'
+    assert sim.buy_limit('BTCUSDT', 1000.0, 100.0)['code'] == -2010
+    assert sim.sell_limit('BTCUSDT', 2.0, 100.0)['code'] == -2010
+    assert sim.buy_limit('ETHUSDT', 1.0, 100.0)['code'] == -1121
+    assert sim.orders_placed == 0
+
+    print('✓ LOT_SIZE, PRICE_FILTER, NOTIONAL and balance checks')
+
+
+def test_quotes_fill_resting_orders():
+    print('\n=== Market ticks ===')
+    sim = exchange(levels=3, liquidity=2.0)
+    view = sim.attach(AccountView())
+
+    sim.tick('BTCUSDT', 100.0)
+    bid, ask = OrderBook.from_snapshot('BTCUSDT', sim.get_order_books('BTCUSDT', 5)).top()
+    assert (bid, ask) == (99.99, 100.01)
+
+    order_id = sim.buy_limit('BTCUSDT', 0.1, 99.5)['orderId']
+    assert view.order(order_id)['status'] == 'NEW'
+
+    # Market falls through the bid: the new asks (2 USDT each) fill it in pieces, at its price
+    sim.tick('BTCUSDT', 99.45)
+    filled = sum(round(2.0 / price, 5) for price in (99.46, 99.47, 99.48))
+    order = view.order(order_id)
+    assert order['status'] == 'PARTIALLY_FILLED'
+    assert abs(float(order['executedQty']) - filled) < 1e-9
+    assert abs(float(order['cummulativeQuoteQty']) - filled * 99.5) < 1e-9
+    assert abs(view.balance('BTC') - (1.0 + filled)) < 1e-9
+
+    sim.tick('BTCUSDT', 99.4)
+    assert view.order(order_id)['status'] == 'FILLED'
+    assert abs(sim.balance('USDT')[0] - (10000.0 - float(view.order(order_id)['cummulativeQuoteQty']))) < 1e-6
+
+    print('✓ Resting order filled by the moving market, stream events delivered')
+
+
+def test_exchange_info_and_klines():
+    print('\n=== Exchange info and klines ===')
+    sim = exchange()
+
+    filters = ExchangeInfoCache(sim).get('BTCUSDT')
+    assert filters.base_asset == 'BTC' and str(filters.tick_size) == '0.01'
+    assert str(filters.min_notional) == '5'
+
+    feed = SyntheticFeed({'BTCUSDT': 100.0}, seed=1)
+    sim.load_history('BTCUSDT', feed.candles('BTCUSDT', 30))
+    klines = sim.get_klines('BTCUSDT', '5m')
+    assert len(klines) == 6 and klines[-1][0] == START - 5 * 60000
+
+    times = {'time': [0.0, 60000.0], 'open': [1.0, 2.0], 'high': [3.0, 3.0],
+             'low': [0.5, 1.5], 'close': [2.0, 1.8], 'volume': [4.0, 8.0]}
+    ticks = list(KlineReplay('BTCUSDT', times, start=START).ticks())
+    assert [tick[2] for tick in ticks] == [1.0, 0.5, 3.0, 2.0, 2.0, 3.0, 1.5, 1.8]
+    assert sim.play(ticks) == 8
+
+    buffer = KlineSync(sim).sync('BTCUSDT', '1m', 40, now=START + 60000)
+    assert buffer.last_time() == START + 60000
+    assert buffer.last('close') == 1.8 and buffer.last('high') == 3.0
+    assert float(sim.get_ticker('BTCUSDT')['lastPrice']) == 1.8
+    assert sim.get_klines('BTCUSDT', '7m')['code'] == -1120
+
+    print('✓ Filters parse, history and replayed candles sync')
+
+
+def main():
+    test_price_time_priority()
+    test_partial_fill_and_cancel()
+    test_market_orders()
+    test_filter_rejections()
+    test_quotes_fill_resting_orders()
+    test_exchange_info_and_klines()
+    print('✓ ALL TESTS COMPLETED')
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+Streaming Indicators Test Script
+Verifies the incremental indicators match the batch versions in Indicators
+"""
+
+import sys
+sys.path.insert(0, './app')
+
+import random
+from Indicators import Indicators
+from StreamingIndicators import (StreamingBollinger, StreamingRSI, StreamingEMA,
+                                 StreamingATR, StreamingVolume, StreamingMACD)
+from BollingerStrategy import BollingerStrategy
+import VectorIndicators as vector_module
+from VectorIndicators import VectorIndicators
+from KlineBuffer import KlineBuffer
+
+TOLERANCE = 1e-9
+
+
+def make_klines(count, seed=7, start=30000.0):
+    """Random-walk klines in Binance REST format (string values)"""
+    rng = random.Random(seed)
+    klines = []
+    price = start
+    for i in range(count):
+        open_price = price
+        price = max(1.0, price + rng.gauss(0, 25))
+        high = max(open_price, price) + rng.random() * 10
+        low = min(open_price, price) - rng.random() * 10
+        volume = rng.random() * 100
+        klines.append([i * 60000, str(open_price), str(high), str(low), str(price), str(volume)])
+    return klines
+
+
+def close_enough(a, b):
+    if a is None or b is None:
+        return a is b
+    return abs(a - b) <= TOLERANCE * max(1.0, abs(a), abs(b))
+
+
+def flatten(value):
+    if isinstance(value, dict):
+        return [float(value[key]) for key in sorted(value)]
+    if isinstance(value, tuple):
+        return list(value)
+    return [value]
+
+
+def test_streaming_matches_batch():
+    """Every bar, each streaming indicator equals its batch counterpart"""
+    klines = make_klines(300)
+    bb, rsi, ema = StreamingBollinger(20, 2.0), StreamingRSI(14), StreamingEMA(12)
+    atr, volume = StreamingATR(14), StreamingVolume(20)
+
+    closes, highs, lows, volumes = [], [], [], []
+    for k in klines:
+        for indicator in (bb, rsi, ema, atr, volume):
+            indicator.update(k)
+        closes.append(float(k[4]))
+        highs.append(float(k[2]))
+        lows.append(float(k[3]))
+        volumes.append(float(k[5]))
+
+        for got, want in zip(bb.value(), Indicators.bollinger_bands(closes, 20, 2.0)):
+            assert close_enough(got, want)
+        assert close_enough(rsi.value(), Indicators.rsi(closes, 14))
+        assert close_enough(ema.value(), Indicators.ema(closes, 12))
+        assert close_enough(atr.value(), Indicators.atr(highs, lows, closes, 14))
+        assert volume.value().keys() == Indicators.volume_analysis(volumes, 20).keys()
+        assert close_enough(volume.value()['volume_ratio'], Indicators.volume_analysis(volumes, 20)['volume_ratio'])
+
+    print('Streaming indicators match batch over %d bars' % len(klines))
+
+
+def test_replace_in_progress_candle():
+    """Revising the last bar gives the same state as feeding the final candle"""
+    klines = make_klines(60)
+    revised = list(klines[-1])
+    revised[4] = str(float(revised[4]) + 40)
+
+    live = [StreamingBollinger(), StreamingRSI(), StreamingEMA(9), StreamingATR(), StreamingVolume()]
+    final = [StreamingBollinger(), StreamingRSI(), StreamingEMA(9), StreamingATR(), StreamingVolume()]
+
+    for k in klines:
+        for indicator in live:
+            indicator.update(k)
+    for indicator in live:
+        indicator.replace(revised)
+
+    for k in klines[:-1] + [revised]:
+        for indicator in final:
+            indicator.update(k)
+
+    for a, b in zip(live, final):
+        for x, y in zip(flatten(a.value()), flatten(b.value())):
+            assert close_enough(x, y)
+
+
+def test_flat_prices_rsi():
+    """A flat window has no losses, so RSI is 100 like the batch version"""
+    rsi = StreamingRSI(14)
+    prices = [100.0 + i * 0.1 for i in range(30)] + [103.0] * 30
+    for price in prices:
+        rsi.push(price)
+    assert rsi.value() == Indicators.rsi(prices, 14) == 100.0
+
+
+def test_wilder_smoothing():
+    """Wilder RSI seeds with the simple average and then smooths"""
+    rsi = StreamingRSI(3, wilder=True)
+    for price in [1.0, 2.0, 1.5, 2.5, 2.0]:
+        rsi.push(price)
+    # seed: gains (1, 0, 1)/3, losses (0, .5, 0)/3; then delta -0.5
+    avg_gain = ((2 / 3) * 2 + 0) / 3
+    avg_loss = ((0.5 / 3) * 2 + 0.5) / 3
+    assert close_enough(rsi.value(), 100 - 100 / (1 + avg_gain / avg_loss))
+
+
+def test_macd_series_linear():
+    """macd_series equals the per-bar EMA definition and the streaming MACD"""
+    closes = [float(k[4]) for k in make_klines(120, seed=3)]
+    macd_line, signal_line, histogram = Indicators.macd_series(closes)
+
+    assert len(macd_line) == len(closes) - 26 + 1
+    for i in range(25, len(closes)):
+        expected = Indicators.ema(closes[:i + 1], 12) - Indicators.ema(closes[:i + 1], 26)
+        assert close_enough(macd_line[i - 25], expected)
+        assert close_enough(signal_line[i - 25], Indicators.ema(macd_line[:i - 24], 9))
+
+    macd = StreamingMACD()
+    for i, price in enumerate(closes):
+        macd.push(price)
+        if i >= 25:
+            got = macd.value()
+            assert close_enough(got[0], macd_line[i - 25])
+            assert close_enough(got[2], histogram[i - 25])
+        if i >= 27:
+            assert macd.cross() == Indicators.macd_signal_cross(closes[:i + 1])
+
+    assert Indicators.macd(closes) == (macd_line[-1], signal_line[-1], histogram[-1])
+    print('MACD series: %d values, last cross: %s' % (len(macd_line), macd.cross()))
+
+
+def test_macd_cross():
+    """Crossovers are read from the sign of the last two histogram values"""
+    assert Indicators.macd_cross(-0.1, 0.2) == 'bullish_cross'
+    assert Indicators.macd_cross(0.1, -0.2) == 'bearish_cross'
+    assert Indicators.macd_cross(0.1, 0.2) == 'bullish_momentum'
+    assert Indicators.macd_cross(-0.1, -0.2) == 'bearish_momentum'
+    assert Indicators.macd_signal_cross([1.0] * 20) == 'none'
+
+
+def test_engine_sync_sliding_window():
+    """Strategy engine fed a sliding window tracks a full batch recompute"""
+    klines = make_klines(400, seed=11)
+    strategy = BollingerStrategy({'use_macd': False})
+    window = 100
+
+    for end in range(window, len(klines) + 1):
+        rows = klines[end - window:end]
+
+        # In-progress candle updates in place before it closes
+        live = list(rows[-1])
+        live[4] = str(float(live[4]) * 0.999)
+        strategy.engine.sync(rows[:-1] + [live])
+        strategy.engine.sync(rows)
+
+        closes = [float(k[4]) for k in rows]
+        for got, want in zip(strategy.engine['bb'].value(), Indicators.bollinger_bands(closes, 20, 2.0)):
+            assert close_enough(got, want)
+        assert close_enough(strategy.engine['rsi'].value(), Indicators.rsi(closes, 14))
+
+    # Unrelated series with the same timestamps forces a rebuild
+    other = make_klines(window, seed=99)
+    strategy.engine.sync(other)
+    closes = [float(k[4]) for k in other]
+    assert close_enough(strategy.engine['bb'].value()[1], Indicators.bollinger_bands(closes, 20, 2.0)[1])
+
+
+def test_kline_buffer():
+    """Ring buffer keeps the last N candles contiguous and revises the live one"""
+    klines = make_klines(50, seed=2)
+    buffer = KlineBuffer(20)
+    buffer.extend(klines[:30])
+
+    assert len(buffer) == 20
+    assert buffer[0][0] == klines[10][0]
+    assert list(buffer.view('close')) == [float(k[4]) for k in klines[10:30]]
+
+    # Same open time replaces, older is ignored, newer slides the window
+    live = list(klines[29])
+    live[4] = '123.0'
+    assert buffer.append(live)
+    assert buffer.last('close') == 123.0 and len(buffer) == 20
+    assert not buffer.append(klines[5])
+    buffer.extend(klines[29:])
+    assert [k[0] for k in buffer] == [k[0] for k in klines[30:]]
+    assert buffer.view('volume').tolist() == [float(k[5]) for k in klines[30:]]
+
+
+def test_engine_sync_kline_buffer():
+    """Strategy engine reads a KlineBuffer the same way as a kline list"""
+    klines = make_klines(300, seed=13)
+    strategy = BollingerStrategy({'use_macd': False})
+    buffer = KlineBuffer(100)
+
+    for k in klines:
+        live = list(k)
+        live[4] = str(float(live[4]) * 1.001)
+        buffer.append(live)
+        strategy.engine.sync(buffer)
+        buffer.append(k)
+        strategy.engine.sync(buffer)
+
+    closes = list(buffer.view('close'))
+    for got, want in zip(strategy.engine['bb'].value(), Indicators.bollinger_bands(closes, 20, 2.0)):
+        assert close_enough(got, want)
+    assert close_enough(strategy.engine['rsi'].value(), Indicators.rsi(closes, 14))
+
+
+def check_vector_series(klines):
+    cols = VectorIndicators.columns(klines)
+    closes, highs, lows, volumes = (list(map(float, cols[name])) for name in ('close', 'high', 'low', 'volume'))
+
+    upper, middle, lower = VectorIndicators.bollinger_bands(closes, 20, 2.0)
+    rsi = VectorIndicators.rsi(closes, 14)
+    ema = VectorIndicators.ema(closes, 12)
+    atr = VectorIndicators.atr(highs, lows, closes, 14)
+    ratio = VectorIndicators.volume_ratio(volumes, 20)
+    macd_line, signal_line, histogram = VectorIndicators.macd(closes)
+
+    for i in range(len(closes)):
+        prefix = closes[:i + 1]
+        want = Indicators.bollinger_bands(prefix, 20, 2.0)
+        if want[0] is None:
+            assert middle[i] != middle[i]  # NaN
+        else:
+            for got, expected in zip((upper[i], middle[i], lower[i]), want):
+                assert close_enough(got, expected)
+        assert close_enough(rsi[i], Indicators.rsi(prefix, 14))
+        assert close_enough(ema[i], Indicators.ema(prefix, 12))
+        assert close_enough(atr[i], Indicators.atr(highs[:i + 1], lows[:i + 1], prefix, 14))
+        assert close_enough(ratio[i], Indicators.volume_analysis(volumes[:i + 1], 20)['volume_ratio'])
+        for got, expected in zip((macd_line[i], signal_line[i], histogram[i]), Indicators.macd(prefix)):
+            assert close_enough(got, expected)
+
+
+def test_vector_series():
+    """Each bar of a vector series equals the batch indicator on the prefix"""
+    klines = make_klines(300, seed=5)
+    check_vector_series(klines)
+
+    buffer = KlineBuffer(len(klines))
+    buffer.extend(klines)
+    check_vector_series(buffer)
+    print('Vector indicators (numpy: %s) match batch over %d bars' % (VectorIndicators.available(), len(klines)))
+
+    # Same contract from the pure-Python fallback
+    np = vector_module.np
+    vector_module.np = None
+    try:
+        check_vector_series(klines)
+    finally:
+        vector_module.np = np
+
+
+def main():
+    test_streaming_matches_batch()
+    test_replace_in_progress_candle()
+    test_flat_prices_rsi()
+    test_wilder_smoothing()
+    test_macd_series_linear()
+    test_macd_cross()
+    test_engine_sync_sliding_window()
+    test_kline_buffer()
+    test_engine_sync_kline_buffer()
+    test_vector_series()
+    print('✓ ALL TESTS COMPLETED')
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
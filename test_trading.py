@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+Trading Test Script
+Drives the Trading order callbacks against a fake client: cancels that never land and stop-loss without a ticker
+"""
+
+import sys
+sys.path.insert(0, './app')
+
+import time
+import types
+import logging
+
+try:
+    import config
+except ImportError:
+    # No config.py in a fresh checkout: only the settings the client reads
+    config = types.ModuleType('config')
+    config.api_key = config.api_secret = ''
+    config.recv_window = 5000
+    sys.modules['config'] = config
+
+# Trading sets up binance-trader.log only if the root logger has no handlers yet
+if not logging.getLogger().handlers:
+    logging.getLogger().addHandler(logging.NullHandler())
+
+import trader
+from Orders import Orders
+from Trading import Trading
+from Scheduler import Scheduler
+from OrderTracker import OrderTracker
+
+
+def order_update(order_id, status, executed=0.0, quote=0.0):
+    return {'symbol': 'BTCUSDT', 'orderId': order_id, 'status': status, 'price': '100.0',
+            'origQty': '1.0', 'executedQty': str(executed), 'cummulativeQuoteQty': str(quote)}
+
+
+class FakeClient:
+    """BinanceAPI stand-in whose cancels are rejected; query_order answers with `query`"""
+
+    def __init__(self, query=None, ticker=None, sell_error=None):
+        self.query = query
+        self.ticker = ticker
+        self.sell_error = sell_error
+        self.cancels = []
+        self.queries = []
+        self.sells = []
+
+    def cancel(self, market, order_id):
+        self.cancels.append(order_id)
+        return {'code': -2011, 'msg': 'Unknown order sent.'}
+
+    def query_order(self, market, orderId):
+        self.queries.append(orderId)
+        if self.query is None:
+            return {'code': -2013, 'msg': 'Order does not exist.'}
+        return self.query
+
+    def get_ticker(self, market):
+        if self.ticker is None:
+            raise IOError('read timed out')
+        return {'symbol': market, 'lastPrice': str(self.ticker)}
+
+    def sell_limit(self, market, quantity, rate):
+        if self.sell_error is not None:
+            raise self.sell_error
+        self.sells.append(('LIMIT', quantity, rate))
+        return order_update(99, 'NEW')
+
+    def sell_market(self, market, quantity):
+        self.sells.append(('MARKET', quantity, None))
+        return order_update(99, 'NEW')
+
+
+def make_bot(client, symbol, **options):
+    Orders.use_client(client)
+    scheduler = Scheduler(workers=2, name='TestTrading')
+    tracker = OrderTracker(scheduler, fetch=Orders.get_order, poll_interval=0.02)
+    option = trader.build_parser().parse_args(['--symbol', symbol])
+    for key, value in options.items():
+        setattr(option, key, value)
+
+    bot = Trading(option, scheduler, tracker)
+    bot.WAIT_TIME_CHECK_SELL = 0.05
+    bot.step_size = 0.001
+    return bot
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_cancel_unknown_order():
+    print('\n=== Cancel of an unknown order ===')
+    client = FakeClient()
+    bot = make_bot(client, 'BTCUSDT')
+
+    assert bot.acquire_slot()
+    bot.tracker.track('BTCUSDT', 7, 'BUY', 1.0, 100.0, timeout=0.01,
+                      on_done=bot.bought, on_timeout=bot.buy_timeout, sell_price=101.0)
+
+    assert wait_for(lambda: bot.open_trades == 0)
+    assert bot.tracker.get(7) is None and client.cancels == [7]
+
+    # Neither the cancel nor the poll comes back for it
+    queries = len(client.queries)
+    time.sleep(0.2)
+    assert len(client.queries) == queries and client.cancels == [7]
+    bot.scheduler.stop()
+
+    print('✓ Slot released after %d cancel and %d queries' % (len(client.cancels), queries))
+
+
+def test_cancel_retries_capped():
+    print('\n=== Cancel never confirmed ===')
+    client = FakeClient(query=order_update(8, 'NEW'))
+    bot = make_bot(client, 'ETHUSDT')
+
+    assert bot.acquire_slot()
+    bot.tracker.track('ETHUSDT', 8, 'BUY', 1.0, 100.0, timeout=0.01,
+                      on_done=bot.bought, on_timeout=bot.buy_timeout, sell_price=101.0)
+
+    assert wait_for(lambda: bot.open_trades == 0)
+    assert client.cancels == [8] * Trading.MAX_CANCEL_ATTEMPTS
+    assert bot.tracker.get(8) is None
+    time.sleep(0.2)
+    assert client.cancels == [8] * Trading.MAX_CANCEL_ATTEMPTS
+    bot.scheduler.stop()
+
+    print('✓ Given up after %d cancels' % Trading.MAX_CANCEL_ATTEMPTS)
+
+
+def test_stop_loss_without_ticker():
+    print('\n=== Stop-loss without a ticker ===')
+    client = FakeClient(query=order_update(99, 'NEW'))
+    bot = make_bot(client, 'BNBUSDT', stop_loss=5)
+
+    assert bot.acquire_slot()
+    bot.tracker.track('BNBUSDT', 9, 'SELL', 1.0, 101.0, on_done=bot.sold, buy_price=100.0, loss_price=95.0)
+    bot.tracker.update(order_update(9, 'CANCELED'))
+
+    assert wait_for(lambda: client.sells)
+    assert client.sells == [('LIMIT', 1.0, 95.0)]
+    assert bot.tracker.get(99) is not None and bot.open_trades == 1
+    bot.scheduler.stop()
+
+    # Placing the stop-loss order fails too: the slot is not kept
+    client = FakeClient(ticker=90.0, sell_error=IOError('connection reset'))
+    client.sell_market = client.sell_limit
+    bot = make_bot(client, 'LTCUSDT', stop_loss=5)
+
+    assert bot.acquire_slot()
+    bot.tracker.track('LTCUSDT', 10, 'SELL', 1.0, 101.0, on_done=bot.sold, buy_price=100.0, loss_price=95.0)
+    bot.tracker.update(order_update(10, 'CANCELED'))
+
+    assert wait_for(lambda: bot.open_trades == 0)
+    bot.scheduler.stop()
+
+    print('✓ Limit sell at the loss price, slot released when the order fails')
+
+
+def main():
+    test_cancel_unknown_order()
+    test_cancel_retries_capped()
+    test_stop_loss_without_ticker()
+    print('✓ ALL TESTS COMPLETED')
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
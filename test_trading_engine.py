@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+Trading Engine Test Script
+Checks entry validation, per-symbol isolation and pausing, the background DB writer and trader_multi option layering
+"""
+
+import sys
+sys.path.insert(0, './app')
+
+import os
+import json
+import types
+import sqlite3
+import logging
+import tempfile
+
+try:
+    import config
+except ImportError:
+    # No config.py in a fresh checkout: only the settings the client reads
+    config = types.ModuleType('config')
+    config.api_key = config.api_secret = ''
+    config.recv_window = 5000
+    sys.modules['config'] = config
+
+# Trading sets up binance-trader.log only if the root logger has no handlers yet
+if not logging.getLogger().handlers:
+    logging.getLogger().addHandler(logging.NullHandler())
+
+import trader
+import trader_bollinger
+import trader_multi
+from Orders import Orders
+from Database import DatabaseWriter
+from TradingEngine import TradingEngine, SymbolRunner
+from test_trading import wait_for
+
+
+class FakeExchange:
+    """Market data and exchangeInfo for a few symbols; orders are never placed (ask below the profit target)"""
+
+    FILTERS = [
+        {'filterType': 'PRICE_FILTER', 'minPrice': '0.01', 'maxPrice': '1000000', 'tickSize': '0.01'},
+        {'filterType': 'LOT_SIZE', 'minQty': '0.001', 'maxQty': '1000', 'stepSize': '0.001'},
+        {'filterType': 'NOTIONAL', 'minNotional': '10'}
+    ]
+
+    def __init__(self, symbols):
+        self.symbols = symbols
+        self.tickers = []
+
+    def get_exchange_info(self, symbols=None):
+        if any(symbol not in self.symbols for symbol in symbols):
+            return {'code': -1121, 'msg': 'Invalid symbol.'}
+        return {'symbols': [{'symbol': symbol, 'status': 'TRADING', 'filters': self.FILTERS} for symbol in symbols]}
+
+    def get_ticker(self, market):
+        self.tickers.append(market)
+        return {'symbol': market, 'lastPrice': '100.2'}
+
+    def get_order_books(self, market, limit=50):
+        return {'lastUpdateId': 1, 'bids': [['100.0', '1.0']], 'asks': [['100.5', '1.0']]}
+
+
+def trading_options(symbol):
+    options = trader.build_parser().parse_args(['--symbol', symbol])
+    options.wait_time = 3600  # one tick during the test
+    return options
+
+
+def test_rejected_entries():
+    print('\n=== Entry validation ===')
+    try:
+        TradingEngine([('trading', trading_options('BTCUSDT')), ('bollinger', trading_options('BTCUSDT'))])
+        assert False, 'duplicate symbol accepted'
+    except ValueError as e:
+        assert 'BTCUSDT' in str(e)
+
+    try:
+        TradingEngine([('grid', trading_options('ETHUSDT'))])
+        assert False, 'unknown bot type accepted'
+    except ValueError as e:
+        assert "'grid'" in str(e)
+
+    print('✓ Duplicate symbols and unknown bot types rejected')
+
+
+def test_setup_isolated():
+    print('\n=== Failing setup ===')
+    client = FakeExchange(['BTCUSDT'])
+    Orders.use_client(client)
+
+    engine = TradingEngine([('trading', trading_options('BTCUSDT')), ('trading', trading_options('BADUSDT'))], workers=2)
+    try:
+        for kind, options in engine.entries:
+            engine.add(kind, options)
+
+        # validate() exits on the unknown symbol; only that symbol is left out
+        assert engine.runners['BADUSDT'].state == 'failed' and engine.runners['BADUSDT'].job is None
+        assert engine.runners['BTCUSDT'].state == 'running'
+        assert wait_for(lambda: 'BTCUSDT' in client.tickers)
+        assert engine.stats()['BADUSDT'] == {'kind': 'trading', 'state': 'failed', 'failures': 0}
+    finally:
+        engine.scheduler.stop(wait=False)
+
+    print('✓ BADUSDT failed to start, BTCUSDT runs')
+
+
+def test_pause_after_errors():
+    print('\n=== Pause after MAX_ERRORS ===')
+    engine = TradingEngine([])
+    calls = []
+
+    def step():
+        calls.append(1)
+        raise IOError('read timed out')
+
+    runner = SymbolRunner('XRPUSDT', 'trading', None, step)
+    runner.state = 'running'
+
+    for _ in range(TradingEngine.MAX_ERRORS - 1):
+        engine._step(runner)
+    assert runner.state == 'running' and runner.errors == TradingEngine.MAX_ERRORS - 1
+
+    engine._step(runner)
+    assert runner.state == 'paused' and runner.errors == 0
+    assert runner.failures == TradingEngine.MAX_ERRORS
+
+    # Ticks during the cooldown do nothing
+    engine._step(runner)
+    assert len(calls) == TradingEngine.MAX_ERRORS
+
+    # After it the symbol runs again, and a good cycle clears the error count
+    runner.paused_until = 0.0
+    engine._step(runner)
+    assert runner.state == 'running' and runner.errors == 1 and len(calls) == TradingEngine.MAX_ERRORS + 1
+
+    runner.step = lambda: None
+    engine._step(runner)
+    assert runner.errors == 0 and runner.failures == TradingEngine.MAX_ERRORS + 1
+
+    print('✓ Paused after %d failures in a row, resumed after the cooldown' % TradingEngine.MAX_ERRORS)
+
+
+class BatchConnection:
+    """In-memory orders table recording the size of every executemany()"""
+
+    def __init__(self):
+        self.db = sqlite3.connect(':memory:', check_same_thread=False)
+        self.db.execute('CREATE TABLE orders (orderid, symbol, amount, price, side, quantity, profit)')
+        self.batches = []
+        self.commits = 0
+
+    def executemany(self, sql, rows):
+        self.batches.append(len(rows))
+        return self.db.executemany(sql, rows)
+
+    def commit(self):
+        self.commits += 1
+        self.db.commit()
+
+    def count(self):
+        return self.db.execute('SELECT COUNT(*) FROM orders').fetchone()[0]
+
+
+def test_database_writer():
+    print('\n=== DatabaseWriter ===')
+    connection = BatchConnection()
+    writer = DatabaseWriter(connection, batch=10)
+
+    # Queued before the thread runs: written in full batches
+    for i in range(25):
+        writer.put([i, 'BTCUSDT', 0, 100.0, 'BUY', 0.1, 1.3])
+    writer.start()
+    writer.flush()
+    assert connection.batches == [10, 10, 5] and connection.commits == 3
+    assert writer.written == 25 and connection.count() == 25
+
+    # A failed insert is logged and never holds up flush()
+    writer.put(['too', 'few'])
+    writer.flush()
+    assert writer.written == 25
+
+    # stop() writes what is still queued
+    for i in range(3):
+        writer.put([100 + i, 'ETHUSDT', 0, 10.0, 'SELL', 1.0, 1.3])
+    writer.stop()
+    assert not writer.is_alive()
+    assert writer.written == 28 and connection.count() == 28
+
+    print('✓ %d rows in %d commits' % (writer.written, connection.commits))
+
+
+def test_load_entries():
+    print('\n=== trader_multi option layering ===')
+    conf = {
+        'defaults': {
+            'bollinger': {'interval': '15m', 'amount': 50},
+            'trading': {'profit': 2.0, 'wait_time': 5}
+        },
+        'symbols': [
+            {'bot': 'bollinger', 'symbol': 'BTCUSDT', 'amount': 100},
+            {'symbol': 'ETHUSDT', 'bb_period': 24},
+            {'bot': 'trading', 'symbol': 'XVGBTC', 'profit': 3.0}
+        ]
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'symbols.json')
+
+        def load(conf):
+            with open(path, 'w') as f:
+                json.dump(conf, f)
+            return trader_multi.load_entries(path)
+
+        entries = load(conf)
+        assert [(kind, options.symbol) for kind, options in entries] == \
+            [('bollinger', 'BTCUSDT'), ('bollinger', 'ETHUSDT'), ('trading', 'XVGBTC')]
+        btc, eth, xvg = [options for kind, options in entries]
+
+        # Own keys over the bot's defaults over its command line defaults
+        bollinger = trader_bollinger.build_parser().parse_args(['--symbol', 'BTCUSDT'])
+        assert btc.amount == 100 and btc.interval == '15m' and btc.bb_period == bollinger.bb_period
+        assert eth.amount == 50 and eth.bb_period == 24 and eth.kline_limit == bollinger.kline_limit
+        assert xvg.profit == 3.0 and xvg.wait_time == 5 and xvg.stop_loss == 0
+        assert not hasattr(xvg, 'bot') and not hasattr(xvg, 'interval')
+
+        for bad, message in (({'symbols': [{'bot': 'trading', 'symbol': 'XVGBTC', 'bb_period': 20}]}, "'bb_period'"),
+                             ({'symbols': [{'bot': 'grid', 'symbol': 'XVGBTC'}]}, "'grid'")):
+            try:
+                load(bad)
+                assert False, 'accepted %s' % bad
+            except ValueError as e:
+                assert message in str(e) and 'XVGBTC' in str(e)
+
+    print('✓ Symbol keys over bot defaults over command line defaults')
+
+
+def main():
+    test_rejected_entries()
+    test_setup_isolated()
+    test_pause_after_errors()
+    test_database_writer()
+    test_load_entries()
+    print('✓ ALL TESTS COMPLETED')
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+User Data Stream Test Script
+Drives UserDataStream from a local fake WebSocket transport
+"""
+
+import sys
+sys.path.insert(0, './app')
+
+import json
+import time
+import asyncio
+import threading
+from UserDataStream import UserDataStream, AccountView
+from test_market_data import FakeConnection, FakeTransport
+
+
+class FakeClient:
+    """listenKey endpoints handing out numbered keys"""
+
+    def __init__(self):
+        self.created = 0
+        self.keepalives = []
+        self.closed = []
+
+    def create_listen_key(self):
+        self.created += 1
+        return {'listenKey': 'key%d' % self.created}
+
+    def keepalive_listen_key(self, listen_key):
+        self.keepalives.append(listen_key)
+        return {}
+
+    def close_listen_key(self, listen_key):
+        self.closed.append(listen_key)
+        return {}
+
+
+def execution(order_id, status, executed, quote='0', side='BUY'):
+    return json.dumps({
+        'e': 'executionReport', 'E': 1, 's': 'BTCUSDT', 'c': 'client%d' % order_id,
+        'S': side, 'o': 'LIMIT', 'f': 'GTC', 'q': '1.00000000', 'p': '100.00000000',
+        'P': '0.00000000', 'x': 'TRADE', 'X': status, 'i': order_id,
+        'l': executed, 'z': executed, 'L': '100.00000000', 'n': '0', 'N': 'BNB',
+        'T': 2000, 'Z': quote, 'O': 1000
+    })
+
+
+def account(asset, free, locked):
+    return json.dumps({'e': 'outboundAccountPosition', 'E': 1, 'u': 1,
+                       'B': [{'a': asset, 'f': free, 'l': locked}]})
+
+
+def run_stream(stream):
+    stream._running = True
+    stream.listen_key = stream.listen_key or stream.new_listen_key()
+    asyncio.run(stream.run())
+
+
+def test_order_and_balance_updates():
+    """executionReport and outboundAccountPosition update the view"""
+    stream = UserDataStream(FakeClient())
+    stream.transport = FakeTransport([[
+        execution(7, 'NEW', '0.00000000'),
+        execution(7, 'PARTIALLY_FILLED', '0.40000000', '40.00000000'),
+        account('USDT', '60.0', '100.0'),
+        execution(7, 'FILLED', '1.00000000', '100.00000000'),
+    ]], stream)
+
+    changes = []
+    stream.view.add_listener(lambda order, previous: changes.append((previous, order['status'])))
+
+    run_stream(stream)
+
+    order = stream.view.order(7)
+    assert order['status'] == 'FILLED'
+    assert order['executedQty'] == '1.00000000'
+    assert order['cummulativeQuoteQty'] == '100.00000000'
+    assert order['time'] == 1000 and order['side'] == 'BUY'
+    assert changes == [(None, 'NEW'), ('NEW', 'PARTIALLY_FILLED'), ('PARTIALLY_FILLED', 'FILLED')]
+    assert stream.view.balance('USDT') == 60.0
+    assert stream.view.balance('BTC') is None
+    assert stream.transport.urls == ['wss://stream.binance.com:9443/ws/key1']
+    print('Order: %s %s, transitions: %s' % (order['status'], order['executedQty'], changes))
+
+
+def test_wait_order():
+    """wait_order returns on the final status, or the current order at timeout"""
+    view = AccountView()
+    view.apply_execution(json.loads(execution(1, 'NEW', '0')))
+
+    assert view.wait_order(1, timeout=0.01)['status'] == 'NEW'
+    assert view.wait_order(2, timeout=0.01) is None
+
+    timer = threading.Timer(0.05, view.apply_execution, [json.loads(execution(1, 'FILLED', '1'))])
+    timer.start()
+    started = time.monotonic()
+    order = view.wait_order(1, timeout=5)
+    assert order['status'] == 'FILLED'
+    assert time.monotonic() - started < 1
+    timer.join()
+
+
+def test_stale_rest_snapshot():
+    """A REST snapshot taken before the fill never overwrites the streamed fill"""
+    view = AccountView()
+    changes = []
+    view.add_listener(lambda order, previous: changes.append((previous, order['status'])))
+
+    snapshot = {'symbol': 'BTCUSDT', 'orderId': 5, 'status': 'NEW', 'price': '100.00000000',
+                'origQty': '1.00000000', 'executedQty': '0.00000000', 'cummulativeQuoteQty': '0.00000000',
+                'updateTime': 1500}
+    assert view.set_order(dict(snapshot))
+
+    # The fill arrives on the stream while a REST query_order is in flight...
+    view.apply_execution(json.loads(execution(5, 'PARTIALLY_FILLED', '0.40000000', '40.00000000')))
+    # ...which then answers with the state from before the fill
+    assert not view.set_order(dict(snapshot))
+    assert view.order(5)['status'] == 'PARTIALLY_FILLED'
+
+    view.apply_execution(json.loads(execution(5, 'FILLED', '1.00000000', '100.00000000')))
+    assert not view.set_order(dict(snapshot, status='PARTIALLY_FILLED', executedQty='0.40000000', updateTime=2500))
+    assert not view.set_order(dict(snapshot, status='CANCELED', updateTime=3000))
+
+    assert view.order(5)['status'] == 'FILLED'
+    assert view.wait_order(5, timeout=0.01)['status'] == 'FILLED'
+    assert changes == [(None, 'NEW'), ('NEW', 'PARTIALLY_FILLED'), ('PARTIALLY_FILLED', 'FILLED')]
+
+    # Same fill, newer snapshot: accepted
+    view.set_order(dict(snapshot, orderId=6, updateTime=1000))
+    assert view.set_order(dict(snapshot, orderId=6, status='CANCELED', updateTime=1200))
+    print('Stale snapshots dropped, transitions: %s' % changes)
+
+
+def test_order_update_awaitable():
+    """order_update resolves from an event applied on another thread"""
+    view = AccountView()
+
+    async def wait():
+        timer = threading.Timer(0.05, view.apply_execution, [json.loads(execution(3, 'CANCELED', '0'))])
+        timer.start()
+        order = await view.order_update(3, timeout=5)
+        timer.join()
+        return order
+
+    assert asyncio.run(wait())['status'] == 'CANCELED'
+
+
+def test_listen_key_expired():
+    """listenKeyExpired gets a new key and reconnects with it"""
+    client = FakeClient()
+    stream = UserDataStream(client)
+    stream.RECONNECT_MIN = 0
+    stream.transport = FakeTransport([
+        [json.dumps({'e': 'listenKeyExpired', 'E': 1, 'listenKey': 'key1'})],
+        [execution(9, 'NEW', '0')],
+    ], stream)
+
+    run_stream(stream)
+
+    assert client.created == 2
+    assert stream.transport.urls[-1].endswith('/key2')
+    assert stream.view.order(9)['status'] == 'NEW'
+
+    stream.stop()
+    assert client.closed == ['key2']
+
+
+def test_keepalive():
+    """The listenKey is kept alive while connected"""
+    client = FakeClient()
+    stream = UserDataStream(client, keepalive=0.01)
+
+    class SlowConnection(FakeConnection):
+        async def recv(self):
+            await asyncio.sleep(0.05)
+            stream._running = False
+            return None
+
+    class SlowTransport:
+        async def connect(self, url):
+            return SlowConnection([])
+
+    stream.transport = SlowTransport()
+    run_stream(stream)
+
+    assert client.keepalives and set(client.keepalives) == {'key1'}
+
+
+def main():
+    test_order_and_balance_updates()
+    test_wait_order()
+    test_stale_rest_snapshot()
+    test_order_update_awaitable()
+    test_listen_key_expired()
+    test_keepalive()
+    print('✓ ALL TESTS COMPLETED')
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
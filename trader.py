@@ -9,7 +9,7 @@ sys.path.insert(0, './app')
 
 from Trading import Trading
 
-if __name__ == '__main__':
+def build_parser():
 
     # Set parser
     parser = argparse.ArgumentParser()
@@ -32,6 +32,9 @@ if __name__ == '__main__':
     parser.add_argument('--debug', help='Debug True/False if set --debug flag, will output all messages every "--wait_time" ',
                         action="store_true", default=False) # 0=True, 1=False
     parser.add_argument('--loop', type=int, help='Loop (0 unlimited)', default=0)
+    parser.add_argument('--max_orders', type=int, help='Buy/sell cycles open at the same time', default=1)
+    parser.add_argument('--stream', help='Read ticker/order book from WebSocket streams instead of REST polling',
+                        action="store_true", default=False)
 
     # Working Modes
     #  - profit: Profit Hunter. Find defined profit, buy and sell. (Ex: 1.3% profit)
@@ -41,7 +44,12 @@ if __name__ == '__main__':
     parser.add_argument('--sellprice', type=float, help='Sell Price (Price is less than equal >=)', default=0)
     parser.add_argument('--commision', type=str, help='Type of commission, TOKEN/BNB (default BNB)', default='BNB')
 
-    option = parser.parse_args()
+    return parser
+
+
+if __name__ == '__main__':
+
+    option = build_parser().parse_args()
 
     # Get start
     t = Trading(option)
@@ -9,24 +9,18 @@ import logging
 
 sys.path.insert(0, './app')
 
-from BollingerTradingBot import BollingerTradingBot
-
 
 def setup_logging(debug=False):
-    """Setup logging configuration"""
+    """Setup logging configuration (written on a background thread, see LogPipeline)"""
+    import config
+    from LogPipeline import setup_logging as setup_pipeline, config_options
+
     level = logging.DEBUG if debug else logging.INFO
-    logging.basicConfig(
-        level=level,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler('bollinger_trader.log'),
-            logging.StreamHandler(sys.stdout)
-        ]
-    )
+    setup_pipeline('bollinger_trader.log', level, stdout=True, **config_options(config))
 
 
-if __name__ == '__main__':
-    # Set up argument parser
+def build_parser():
+    """Command line options of the bot (also used by trader_multi.py for defaults)"""
     parser = argparse.ArgumentParser(
         description='Binance Bollinger Bands Trading Bot - Advanced Strategy',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -108,12 +102,19 @@ Examples:
                         help='Test mode - analyze only, no real trades')
     parser.add_argument('--debug', action='store_true',
                         help='Enable debug logging')
+    parser.add_argument('--stream', action='store_true',
+                        help='Read price and klines from WebSocket streams instead of REST polling')
 
     # Commission type
     parser.add_argument('--commission', type=str, default='BNB',
                         help='Commission payment type: BNB or TOKEN (default: BNB)')
 
-    args = parser.parse_args()
+    return parser
+
+
+if __name__ == '__main__':
+    # Set up argument parser
+    args = build_parser().parse_args()
 
     # Setup logging
     setup_logging(args.debug)
@@ -147,6 +148,7 @@ Examples:
     print(f'Wait Time: {args.wait_time}s between cycles')
     print(f'Max Trades: {args.max_trades if args.max_trades > 0 else "Unlimited"}')
     print(f'Commission Type: {args.commission}')
+    print(f'Market Data: {"WebSocket stream" if args.stream else "REST polling"}')
     print('=' * 70)
     print()
 
@@ -165,6 +167,9 @@ Examples:
             sys.exit(0)
         print()
 
+    # Imported here so build_parser() works without API keys (backtest.py)
+    from BollingerTradingBot import BollingerTradingBot
+
     try:
         # Initialize and run the trading bot
         bot = BollingerTradingBot(args)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Binance Trader - many symbols in one process
+
+import sys
+import json
+import argparse
+import logging
+
+sys.path.insert(0, './app')
+
+import config
+import trader
+import trader_bollinger
+from TradingEngine import TradingEngine
+from ShardedRunner import ShardedRunner
+from LogPipeline import setup_logging as setup_pipeline, config_options
+
+
+def setup_logging(debug=False):
+    """Everything goes to the log file; Trading symbols also print to stdout"""
+    level = logging.DEBUG if debug else logging.INFO
+    setup_pipeline('multi_trader.log', level, force=True, **config_options(config))
+
+
+def load_entries(path):
+    """
+    Read the symbol list
+
+    Each symbol takes the command line defaults of its bot (trader.py for
+    "trading", trader_bollinger.py for "bollinger"), then the "defaults"
+    section for that bot, then its own keys.
+    """
+    with open(path) as f:
+        conf = json.load(f)
+
+    defaults = conf.get('defaults', {})
+    parsers = {'trading': trader.build_parser, 'bollinger': trader_bollinger.build_parser}
+
+    entries = []
+    for item in conf['symbols']:
+        kind = item.get('bot', 'bollinger')
+        if kind not in parsers:
+            raise ValueError('%s: unknown bot type %r' % (item.get('symbol'), kind))
+
+        options = parsers[kind]().parse_args(['--symbol', item['symbol']])
+        settings = dict(defaults.get(kind, {}))
+        settings.update(item)
+        settings.pop('bot', None)
+
+        for key, value in settings.items():
+            if not hasattr(options, key):
+                raise ValueError('%s: unknown option %r for %s' % (item['symbol'], key, kind))
+            setattr(options, key, value)
+
+        entries.append((kind, options))
+
+    return entries
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run many symbols in one process on a shared client, stream and DB writer')
+    parser.add_argument('--config', type=str, required=True,
+                        help='JSON file with the symbols and their options (see symbols.sample.json)')
+    parser.add_argument('--workers', type=int, default=8,
+                        help='Worker threads shared by all symbols (default: 8)')
+    parser.add_argument('--stream', action='store_true',
+                        help='One WebSocket connection for all symbols instead of REST polling')
+    parser.add_argument('--shards', type=int, default=0,
+                        help='Analyze on this many worker processes (bollinger symbols only, default: 0 = off)')
+    parser.add_argument('--debug', action='store_true',
+                        help='Enable debug logging')
+    args = parser.parse_args()
+
+    setup_logging(args.debug)
+    entries = load_entries(args.config)
+
+    if args.shards and any(kind != 'bollinger' for kind, options in entries):
+        parser.error('--shards only runs "bollinger" symbols')
+
+    print('=' * 70)
+    print('BINANCE TRADER - %d SYMBOLS' % len(entries))
+    print('=' * 70)
+    for kind, options in entries:
+        live = kind == 'trading' or not options.test_mode
+        print('%-12s %-10s %s' % (options.symbol, kind, 'LIVE' if live else 'test mode'))
+    print('Market Data: %s' % ('WebSocket stream' if args.stream else 'REST polling'))
+    if args.shards:
+        print('Analysis: %d worker processes' % args.shards)
+    print('=' * 70)
+    print()
+
+    # Confirmation for live trading
+    if any(kind == 'trading' or not options.test_mode for kind, options in entries):
+        print('⚠️  WARNING: Some symbols above trade LIVE with real money!')
+        response = input('Type "START" to begin live trading, or anything else to exit: ')
+        if response.strip().upper() != 'START':
+            print('Exiting...')
+            sys.exit(0)
+        print()
+
+    if args.shards:
+        runner = ShardedRunner([options for kind, options in entries], shards=args.shards,
+                               workers=args.workers, stream=args.stream)
+        runner.run()
+    else:
+        engine = TradingEngine(entries, workers=args.workers, stream=args.stream)
+        engine.run()